@@ -4,4 +4,4 @@
 cd tabbycat
 
 # Run worker
-python ./manage.py runworker notifications adjallocation venues
+python ./manage.py runworker notifications adjallocation venues draw pagecache
@@ -1,11 +1,7 @@
 import logging
 
-from django.db.models import QuerySet
 from django.utils.translation import gettext as _
 
-from draw.models import Debate
-from participants.models import Team
-
 from ..conflicts import ConflictsInfo, HistoryInfo
 
 logger = logging.getLogger(__name__)
@@ -37,14 +33,8 @@ class BaseAdjudicatorAllocator:
             logger.info(info)
             raise AdjudicatorAllocationError(info)
 
-        if (isinstance(debates, QuerySet) and debates.model == Debate) or \
-                (isinstance(debates, list) and len(debates) > 0 and isinstance(debates[0], Debate)):
-            teams = Team.objects.filter(debateteam__debate__in=debates)
-        else:
-            teams = None
-
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=self.adjudicators)
-        self.history = HistoryInfo(round=round)
+        self.conflicts = ConflictsInfo.for_tournament(self.tournament)
+        self.history = HistoryInfo.for_round(round)
 
     def allocate(self):
         raise NotImplementedError
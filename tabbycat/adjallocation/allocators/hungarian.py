@@ -1,9 +1,10 @@
 import logging
 import random
-from math import exp
 
+import numpy as np
 from django.utils.translation import gettext as _, ngettext
-from munkres import Munkres
+
+from utils.assignment import broadcast_costs, get_assignment_solver
 
 from .base import AdjudicatorAllocationError, BaseAdjudicatorAllocator, register
 from ..allocation import AdjudicatorAllocation
@@ -13,6 +14,8 @@ logger = logging.getLogger(__name__)
 
 class BaseHungarianAllocator(BaseAdjudicatorAllocator):
 
+    assignment_solver = "jonker_volgenant"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -27,7 +30,7 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
         self.feedback_weight = self.round.feedback_weight
         self.user_warnings = []  # Surfaced to users for non-error disclosures
 
-        self.munkres = Munkres()
+        self.solve_assignment = get_assignment_solver(self.assignment_solver)
 
     def allocate(self):
         self.populate_adj_scores(self.adjudicators)
@@ -63,43 +66,70 @@ class BaseHungarianAllocator(BaseAdjudicatorAllocator):
             self.user_warnings.append(warning_msg)
             logger.warning(warning_msg)
 
-    def calc_cost(self, debate, adj, adjustment=0, chair=None):
-        cost = 0
+    def calc_penalties(self, positions, adjs):
+        """Returns the matrix of conflict and history penalties for allocating
+        `adjs` (columns) to `positions` (rows), as a debate×team incidence
+        matrix multiplied by the adjudicator×team penalty matrix, plus the
+        penalties against each position's chair."""
+        teams = list({team.id: team for debate, adjustment, chair in positions for team in debate.teams}.values())
+        team_index = {team.id: k for k, team in enumerate(teams)}
+        debate_teams = np.zeros((len(positions), len(teams)))
+        for r, (debate, adjustment, chair) in enumerate(positions):
+            for team in debate.teams:
+                debate_teams[r, team_index[team.id]] += 1
+
+        team_penalties = (self.conflict_penalty * self.conflicts.conflict_adj_team_matrix(adjs, teams) +
+                          self.history_penalty * self.history.seen_adj_team_matrix(adjs, teams))
+        penalties = debate_teams @ team_penalties.T
+
+        chairs = list({chair.id: chair for debate, adjustment, chair in positions if chair}.values())
+        if chairs:
+            chair_index = {chair.id: k for k, chair in enumerate(chairs)}
+            chair_penalties = (self.conflict_penalty * self.conflicts.conflict_adj_adj_matrix(adjs, chairs) +
+                               self.history_penalty * self.history.seen_adj_adj_matrix(adjs, chairs))
+            rows = [r for r, (debate, adjustment, chair) in enumerate(positions) if chair]
+            cols = [chair_index[positions[r][2].id] for r in rows]
+            penalties[rows] += chair_penalties[:, cols].T
+
+        return penalties
+
+    @staticmethod
+    def shortfall_cost(importances, scores):
+        """Vectorised cost of adjudicators whose scores fall short of the
+        (adjusted) importances of the positions they fill."""
+        diff = 5 + importances - scores
+        return np.where(diff > 0.25, 1000 * np.exp(np.maximum(diff - 0.25, 0)), 0.0)
+
+    def calc_costs(self, positions, adjs):
+        """Returns the cost matrix for allocating `adjs` (columns) to
+        `positions` (rows). Each position is a tuple `(debate, adjustment,
+        chair)`, where `adjustment` is added to the debate's importance and
+        `chair` may be None."""
+        penalties = self.calc_penalties(positions, adjs)
 
         # Normalise debate importances back to the 1-5 (not ±2) range expected
-        normalised_importance = debate.importance + 3
-
-        for team in debate.teams:
-            cost += self.conflict_penalty * self.conflicts.conflict_adj_team(adj, team)
-            cost += self.history_penalty * self.history.seen_adj_team(adj, team)
-        if chair:
-            cost += self.conflict_penalty * self.conflicts.conflict_adj_adj(adj, chair)
-            cost += self.history_penalty * self.history.seen_adj_adj(adj, chair)
-
-        impt = normalised_importance + adjustment
-        diff = 5 + impt - adj._normalized_score
-        if diff > 0.25:
-            cost += 1000 * exp(diff - 0.25)
+        importances = [debate.importance + 3 + adjustment for debate, adjustment, chair in positions]
+        scores = [adj._normalized_score for adj in adjs]
 
-        cost += self.max_score - adj._normalized_score
+        costs = penalties + broadcast_costs(self.shortfall_cost, importances, scores)
+        costs += broadcast_costs(lambda i, s: self.max_score - s, importances, scores)
+        return costs
 
-        return cost
+    def optimize(self, cost_matrix, description):
+        logger.info("optimizing %s (matrix size: %d positions by %d adjudicators)", description, *cost_matrix.shape)
+        indices = self.solve_assignment(cost_matrix)
+        total_cost = sum(cost_matrix[i, j] for i, j in indices)
+        logger.info('total cost for %d %s: %f', len(indices), description, total_cost)
+        return indices
 
     def allocate_trainees(self, trainees, allocation, debates):
         if len(trainees) > 0 and len(debates) > 0:
             allocation_by_debate = {aa.container: aa for aa in allocation}
 
             logger.info("costing trainees")
-            cost_matrix = []
-            for debate in debates:
-                chair = allocation_by_debate[debate].chair
-                row = [self.calc_cost(debate, adj, adjustment=-2.0, chair=chair) for adj in trainees]
-                cost_matrix.append(row)
-
-            logger.info("optimizing trainees (matrix size: %d positions by %d trainees)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
-            logger.info('total cost for %d trainees: %f', len(indices), total_cost)
+            positions = [(debate, -2.0, allocation_by_debate[debate].chair) for debate in debates]
+            cost_matrix = self.calc_costs(positions, trainees)
+            indices = self.optimize(cost_matrix, "trainees")
 
             result = ((debates[i], trainees[j]) for i, j in indices if i < len(debates))
             for debate, trainee in result:
@@ -180,15 +210,8 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
 
         if len(solos) > 0 and len(solo_debates) > 0:
             logger.info("costing solos")
-            cost_matrix = []
-            for debate in solo_debates:
-                row = [self.calc_cost(debate, adj) for adj in solos]
-                cost_matrix.append(row)
-
-            logger.info("optimizing solos (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
-            logger.info('total cost for %d solo debates: %f', len(solos), total_cost)
+            cost_matrix = self.calc_costs([(debate, 0, None) for debate in solo_debates], solos)
+            indices = self.optimize(cost_matrix, "solo debates")
 
             result = ((solo_debates[i], solos[j]) for i, j in indices if i < len(solo_debates))
             alloc = [AdjudicatorAllocation(d, c) for d, c in result]
@@ -202,19 +225,16 @@ class VotingHungarianAllocator(BaseHungarianAllocator):
         # Allocate panellists
         if len(panellists) > 0 and len(panel_debates) > 0:
             logger.info("costing panellists")
-            cost_matrix = []
+            positions = []
             for i, debate in enumerate(panel_debates):
                 for j in range(3):
                     # for the top half of these debates, the final panellist
                     # can be of lower quality than the other 2
                     adjustment = -1.0 if i < len(panel_debates)/2 and j == 2 else 0.0
-                    row = [self.calc_cost(debate, adj, adjustment) for adj in panellists]
-                    cost_matrix.append(row)
+                    positions.append((debate, adjustment, None))
 
-            logger.info("optimizing panellists (matrix size: %d positions by %d adjudicators)", len(cost_matrix), len(cost_matrix[0]))
-            indices = self.munkres.compute(cost_matrix)
-            total_cost = sum(cost_matrix[i][j] for i, j in indices)
-            logger.info('total cost for %d panel debates: %f', len(panel_debates), total_cost)
+            cost_matrix = self.calc_costs(positions, panellists)
+            indices = self.optimize(cost_matrix, "panel positions")
 
             # transfer the indices to the debates
             # the debate corresponding to row r is floor(r/3) (i.e. r // 3)
@@ -289,18 +309,9 @@ class ConsensusHungarianAllocator(BaseHungarianAllocator):
 
         # Allocate voting
         logger.info("costing voting adjudicators")
-        cost_matrix = []
-        for debate, njudges in zip(debates_sorted, judges_per_room):
-            for i in range(njudges):
-                row = [self.calc_cost(debate, adj, adjustment=-i) for adj in voting]
-                cost_matrix.append(row)
-
-        logger.info("optimizing voting adjudicators (matrix size: %d positions by %d adjudicators)",
-                len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
-        indices.sort()
-        total_cost = sum(cost_matrix[i][j] for i, j in indices)
-        logger.info('total cost for %d debates: %f', n_debates, total_cost)
+        positions = [(debate, -i, None) for debate, njudges in zip(debates_sorted, judges_per_room) for i in range(njudges)]
+        cost_matrix = self.calc_costs(positions, voting)
+        indices = self.optimize(cost_matrix, "voting positions")
 
         # transfer the indices to the debates
         alloc = []
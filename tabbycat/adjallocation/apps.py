@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class AdjAllocationConfig(AppConfig):
     name = 'adjallocation'
     verbose_name = _("Adjudicator Allocation")
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -1,16 +1,26 @@
 """Utilities for querying and listing conflicts and history between
 participants."""
 import logging
-from itertools import combinations, product
 from typing import Dict, List, Tuple, TypedDict
 
+import numpy as np
+from django.core.cache import cache
+from django.db.models import QuerySet
+
 from adjallocation.models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
-                     AdjudicatorTeamConflict, TeamInstitutionConflict)
-from draw.models import Debate
-from participants.models import Adjudicator, Team
+                     AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+from draw.models import DebateTeam
+from participants.models import Adjudicator, Institution, Team
 
 logger = logging.getLogger(__name__)
 
+CONFLICTS_CACHE_KEY = "%s_conflicts"    # tournament slug
+HISTORY_CACHE_KEY = "%s_%s_history"     # tournament slug, round seq
+
+# Cached conflicts and history are cleared when they change (see signals.py).
+# This is a backstop in case a change doesn't send a signal.
+CACHE_TIMEOUT = 60 * 60
+
 
 class AdjudicatorConflicts(TypedDict):
     class Conflict(TypedDict):
@@ -24,19 +34,89 @@ class AdjudicatorConflicts(TypedDict):
 TeamConflicts = AdjudicatorConflicts
 
 
+class PairIndex:
+    """A set of pairs of integer IDs, e.g. `(adjudicator_id, team_id)`. Each
+    pair is packed into a single 64-bit key, and the keys are kept in a sorted
+    array, so the pairs for a given first ID are contiguous and can be found
+    by binary search."""
+
+    def __init__(self, rows=(), cols=()):
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        self.keys = np.unique((rows << 32) | cols)
+
+    @classmethod
+    def from_queryset(cls, queryset, symmetric=False):
+        """Builds an index from a `values_list()` QuerySet of pairs. If
+        `symmetric` is True, each pair is also stored the other way round."""
+        pairs = np.array(list(queryset), dtype=np.int64).reshape(-1, 2)
+        if symmetric:
+            pairs = np.concatenate([pairs, pairs[:, ::-1]])
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for key in self.keys.tolist():
+            yield key >> 32, key & 0xffffffff
+
+    def __contains__(self, pair):
+        key = (pair[0] << 32) | pair[1]
+        i = np.searchsorted(self.keys, key)
+        return i < len(self.keys) and self.keys[i] == key
+
+    def row(self, row_id):
+        """Returns a sorted array of the second IDs paired with `row_id`."""
+        lo, hi = np.searchsorted(self.keys, [row_id << 32, (row_id + 1) << 32])
+        return self.keys[lo:hi] & 0xffffffff
+
+    def matrix(self, row_ids, col_ids):
+        """Returns a boolean array whose `[i, j]` element is True if
+        `(row_ids[i], col_ids[j])` is in the index."""
+        rows = np.asarray(row_ids, dtype=np.int64).reshape(-1, 1)
+        cols = np.asarray(col_ids, dtype=np.int64).reshape(1, -1)
+        return np.isin((rows << 32) | cols, self.keys)
+
+
+def _ids(objects):
+    if isinstance(objects, QuerySet):
+        return set(objects.values_list('id', flat=True))
+    return {obj.id for obj in objects}
+
+
+def _matching_rows(keys, sorted_keys, after=None):
+    """Returns arrays `(left, right)` listing every pair of indices such that
+    `keys[left] == sorted_keys[right]`, and if `after` is given, also
+    `right >= after[left]`."""
+    starts = np.searchsorted(sorted_keys, keys, side='left')
+    ends = np.searchsorted(sorted_keys, keys, side='right')
+    if after is not None:
+        starts = np.maximum(starts, after)
+    counts = np.maximum(ends - starts, 0)
+    left = np.repeat(np.arange(len(keys)), counts)
+    right = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(starts, counts)
+    return left, right
+
+
 class ConflictsInfo:
     """Manages information about conflicts between participants.
 
     The main purpose of this class is to streamline queries about conflicts.
     This class hits the database once, on creation, with one query per type of
     conflict (adjudicator-team, adjudicator-adjudicator, adjudicator-institution
-    and adjudicator-team). It then can be used to find efficiently whether
+    and team-institution), plus one each for the covered team, adjudicator and
+    institution IDs. It then can be used to find efficiently whether
     particular participants conflict, without a need for further SQL queries or
     excessive data processing.
 
     All queries must relate to teams and adjudicators that were in the QuerySets
     or other iterables that were provided to the constructor.
 
+    Use `ConflictsInfo.for_tournament()` to get a cached instance covering all
+    teams and adjudicators in a tournament. The cache is cleared by signals in
+    `adjallocation.signals` when conflicts, teams or adjudicators change.
+
     Although the attributes `self.adjteamconflicts`, `self.adjadjconflicts`,
     etc. aren't marked as such, they should be treated a private implementation
     detail that is subject to change. Callers should rely exclusively on
@@ -44,68 +124,58 @@ class ConflictsInfo:
     """
 
     def __init__(self, teams=None, adjudicators=None):
-        self.teams = teams or Team.objects.none()
-        self.adjudicators = adjudicators or Adjudicator.objects.none()
-        self._fetch_conflicts_from_db()
-
-    def _fetch_conflicts_from_db(self):
-        """Fetches relevant conflicts from the database, based on `self.teams`
-        and `self.adjudicators`."""
-
-        # Refresh `self.adjudicator_ids` and `self.team_ids`
-        self.adjudicator_ids = {adj.id for adj in self.adjudicators}
-        self.team_ids = {team.id for team in self.teams}
-
-        # Adjudicator-team and adjudicator-adjudicator conflicts are stored as
-        # sets of primary keys. Primary keys to avoid having to select_related
-        # all the teams and adjudicators from the database, and sets so that
-        # they're stored in a hash-map structure (for O(1) `x in S` check)
-        # rather than an array (O(n)). Adjudicator pairs are stored both ways
-        # round, i.e. under both `(adj1.id, adj2.id)` and `(adj2.id, adj1.id)`.
-
-        adjteamconflict_instances = AdjudicatorTeamConflict.objects.filter(
-            adjudicator__in=self.adjudicators,
-            team__in=self.teams,
-        ).distinct()
-        self.adjteamconflicts = {(c.adjudicator_id, c.team_id) for c in adjteamconflict_instances}
-
-        adjadjconflict_instances = AdjudicatorAdjudicatorConflict.objects.filter(
-            adjudicator1__in=self.adjudicators,
-            adjudicator2__in=self.adjudicators,
-        ).distinct()
-        self.adjadjconflicts = set()
-        for conflict in adjadjconflict_instances:
-            self.adjadjconflicts.add((conflict.adjudicator1_id, conflict.adjudicator2_id))
-            self.adjadjconflicts.add((conflict.adjudicator2_id, conflict.adjudicator1_id))
-
-        # Adjudicator-institution and team-institution conflicts are stored as
-        # sets, which in turn are in dicts whose keys are the adjudicator/team
-        # primary keys. The sets contain the entire institution objects, since
-        # it's useful in some contexts to be able to grab institution details
-        # quickly from them. They're sets to allow the use of the set
-        # intersection operator to check for institution overlap.
-
-        teaminstconflict_instances = TeamInstitutionConflict.objects.filter(
-            team__in=self.teams,
-        ).select_related('institution').distinct()
-        self.teaminstconflicts = {team_id: set() for team_id in self.team_ids}
-        for conflict in teaminstconflict_instances:
-            if conflict.team_id in self.teaminstconflicts:
-                self.teaminstconflicts[conflict.team_id].add(conflict.institution)
-            else:
-                logger.warning("Couldnt add conflict for team ID %s to \
-                                institution %s" % (conflict.team_id, conflict.institution))
-
-        adjinstconflict_instances = AdjudicatorInstitutionConflict.objects.filter(
-            adjudicator__in=self.adjudicators,
-        ).select_related('institution').distinct()
-        self.adjinstconflicts = {adj_id: set() for adj_id in self.adjudicator_ids}
-        for conflict in adjinstconflict_instances:
-            if conflict.adjudicator_id in self.adjinstconflicts:
-                self.adjinstconflicts[conflict.adjudicator_id].add(conflict.institution)
-            else:
-                logger.warning("Couldnt add conflict for adjudicator ID %s to \
-                                institution %s" % (conflict.adjudicator_id, conflict.institution))
+        teams = teams if teams is not None else Team.objects.none()
+        adjudicators = adjudicators if adjudicators is not None else Adjudicator.objects.none()
+        self._fetch_conflicts_from_db(teams, adjudicators)
+
+    @classmethod
+    def for_tournament(cls, tournament):
+        """Returns conflicts for all teams and adjudicators in the tournament,
+        from the cache if possible."""
+        key = CONFLICTS_CACHE_KEY % tournament.slug
+        conflicts = cache.get(key)
+        if conflicts is None:
+            conflicts = cls(teams=tournament.team_set.all(), adjudicators=tournament.relevant_adjudicators)
+            cache.set(key, conflicts, CACHE_TIMEOUT)
+        return conflicts
+
+    def _fetch_conflicts_from_db(self, teams, adjudicators):
+        """Fetches relevant conflicts from the database, based on `teams` and
+        `adjudicators`."""
+
+        self.adjudicator_ids = _ids(adjudicators)
+        self.team_ids = _ids(teams)
+
+        # All conflicts are stored as pairs of primary keys in a `PairIndex`.
+        # Primary keys to avoid having to fetch all the teams and adjudicators
+        # from the database, and a sorted array so that checking a pair is a
+        # binary search, and conflicts for one participant form a contiguous
+        # slice. Adjudicator pairs are stored both ways round, i.e. under both
+        # `(adj1.id, adj2.id)` and `(adj2.id, adj1.id)`.
+
+        self.adjteamconflicts = PairIndex.from_queryset(AdjudicatorTeamConflict.objects.filter(
+            adjudicator__in=adjudicators,
+            team__in=teams,
+        ).values_list('adjudicator_id', 'team_id'))
+
+        self.adjadjconflicts = PairIndex.from_queryset(AdjudicatorAdjudicatorConflict.objects.filter(
+            adjudicator1__in=adjudicators,
+            adjudicator2__in=adjudicators,
+        ).values_list('adjudicator1_id', 'adjudicator2_id'), symmetric=True)
+
+        self.teaminstconflicts = PairIndex.from_queryset(TeamInstitutionConflict.objects.filter(
+            team__in=teams,
+        ).values_list('team_id', 'institution_id'))
+
+        self.adjinstconflicts = PairIndex.from_queryset(AdjudicatorInstitutionConflict.objects.filter(
+            adjudicator__in=adjudicators,
+        ).values_list('adjudicator_id', 'institution_id'))
+
+        # The institutions themselves are kept, since it's useful in some
+        # contexts to be able to grab institution details quickly.
+        institution_ids = {inst_id for _, inst_id in self.teaminstconflicts}
+        institution_ids.update(inst_id for _, inst_id in self.adjinstconflicts)
+        self.institutions = Institution.objects.in_bulk(institution_ids) if institution_ids else {}
 
     def personal_conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team personally conflict."""
@@ -119,21 +189,26 @@ class ConflictsInfo:
         assert adj2.id in self.adjudicator_ids, "adjudicator 2 not covered"
         return (adj1.id, adj2.id) in self.adjadjconflicts
 
+    def _shared_institutions(self, row_instconflicts, row_id, col_instconflicts, col_id):
+        return np.intersect1d(row_instconflicts.row(row_id), col_instconflicts.row(col_id), assume_unique=True)
+
     def conflicting_institutions_adj_team(self, adj, team):
         """Returns a set of institutions that the adjudicator and team share."""
-        return self.adjinstconflicts[adj.id] & self.teaminstconflicts[team.id]
+        shared = self._shared_institutions(self.adjinstconflicts, adj.id, self.teaminstconflicts, team.id)
+        return {self.institutions[inst_id] for inst_id in shared.tolist()}
 
     def conflicting_institutions_adj_adj(self, adj1, adj2):
         """Returns a set of institutions that the two adjudicators share."""
-        return self.adjinstconflicts[adj1.id] & self.adjinstconflicts[adj2.id]
+        shared = self._shared_institutions(self.adjinstconflicts, adj1.id, self.adjinstconflicts, adj2.id)
+        return {self.institutions[inst_id] for inst_id in shared.tolist()}
 
     def institutional_conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team share at least one institution."""
-        return not self.adjinstconflicts[adj.id].isdisjoint(self.teaminstconflicts[team.id])
+        return len(self._shared_institutions(self.adjinstconflicts, adj.id, self.teaminstconflicts, team.id)) > 0
 
     def institutional_conflict_adj_adj(self, adj1, adj2):
         """Returns True if the two adjudicators share at least one institution."""
-        return not self.adjinstconflicts[adj1.id].isdisjoint(self.adjinstconflicts[adj2.id])
+        return len(self._shared_institutions(self.adjinstconflicts, adj1.id, self.adjinstconflicts, adj2.id)) > 0
 
     def conflict_adj_team(self, adj, team):
         """Returns True if the adjudicator and team conflict."""
@@ -145,6 +220,31 @@ class ConflictsInfo:
         return (self.personal_conflict_adj_adj(adj1, adj2) or
                 self.institutional_conflict_adj_adj(adj1, adj2))
 
+    def _institutional_conflict_matrix(self, row_instconflicts, row_ids, col_instconflicts, col_ids):
+        institution_ids = list(self.institutions.keys())
+        rows = row_instconflicts.matrix(row_ids, institution_ids).astype(np.int64)
+        cols = col_instconflicts.matrix(col_ids, institution_ids).astype(np.int64)
+        return (rows @ cols.T) > 0
+
+    def conflict_adj_team_matrix(self, adjs, teams):
+        """Returns a boolean array whose `[i, j]` element is True if `adjs[i]`
+        and `teams[j]` conflict, as `conflict_adj_team()` would find."""
+        adj_ids = [adj.id for adj in adjs]
+        team_ids = [team.id for team in teams]
+        assert self.adjudicator_ids.issuperset(adj_ids), "adjudicators not covered"
+        assert self.team_ids.issuperset(team_ids), "teams not covered"
+        personal = self.adjteamconflicts.matrix(adj_ids, team_ids)
+        return personal | self._institutional_conflict_matrix(self.adjinstconflicts, adj_ids, self.teaminstconflicts, team_ids)
+
+    def conflict_adj_adj_matrix(self, adjs1, adjs2):
+        """Returns a boolean array whose `[i, j]` element is True if `adjs1[i]`
+        and `adjs2[j]` conflict, as `conflict_adj_adj()` would find."""
+        adj1_ids = [adj.id for adj in adjs1]
+        adj2_ids = [adj.id for adj in adjs2]
+        assert self.adjudicator_ids.issuperset(adj1_ids + adj2_ids), "adjudicators not covered"
+        personal = self.adjadjconflicts.matrix(adj1_ids, adj2_ids)
+        return personal | self._institutional_conflict_matrix(self.adjinstconflicts, adj1_ids, self.adjinstconflicts, adj2_ids)
+
     def serialized_by_participant(self):
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a three-key dict
@@ -164,11 +264,11 @@ class ConflictsInfo:
         for adj1_id, adj2_id in self.adjadjconflicts:
             adjudicators[adj1_id]['adjudicator'].append({'id': adj2_id})
 
-        for team_id, institutions in self.teaminstconflicts.items():
-            teams[team_id]['institution'] = [{'id': inst.id} for inst in institutions]
+        for team_id, inst_id in self.teaminstconflicts:
+            teams[team_id]['institution'].append({'id': inst_id})
 
-        for adj_id, institutions in self.adjinstconflicts.items():
-            adjudicators[adj_id]['institution'] = [{'id': inst.id} for inst in institutions]
+        for adj_id, inst_id in self.adjinstconflicts:
+            adjudicators[adj_id]['institution'].append({'id': inst_id})
 
         return teams, adjudicators
 
@@ -185,6 +285,10 @@ class HistoryInfo:
     efficiently whether particular participants have seen each other, without a
     need for further SQL queries or excessive data processing.
 
+    Use `HistoryInfo.for_round()` to get a cached instance. The cache is
+    cleared by signals in `adjallocation.signals` when debate adjudicators or
+    debate teams in earlier rounds change.
+
     Although the attributes `self.adjteamhistories` and  `self.adjadjhistories`
     aren't marked as such, they should be treated a private implementation
     detail that is subject to change. Callers should rely exclusively on
@@ -192,51 +296,46 @@ class HistoryInfo:
     """
 
     def __init__(self, round, teams=None, adjudicators=None):
-        self.round = round
-        self.tournament = round.tournament
-        self._fetch_histories_from_db()
-
-    def _fetch_histories_from_db(self):
-        """Fetches history information from the database, based on `self.teams`
-        and `self.adjudicators`."""
-
-        # The prefetches don't need `.select_related('adjudicator')` and
-        # `.select_related('team')`, because we only deal with the primary keys
-        # of adjudicators and teams.
-
-        debates = Debate.objects.filter(
-            round__tournament=self.tournament,
-            round__seq__lt=self.round.seq,
-        ).prefetch_related(
-            'debateadjudicator_set',
-            'debateteam_set',
-        ).select_related('round')
-
-        # Histories are stored in a dict, where keys are (adj.id, team.id) or
-        # (adj1.id, adj2.id) tuples, and values are lists of `seq` integers
-        # denoting the rounds where the participants saw each other. For
+        self.round_seq = round.seq
+        self._fetch_histories_from_db(round)
+
+    @classmethod
+    def for_round(cls, round):
+        """Returns history prior to the round, from the cache if possible."""
+        key = HISTORY_CACHE_KEY % (round.tournament.slug, round.seq)
+        history = cache.get(key)
+        if history is None:
+            history = cls(round)
+            cache.set(key, history, CACHE_TIMEOUT)
+        return history
+
+    def _fetch_histories_from_db(self, round):
+        """Fetches history information from the database, with one query for
+        debate adjudicators and one for debate teams, joined on the debate in
+        NumPy."""
+
+        debate_filter = {'debate__round__tournament_id': round.tournament_id, 'debate__round__seq__lt': round.seq}
+        debateadjs = np.array(list(DebateAdjudicator.objects.filter(**debate_filter).order_by('debate_id', 'id').values_list(
+                'debate_id', 'adjudicator_id', 'debate__round__seq')), dtype=np.int64).reshape(-1, 3)
+        debateteams = np.array(list(DebateTeam.objects.filter(**debate_filter).order_by('debate_id').values_list(
+                'debate_id', 'team_id')), dtype=np.int64).reshape(-1, 2)
+
+        # Histories are stored as arrays of (adj.id, team.id, seq) or
+        # (adj1.id, adj2.id, seq) rows, one for each time the participants saw
+        # each other, with the pairs also in a `PairIndex` for fast lookup. For
         # example, if `Adjudicator(id=33)` saw `Team(id=25)` in rounds 3 and 5,
-        # then `self.adjteamhistories[(33, 25)] = [3, 5]`. They're stored in a
-        # dict to allow for O(1) lookup for adj-team or adj1-adj2 pairs.
+        # then `self.adjteamhistory` has rows `[33, 25, 3]` and `[33, 25, 5]`.
         #
-        # Adjudicator pairs are stored both ways round, i.e., under both
-        # `(adj1.id, adj2.id)` and `(adj2.id, adj1.id)`. If a pair of
-        # participants has not seen each other, they are not in the dict at all;
-        # an empty list is *not* stored to indicate a lack of encounter.
-
-        self.adjteamhistories = {}
-        self.adjadjhistories = {}
+        # Adjudicator pairs are stored in the order in which they were
+        # allocated to the debate.
 
-        for debate in debates:
-            r = debate.round.seq
+        adjs, teams = _matching_rows(debateadjs[:, 0], debateteams[:, 0])
+        self.adjteamhistory = np.column_stack([debateadjs[adjs, 1], debateteams[teams, 1], debateadjs[adjs, 2]])
+        self.adjteamhistories = PairIndex(self.adjteamhistory[:, 0], self.adjteamhistory[:, 1])
 
-            for da, dt in product(debate.debateadjudicator_set.all(), debate.debateteam_set.all()):
-                pair = (da.adjudicator_id, dt.team_id)
-                self.adjteamhistories.setdefault(pair, []).append(r)
-
-            for da1, da2 in combinations(debate.debateadjudicator_set.all(), 2):
-                pair = (da1.adjudicator_id, da2.adjudicator_id)
-                self.adjadjhistories.setdefault(pair, []).append(r)
+        adjs1, adjs2 = _matching_rows(debateadjs[:, 0], debateadjs[:, 0], after=np.arange(1, len(debateadjs) + 1))
+        self.adjadjhistory = np.column_stack([debateadjs[adjs1, 1], debateadjs[adjs2, 1], debateadjs[adjs1, 2]])
+        self.adjadjhistories = PairIndex(self.adjadjhistory[:, 0], self.adjadjhistory[:, 1])
 
     def seen_adj_team(self, adj, team):
         """Returns True if the adjudicator has seen this team in the history
@@ -248,6 +347,16 @@ class HistoryInfo:
         covered by this object."""
         return (adj1.id, adj2.id) in self.adjadjhistories
 
+    def seen_adj_team_matrix(self, adjs, teams):
+        """Returns a boolean array whose `[i, j]` element is True if `adjs[i]`
+        has seen `teams[j]`, as `seen_adj_team()` would find."""
+        return self.adjteamhistories.matrix([adj.id for adj in adjs], [team.id for team in teams])
+
+    def seen_adj_adj_matrix(self, adjs1, adjs2):
+        """Returns a boolean array whose `[i, j]` element is True if `adjs1[i]`
+        has judged with `adjs2[j]`, as `seen_adj_adj()` would find."""
+        return self.adjadjhistories.matrix([adj.id for adj in adjs1], [adj.id for adj in adjs2])
+
     def serialized_by_participant(self) -> Tuple[Dict[int, TeamConflicts], Dict[int, AdjudicatorConflicts]]:
         """Returns a tuple of two dicts, mapping primary keys of teams and
         adjudicators respectively to a two-key dict
@@ -260,21 +369,21 @@ class HistoryInfo:
 
         teams = {}
         adjudicators = {}
-        now = self.round.seq
+        now = self.round_seq
 
-        for (adj_id, team_id), rseqs in self.adjteamhistories.items():
+        for adj_id, team_id, r in self.adjteamhistory.tolist():
             history = adjudicators.setdefault(adj_id, {'team': [], 'adjudicator': []})
-            history['team'].extend([{'id': team_id, 'ago': now - r} for r in rseqs])
+            history['team'].append({'id': team_id, 'ago': now - r})
 
             history = teams.setdefault(team_id, {'team': [], 'adjudicator': []})
-            history['adjudicator'].extend([{'id': adj_id, 'ago': now - r} for r in rseqs])
+            history['adjudicator'].append({'id': adj_id, 'ago': now - r})
 
-        for (adj1_id, adj2_id), rseqs in self.adjadjhistories.items():
+        for adj1_id, adj2_id, r in self.adjadjhistory.tolist():
             history = adjudicators.setdefault(adj1_id, {'team': [], 'adjudicator': []})
-            history['adjudicator'].extend([{'id': adj2_id, 'ago': now - r} for r in rseqs])
+            history['adjudicator'].append({'id': adj2_id, 'ago': now - r})
 
             # Need to reverse the order so the second adj also has a record
             history = adjudicators.setdefault(adj2_id, {'team': [], 'adjudicator': []})
-            history['adjudicator'].extend([{'id': adj1_id, 'ago': now - r} for r in rseqs])
+            history['adjudicator'].append({'id': adj1_id, 'ago': now - r})
 
         return teams, adjudicators
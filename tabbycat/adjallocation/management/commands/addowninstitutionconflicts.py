@@ -1,7 +1,10 @@
 from django.db.models import F
 
+from tournaments.models import Tournament
 from utils.management.base import TournamentCommand
 
+from ...signals import invalidate_conflicts
+
 
 class Command(TournamentCommand):
 
@@ -19,6 +22,8 @@ class Command(TournamentCommand):
             self.add_for_queryset(tournament.adjudicator_set)
         if not options["adjudicators_only"]:
             self.add_for_queryset(tournament.team_set)
+        # Conflicts are created in bulk, which doesn't clear cached conflicts
+        invalidate_conflicts(Tournament.objects.filter(id=tournament.id))
 
     def add_for_queryset(self, qs):
         conflict_model = qs.model.institution_conflicts.through
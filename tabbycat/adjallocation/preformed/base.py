@@ -4,7 +4,6 @@ from django.db.models import Prefetch
 from django.utils.translation import gettext as _
 
 from adjallocation.models import PreformedPanelAdjudicator
-from participants.models import Adjudicator, Team
 
 from ..allocators.base import AdjudicatorAllocationError
 from ..conflicts import ConflictsInfo, HistoryInfo
@@ -44,10 +43,8 @@ class BasePreformedPanelAllocator:
             logger.info(info)
             raise AdjudicatorAllocationError(info)
 
-        teams = Team.objects.filter(debateteam__debate__in=debates)
-        adjudicators = Adjudicator.objects.filter(preformedpaneladjudicator__panel__in=panels)
-        self.conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
-        self.history = HistoryInfo(round=round)
+        self.conflicts = ConflictsInfo.for_tournament(self.tournament)
+        self.history = HistoryInfo.for_round(round)
 
     def allocate(self):
         """Must return a tuple of two lists: a list of `Debate` instances, and
@@ -1,6 +1,8 @@
 import logging
 
-from munkres import Munkres
+import numpy as np
+
+from utils.assignment import broadcast_costs, get_assignment_solver
 
 from .base import BasePreformedPanelAllocator, register
 
@@ -11,6 +13,7 @@ logger = logging.getLogger(__name__)
 class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
 
     key = "hungarian"
+    assignment_solver = "jonker_volgenant"
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -20,38 +23,52 @@ class HungarianPreformedPanelAllocator(BasePreformedPanelAllocator):
         self.history_penalty = t.pref('adj_history_penalty')
         self.mismatch_penalty = t.pref('preformed_panel_mismatch_penalty')
 
-        self.munkres = Munkres()
-
-    def calc_cost(self, debate, panel):
-        cost = 0
-
-        mismatch = (debate.importance - panel.importance) ** 2
-        cost += self.mismatch_penalty * mismatch
-
-        for adj in panel.adjudicators.all():
-            for team in debate.teams:
-                cost += self.conflict_penalty * self.conflicts.conflict_adj_team(adj, team)
-                cost += self.history_penalty * self.history.seen_adj_team(adj, team)
-
-        return cost
+        self.solve_assignment = get_assignment_solver(self.assignment_solver)
+
+    def calc_costs(self, debates, panels):
+        """Returns the cost matrix for allocating `panels` (columns) to
+        `debates` (rows). Conflict and history penalties are a debate×team
+        incidence matrix, multiplied by the adjudicator×team penalty matrix and
+        a panel×adjudicator incidence matrix."""
+        panel_adjs = [list(panel.adjudicators.all()) for panel in panels]
+        adjs = list({adj.id: adj for adjs in panel_adjs for adj in adjs}.values())
+        adj_index = {adj.id: k for k, adj in enumerate(adjs)}
+        panel_incidence = np.zeros((len(panels), len(adjs)))
+        for c, adjs_in_panel in enumerate(panel_adjs):
+            for adj in adjs_in_panel:
+                panel_incidence[c, adj_index[adj.id]] += 1
+
+        debate_teams = [list(debate.teams) for debate in debates]
+        teams = list({team.id: team for teams in debate_teams for team in teams}.values())
+        team_index = {team.id: k for k, team in enumerate(teams)}
+        debate_incidence = np.zeros((len(debates), len(teams)))
+        for r, teams_in_debate in enumerate(debate_teams):
+            for team in teams_in_debate:
+                debate_incidence[r, team_index[team.id]] += 1
+
+        adj_team_penalties = (self.conflict_penalty * self.conflicts.conflict_adj_team_matrix(adjs, teams) +
+                              self.history_penalty * self.history.seen_adj_team_matrix(adjs, teams))
+        penalties = debate_incidence @ (panel_incidence @ adj_team_penalties).T
+
+        mismatches = broadcast_costs(lambda d, p: (d - p) ** 2,
+            [debate.importance for debate in debates], [panel.importance for panel in panels])
+        return penalties + self.mismatch_penalty * mismatches
 
     def allocate(self):
-        cost_matrix = [
-            [self.calc_cost(debate, panel) for panel in self.panels]
-            for debate in self.debates
-        ]
-
-        logger.info("optimizing panels (matrix size: %d debates by %d panels", len(cost_matrix), len(cost_matrix[0]))
-        indices = self.munkres.compute(cost_matrix)
-        indices.sort()
-        total_cost = sum(cost_matrix[i][j] for i, j in indices)
+        debates = list(self.debates)
+        panels = list(self.panels)
+        cost_matrix = self.calc_costs(debates, panels)
+
+        logger.info("optimizing panels (matrix size: %d debates by %d panels)", *cost_matrix.shape)
+        indices = self.solve_assignment(cost_matrix)
+        total_cost = sum(cost_matrix[i, j] for i, j in indices)
         logger.info("total cost: %f", total_cost)
 
         # Need to make sure all debates show up in the returned debates list,
         # corresponding to `None` if it didn't get assigned a panel.
-        panels = [None] * len(self.debates)
+        allocated = [None] * len(debates)
         for r, c in indices:
-            logger.info("debate %d, panel %d: cost %f", r, c, cost_matrix[r][c])
-            panels[r] = self.panels[c]
+            logger.info("debate %d, panel %d: cost %f", r, c, cost_matrix[r, c])
+            allocated[r] = panels[c]
 
-        return list(self.debates), panels
+        return debates, allocated
@@ -0,0 +1,110 @@
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from participants.models import Adjudicator, Team
+from tournaments.models import Round, Tournament
+
+from .conflicts import CONFLICTS_CACHE_KEY, HISTORY_CACHE_KEY
+from .models import (AdjudicatorAdjudicatorConflict, AdjudicatorInstitutionConflict,
+                     AdjudicatorTeamConflict, DebateAdjudicator, TeamInstitutionConflict)
+
+logger = logging.getLogger(__name__)
+
+
+def _delete_now_and_on_commit(keys):
+    # Entries are deleted straight away, so that this process sees the change,
+    # and again once the current transaction commits, in case another process
+    # rebuilt them from the old data in the meantime.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_conflicts(tournaments):
+    """Clears cached conflicts for the given Tournament QuerySet."""
+    _delete_now_and_on_commit([CONFLICTS_CACHE_KEY % slug for slug in tournaments.values_list('slug', flat=True)])
+
+
+def invalidate_histories(rounds):
+    """Clears cached histories for the given Round QuerySet."""
+    _delete_now_and_on_commit([HISTORY_CACHE_KEY % key for key in rounds.values_list('tournament__slug', 'seq')])
+
+
+@receiver(post_delete, sender=AdjudicatorTeamConflict)
+@receiver(post_save, sender=AdjudicatorTeamConflict)
+@receiver(post_delete, sender=TeamInstitutionConflict)
+@receiver(post_save, sender=TeamInstitutionConflict)
+def update_team_conflicts_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_conflicts(Tournament.objects.filter(team__id=instance.team_id))
+
+
+@receiver(post_delete, sender=AdjudicatorInstitutionConflict)
+@receiver(post_save, sender=AdjudicatorInstitutionConflict)
+def update_adjudicator_conflicts_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_conflicts(Tournament.objects.filter(adjudicator__id=instance.adjudicator_id))
+
+
+@receiver(post_delete, sender=AdjudicatorAdjudicatorConflict)
+@receiver(post_save, sender=AdjudicatorAdjudicatorConflict)
+def update_adjudicator_pair_conflicts_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_conflicts(Tournament.objects.filter(adjudicator__id__in=[instance.adjudicator1_id, instance.adjudicator2_id]))
+
+
+@receiver(m2m_changed, sender=AdjudicatorAdjudicatorConflict)
+@receiver(m2m_changed, sender=AdjudicatorInstitutionConflict)
+@receiver(m2m_changed, sender=AdjudicatorTeamConflict)
+@receiver(m2m_changed, sender=TeamInstitutionConflict)
+def update_m2m_conflicts_cache(sender, instance, action, model, pk_set, **kwargs):
+    # Changing conflicts through the many-to-many fields (e.g. with `set()`, as
+    # the API does) creates and deletes the through models in bulk, without
+    # sending post_save or post_delete
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if isinstance(instance, (Adjudicator, Team)):
+        tournaments = Tournament.objects.filter(id=instance.tournament_id)
+    elif pk_set is not None:  # from an institution
+        tournaments = Tournament.objects.filter(**{model._meta.model_name + '__id__in': pk_set})
+    else:  # an institution's conflicts were cleared
+        tournaments = Tournament.objects.all()
+    invalidate_conflicts(tournaments)
+
+
+@receiver(post_delete, sender=Adjudicator)
+@receiver(post_save, sender=Adjudicator)
+@receiver(post_delete, sender=Team)
+@receiver(post_save, sender=Team)
+def update_participant_conflicts_cache(sender, instance, created=True, raw=False, **kwargs):
+    # Cached conflicts only cover participants that existed when they were built
+    if raw or not created or instance.tournament_id is None:
+        return
+    invalidate_conflicts(Tournament.objects.filter(id=instance.tournament_id))
+
+
+@receiver(post_delete, sender=DebateAdjudicator)
+@receiver(post_save, sender=DebateAdjudicator)
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+def update_history_cache(sender, instance, raw=False, **kwargs):
+    # History for a round covers only earlier rounds, so clear later rounds
+    if raw:
+        return
+    invalidate_histories(Round.objects.filter(tournament__round__debate__id=instance.debate_id,
+            seq__gt=F('tournament__round__seq')))
+
+
+@receiver(post_save, sender=Round)
+def update_round_history_cache(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_histories(Round.objects.filter(tournament_id=instance.tournament_id))
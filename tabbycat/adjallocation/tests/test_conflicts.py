@@ -0,0 +1,164 @@
+from io import StringIO
+from itertools import combinations
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from draw.models import Debate
+from participants.models import Institution
+from utils.tests import CompletedTournamentTestMixin
+
+from ..conflicts import CONFLICTS_CACHE_KEY, ConflictsInfo, HistoryInfo, PairIndex
+from ..models import AdjudicatorAdjudicatorConflict, AdjudicatorTeamConflict, DebateAdjudicator
+
+
+class TestConflictMatrices(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.teams = list(self.tournament.team_set.all())
+        self.adjs = list(self.tournament.adjudicator_set.all())
+        AdjudicatorAdjudicatorConflict.objects.create(adjudicator1=self.adjs[0], adjudicator2=self.adjs[1])
+
+    def assertMatrixMatches(self, matrix, func, rows, cols):  # noqa: N802
+        self.assertEqual(matrix.shape, (len(rows), len(cols)))
+        for i, row in enumerate(rows):
+            for j, col in enumerate(cols):
+                self.assertEqual(matrix[i, j], func(row, col), msg="%s, %s" % (row, col))
+
+    def test_conflicts(self):
+        conflicts = ConflictsInfo(teams=self.teams, adjudicators=self.adjs)
+        matrix = conflicts.conflict_adj_team_matrix(self.adjs, self.teams)
+        self.assertTrue(matrix.any())
+        self.assertMatrixMatches(matrix, conflicts.conflict_adj_team, self.adjs, self.teams)
+
+        matrix = conflicts.conflict_adj_adj_matrix(self.adjs, self.adjs[:5])
+        self.assertTrue(matrix.any())
+        self.assertMatrixMatches(matrix, conflicts.conflict_adj_adj, self.adjs, self.adjs[:5])
+
+    def test_history(self):
+        for round in self.tournament.prelim_rounds():
+            with self.subTest(round=round.seq):
+                history = HistoryInfo(round)
+                matrix = history.seen_adj_team_matrix(self.adjs, self.teams)
+                self.assertEqual(matrix.any(), round.seq > 1)
+                self.assertMatrixMatches(matrix, history.seen_adj_team, self.adjs, self.teams)
+                matrix = history.seen_adj_adj_matrix(self.adjs, self.adjs)
+                self.assertMatrixMatches(matrix, history.seen_adj_adj, self.adjs, self.adjs)
+
+
+class TestPairIndex(TestCase):
+
+    def test_lookups(self):
+        index = PairIndex([3, 1, 3, 2, 3], [5, 7, 2, 7, 5])
+        self.assertEqual(len(index), 4)
+        self.assertEqual(list(index), [(1, 7), (2, 7), (3, 2), (3, 5)])
+        self.assertIn((3, 2), index)
+        self.assertNotIn((2, 3), index)
+        self.assertNotIn((4, 0), index)
+        self.assertEqual(index.row(3).tolist(), [2, 5])
+        self.assertEqual(index.row(4).tolist(), [])
+        self.assertEqual(index.matrix([1, 3], [2, 7]).tolist(), [[False, True], [True, False]])
+
+    def test_empty(self):
+        index = PairIndex()
+        self.assertNotIn((1, 1), index)
+        self.assertEqual(index.matrix([1, 2], [3]).tolist(), [[False], [False]])
+
+
+class TestConflictsCache(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_history_matches_debates(self):
+        round = self.tournament.round_set.get(seq=4)
+        history = HistoryInfo(round)
+        expected_adjteam, expected_adjadj = set(), set()
+        for debate in Debate.objects.filter(round__tournament=self.tournament, round__seq__lt=4):
+            adjs = list(debate.debateadjudicator_set.order_by('id').values_list('adjudicator_id', flat=True))
+            expected_adjteam.update((adj, dt.team_id) for adj in adjs for dt in debate.debateteam_set.all())
+            expected_adjadj.update(combinations(adjs, 2))
+        self.assertEqual(set(history.adjteamhistories), expected_adjteam)
+        self.assertEqual(set(history.adjadjhistories), expected_adjadj)
+
+    def test_conflicts_cached(self):
+        ConflictsInfo.for_tournament(self.tournament)
+        with self.assertNumQueries(0):
+            conflicts = ConflictsInfo.for_tournament(self.tournament)
+        adj = self.tournament.adjudicator_set.first()
+        team = self.tournament.team_set.exclude(adjudicatorteamconflict__adjudicator=adj).first()
+        self.assertFalse(conflicts.personal_conflict_adj_team(adj, team))
+
+        AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=team)
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_team(adj, team))
+
+        AdjudicatorTeamConflict.objects.filter(adjudicator=adj, team=team).delete()
+        self.assertFalse(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_team(adj, team))
+
+    def test_invalidated_again_on_commit(self):
+        adj = self.tournament.adjudicator_set.first()
+        team = self.tournament.team_set.exclude(adjudicatorteamconflict__adjudicator=adj).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            AdjudicatorTeamConflict.objects.create(adjudicator=adj, team=team)
+            # Another process caches conflicts from before the transaction commits
+            cache.set(CONFLICTS_CACHE_KEY % self.tournament.slug, ConflictsInfo(), None)
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_team(adj, team))
+
+    def test_m2m_changes_invalidate(self):
+        adj1, adj2 = self.tournament.adjudicator_set.all()[:2]
+        team = self.tournament.team_set.exclude(adjudicatorteamconflict__adjudicator=adj1).first()
+        institution = Institution.objects.create(name="Conflicted Institution", code="Conflicted")
+
+        ConflictsInfo.for_tournament(self.tournament)
+        adj1.team_conflicts.add(team)
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_team(adj1, team))
+        adj1.team_conflicts.remove(team)
+        self.assertFalse(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_team(adj1, team))
+
+        team.institution_conflicts.add(institution)
+        adj1.institution_conflicts.set([institution])
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).institutional_conflict_adj_team(adj1, team))
+        institution.adj_inst_conflicts.add(adj2)
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).institutional_conflict_adj_adj(adj1, adj2))
+        institution.adj_inst_conflicts.clear()
+        self.assertFalse(ConflictsInfo.for_tournament(self.tournament).institutional_conflict_adj_adj(adj1, adj2))
+
+        adj1.adjudicator_conflicts.add(adj2)
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).personal_conflict_adj_adj(adj1, adj2))
+
+    def test_own_institution_command_invalidates(self):
+        team = self.tournament.team_set.filter(institution__isnull=False).first()
+        team.institution_conflicts.clear()
+        adj = self.tournament.adjudicator_set.filter(institution=team.institution).first() or \
+            self.tournament.adjudicator_set.create(name="Same Institution", institution=team.institution)
+        adj.institution_conflicts.add(team.institution)
+        self.assertFalse(ConflictsInfo.for_tournament(self.tournament).institutional_conflict_adj_team(adj, team))
+
+        call_command('addowninstitutionconflicts', '-t', self.tournament.slug, '--teams-only', stdout=StringIO())
+        self.assertTrue(ConflictsInfo.for_tournament(self.tournament).institutional_conflict_adj_team(adj, team))
+
+    def test_new_adjudicator_invalidates(self):
+        ConflictsInfo.for_tournament(self.tournament)
+        adj = self.tournament.adjudicator_set.create(name="New Adjudicator")
+        team = self.tournament.team_set.first()
+        self.assertFalse(ConflictsInfo.for_tournament(self.tournament).conflict_adj_team(adj, team))
+
+    def test_history_invalidated_for_later_rounds(self):
+        rounds = {round.seq: round for round in self.tournament.prelim_rounds()}
+        for round in rounds.values():
+            HistoryInfo.for_round(round)
+
+        debate = rounds[2].debate_set.first()
+        team = debate.debateteam_set.first().team
+        adj = next(adj for adj in self.tournament.adjudicator_set.all()
+                   if not HistoryInfo.for_round(rounds[4]).seen_adj_team(adj, team))
+        DebateAdjudicator.objects.create(debate=debate, adjudicator=adj, type=DebateAdjudicator.TYPE_TRAINEE)
+
+        with self.assertNumQueries(0):
+            HistoryInfo.for_round(rounds[1])
+            HistoryInfo.for_round(rounds[2])
+        for seq in [3, 4]:
+            self.assertTrue(HistoryInfo.for_round(rounds[seq]).seen_adj_team(adj, team))
@@ -0,0 +1,139 @@
+import random
+from math import exp
+
+import numpy as np
+from django.test import TestCase
+
+from availability.utils import activate_all
+from utils.tests import CompletedTournamentTestMixin
+
+from ..allocators.hungarian import ConsensusHungarianAllocator, VotingHungarianAllocator
+from ..models import PreformedPanel, PreformedPanelAdjudicator
+from ..preformed.hungarian import HungarianPreformedPanelAllocator
+
+
+def recording(allocator_class, solver):
+    """Returns a subclass of `allocator_class` using the given assignment
+    solver, that records the total cost of each assignment it solves."""
+
+    class RecordingAllocator(allocator_class):
+        assignment_solver = solver
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.total_costs = []
+
+        def optimize(self, cost_matrix, description):
+            indices = super().optimize(cost_matrix, description)
+            self.total_costs.append(sum(cost_matrix[i, j] for i, j in indices))
+            return indices
+
+    return RecordingAllocator
+
+
+class TestHungarianAllocators(CompletedTournamentTestMixin, TestCase):
+
+    allocator_classes = [VotingHungarianAllocator, ConsensusHungarianAllocator]
+
+    def setUp(self):
+        super().setUp()
+        for round in self.tournament.prelim_rounds():
+            activate_all(round)
+
+    def get_allocator(self, allocator_class, round):
+        return allocator_class(round.debate_set.all(), round.active_adjudicators.all(), round)
+
+    def calc_cost(self, allocator, debate, adj, adjustment=0, chair=None):
+        """Element-wise cost function, as the allocators used to compute it."""
+        cost = 0
+        for team in debate.teams:
+            cost += allocator.conflict_penalty * allocator.conflicts.conflict_adj_team(adj, team)
+            cost += allocator.history_penalty * allocator.history.seen_adj_team(adj, team)
+        if chair:
+            cost += allocator.conflict_penalty * allocator.conflicts.conflict_adj_adj(adj, chair)
+            cost += allocator.history_penalty * allocator.history.seen_adj_adj(adj, chair)
+        diff = 5 + debate.importance + 3 + adjustment - adj._normalized_score
+        if diff > 0.25:
+            cost += 1000 * exp(diff - 0.25)
+        cost += allocator.max_score - adj._normalized_score
+        return cost
+
+    def test_cost_matrix(self):
+        round = self.tournament.round_set.get(seq=4)
+        allocator = self.get_allocator(VotingHungarianAllocator, round)
+        adjs = list(allocator.adjudicators)
+        allocator.populate_adj_scores(adjs)
+        chair = adjs[0]
+        positions = [(debate, adjustment, c) for debate in allocator.debates for adjustment in [0, -1.0, -2.0] for c in [None, chair]]
+
+        costs = allocator.calc_costs(positions, adjs)
+        self.assertEqual(costs.shape, (len(positions), len(adjs)))
+        expected = np.array([[self.calc_cost(allocator, debate, adj, adjustment, c) for adj in adjs]
+                for debate, adjustment, c in positions])
+        np.testing.assert_array_equal(costs, expected)
+
+    def test_same_total_cost_as_munkres(self):
+        for allocator_class in self.allocator_classes:
+            for round in self.tournament.prelim_rounds():
+                with self.subTest(allocator=allocator_class.key, round=round.seq):
+                    totals = []
+                    for solver in ["jonker_volgenant", "munkres"]:
+                        random.seed(round.seq)
+                        allocator = self.get_allocator(recording(allocator_class, solver), round)
+                        allocator.allocate()
+                        totals.append(allocator.total_costs)
+                    self.assertEqual(len(totals[0]), len(totals[1]))
+                    for result, expected in zip(*totals):
+                        self.assertAlmostEqual(result, expected)
+
+    def test_allocations_are_valid(self):
+        round = self.tournament.round_set.get(seq=4)
+        for allocator_class in self.allocator_classes:
+            with self.subTest(allocator=allocator_class.key):
+                allocations, warnings = self.get_allocator(allocator_class, round).allocate()
+                self.assertCountEqual([aa.container for aa in allocations], round.debate_set.all())
+                adjs = [adj for aa in allocations for adj, pos in aa.with_positions()]
+                self.assertEqual(len(adjs), len(set(adjs)))
+                self.assertTrue(all(aa.chair is not None for aa in allocations))
+
+
+class TestHungarianPreformedPanelAllocator(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.round = self.tournament.round_set.get(seq=4)
+        rng = random.Random(0)
+        # Panels from the previous round, so that some have seen the teams
+        for debate in self.tournament.round_set.get(seq=3).debate_set.all():
+            panel = PreformedPanel.objects.create(round=self.round, importance=rng.randrange(-2, 3))
+            PreformedPanelAdjudicator.objects.bulk_create([PreformedPanelAdjudicator(panel=panel, adjudicator=da.adjudicator, type=da.type)
+                for da in debate.debateadjudicator_set.all()])
+        for debate in self.round.debate_set.all():
+            debate.importance = rng.randrange(-2, 3)
+            debate.save()
+
+    def get_allocator(self):
+        return HungarianPreformedPanelAllocator(self.round.debate_set.all(), self.round.preformedpanel_set.all(), self.round)
+
+    def calc_cost(self, allocator, debate, panel):
+        """Element-wise cost function, as the allocator used to compute it."""
+        cost = allocator.mismatch_penalty * (debate.importance - panel.importance) ** 2
+        for adj in panel.adjudicators.all():
+            for team in debate.teams:
+                cost += allocator.conflict_penalty * allocator.conflicts.conflict_adj_team(adj, team)
+                cost += allocator.history_penalty * allocator.history.seen_adj_team(adj, team)
+        return cost
+
+    def test_cost_matrix(self):
+        allocator = self.get_allocator()
+        debates, panels = list(allocator.debates), list(allocator.panels)
+        costs = allocator.calc_costs(debates, panels)
+        expected = np.array([[self.calc_cost(allocator, debate, panel) for panel in panels] for debate in debates])
+        np.testing.assert_array_equal(costs, expected)
+        self.assertTrue((costs > 0).any())
+
+    def test_allocation(self):
+        debates, panels = self.get_allocator().allocate()
+        self.assertCountEqual(debates, self.round.debate_set.all())
+        self.assertEqual(len(set(panels)), len(debates))
+        self.assertNotIn(None, panels)
@@ -4,19 +4,15 @@ from itertools import combinations, product
 from django.utils.html import escape
 from django.utils.translation import gettext as _
 
-from participants.models import Adjudicator, Team
-
 from .conflicts import ConflictsInfo
 
 
-def adjudicator_conflicts_display(debates):
+def adjudicator_conflicts_display(debates, tournament):
     """Returns a dict mapping elements (debates) in `debates` to a list of
     strings of explaining conflicts between adjudicators and teams, and
     conflicts between adjudicators and each other."""
 
-    adjudicators = Adjudicator.objects.filter(debateadjudicator__debate__in=debates)
-    teams = Team.objects.filter(debateteam__debate__in=debates)
-    conflicts = ConflictsInfo(teams=teams, adjudicators=adjudicators)
+    conflicts = ConflictsInfo.for_tournament(tournament)
 
     conflict_messages = {debate: [] for debate in debates}
 
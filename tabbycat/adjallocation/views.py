@@ -73,13 +73,12 @@ class BaseEditDebateOrPanelAdjudicatorsView(DebateDragAndDropMixin, Administrato
         return self.json_render(serialized_adjs.data)
 
     def get_adjudicator_conflicts(self):
-        conflicts = ConflictsInfo(teams=self.tournament.team_set.all(),
-                                  adjudicators=self.tournament.adjudicator_set.all())
+        conflicts = ConflictsInfo.for_tournament(self.tournament)
         team_conflicts, adj_conflicts = conflicts.serialized_by_participant()
         return {'teams': team_conflicts, 'adjudicators': adj_conflicts}
 
     def get_history_conflicts(self):
-        history = HistoryInfo(self.round)
+        history = HistoryInfo.for_round(self.round)
         team_history, adj_history = history.serialized_by_participant()
         return {'teams': team_history,  'adjudicators': adj_history}
 
@@ -1,13 +1,18 @@
 import operator
+from itertools import islice
 
+from django.http import StreamingHttpResponse
 from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import IsAdminUser
+from rest_framework.settings import api_settings
 
 from actionlog.mixins import LogActionMixin
 from actionlog.models import ActionLogEntry
 from tournaments.models import Round, Tournament
 
+from .pagination import KeysetPagination
 from .permissions import APIEnabledPermission, IsAdminOrReadOnly, PerTournamentPermissionRequired, PublicIfReleasedPermission, PublicPreferencePermission
+from .renderers import JSONLinesRenderer
 
 
 class APILogActionMixin(LogActionMixin):
@@ -88,3 +93,32 @@ class OnReleasePublicAPIMixin(TournamentPublicAPIMixin):
 
 class PublicAPIMixin:
     permission_classes = [APIEnabledPermission, IsAdminOrReadOnly | PerTournamentPermissionRequired]
+
+
+class StreamingListMixin:
+    # For viewsets of resources that can have thousands of objects. Lists are
+    # paginated by primary key (see KeysetPagination), and lists requested as
+    # JSON lines are streamed, serializing `stream_chunk_size` objects at a time
+    # as they're read from the database, so that memory use doesn't grow with
+    # the number of objects. (This isn't a docstring, so that it doesn't end up
+    # in the API schema as the viewsets' descriptions.)
+
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, JSONLinesRenderer]
+    pagination_class = KeysetPagination
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONLinesRenderer):
+            return super().list(request, *args, **kwargs)
+
+        # Build the queryset here, rather than in the generator, so that any
+        # errors are raised before the response starts
+        queryset = self.filter_queryset(self.get_queryset())
+        lines = self.stream_lines(queryset, request.accepted_renderer)
+        return StreamingHttpResponse(lines, content_type=request.accepted_renderer.media_type)
+
+    def stream_lines(self, queryset, renderer):
+        objects = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while chunk := list(islice(objects, self.stream_chunk_size)):
+            serializer = self.get_serializer(chunk, many=True)
+            yield b''.join(renderer.render_line(item) for item in serializer.data)
@@ -0,0 +1,34 @@
+from drf_link_header_pagination import LinkHeaderCursorPagination, LinkHeaderLimitOffsetPagination
+
+
+class KeysetPagination(LinkHeaderCursorPagination):
+    """Paginates by primary key, so that each page is fetched with an indexed
+    `WHERE id > ...` rather than an `OFFSET`, which gets slower the further
+    into the list it is. Links to the next and previous pages are given in the
+    `Link` header, as with the default pagination.
+
+    As with the default, lists are only paginated if `?limit=` is given.
+    Requests that also give `?offset=` are paginated by offset, so existing
+    clients that compute offsets themselves keep working."""
+
+    ordering = 'id'
+    page_size = None
+    page_size_query_param = 'limit'
+    offset_query_param = LinkHeaderLimitOffsetPagination.offset_query_param
+
+    offset_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.offset_query_param in request.query_params:
+            self.offset_paginator = LinkHeaderLimitOffsetPagination()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        offset_parameters = LinkHeaderLimitOffsetPagination().get_schema_operation_parameters(view)
+        return super().get_schema_operation_parameters(view) + [p for p in offset_parameters if p['name'] == self.offset_query_param]
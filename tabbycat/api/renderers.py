@@ -0,0 +1,27 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """Renders lists as newline-delimited JSON, one object per line, selected
+    with `?format=jsonl` or `Accept: application/x-ndjson`. Anything other
+    than a list (e.g. an error) is rendered as a single line.
+
+    List views using StreamingListMixin don't render whole lists with this, but
+    stream them a line at a time using `render_line()`."""
+
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = None
+
+    def render_line(self, item):
+        return json.dumps(item, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, list):
+            data = [data]
+        return b''.join(self.render_line(item) for item in data)
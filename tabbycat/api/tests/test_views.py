@@ -1,9 +1,14 @@
+import json
+import re
+from unittest import mock
+
 from django.conf import settings
 from django.test import Client
 from django.urls import reverse
 from dynamic_preferences.registries import global_preferences_registry
 from rest_framework.test import APITestCase
 
+from results.models import BallotSubmission
 from utils.tests import CompletedTournamentTestMixin
 
 
@@ -91,6 +96,15 @@ class SpeakerCategoryViewsetTests(CompletedTournamentTestMixin, APITestCase):
         self.assertEqual(len(response.data), 2)
 
 
+class FeedbackViewsetTests(CompletedTournamentTestMixin, APITestCase):
+
+    def test_stream_jsonl_unauthorized(self):
+        response = self.client.get(reverse('api-feedback-list', kwargs={'tournament_slug': self.tournament.slug}), {'format': 'jsonl'})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(response.streaming)
+        self.assertEqual(len(response.content.splitlines()), 1)
+
+
 class BreakEligibilityViewsetTests(CompletedTournamentTestMixin, APITestCase):
 
     def test_get_eligible_teams(self):
@@ -153,3 +167,55 @@ class BallotViewSetTests(CompletedTournamentTestMixin, APITestCase):
     def test_access_with_private_url(self):
         response = self.client.get(reverse('api-ballot-list', kwargs={'tournament_slug': self.tournament.slug, 'round_seq': 1, 'debate_pk': 12}), headers={"Authorization": "Key urlkey"})
         self.assertEqual(response.status_code, 200)
+
+
+class BallotViewSetListTests(CompletedTournamentTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.login(username="admin", password="admin")
+        debate = self.tournament.round_set.get(seq=1).debate_set.get(pk=12)
+        BallotSubmission.objects.bulk_create([BallotSubmission(debate=debate, version=version, discarded=True) for version in range(2, 25)])
+        self.url = reverse('api-ballot-list', kwargs={'tournament_slug': self.tournament.slug, 'round_seq': 1, 'debate_pk': 12})
+        self.ballot_ids = sorted(debate.ballotsubmission_set.values_list('id', flat=True))
+
+    def next_link(self, response):
+        match = re.search(r'<([^>]+)>; rel="next"', response.get('Link', ''))
+        return match and match.group(1)
+
+    def test_unpaginated(self):
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.data), len(self.ballot_ids))
+        self.assertNotIn('Link', response)
+
+    def test_keyset_pagination(self):
+        ids = []
+        url = self.url + "?limit=5"
+        while url:
+            response = self.client.get(url)
+            self.assertLessEqual(len(response.data), 5)
+            self.assertNotIn('offset=', response.get('Link', ''))
+            ids.extend(ballot['id'] for ballot in response.data)
+            url = self.next_link(response)
+        self.assertEqual(ids, self.ballot_ids)
+
+    def test_offset_pagination(self):
+        response = self.client.get(self.url + "?limit=5&offset=5")
+        self.assertEqual(len(response.data), 5)
+        self.assertIn('offset=10', self.next_link(response))
+
+    def test_stream_jsonl(self):
+        for kwargs in [{'data': {'format': 'jsonl'}}, {'headers': {'Accept': 'application/x-ndjson'}}]:
+            with self.subTest(**kwargs), mock.patch('api.views.BallotViewSet.stream_chunk_size', 7):
+                response = self.client.get(self.url, **kwargs)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                lines = b''.join(response.streaming_content).decode().splitlines()
+                self.assertEqual(sorted(json.loads(line)['id'] for line in lines), self.ballot_ids)
+
+    def test_stream_jsonl_matches_json(self):
+        expected = json.loads(json.dumps(self.client.get(self.url).data))
+        response = self.client.get(self.url, headers={'Accept': 'application/x-ndjson'})
+        streamed = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertCountEqual(streamed, expected)
@@ -43,7 +43,7 @@ from venues.models import Venue, VenueCategory
 
 from . import serializers
 from .fields import ParticipantAvailabilityForeignKeyField
-from .mixins import AdministratorAPIMixin, APILogActionMixin, PublicAPIMixin, RoundAPIMixin, TournamentAPIMixin, TournamentPublicAPIMixin
+from .mixins import AdministratorAPIMixin, APILogActionMixin, PublicAPIMixin, RoundAPIMixin, StreamingListMixin, TournamentAPIMixin, TournamentPublicAPIMixin
 from .permissions import APIEnabledPermission, PerTournamentPermissionRequired, PublicPreferencePermission, URLKeyAuthentication
 
 
@@ -519,7 +519,7 @@ class GlobalInstitutionViewSet(AdministratorAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch speaker", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete speaker", parameters=[id_parameter]),
 )
-class SpeakerViewSet(TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class SpeakerViewSet(StreamingListMixin, TournamentAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
     serializer_class = serializers.SpeakerSerializer
     tournament_field = "team__tournament"
     access_preference = 'public_participants'
@@ -1050,7 +1050,7 @@ class GeneratePairingView(RoundAPIMixin, AdministratorAPIMixin, CreateAPIView):
     update=extend_schema(summary="Update ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
     partial_update=extend_schema(summary="Patch ballot", parameters=[id_parameter], request=serializers.UpdateBallotSerializer),
 )
-class BallotViewSet(RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
+class BallotViewSet(StreamingListMixin, RoundAPIMixin, TournamentPublicAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
@@ -1197,7 +1197,7 @@ class FeedbackQuestionViewSet(TournamentAPIMixin, PublicAPIMixin, ModelViewSet):
     partial_update=extend_schema(summary="Patch feedback", parameters=[id_parameter]),
     destroy=extend_schema(summary="Delete feedback", parameters=[id_parameter]),
 )
-class FeedbackViewSet(TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
+class FeedbackViewSet(StreamingListMixin, TournamentAPIMixin, AdministratorAPIMixin, ModelViewSet):
 
     class CustomPermission(BasePermission):
         def has_permission(self, request, view):
@@ -12,9 +12,10 @@ django.setup()
 from actionlog.consumers import ActionLogEntryConsumer # noqa: E402 (has to come after settings)
 from adjallocation.consumers import AdjudicatorAllocationWorkerConsumer, PanelEditConsumer # noqa: E402 (has to come after settings)
 from checkins.consumers import CheckInEventConsumer # noqa: E402 (has to come after settings)
-from draw.consumers import DebateEditConsumer # noqa: E402 (has to come after settings)
+from draw.consumers import DebateEditConsumer, DrawGenerationJobConsumer, DrawGenerationWorkerConsumer # noqa: E402 (has to come after settings)
 from notifications.consumers import NotificationQueueConsumer # noqa: E402 (has to come after settings)
 from results.consumers import BallotResultConsumer, BallotStatusConsumer # noqa: E402 (has to come after settings)
+from utils.consumers import PageCacheWorkerConsumer # noqa: E402 (has to come after settings)
 from venues.consumers import VenuesWorkerConsumer # noqa: E402 (has to come after settings)
 
 application = ProtocolTypeRouter({
@@ -34,6 +35,8 @@ application = ProtocolTypeRouter({
             # Draw and Preformed Panel Edits
             re_path(r'^ws/(?P<tournament_slug>[-\w_]+)/round/(?P<round_seq>[-\w_]+)/debates/$', DebateEditConsumer.as_asgi()),
             re_path(r'^ws/(?P<tournament_slug>[-\w_]+)/round/(?P<round_seq>[-\w_]+)/panels/$', PanelEditConsumer.as_asgi()),
+            # Draw generation progress
+            re_path(r'^ws/(?P<tournament_slug>[-\w_]+)/round/(?P<round_seq>[-\w_]+)/draw_job/$', DrawGenerationJobConsumer.as_asgi()),
         ]),
     ),
 
@@ -43,5 +46,7 @@ application = ProtocolTypeRouter({
         "notifications":  NotificationQueueConsumer.as_asgi(), # Email sending
         "adjallocation": AdjudicatorAllocationWorkerConsumer.as_asgi(),
         "venues": VenuesWorkerConsumer.as_asgi(),
+        "draw": DrawGenerationWorkerConsumer.as_asgi(),
+        "pagecache": PageCacheWorkerConsumer.as_asgi(), # Pre-warming public pages
     }),
 })
@@ -9,6 +9,7 @@ from django.utils.encoding import force_str
 from django.utils.translation import ngettext
 
 from breakqual.models import BreakingTeam
+from standings.columnar import ColumnarTeamStandingsGenerator
 from standings.teams import TeamStandingsGenerator
 
 logger = logging.getLogger(__name__)
@@ -121,7 +122,7 @@ class BaseBreakGenerator:
         metrics = self.category.tournament.pref('team_standings_precedence')
         self.check_required_metrics(metrics)
 
-        generator = TeamStandingsGenerator(metrics, self.rankings)
+        generator = ColumnarTeamStandingsGenerator(metrics, self.rankings)
         generated = generator.generate(self.team_queryset, tournament=self.category.tournament)
         self.standings = list(generated)
 
@@ -4,7 +4,7 @@ import logging
 from django.db.models import Count, Max, Q, Sum
 from django.utils.translation import gettext_lazy as _
 
-from standings.teams import TeamStandingsGenerator
+from standings.columnar import ColumnarTeamStandingsGenerator
 from tournaments.models import Round
 
 from .liveness import liveness_bp, liveness_twoteam
@@ -18,11 +18,11 @@ def get_breaking_teams(category, prefetch=(), rankings=('rank',)):
     `tsi.break_rank` is the rank of the team out of those that are in the break.
 
     `prefetch` is passed to `prefetch_related()` in the Team query.
-    `rankings` is passed to `rankings` in the TeamStandingsGenerator.
+    `rankings` is passed to `rankings` in the ColumnarTeamStandingsGenerator.
     """
     teams = category.breaking_teams.all().prefetch_related(*prefetch)
     metrics = category.tournament.pref('team_standings_precedence')
-    generator = TeamStandingsGenerator(metrics, rankings)
+    generator = ColumnarTeamStandingsGenerator(metrics, rankings)
     standings = generator.generate(teams, tournament=category.tournament)
 
     breakingteams_by_team_id = {bt.team_id: bt for bt in category.breakingteam_set.all()}
@@ -10,9 +10,13 @@ from polymorphic.models import PolymorphicModel
 from utils.misc import generate_identifier_string
 
 
-def generate_identifier():
+def generate_barcode():
     # First number should not be 0 so that it is easier import into Excel etc
-    new_id = str(random.choice([1, 2, 3, 4, 5, 6, 7, 8, 9])) + generate_identifier_string(digits, 5)
+    return str(random.choice([1, 2, 3, 4, 5, 6, 7, 8, 9])) + generate_identifier_string(digits, 5)
+
+
+def generate_identifier():
+    new_id = generate_barcode()
     if Identifier.objects.filter(barcode=new_id).count() == 0:
         return new_id
     else:
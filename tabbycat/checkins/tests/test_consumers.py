@@ -0,0 +1,145 @@
+import asyncio
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from participants.models import Adjudicator, Institution
+from tournaments.models import Tournament
+from utils.tests import ClearTournamentCacheMixin
+
+from ..consumers import CheckInEventConsumer
+from ..models import Event, PersonIdentifier
+
+
+class TestCheckInEventConsumerLoad(ClearTournamentCacheMixin, TestCase):
+    """Simulates several scanners sending check-ins while many screens are
+    listening, and checks that each scan is only written once."""
+
+    NSCANNERS = 4
+    NSUBSCRIBERS = 30
+    NSCANS = 10  # per scanner
+    BATCH_SIZE = 5  # barcodes per scan
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = Tournament.objects.create(slug="checkinload", name="Check-in load")
+        cls.user = get_user_model().objects.create_superuser("checkinadmin", "admin@example.com", "password")
+        institution = Institution.objects.create(code="INS", name="Institution")
+        nadjs = cls.NSCANNERS * cls.NSCANS * cls.BATCH_SIZE
+        adjs = [Adjudicator.objects.create(tournament=cls.tournament, institution=institution, name="Adjudicator %d" % i) for i in range(nadjs)]
+        cls.barcodes = [PersonIdentifier.objects.create(person=adj, barcode=str(100000 + i)).barcode for i, adj in enumerate(adjs)]
+
+    def setUp(self):
+        super().setUp()
+        # Consumers close the database connection after handling each message,
+        # which would end the test's transaction
+        patcher = mock.patch('channels.db.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_communicator(self, user=None):
+        communicator = WebsocketCommunicator(CheckInEventConsumer.as_asgi(), "/ws/%s/checkins/" % self.tournament.slug)
+        communicator.scope['url_route'] = {'args': (), 'kwargs': {'tournament_slug': self.tournament.slug}}
+        communicator.scope['user'] = user or self.user
+        return communicator
+
+    def scan_payloads(self, scanner):
+        for scan in range(self.NSCANS):
+            start = (scanner * self.NSCANS + scan) * self.BATCH_SIZE
+            yield {'barcodes': self.barcodes[start:start + self.BATCH_SIZE], 'status': True,
+                   'type': 'people', 'component_id': "scanner-%d" % scanner}
+
+    async def run_scanners(self):
+        scanners = [self.get_communicator() for i in range(self.NSCANNERS)]
+        subscribers = [self.get_communicator() for i in range(self.NSUBSCRIBERS)]
+        for communicator in scanners + subscribers:
+            connected, subprotocol = await communicator.connect()
+            self.assertTrue(connected)
+
+        for i, scanner in enumerate(scanners):
+            for payload in self.scan_payloads(i):
+                await scanner.send_json_to(payload)
+
+        received = []
+        for communicator in scanners + subscribers:
+            messages = [await communicator.receive_json_from(timeout=5) for i in range(self.NSCANNERS * self.NSCANS)]
+            self.assertTrue(await communicator.receive_nothing())
+            received.append(messages)
+
+        for communicator in scanners + subscribers:
+            await communicator.disconnect()
+        return received
+
+    def test_each_scan_written_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            received = async_to_sync(self.run_scanners)()
+
+        self.assertEqual(Event.objects.filter(tournament=self.tournament).count(), len(self.barcodes))
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "checkins_event"')]
+        self.assertEqual(len(inserts), self.NSCANNERS * self.NSCANS)
+
+        for messages in received:
+            self.assertTrue(all(message.keys() == {'created', 'checkins', 'component_id'} for message in messages))
+            self.assertTrue(all(message['created'] is True for message in messages))
+            barcodes = [checkin['identifier'] for message in messages for checkin in message['checkins']]
+            self.assertCountEqual(barcodes, self.barcodes)
+            owner_names = {checkin['owner_name'] for message in messages for checkin in message['checkins']}
+            self.assertIn("Adjudicator 0", owner_names)
+
+    def test_queries_constant(self):
+        async def scan(barcodes):
+            communicator = self.get_communicator()
+            await communicator.connect()
+            await communicator.send_json_to({'barcodes': barcodes, 'status': True, 'type': 'people', 'component_id': "scanner"})
+            message = await communicator.receive_json_from(timeout=5)
+            await communicator.disconnect()
+            return message
+
+        async_to_sync(scan)(self.barcodes[:1])  # loads the tournament and its preferences
+        query_counts = []
+        for barcodes in [self.barcodes[1:2], self.barcodes[2:102]]:
+            with CaptureQueriesContext(connection) as queries:
+                message = async_to_sync(scan)(barcodes)
+            self.assertEqual(len(message['checkins']), len(barcodes))
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_revoke(self):
+        async def scan(communicator, status, barcodes):
+            await communicator.send_json_to({'barcodes': barcodes, 'status': status, 'type': 'people', 'component_id': "scanner"})
+            return await communicator.receive_json_from(timeout=5)
+
+        async def check_in_and_revoke():
+            communicator = self.get_communicator()
+            await communicator.connect()
+            await scan(communicator, True, self.barcodes[:3])
+            message = await scan(communicator, False, self.barcodes[:2])
+            await communicator.disconnect()
+            return message
+
+        message = async_to_sync(check_in_and_revoke)()
+        self.assertIs(message['created'], False)
+        self.assertCountEqual([checkin['identifier'] for checkin in message['checkins']], self.barcodes[:2])
+        self.assertCountEqual(Event.objects.values_list('identifier__barcode', flat=True), self.barcodes[2:3])
+
+    def test_errors_only_sent_to_scanner(self):
+        async def scan_nonexistent():
+            scanner, subscriber = self.get_communicator(), self.get_communicator()
+            await scanner.connect()
+            await subscriber.connect()
+            await scanner.send_json_to({'barcodes': ["999999"], 'status': True, 'type': 'people', 'component_id': "scanner"})
+            message = await scanner.receive_json_from(timeout=5)
+            nothing = await subscriber.receive_nothing()
+            await asyncio.gather(scanner.disconnect(), subscriber.disconnect())
+            return message, nothing
+
+        message, nothing = async_to_sync(scan_nonexistent)()
+        self.assertEqual(message['component_id'], "scanner")
+        self.assertIn('error', message)
+        self.assertTrue(nothing)
+        self.assertFalse(Event.objects.exists())
@@ -0,0 +1,115 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from participants.models import Adjudicator, Institution, Speaker, Team
+from tournaments.models import Tournament
+from utils.tests import ClearTournamentCacheMixin
+from venues.models import Venue
+
+from ..models import Event, generate_barcode, Identifier, PersonIdentifier, VenueIdentifier
+from ..utils import create_identifiers, get_checkins
+
+
+class TestGetCheckins(ClearTournamentCacheMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = Tournament.objects.create(slug="checkinstatus", name="Check-in status")
+        institution = Institution.objects.create(code="INS", name="Institution")
+        cls.team = Team.objects.create(tournament=cls.tournament, institution=institution, reference="1", short_name="INS 1")
+        cls.speakers = [Speaker.objects.create(team=cls.team, name="Speaker %d" % i) for i in range(3)]
+        cls.adjs = [Adjudicator.objects.create(tournament=cls.tournament, institution=institution, name="Adjudicator %d" % i) for i in range(4)]
+        for person in cls.speakers + cls.adjs[:3]:
+            PersonIdentifier.objects.create(person=person)
+
+        now = timezone.now()
+        cls.first_time = now - timedelta(hours=2)
+        for adj in cls.adjs[:2]:
+            Event.objects.create(identifier=adj.checkin_identifier, tournament=cls.tournament, time=cls.first_time)
+            Event.objects.create(identifier=adj.checkin_identifier, tournament=cls.tournament, time=now - timedelta(hours=1))
+        # Expired check-in
+        Event.objects.create(identifier=cls.adjs[2].checkin_identifier, tournament=cls.tournament, time=now - timedelta(hours=20))
+        for speaker in cls.speakers[:2]:
+            Event.objects.create(identifier=speaker.checkin_identifier, tournament=cls.tournament, time=cls.first_time)
+
+    def test_adjudicators(self):
+        adjs = get_checkins(Adjudicator.objects.filter(tournament=self.tournament).select_related('checkin_identifier').order_by('name'),
+                            self.tournament, 'checkin_window_people')
+        self.assertEqual([adj.checked_in for adj in adjs], [True, True, False, False])
+        self.assertEqual(adjs[0].time, self.first_time)
+        self.assertIsNone(adjs[2].time)
+        self.assertIsNone(adjs[3].barcode)
+
+    def test_teams(self):
+        team, = get_checkins(Team.objects.filter(pk=self.team.pk).prefetch_related('speaker_set__checkin_identifier'),
+                             self.tournament, 'checkin_window_people')
+        self.assertTrue(team.checked_in)  # only one speaker missing
+        self.assertEqual(team.checked_icon, 'shuffle')
+
+    def test_queries_constant(self):
+        query_counts = []
+        for n in [1, 4]:
+            adjs = Adjudicator.objects.filter(tournament=self.tournament).select_related('checkin_identifier')[:n]
+            with CaptureQueriesContext(connection) as queries:
+                get_checkins(adjs, self.tournament, 'checkin_window_people')
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+
+class TestCreateIdentifiers(ClearTournamentCacheMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = Tournament.objects.create(slug="identifiers", name="Identifiers")
+        institution = Institution.objects.create(code="INS", name="Institution")
+        cls.adjs = [Adjudicator.objects.create(tournament=cls.tournament, institution=institution, name="Adjudicator %d" % i) for i in range(30)]
+
+    def adjudicators(self):
+        return Adjudicator.objects.filter(tournament=self.tournament)
+
+    def test_create(self):
+        PersonIdentifier.objects.create(person=self.adjs[0], barcode="100000")
+        create_identifiers(PersonIdentifier, self.adjudicators(), batch_size=7)
+
+        identifiers = PersonIdentifier.objects.filter(person__adjudicator__tournament=self.tournament)
+        self.assertEqual(identifiers.count(), 30)
+        self.assertEqual(identifiers.get(person=self.adjs[0]).barcode, "100000")
+        self.assertEqual(len(set(identifiers.values_list('barcode', flat=True))), 30)
+        for identifier in Identifier.objects.all():  # polymorphic
+            self.assertIsInstance(identifier, PersonIdentifier)
+            self.assertRegex(identifier.barcode, r'^[1-9][0-9]{5}$')
+
+    def test_queries_constant(self):
+        query_counts = []
+        for adjs in [self.adjs[:1], self.adjs[1:]]:
+            with CaptureQueriesContext(connection) as queries:
+                create_identifiers(PersonIdentifier, self.adjudicators().filter(pk__in=[adj.pk for adj in adjs]))
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_existing_barcodes_avoided(self):
+        venue = Venue.objects.create(tournament=self.tournament, name="Room", priority=1)
+        VenueIdentifier.objects.create(venue=venue, barcode="111111")
+        with mock.patch('checkins.utils.generate_barcode', side_effect=["111111", "222222"]):
+            create_identifiers(PersonIdentifier, self.adjudicators().filter(pk=self.adjs[0].pk))
+        self.assertEqual(self.adjs[0].checkin_identifier.barcode, "222222")
+
+    def test_conflict_retried(self):
+        def taken_elsewhere():
+            # Another process takes the first barcode after the existing ones are loaded
+            if not Identifier.objects.filter(barcode="111111").exists():
+                PersonIdentifier.objects.create(person=self.adjs[0], barcode="111111")
+                return "111111"
+            return generate_barcode()
+
+        with mock.patch('checkins.utils.generate_barcode', side_effect=taken_elsewhere):
+            create_identifiers(PersonIdentifier, self.adjudicators(), batch_size=10)
+
+        identifiers = PersonIdentifier.objects.filter(person__adjudicator__tournament=self.tournament)
+        self.assertEqual(identifiers.count(), 30)
+        self.assertEqual(identifiers.get(barcode="111111").person_id, self.adjs[0].pk)
@@ -3,12 +3,16 @@ import logging
 import random
 import string
 
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db import IntegrityError, router, transaction
+from django.db.models import Min, Q
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from .models import DebateIdentifier, Event, PersonIdentifier, VenueIdentifier
+from utils.models import bulk_create_inherited
+
+from .models import DebateIdentifier, Event, generate_barcode, Identifier, PersonIdentifier, VenueIdentifier
 
 logger = logging.getLogger(__name__)
 
@@ -42,17 +46,112 @@ def get_unexpired_checkins(tournament, window_preference_type):
     return Event.objects.filter(filters).select_related('identifier').order_by('time')
 
 
-def create_identifiers(model_to_make, items_to_check):
-    kind = model_to_make.instance_attr
-    identifiers_to_make = items_to_check.filter(checkin_identifier__isnull=True)
+def get_checkin_times(tournament, window_preference_type):
+    """Returns a dict mapping the barcode of each identifier with an unexpired
+    check-in to the time of its first unexpired check-in."""
+    events = get_unexpired_checkins(tournament, window_preference_type).order_by().values(
+        'identifier__barcode').annotate(first_time=Min('time'))
+    return {e['identifier__barcode']: e['first_time'] for e in events}
+
 
-    for item in identifiers_to_make:
-        model_to_make.objects.create(**{kind: item})
+def get_identifiers(barcodes):
+    """Returns the identifiers with the given barcodes, with their owners, in
+    one query for each kind of identifier."""
+    identifiers = []
+    for klass in IDENTIFIER_CLASSES.values():
+        identifiers.extend(klass.objects.filter(barcode__in=barcodes).select_related(klass.instance_attr))
+    return identifiers
 
-    return
 
+def create_checkins(tournament, identifiers, use_team_code_names=False):
+    """Checks in all of `identifiers`, creating their events together, and
+    returns the check-ins as they're sent to websocket clients."""
+    events = Event.objects.bulk_create([Event(identifier=identifier, tournament=tournament) for identifier in identifiers])
+
+    checkins = []
+    for event in events:
+        checkin_dict = event.serialize()
+        owner = event.identifier.owner
+        if hasattr(owner, 'matchup'):
+            checkin_dict['owner_name'] = owner.matchup_codes if use_team_code_names else owner.matchup
+        else:
+            checkin_dict['owner_name'] = owner.name
+        checkins.append(checkin_dict)
+    return checkins
 
-def single_checkin(instance, events):
+
+def revoke_checkins(tournament, identifiers, window_preference_type):
+    """Revokes the unexpired check-ins of all of `identifiers`, and returns the
+    revocations as they're sent to websocket clients."""
+    get_unexpired_checkins(tournament, window_preference_type).filter(identifier__in=identifiers).delete()
+    return [{'identifier': identifier.barcode} for identifier in identifiers]
+
+
+def create_identifiers(model_to_make, items_to_check, batch_size=1000, attempts=5):
+    """Creates identifiers for the items in `items_to_check` that don't have
+    one. Barcodes are drawn in memory, avoiding those already in the database,
+    and the identifiers are inserted `batch_size` at a time. If a batch
+    conflicts with identifiers created elsewhere in the meantime, only the
+    conflicting rows are changed before the batch is retried, up to `attempts`
+    times."""
+    kind = model_to_make.instance_attr
+    item_ids = list(items_to_check.filter(checkin_identifier__isnull=True).values_list('pk', flat=True))
+    if not item_ids:
+        return
+
+    using = router.db_for_write(model_to_make)
+    ctype = ContentType.objects.db_manager(using).get_for_model(model_to_make, for_concrete_model=False)
+    used = set(Identifier.objects.using(using).values_list('barcode', flat=True))
+
+    def draw_barcode():
+        while True:
+            barcode = generate_barcode()
+            if barcode not in used:
+                used.add(barcode)
+                return barcode
+
+    for start in range(0, len(item_ids), batch_size):
+        identifiers = [model_to_make(**{kind + '_id': item_id}, barcode=draw_barcode(), polymorphic_ctype=ctype)
+                       for item_id in item_ids[start:start + batch_size]]
+
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic(using=using):
+                    bulk_create_inherited(model_to_make, identifiers, using)
+                break
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
+                identifiers = _resolve_identifier_conflicts(model_to_make, identifiers, used, draw_barcode, using)
+                if not identifiers:
+                    break
+
+
+def _resolve_identifier_conflicts(model_to_make, identifiers, used, draw_barcode, using):
+    """Redraws the barcodes of `identifiers` that have been taken, and drops
+    those whose items have been given identifiers, since they were drawn."""
+    kind_id = model_to_make.instance_attr + '_id'
+    taken = set(Identifier.objects.using(using).filter(
+        barcode__in=[identifier.barcode for identifier in identifiers]).values_list('barcode', flat=True))
+    done = set(model_to_make.objects.using(using).filter(
+        **{kind_id + '__in': [getattr(identifier, kind_id) for identifier in identifiers]}).values_list(kind_id, flat=True))
+    logger.info("Retrying %d identifiers: %d barcodes taken, %d items given identifiers elsewhere",
+                len(identifiers), len(taken), len(done))
+
+    used.update(taken)
+    remaining = []
+    for identifier in identifiers:
+        if getattr(identifier, kind_id) in done:
+            continue
+        if identifier.barcode in taken:
+            identifier.barcode = draw_barcode()
+        identifier.pk = identifier.id = None  # set by the failed insert
+        identifier._state.adding = True
+        remaining.append(identifier)
+    return remaining
+
+
+def single_checkin(instance, checkin_times):
     instance.checked_icon = ''
     instance.checked_in = False
     try:
@@ -65,7 +164,7 @@ def single_checkin(instance, events):
         instance.checked_tooltip = _("Not checked in; no barcode assigned")
 
     if identifier:
-        instance.time = next((e['time'] for e in events if e['identifier__barcode'] == identifier.barcode), None)
+        instance.time = checkin_times.get(identifier.barcode)
         if instance.time:
             instance.checked_in = True
             instance.checked_icon = 'check'
@@ -73,13 +172,13 @@ def single_checkin(instance, events):
     return instance
 
 
-def multi_checkin(team, events, t):
+def multi_checkin(team, checkin_times, t):
     team.checked_icon = ''
     team.checked_in = False
     tooltips = []
 
     for speaker in team.speaker_set.all():
-        speaker = single_checkin(speaker, events)
+        speaker = single_checkin(speaker, checkin_times)
         if speaker.checked_in:
             tooltip = _("%(speaker)s checked in at %(time)s.") % {'speaker': speaker.get_public_name(t), 'time': speaker.time.strftime('%H:%M')}
         else:
@@ -101,12 +200,11 @@ def multi_checkin(team, events, t):
 
 
 def get_checkins(queryset, t, window_preference_type):
-    events = get_unexpired_checkins(t, window_preference_type).values(
-        'time', 'identifier__barcode')
+    checkin_times = get_checkin_times(t, window_preference_type)
     for instance in queryset:
         if hasattr(instance, 'use_institution_prefix'):
-            instance = multi_checkin(instance, events, t)
+            instance = multi_checkin(instance, checkin_times, t)
         else:
-            instance = single_checkin(instance, events)
+            instance = single_checkin(instance, checkin_times)
 
     return queryset
@@ -5,7 +5,7 @@ from django.utils.translation import gettext_lazy as _, ngettext
 from adjallocation.models import DebateAdjudicator
 from utils.admin import ModelAdmin, TabbycatModelAdminFieldsMixin
 
-from .models import Debate, DebateTeam
+from .models import Debate, DebateTeam, DrawGenerationJob
 
 
 # ==============================================================================
@@ -81,3 +81,14 @@ class DebateAdmin(ModelAdmin):
             updated,
         ) % {'count': updated}
         self.message_user(request, message)
+
+
+# ==============================================================================
+# DrawGenerationJob
+# ==============================================================================
+
+@admin.register(DrawGenerationJob)
+class DrawGenerationJobAdmin(ModelAdmin):
+    list_display = ('id', 'round', 'user', 'status', 'stage', 'created', 'modified')
+    list_filter = ('round__tournament', 'status')
+    raw_id_fields = ('round', 'user')
@@ -12,7 +12,8 @@ from users.permissions import Permission
 from utils.mixins import SuperuserRequiredWebsocketMixin
 from venues.serializers import SimpleDebateVenueSerializer
 
-from .models import Debate, DebateTeam
+from .jobs import run_draw_job, serialize_job
+from .models import Debate, DebateTeam, DrawGenerationJob
 from .serializers import EditDebateTeamsDebateSerializer, SimpleDebateSideStatusSerializer
 
 logger = logging.getLogger(__name__)
@@ -234,3 +235,29 @@ class EditDebateOrPanelWorkerMixin(SyncConsumer):
                 'content': content,
             },
         )
+
+
+class DrawGenerationJobConsumer(SuperuserRequiredWebsocketMixin, RoundWebsocketMixin, JsonWebsocketConsumer):
+    """Sends the progress of the round's draw generation job, starting with its
+    current state on connection. Updates are sent by `draw.jobs.update_job()`."""
+
+    group_prefix = 'drawjobs'
+    access_permission = Permission.GENERATE_DEBATE
+
+    def connect(self):
+        super().connect()
+        if not self.access_permitted():
+            return
+        job = self.round.drawgenerationjob_set.order_by('-created').first()
+        if job is not None:
+            self.send_json(serialize_job(job))
+
+    def broadcast_job(self, event):
+        self.send_json(event['job'])
+
+
+class DrawGenerationWorkerConsumer(SyncConsumer):
+
+    def create_draw(self, event):
+        job = DrawGenerationJob.objects.select_related('round__tournament', 'user').get(pk=event['job_id'])
+        run_draw_job(job)
@@ -5,9 +5,11 @@ from collections import Counter
 from math import log2
 from statistics import pvariance
 
-import munkres
+import numpy as np
 from django.utils.translation import gettext as _
 
+from utils.assignment import DISALLOWED, get_assignment_solver
+
 from .common import BaseBPDrawGenerator, DrawUserError
 from .pairing import PolyPairing
 
@@ -64,6 +66,16 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             "hungarian_preshuffled" - Hungarian algorithm, with the rows and
                                       columns of the cost matrix permuted
                                       randomly beforehand.
+
+        "assignment_solver" - Implementation used to solve the assignment
+                              problem, from `assignment.ASSIGNMENT_SOLVERS`.
+                              Permitted values:
+
+            "jonker_volgenant" - Shortest augmenting path algorithm, vectorised
+                                 with NumPy.
+
+            "munkres"          - The `munkres` package. Much slower; kept as a
+                                 reference implementation.
     """
 
     requires_even_teams = True
@@ -75,13 +87,14 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         "renyi_order"      : 1.0,
         "exponent"         : 4.0,
         "assignment_method": "hungarian_preshuffled",
+        "assignment_solver": "jonker_volgenant",
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.check_teams_for_attribute("points")
         self.check_teams_for_attribute("side_history")
-        self.munkres = munkres.Munkres()
+        self.solver = get_assignment_solver(self.options["assignment_solver"])
 
     def generate(self):
         self._rooms = self.define_rooms([team.points for team in self.teams])
@@ -217,34 +230,60 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
             return (2 - log2(sum([p ** α for p in probs])) / (1 - α)) * n
         return _position_cost_renyi_entropy
 
+    def get_position_costs(self):
+        """Returns an array of shape (nteams, 4), whose (t, pos) element is the
+        position cost (raised to the exponent) of team `t` in position `pos`.
+        Position costs depend only on the position history, so they're computed
+        once for each distinct history, rather than once for each room."""
+        cost = self.get_position_cost_function()
+        exponent = self.options["exponent"]
+
+        costs_by_history = {}
+        for team in self.teams:
+            history = tuple(team.side_history)
+            if history not in costs_by_history:
+                costs_by_history[history] = [cost(pos, team.side_history) ** exponent for pos in range(4)]
+
+        position_costs = [costs_by_history[tuple(team.side_history)] for team in self.teams]
+        return np.array(position_costs, dtype=float).reshape(len(self.teams), 4)
+
+    def get_room_eligibility(self, rooms):
+        """Returns a boolean array of shape (nteams, nrooms), whose (t, r)
+        element is True if team `t` (given its points) is allowed in room `r`.
+        """
+        points = np.array([team.points for team in self.teams])
+
+        eligible_by_allowed = {}
+        columns = []
+        for level, allowed in rooms:
+            key = frozenset(allowed)
+            if key not in eligible_by_allowed:
+                eligible_by_allowed[key] = np.isin(points, list(allowed))
+            columns.append(eligible_by_allowed[key])
+
+        return np.column_stack(columns)
+
     def generate_cost_matrix(self, rooms):
-        """Returns a cost matrix for the tournament.
-        Rows (inner lists) are teams, in the same order as in `self.teams`.
+        """Returns a cost matrix for the tournament, as a NumPy array.
+        Rows are teams, in the same order as in `self.teams`.
         Columns (elements) are positions in rooms, ordered first by room in the
         order returned by `rooms`, then in speaking order (OG, OO, CG, CO).
         Rules:
          - if the team (given its points) is not allowed in the room, use
-           DISALLOWED.
+           DISALLOWED (infinity).
          - otherwise, for each position, use the position cost for that position
            (for a team with that position history).
+        The matrix is assembled by broadcasting the position costs of each team
+        over the room eligibility mask.
         """
         nteams = len(self.teams)
-        cost = self.get_position_cost_function()
-        exponent = self.options["exponent"]
+        assert len(rooms) * 4 == nteams
 
-        costs = []
-        for team in self.teams:
-            row = []
-            for level, allowed in rooms:
-                if team.points not in allowed:
-                    row.extend([munkres.DISALLOWED] * 4)
-                else:
-                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
-            assert len(row) == nteams
-            costs.append(row)
-
-        assert len(costs) == nteams
-        return costs
+        position_costs = self.get_position_costs()    # (nteams, 4)
+        eligible = self.get_room_eligibility(rooms)   # (nteams, nrooms)
+
+        costs = np.where(eligible[:, :, np.newaxis], position_costs[:, np.newaxis, :], DISALLOWED)
+        return costs.reshape(nteams, nteams)
 
     # Assignment algorithms
 
@@ -261,20 +300,20 @@ class BPHungarianDrawGenerator(BaseBPDrawGenerator):
         start = time.perf_counter()
         logger.info("Running assignment algorithm for %d teams...", len(costs))
         indices = function(costs)
-        total_cost = sum(costs[i][j] for i, j in indices)
+        total_cost = sum(costs[i, j] for i, j in indices)
         elapsed = time.perf_counter() - start
         logger.info("Assignment took %.2f seconds, total cost: %f", elapsed, total_cost)
         return indices
 
     def _assign_hungarian(self, costs):
-        return self.munkres.compute(costs)
+        return self.solver(costs)
 
     def _assign_hungarian_preshuffled(self, costs):
         n = len(costs)
-        K = random.sample(range(n), n)             # noqa: N806
-        J = random.sample(range(n), n)             # noqa: N806
-        C = [[costs[i][j] for j in J] for i in K]  # noqa: N806
-        indices = self.munkres.compute(C)
+        K = random.sample(range(n), n)  # noqa: N806
+        J = random.sample(range(n), n)  # noqa: N806
+        C = costs[np.ix_(K, J)]         # noqa: N806
+        indices = self.solver(C)
         return [(K[i], J[j]) for i, j in indices]
 
     # Make pairings
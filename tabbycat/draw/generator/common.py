@@ -171,6 +171,8 @@ class BasePairDrawGenerator(BaseDrawGenerator):
         "pairing_penalty"       : 0,
         "avoid_conflicts"       : "off",
         "max_times_on_one_side" : 0,
+        "matching_engine"       : "networkx",
+        "matching_window"       : 10,
     }
 
     TEAMS_IN_DEBATE = 2
@@ -3,7 +3,9 @@ from typing import Optional, TYPE_CHECKING
 
 import munkres
 import networkx as nx
+import numpy as np
 
+from .matching import DISALLOWED, sparse_min_weight_matching
 from ..types import DebateSide
 
 if TYPE_CHECKING:
@@ -18,7 +20,73 @@ def sign(n: int) -> int:
         return 0
 
 
+def history_matrix(teams):
+    """Returns a symmetric array whose (i, j) element is the number of times
+    `teams[i]` and `teams[j]` have met. If every team has a `team_history`
+    dict (see `BaseDrawManager._populate_team_history()`), this is built from
+    those; otherwise, each pair of teams is asked via `seen()`."""
+    n = len(teams)
+    matrix = np.zeros((n, n))
+
+    if all(hasattr(team, "team_history") for team in teams):
+        index = {team.id: i for i, team in enumerate(teams)}
+        rows, cols, counts = [], [], []
+        for i, team in enumerate(teams):
+            for other_id, count in team.team_history.items():
+                j = index.get(other_id)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+                    counts.append(count)
+        matrix[rows, cols] = counts
+        matrix[cols, rows] = counts
+        return matrix
+
+    for i, t1 in enumerate(teams):
+        for j in range(i + 1, n):
+            matrix[i, j] = matrix[j, i] = t1.seen(teams[j])
+    return matrix
+
+
+def institution_matrix(teams):
+    """Returns a symmetric boolean array whose (i, j) element is True if
+    `teams[i]` and `teams[j]` are from the same institution. Teams with no
+    institution aren't from the same institution as any team."""
+    codes = {}
+    institutions = []
+    for team in teams:
+        # Use the ID where there is one, to avoid fetching Institution objects
+        inst = team.institution_id if hasattr(team, "institution_id") else team.institution
+        institutions.append(-1 if inst is None else codes.setdefault(inst, len(codes)))
+    institutions = np.array(institutions, dtype=int)
+    return (institutions[:, np.newaxis] == institutions[np.newaxis, :]) & (institutions[:, np.newaxis] >= 0)
+
+
 class GraphGeneratorMixin:
+    """Pairs teams by finding a minimum-weight matching in a graph of teams.
+
+    Options:
+        "matching_engine" - How to find the matching. Permitted values:
+
+            "networkx" - Build the complete graph of each bracket, calling
+                         `assignment_cost()` for each edge, and match it using
+                         NetworkX.
+
+            "sparse"   - Build an integer cost array for each bracket using
+                         `assignment_cost_matrix()`, prune it to candidate
+                         edges, and match the pruned graph. Much faster for
+                         large brackets. See `matching.candidate_mask()`.
+
+        "matching_window" - (int) For the "sparse" engine, the initial size of
+                            the candidate window. This is automatically widened
+                            if the pruned graph has no perfect matching.
+    """
+
+    MATCHING_ENGINE_FUNCTIONS = {
+        "networkx": "_match_networkx",
+        "sparse"  : "_match_sparse",
+    }
+
     def avoid_conflicts(self, pairings):
         """Graph optimisation avoids conflicts, so method is extraneous."""
         pass
@@ -57,31 +125,75 @@ class GraphGeneratorMixin:
 
         return penalty
 
+    def assignment_cost_matrix(self, teams, size, bracket=None):
+        """Returns an array whose (i, j) element, for i < j, is the same as
+        `self.assignment_cost(teams[i], teams[j], size, bracket)`, with
+        infinity in place of None. Subclasses that override `assignment_cost()`
+        should also override this method."""
+        n = len(teams)
+        costs = np.zeros((n, n))
+
+        if self.options["avoid_history"]:
+            costs += history_matrix(teams) * self.options["history_penalty"]
+        if self.options["avoid_institution"]:
+            costs += institution_matrix(teams) * self.options["institution_penalty"]
+
+        # Add penalty of a side imbalance
+        if self.options["side_allocations"] == "balance" and self.options["side_penalty"] > 0:
+            affs, negs = np.array([t.side_history for t in teams], dtype=float).reshape(n, 2).T
+
+            if self.options["max_times_on_one_side"] > 0:
+                # Same condition as assignment_cost(), applied to rows i < j
+                most = np.maximum(np.maximum(affs, negs)[:, np.newaxis], affs[np.newaxis, :])
+                costs[most > self.options["max_times_on_one_side"]] = np.inf
+
+            imbalances = affs - negs
+            imbalance = np.maximum(0, np.multiply.outer(np.sign(imbalances), np.sign(imbalances)))
+            magnitude = np.add.outer(np.abs(imbalances), np.abs(imbalances)) // 2
+            costs += imbalance * magnitude * self.options["side_penalty"]
+
+        np.fill_diagonal(costs, np.inf)
+        return costs
+
     def get_n_teams(self, teams: list['Team']) -> int:
         return len(teams)
 
     def generate_pairings(self, brackets):
-        """Creates an undirected weighted graph for each bracket and gets the minimum weight matching"""
+        """Finds the minimum weight matching for each bracket, using the
+        matching engine specified in the options."""
         from .pairing import Pairing
+        match = self.get_option_function("matching_engine", self.MATCHING_ENGINE_FUNCTIONS)
         pairings = OrderedDict()
         i = 0
         for j, (points, teams) in enumerate(brackets.items()):
             pairings[points] = []
-            graph = nx.Graph()
             n_teams = self.get_n_teams(teams)
-            for k, t1 in enumerate(teams):
-                for t2 in teams[k+1:]:
-                    penalty = self.assignment_cost(t1, t2, n_teams, j)
-                    if penalty is not None:
-                        graph.add_edge(t1, t2, weight=penalty)
-
-            # nx.nx_pydot.write_dot(graph, sys.stdout)
-            for pairing in sorted(nx.min_weight_matching(graph), key=lambda p: self.room_rank_ordering(p)):
+            for pairing in sorted(match(teams, n_teams, j), key=lambda p: self.room_rank_ordering(p)):
                 i += 1
                 pairings[points].append(Pairing(teams=pairing, bracket=points, room_rank=i))
 
         return pairings
 
+    def _match_networkx(self, teams, size, bracket):
+        """Creates an undirected weighted graph for the bracket and gets the minimum weight matching"""
+        graph = nx.Graph()
+        for k, t1 in enumerate(teams):
+            for t2 in teams[k+1:]:
+                penalty = self.assignment_cost(t1, t2, size, bracket)
+                if penalty is not None:
+                    graph.add_edge(t1, t2, weight=penalty)
+
+        # nx.nx_pydot.write_dot(graph, sys.stdout)
+        return nx.min_weight_matching(graph)
+
+    def _match_sparse(self, teams, size, bracket):
+        """Computes the cost array for the bracket and gets the minimum weight
+        matching of the pruned graph"""
+        costs = self.assignment_cost_matrix(teams, size, bracket)
+        costs = np.where(np.isinf(costs), DISALLOWED, np.rint(costs)).astype(np.int64)
+        matching = sparse_min_weight_matching(costs, self.options["matching_window"])
+        return [(teams[i], teams[j]) for i, j in matching]
+
     def room_rank_ordering(self, p):
         return min([t.subrank for t in p if t.subrank is not None], default=0)
 
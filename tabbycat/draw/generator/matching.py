@@ -0,0 +1,65 @@
+"""Minimum-weight matching on pruned graphs, for the graph-based two-team draw
+generators.
+
+Costs are given as square integer arrays, with vertices (teams) in rank order.
+Only the upper triangle (i < j) is read. Pairs that may never be matched are
+marked with `DISALLOWED` (or any other negative value)."""
+
+import logging
+
+import networkx as nx
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DISALLOWED = -1
+
+
+def candidate_mask(costs, window):
+    """Returns a symmetric boolean array marking the candidate edges of the
+    pruned graph. Each vertex is joined to the `window` vertices on either side
+    of it in rank order, and to its `window` cheapest partners (so that, for
+    example, partners half a bracket away are still considered when pairing by
+    slide)."""
+    n = len(costs)
+    upper = np.triu(costs, k=1)
+    symmetric = upper + upper.T
+    allowed = symmetric >= 0
+    np.fill_diagonal(allowed, False)
+
+    ranks = np.arange(n)
+    mask = np.abs(ranks[:, np.newaxis] - ranks[np.newaxis, :]) <= window
+
+    k = min(window, n - 1)
+    if k > 0:
+        ordered = np.where(allowed, symmetric, np.iinfo(np.int64).max)
+        nearest = np.argpartition(ordered, k - 1, axis=1)[:, :k]
+        by_cost = np.zeros((n, n), dtype=bool)
+        by_cost[ranks[:, np.newaxis], nearest] = True
+        mask |= by_cost | by_cost.T
+
+    return mask & allowed
+
+
+def sparse_min_weight_matching(costs, window=10):
+    """Returns a minimum-weight maximum-cardinality matching, as a set of
+    `(i, j)` index pairs, in the graph whose edges are the candidates given by
+    `candidate_mask()`. If this graph has no perfect matching, the window is
+    doubled and the search repeated, up to the complete graph."""
+    costs = np.asarray(costs, dtype=np.int64)
+    n = len(costs)
+    window = max(window, 1)
+
+    while True:
+        rows, cols = np.nonzero(np.triu(candidate_mask(costs, window), k=1))
+        graph = nx.Graph()
+        graph.add_nodes_from(range(n))
+        graph.add_weighted_edges_from(zip(rows.tolist(), cols.tolist(), costs[rows, cols].tolist()))
+
+        matching = nx.min_weight_matching(graph)
+        if 2 * len(matching) == n or window >= n - 1:
+            return matching
+
+        logger.info("No perfect matching with window %d (%d edges, %d of %d vertices matched), widening",
+                    window, len(rows), 2 * len(matching), n)
+        window *= 2
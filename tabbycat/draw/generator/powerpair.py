@@ -4,6 +4,7 @@ from itertools import groupby
 from operator import attrgetter
 from typing import Optional, TYPE_CHECKING
 
+import numpy as np
 from django.utils.translation import gettext as _
 
 from .common import BasePairDrawGenerator, DrawFatalError, DrawUserError
@@ -321,6 +322,31 @@ class GraphCostMixin:
                 subranks.append(t.subrank)
         return subpool_penalty_func(subranks, size, bracket) * self.options["pairing_penalty"]
 
+    def assignment_cost_matrix(self, teams, size, bracket=None):
+        costs = super().assignment_cost_matrix(teams, size)
+
+        # Add penalty for seeing the pullup again
+        if self.options["pullup_debates_penalty"]:
+            points = np.array([t.points for t in teams])
+            pullup_debates = np.array([t.pullup_debates for t in teams])
+            differ = np.not_equal.outer(points, points)
+            costs += np.where(differ, np.maximum.outer(pullup_debates, pullup_debates), 0) * self.options["pullup_debates_penalty"]
+
+        # Add penalty for deviations in the pairing method
+        if self.options["pairing_method"] != "random":
+            costs += self.calculate_pairing_penalty_matrix(teams, size, bracket)
+        return costs
+
+    def calculate_pairing_penalty_matrix(self, teams, size, bracket=None):
+        """Array version of `calculate_pairing_penalty()`. The pairing functions
+        are called with arrays of subranks, and `size` may also be an array."""
+        subpool_penalty_func = self.get_option_function("pairing_method", self.PAIRING_FUNCTIONS)
+
+        # Set the subrank to be last for pulled-up teams
+        subranks = np.array([size if t.subrank is None else t.subrank for t in teams])
+        penalties = subpool_penalty_func([subranks[:, np.newaxis], subranks[np.newaxis, :]], size, bracket)
+        return penalties * self.options["pairing_penalty"]
+
     @staticmethod
     def _pairings_slide(teams, size: int, bracket: Optional[int] = None) -> int:
         return abs(abs(teams[0] - teams[1]) - size // 2)
@@ -516,6 +542,29 @@ class SingleGraphPowerPairedDrawGenerator(GraphCostMixin, GraphGeneratorMixin, B
             penalty += pullup_team.pullup_magnitude
         return penalty
 
+    def assignment_cost_matrix(self, teams, size, bracket=None):
+        points = np.array([t.points for t in teams], dtype=int)
+        min_points = np.minimum.outer(points, points)
+        max_points = np.maximum.outer(points, points)
+        n_teams_per_points = np.array([self.n_teams_per_points[p] for p in range(len(self.n_teams_per_points))], dtype=int)
+        sizes = n_teams_per_points[max_points]
+        costs = super().assignment_cost_matrix(teams, sizes)
+
+        # Add penalty for pulling up
+        is_pullup = max_points - min_points
+        if is_pullup.any():
+            # Don't allow pulling up more than one bracket (all in between are empty);
+            # nonempty_below[p] is the number of nonempty brackets below p points
+            nonempty_below = np.concatenate([[0], np.cumsum(n_teams_per_points != 0)])
+            nonempty_between = nonempty_below[max_points] - nonempty_below[min_points + 1]
+            costs[(is_pullup > 1) & (nonempty_between > 0)] = np.inf
+
+            # Include penalty for the pulled up team
+            pullup_magnitudes = np.array([t.pullup_magnitude for t in teams])
+            lower_magnitude = np.where(np.less.outer(points, points), pullup_magnitudes[:, np.newaxis], pullup_magnitudes[np.newaxis, :])
+            costs += np.where(is_pullup >= 1, lower_magnitude, 0)
+        return costs
+
     def calculate_pairing_penalty(self, t1, t2, size, bracket=None) -> int:
         subpool_penalty_func = self.get_option_function("pairing_method", self.PAIRING_FUNCTIONS)
 
@@ -526,6 +575,18 @@ class SingleGraphPowerPairedDrawGenerator(GraphCostMixin, GraphGeneratorMixin, B
 
         return subpool_penalty_func([t1.subrank, t2.subrank], size, bracket) * self.options["pairing_penalty"]
 
+    def calculate_pairing_penalty_matrix(self, teams, size, bracket=None):
+        subpool_penalty_func = self.get_option_function("pairing_method", self.PAIRING_FUNCTIONS)
+        points = np.array([t.points for t in teams])
+        subranks = np.array([t.subrank for t in teams])
+
+        # Set the subrank to be last for pulled-up teams
+        in_bracket_subranks = np.where(np.greater_equal.outer(points, points), subranks[:, np.newaxis], subranks[np.newaxis, :])
+        pullup_penalties = subpool_penalty_func([in_bracket_subranks, size+1], size+1, bracket)
+        penalties = subpool_penalty_func([subranks[:, np.newaxis], subranks[np.newaxis, :]], size, bracket)
+
+        return np.where(np.not_equal.outer(points, points), pullup_penalties, penalties) * self.options["pairing_penalty"]
+
     def annotate_team_pullup_precedence(self, teams):
         sort_function = self.get_option_function("odd_bracket", self.ODD_BRACKET_FUNCTIONS)
 
@@ -0,0 +1,199 @@
+"""Draw search: runs a draw generator several times with different random
+seeds, in a pool of worker processes, and keeps the candidate draw with the
+lowest penalty score.
+
+Worker processes don't have access to the database, so teams are sent to them
+as `TeamSnapshot`s, which carry a copy of the attributes that draw generators
+use and answer `seen()` from a preloaded meeting history. The pairings that
+come back are mapped back onto the original teams before they're returned."""
+
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from statistics import median
+
+from . import DrawGenerator
+
+logger = logging.getLogger(__name__)
+
+SCORE_WEIGHTS = ("history_penalty", "institution_penalty", "side_penalty", "pullup_penalty")
+
+
+class TeamSnapshot:
+    """Picklable stand-in for a team, for use in worker processes.
+
+    `team_history` is a dict mapping the IDs of other teams to the number of
+    times this team has met them, as for teams in `BaseDrawManager`."""
+
+    SNAPSHOT_TYPES = (int, float, str, bool, list, tuple, type(None))
+
+    def __init__(self, team, index, history):
+        for key, value in vars(team).items():
+            if not key.startswith("_") and isinstance(value, self.SNAPSHOT_TYPES):
+                setattr(self, key, value)
+        self.id = team.id
+        self.index = index
+        self.institution = team.institution_id if hasattr(team, "institution_id") else getattr(team, "institution", None)
+        self.team_history = history
+
+    def __repr__(self):
+        return "<TeamSnapshot {0.id}>".format(self)
+
+    def seen(self, other):
+        return self.team_history.get(other.id, 0)
+
+    def same_institution(self, other):
+        return self.institution is not None and self.institution == other.institution
+
+
+class DrawCandidate:
+    """Result of one run of the draw generator in a draw search."""
+
+    def __init__(self, seed, pairings, score, components, elapsed):
+        self.seed = seed
+        self.pairings = pairings
+        self.score = score
+        self.components = components
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return "<DrawCandidate seed={0.seed} score={0.score} ({0.elapsed:.2f}s)>".format(self)
+
+
+def score_draw(pairings, weights):
+    """Returns a tuple `(score, components)`, where `components` is a dict of
+    the unweighted history conflicts, institution conflicts, side imbalance
+    and pull-ups in the draw, and `score` is their sum weighted by `weights`.
+    Lower is better.
+
+    Side imbalance is the total, over all teams, of the difference between the
+    most and least times a team will have been on a side after this round. A
+    pull-up is a team with fewer points than another team in its debate."""
+    history = institution = imbalance = pullups = 0
+
+    for pairing in pairings:
+        teams = pairing.teams
+        for i, team in enumerate(teams):
+            for other in teams[i+1:]:
+                history += team.seen(other)
+                institution += team.same_institution(other)
+
+            side_history = getattr(team, "side_history", None)
+            if side_history is not None and len(side_history) == len(teams):
+                sides = list(side_history)
+                sides[i] += 1
+                imbalance += max(sides) - min(sides)
+
+        points = [getattr(team, "points", None) for team in teams]
+        if None not in points:
+            pullups += sum(p < max(points) for p in points)
+
+    components = {
+        "history_penalty": history,
+        "institution_penalty": institution,
+        "side_penalty": imbalance,
+        "pullup_penalty": pullups,
+    }
+    score = sum(weights.get(key, 0) * value for key, value in components.items())
+    return score, components
+
+
+def shuffle_ties(teams, rng):
+    """Reorders teams that are tied in the standings (i.e., have the same
+    `standings_rank`), as a random tiebreak would have, swapping their subranks
+    accordingly. Operates in-place."""
+    start = 0
+    while start < len(teams):
+        end = start + 1
+        while end < len(teams) and teams[end].standings_rank == teams[start].standings_rank:
+            end += 1
+        if end - start > 1:
+            group = teams[start:end]
+            subranks = [team.subrank for team in group]
+            rng.shuffle(group)
+            for team, subrank in zip(group, subranks):
+                team.subrank = subrank
+            teams[start:end] = group
+        start = end
+
+
+def generate_candidate(teams_in_debate, generator_type, teams, options, weights, seed):
+    """Generates and scores one candidate draw. This is the function run by
+    worker processes."""
+    start = time.perf_counter()
+    random.seed(seed)
+    if teams and all(hasattr(team, "standings_rank") for team in teams):
+        teams = list(teams)
+        shuffle_ties(teams, random)
+
+    generator = DrawGenerator(teams_in_debate, generator_type, teams, **options)
+    pairings = generator.generate()
+    score, components = score_draw(pairings, weights)
+    return DrawCandidate(seed, pairings, score, components, time.perf_counter() - start)
+
+
+class DrawSearch:
+    """Generates `candidates` draws with the given generator type and options,
+    and returns the one with the lowest score from `score_draw()`.
+
+    `history` is a dict mapping each team ID to a dict, which maps the IDs of
+    other teams to the number of times those teams have met, as `Team.seen()`
+    would return. `weights` is a dict of the penalties in `SCORE_WEIGHTS`."""
+
+    def __init__(self, teams_in_debate, generator_type, teams, history, weights, candidates, max_workers=None):
+        self.teams_in_debate = teams_in_debate
+        self.generator_type = generator_type
+        self.teams = list(teams)
+        self.history = history
+        self.weights = weights
+        self.candidates = candidates
+        self.max_workers = max_workers or min(candidates, os.cpu_count() or 1)
+        self.results = []
+
+    def run(self, **options):
+        """Runs the search and returns the pairings of the best candidate. All
+        candidates are kept, sorted by score, in `self.results`."""
+        snapshots = [TeamSnapshot(team, i, self.history.get(team.id, {})) for i, team in enumerate(self.teams)]
+        seeds = [random.randrange(2**32) for i in range(self.candidates)]
+        args = (self.teams_in_debate, self.generator_type, snapshots, options, self.weights)
+
+        start = time.perf_counter()
+        if self.max_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(generate_candidate, *args, seed) for seed in seeds]
+                results = [future.result() for future in futures]
+        else:
+            # Generators and tiebreaks may modify teams, so each candidate needs its own copy
+            results = [generate_candidate(self.teams_in_debate, self.generator_type, deepcopy(snapshots),
+                options, self.weights, seed) for seed in seeds]
+        self.wall_time = time.perf_counter() - start
+
+        self.results = sorted(results, key=lambda c: c.score)
+        logger.info("Searched %d candidate draws in %.2f seconds, scores: %s", len(results),
+                    self.wall_time, ", ".join(str(c.score) for c in self.results))
+
+        best = self.results[0]
+        for pairing in best.pairings:
+            self._restore_teams(pairing)
+        return best.pairings
+
+    def _restore_teams(self, pairing):
+        pairing.teams = [self.teams[team.index] for team in pairing.teams]
+        pairing.team_flags = {self.teams[team.index]: flags for team, flags in pairing.team_flags.items()}
+
+    def summary(self):
+        """Returns a dict summarising the score distribution and timings."""
+        scores = [c.score for c in self.results]
+        times = [c.elapsed for c in self.results]
+        return {
+            "candidates": len(self.results),
+            "best": scores[0],
+            "median": median(scores),
+            "worst": scores[-1],
+            "mean_time": sum(times) / len(times),
+            "wall_time": self.wall_time,
+            "components": self.results[0].components,
+        }
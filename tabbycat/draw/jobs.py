@@ -0,0 +1,178 @@
+"""Draw generation jobs.
+
+Generating a draw can take a while, particularly when searching over candidate
+draws, so it's done by the "draw" worker rather than in the request that asks
+for it. Each job's state is kept in a `DrawGenerationJob`, and changes to it are
+sent to the round's "drawjobs" websocket group, which the status page listens
+to. If there's no worker (see `settings.DRAW_GENERATION_IN_WORKER`), the job
+is run in the request instead."""
+
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from actionlog.models import ActionLogEntry
+from standings.base import StandingsError
+from standings.views import BaseStandingsView
+from tournaments.models import Round
+from utils.misc import reverse_tournament
+from venues.allocator import allocate_venues
+from venues.models import VenueConstraint
+
+from .generator import DrawFatalError, DrawUserError
+from .manager import DrawManager
+from .models import DrawGenerationJob
+
+logger = logging.getLogger(__name__)
+
+# Jobs that have been queued or running for this long without any progress are
+# assumed to have been lost, e.g. because the worker was restarted.
+STALE_JOB_TIMEOUT = timedelta(minutes=30)
+
+
+def generate_in_worker():
+    if settings.DRAW_GENERATION_IN_WORKER is not None:
+        return settings.DRAW_GENERATION_IN_WORKER
+    return settings.CHANNEL_LAYERS['default']['BACKEND'] != 'channels.layers.InMemoryChannelLayer'
+
+
+def get_group_name(round):
+    # Matches RoundWebsocketMixin.group_name() in DrawGenerationJobConsumer
+    return 'drawjobs_%s_%d' % (round.tournament.slug, round.seq)
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'status': job.status,
+        'stage': job.stage,
+        'stage_display': job.get_stage_display() if job.stage else _("Waiting to start"),
+        'finished': job.finished,
+    }
+
+
+def update_job(job, **fields):
+    """Saves the given fields on the job, and sends its new state to anyone
+    watching it."""
+    for field, value in fields.items():
+        setattr(job, field, value)
+    job.save(update_fields=[*fields.keys(), 'modified'])
+    async_to_sync(get_channel_layer().group_send)(get_group_name(job.round), {
+        'type': 'broadcast_job',
+        'job': serialize_job(job),
+    })
+
+
+def start_draw_job(round, user, ip_address=None):
+    """Starts generating the draw for the given round, unless that's already
+    happening. Returns a tuple `(job, created)`."""
+
+    # Give up on jobs that were lost, so that they don't block this one
+    round.drawgenerationjob_set.filter(status__in=DrawGenerationJob.ACTIVE_STATUSES,
+        modified__lt=timezone.now() - STALE_JOB_TIMEOUT).update(status=DrawGenerationJob.Status.FAILED)
+
+    try:
+        with transaction.atomic():
+            job = DrawGenerationJob.objects.create(round=round, user=user, ip_address=ip_address)
+    except IntegrityError:
+        # There's already a job for this round (the unique constraint only
+        # covers active jobs); if it's finished since, it's still the one to show
+        logger.info("Draw generation for %s is already in progress", round)
+        return round.drawgenerationjob_set.latest('created'), False
+
+    if generate_in_worker():
+        transaction.on_commit(lambda: async_to_sync(get_channel_layer().send)("draw", {
+            'type': 'create_draw',
+            'job_id': job.id,
+        }))
+    else:
+        run_draw_job(job)
+    return job, True
+
+
+def run_draw_job(job):
+    round = job.round
+    if round.draw_status != Round.Status.NONE:
+        fail_job(job, _("Could not create draw for %(round)s, there was already a draw!") % {'round': round.name})
+        return
+
+    update_job(job, status=DrawGenerationJob.Status.RUNNING)
+
+    try:
+        manager = DrawManager(round)
+        manager.create(progress=lambda stage: update_job(job, stage=stage))
+        if manager.search is not None:
+            job.messages.append((messages.INFO, get_search_message(manager.search)))
+    except DrawUserError as e:
+        logger.warning("User error creating draw: " + str(e), exc_info=True)
+        fail_job(job, _(
+            "<p>The draw could not be created, for the following reason: "
+            "<em>%(message)s</em></p>\n"
+            "<p>Please fix this issue before attempting to create the draw.</p>",
+        ) % {'message': str(e)})
+        return
+    except DrawFatalError as e:
+        logger.exception("Fatal error creating draw: " + str(e))
+        fail_job(job, _(
+            "<p>The draw could not be created, because the following error occurred: "
+            "<em>%(message)s</em></p>\n"
+            "<p>If this issue persists and you're not sure how to resolve it, please "
+            "contact the developers.</p>",
+        ) % {'message': str(e)})
+        return
+    except StandingsError as e:
+        logger.exception("Error generating standings for draw: " + str(e))
+        message = _(
+            "<p>The team standings could not be generated, because the following error occurred: "
+            "<em>%(message)s</em></p>\n"
+            "<p>Because generating the draw uses the current team standings, this "
+            "prevents the draw from being generated.</p>",
+        ) % {'message': str(e)}
+        standings_options_url = reverse_tournament('options-tournament-section', round.tournament, kwargs={'section': 'standings'})
+        instructions = BaseStandingsView.admin_standings_error_instructions % {'standings_options_url': standings_options_url}
+        fail_job(job, message + instructions)
+        return
+    except Exception:
+        # Don't leave the job running, or it'd block any further attempts
+        fail_job(job, _("The draw could not be created, because an unexpected error occurred."))
+        raise
+
+    relevant_adj_venue_constraints = VenueConstraint.objects.filter(
+            adjudicator__in=round.tournament.relevant_adjudicators)
+    if not relevant_adj_venue_constraints.exists():
+        update_job(job, stage=DrawGenerationJob.Stage.VENUES)
+        allocate_venues(round)
+    else:
+        job.messages.append((messages.WARNING, _("Rooms were not auto-allocated because there are one or more adjudicator room constraints. "
+            "You should run room allocations after allocating adjudicators.")))
+
+    ActionLogEntry.objects.log(type=ActionLogEntry.ActionType.DRAW_CREATE, user=job.user, ip_address=job.ip_address,
+            round=round, tournament=round.tournament, content_object=round)
+    update_job(job, status=DrawGenerationJob.Status.DONE, messages=job.messages)
+
+
+def fail_job(job, message):
+    job.messages.append((messages.ERROR, message))
+    update_job(job, status=DrawGenerationJob.Status.FAILED, messages=job.messages)
+
+
+def get_search_message(search):
+    summary = search.summary()
+    return _("Generated %(candidates)d candidate draws in %(wall_time).1f seconds (%(mean_time).2f seconds "
+        "per candidate) and kept the one with the lowest penalty score. Scores: best %(best)s, median "
+        "%(median)s, worst %(worst)s. The kept draw has %(history)d history conflicts, %(institution)d "
+        "institution conflicts, %(pullups)d pull-ups and a total side imbalance of %(imbalance)d.") % {
+        'candidates': summary['candidates'], 'wall_time': summary['wall_time'], 'mean_time': summary['mean_time'],
+        'best': summary['best'], 'median': summary['median'], 'worst': summary['worst'],
+        'history': summary['components']['history_penalty'],
+        'institution': summary['components']['institution_penalty'],
+        'pullups': summary['components']['pullup_penalty'],
+        'imbalance': summary['components']['side_penalty'],
+    }
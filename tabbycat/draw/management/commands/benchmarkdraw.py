@@ -0,0 +1,136 @@
+import logging
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from utils.assignment import ASSIGNMENT_SOLVERS
+
+from ...generator import DrawGenerator
+from ...generator.bphungarian import BPHungarianDrawGenerator
+from ...generator.graph import GraphGeneratorMixin
+
+
+class BenchmarkTeam:
+    """Team-like object for draw generators, with an in-memory history."""
+
+    def __init__(self, id, institution, points, side_history):
+        self.id = id
+        self.institution = institution
+        self.points = points
+        self.side_history = side_history
+        self.team_history = Counter()
+        self.subrank = None
+
+    def __repr__(self):
+        return "<BenchmarkTeam {0}>".format(self.id)
+
+    def seen(self, other):
+        return self.team_history[other.id]
+
+    def same_institution(self, other):
+        return self.institution is not None and self.institution == other.institution
+
+
+class Command(BaseCommand):
+
+    help = "Times draw generators on randomly generated fields of teams. " \
+           "This doesn't read from or write to the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("format", choices=["bp", "graph"],
+            help="'bp' to time the BP power-paired draw generator for each assignment solver, "
+                 "'graph' to time minimum cost matching two-team draws for each matching engine")
+        parser.add_argument("-n", "--teams", type=int, nargs="+", default=[100, 200, 400],
+            help="Number of teams in each field to benchmark (default: 100 200 400)")
+        parser.add_argument("-r", "--rounds", type=int, default=6,
+            help="Number of rounds that have already happened (default: 6)")
+        parser.add_argument("-s", "--solvers", nargs="+", choices=list(ASSIGNMENT_SOLVERS.keys()),
+            default=list(ASSIGNMENT_SOLVERS.keys()), help="Assignment solvers to benchmark, for 'bp' (default: all)")
+        parser.add_argument("-e", "--engines", nargs="+", choices=list(GraphGeneratorMixin.MATCHING_ENGINE_FUNCTIONS.keys()),
+            default=list(GraphGeneratorMixin.MATCHING_ENGINE_FUNCTIONS.keys()),
+            help="Matching engines to benchmark, for 'graph' (default: all)")
+        parser.add_argument("--avoid-conflicts", choices=["graph", "graph_one"], default="graph_one",
+            help="Conflict avoidance method, for 'graph' (default: graph_one)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Random seed for generating the fields")
+
+    def generate_bp_teams(self, nteams, nrounds, rng):
+        teams = []
+        for i in range(nteams):
+            side_history = [0, 0, 0, 0]
+            for r in range(nrounds):
+                side_history[rng.randrange(4)] += 1
+            points = sum(rng.randrange(4) for r in range(nrounds))
+            teams.append(BenchmarkTeam(i, None, points, side_history))
+        return teams
+
+    def generate_two_team_teams(self, nteams, nrounds, rng):
+        teams = [BenchmarkTeam(i, rng.randrange(nteams // 3), 0, [0, 0]) for i in range(nteams)]
+        for r in range(nrounds):
+            rng.shuffle(teams)
+            for aff, neg in zip(teams[::2], teams[1::2]):
+                aff.team_history[neg.id] += 1
+                neg.team_history[aff.id] += 1
+                aff.side_history[0] += 1
+                neg.side_history[1] += 1
+                rng.choice([aff, neg]).points += 1
+
+        teams.sort(key=lambda t: -t.points)
+        for i, team in enumerate(teams):
+            team.subrank = 1 if i == 0 or teams[i-1].points != team.points else teams[i-1].subrank + 1
+        return teams
+
+    def handle(self, *args, **options):
+        loglevel = [logging.WARNING, logging.INFO, logging.DEBUG, logging.DEBUG][options["verbosity"]]
+        logging.getLogger("draw").setLevel(loglevel)
+
+        rng = random.Random(options["seed"])
+
+        if options["format"] == "bp":
+            self.benchmark_bp(rng, **options)
+        else:
+            self.benchmark_graph(rng, **options)
+
+    def benchmark_bp(self, rng, **options):
+        self.stdout.write("{:>6} {:<18} {:>12} {:>12} {:>16}".format(
+            "teams", "solver", "costs (s)", "solve (s)", "total cost"))
+
+        for nteams in options["teams"]:
+            nteams -= nteams % 4
+            teams = self.generate_bp_teams(nteams, options["rounds"], rng)
+
+            for solver in options["solvers"]:
+                generator = BPHungarianDrawGenerator(teams, assignment_method="hungarian", assignment_solver=solver)
+                rooms = generator.define_rooms([team.points for team in teams])
+
+                start = time.perf_counter()
+                costs = generator.generate_cost_matrix(rooms)
+                cost_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                indices = generator.solve_assignment(costs)
+                solve_time = time.perf_counter() - start
+
+                total_cost = sum(costs[i, j] for i, j in indices)
+                self.stdout.write("{:>6d} {:<18} {:>12.3f} {:>12.3f} {:>16.2f}".format(
+                    nteams, solver, cost_time, solve_time, total_cost))
+
+    def benchmark_graph(self, rng, **options):
+        self.stdout.write("{:>6} {:<18} {:>12} {:>16}".format("teams", "engine", "draw (s)", "total cost"))
+
+        for nteams in options["teams"]:
+            nteams -= nteams % 2
+            teams = self.generate_two_team_teams(nteams, options["rounds"], rng)
+
+            for engine in options["engines"]:
+                generator = DrawGenerator(2, "power_paired", teams, avoid_conflicts=options["avoid_conflicts"],
+                    odd_bracket="pullup_top", pairing_method="slide", pairing_penalty=1, matching_engine=engine)
+
+                start = time.perf_counter()
+                draw = generator.generate()
+                draw_time = time.perf_counter() - start
+
+                total_cost = sum(GraphGeneratorMixin.assignment_cost(generator, *pairing.teams, nteams) for pairing in draw)
+                self.stdout.write("{:>6d} {:<18} {:>12.3f} {:>16d}".format(nteams, engine, draw_time, int(total_cost)))
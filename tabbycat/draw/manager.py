@@ -1,19 +1,23 @@
 import logging
 import random
+from collections import defaultdict
 from operator import add
 from typing import List, Tuple, TYPE_CHECKING
 
+from django.db import connection
+from django.db.models import Count
 from django.utils.translation import gettext as _
 
 from draw.generator.powerpair import BasePowerPairedDrawGenerator
 from participants.utils import get_side_history
 from results.models import BallotSubmission, TeamScore
-from standings.teams import TeamStandingsGenerator
+from standings.columnar import ColumnarTeamStandingsGenerator
 from tournaments.models import Round
 
 from .generator import BPEliminationResultPairing, DrawGenerator, DrawUserError, ResultPairing
+from .generator.search import DrawSearch
 from .generator.utils import ispow2
-from .models import Debate, DebateTeam
+from .models import Debate, DebateTeam, DrawGenerationJob
 from .types import DebateSide
 
 if TYPE_CHECKING:
@@ -33,6 +37,7 @@ OPTIONS_TO_CONFIG_MAPPING = {
     "pairing_penalty"       : "draw_rules__pairing_penalty",
     "side_allocations"      : "draw_rules__draw_side_allocations",
     "avoid_conflicts"       : "draw_rules__draw_avoid_conflicts",
+    "matching_engine"       : "draw_rules__draw_matching_engine",
     "odd_bracket"           : "draw_rules__draw_odd_bracket",
     "pairing_method"        : "draw_rules__draw_pairing_method",
     "pullup_restriction"    : "draw_rules__draw_pullup_restriction",
@@ -70,11 +75,14 @@ class BaseDrawManager:
     """Creates, modifies and retrieves relevant Debate objects relating to a draw."""
 
     generator_type = None
+    searchable = False  # whether draws have random elements worth searching over
 
     def __init__(self, round, active_only=True):
         self.round = round
         self.teams_in_debate = self.round.tournament.pref('teams_in_debate')
         self.active_only = active_only
+        self.search = None
+        self.progress = None
 
     def get_relevant_options(self):
         if self.teams_in_debate == 2:
@@ -87,6 +95,7 @@ class BaseDrawManager:
                 "side_penalty",
                 "pairing_penalty",
                 "avoid_conflicts",
+                "matching_engine",
             ]
         return []
 
@@ -138,6 +147,42 @@ class BaseDrawManager:
             if team in tsas:
                 team.allocated_side = tsas[team]
 
+    def _get_team_history(self, teams):
+        """Returns a dict mapping each team ID to a dict, which maps the IDs of
+        other teams to the number of times they've met, using one aggregated
+        query."""
+        meetings = DebateTeam.objects.filter(team__in=teams).order_by().values_list(
+            'team_id', 'debate__debateteam__team_id').annotate(count=Count('debate_id'))
+
+        history = defaultdict(lambda: defaultdict(int))
+        for team_id, other_id, count in meetings:
+            if other_id != team_id:
+                history[team_id][other_id] = count
+        return history
+
+    def _populate_team_history(self, teams, history):
+        """Attaches each team's meeting history, so that `Team.seen()` can
+        answer from memory during draw generation."""
+        for team in teams:
+            team.team_history = history[team.id]
+
+    def get_search_weights(self):
+        prefs = self.round.tournament.preferences
+        return {
+            "history_penalty": prefs['draw_rules__team_history_penalty'] if prefs['draw_rules__avoid_team_history'] else 0,
+            "institution_penalty": prefs['draw_rules__team_institution_penalty'] if prefs['draw_rules__avoid_same_institution'] else 0,
+            "side_penalty": prefs['draw_rules__side_penalty'],
+            "pullup_penalty": prefs['draw_rules__draw_pullup_penalty'],
+        }
+
+    def _search_draws(self, generator_type, teams, history, options, candidates):
+        """Generates several candidate draws in parallel, and returns the
+        pairings of the best one. Details of all candidates are kept in
+        `self.search`."""
+        self.search = DrawSearch(self.teams_in_debate, generator_type, teams,
+                history=history, weights=self.get_search_weights(), candidates=candidates)
+        return self.search.run(**options)
+
     def _make_debates(self, pairings: List['BasePairing']) -> list[Debate]:
         random.shuffle(pairings)  # to avoid IDs indicating room ranks
 
@@ -183,9 +228,29 @@ class BaseDrawManager:
     def delete(self):
         self.round.debate_set.all().delete()
 
-    def create(self, options: dict | None = None) -> list[Debate]:
-        """Generates a draw and populates the database with it."""
+    def _count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    def _report_stage(self, stage):
+        if self.progress is not None:
+            self.progress(stage)
+
+    def create(self, options: dict | None = None, progress=None) -> list[Debate]:
+        """Generates a draw and populates the database with it. The number of
+        database queries made is logged, and kept in `self.query_count`.
+
+        If `progress` is given, it is called with a `DrawGenerationJob.Stage`
+        as each stage of the generation starts."""
 
+        self.query_count = 0
+        self.progress = progress
+        with connection.execute_wrapper(self._count_query):
+            debates = self._create(options)
+        logger.info("Draw for %s made %d database queries", self.round, self.query_count)
+        return debates
+
+    def _create(self, options):
         if self.round.draw_status != Round.Status.NONE:
             raise RuntimeError("Tried to create a draw on round that already has a draw")
 
@@ -199,6 +264,7 @@ class BaseDrawManager:
         if options.get("side_allocations") == "manual-ballot":
             options["side_allocations"] = "balance"
 
+        self._report_stage(DrawGenerationJob.Stage.STANDINGS)
         teams, byes = self.get_teams()
         results = self.get_results()
         rrseq = self.get_rrseq()
@@ -206,12 +272,21 @@ class BaseDrawManager:
         self._populate_side_history(teams)
         if options.get("side_allocations") == "preallocated":
             self._populate_team_side_allocations(teams)
+        history = self._get_team_history(teams)
+        self._populate_team_history(teams, history)
 
+        self._report_stage(DrawGenerationJob.Stage.PAIRING)
         generator_type = self.get_generator_type()
         logger.debug("Using generator type: %s", generator_type)
-        drawer = DrawGenerator(self.teams_in_debate, generator_type, teams,
-                results=results, rrseq=rrseq, **options)
-        pairings = drawer.generate()
+        candidates = self.round.tournament.pref('draw_search_candidates')
+        if self.searchable and candidates > 1:
+            pairings = self._search_draws(generator_type, teams, history, options, candidates)
+        else:
+            drawer = DrawGenerator(self.teams_in_debate, generator_type, teams,
+                    results=results, rrseq=rrseq, **options)
+            pairings = drawer.generate()
+
+        self._report_stage(DrawGenerationJob.Stage.SAVING)
         debates = self._make_debates(pairings)
 
         debates.extend(self._make_bye_debates(byes, max([p.room_rank for p in pairings], default=0)))
@@ -224,6 +299,7 @@ class BaseDrawManager:
 
 class RandomDrawManager(BaseDrawManager):
     generator_type = "random"
+    searchable = True
 
     def get_relevant_options(self):
         options = super().get_relevant_options()
@@ -241,6 +317,7 @@ class ManualDrawManager(BaseDrawManager):
 
 class PowerPairedDrawManager(BaseDrawManager):
     generator_type = "power_paired"
+    searchable = True
 
     def get_relevant_options(self):
         options = super().get_relevant_options()
@@ -268,7 +345,7 @@ class PowerPairedDrawManager(BaseDrawManager):
             extra_metrics.add("pullup_debates")
         extra_metrics -= set(metrics)
 
-        generator = TeamStandingsGenerator(metrics, ('rank', 'subrank'), tiebreak="random", extra_metrics=list(extra_metrics))
+        generator = ColumnarTeamStandingsGenerator(metrics, ('rank', 'subrank'), tiebreak="random", extra_metrics=list(extra_metrics))
         standings = generator.generate(teams, round=self.round.prev)
 
         ranked = []
@@ -276,6 +353,7 @@ class PowerPairedDrawManager(BaseDrawManager):
             team = standing.team
             team.points = next(standing.itermetrics(), 0) or 0
             team.subrank = standing.get_ranking('subrank')
+            team.standings_rank = standing.get_ranking('rank')  # for reshuffling ties in draw searches
             if pullup_debates_penalty > 0:
                 team.pullup_debates = standing.metrics.get("pullup_debates", 0)
             if pullup_metric:
@@ -299,6 +377,7 @@ class PowerPairedDrawManager(BaseDrawManager):
 
 class SeededDrawManager(BaseDrawManager):
     generator_type = "power_paired"
+    searchable = True
 
     def get_relevant_options(self):
         options = super().get_relevant_options()
@@ -326,6 +405,7 @@ class SeededDrawManager(BaseDrawManager):
         for team in teams:
             team.points = 0
             team.subrank = team.seed + 1
+            team.standings_rank = team.seed
 
         return teams, byes
 
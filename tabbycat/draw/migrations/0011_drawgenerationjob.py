@@ -0,0 +1,41 @@
+# Generated by Django 5.0.4 on 2026-10-18 18:40
+
+import django.db.models.deletion
+import utils.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('draw', '0010_alter_debateteam_side_alter_teamsideallocation_side'),
+        ('tournaments', '0013_scheduleevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DrawGenerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP address')),
+                ('status', models.CharField(choices=[('Q', 'queued'), ('R', 'running'), ('D', 'done'), ('F', 'failed')], default='Q', max_length=1, verbose_name='status')),
+                ('stage', models.CharField(blank=True, choices=[('standings', 'Calculating team standings'), ('pairing', 'Pairing teams and avoiding conflicts'), ('saving', 'Saving debates'), ('venues', 'Allocating rooms')], max_length=10, verbose_name='stage')),
+                ('messages', models.JSONField(blank=True, default=list, help_text='List of (level, text) pairs to show the user when the job finishes', verbose_name='messages')),
+                ('messages_shown', models.BooleanField(default=False, verbose_name='messages shown')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='created')),
+                ('modified', models.DateTimeField(auto_now=True, verbose_name='modified')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='user')),
+            ],
+            options={
+                'verbose_name': 'draw generation job',
+                'verbose_name_plural': 'draw generation jobs',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='drawgenerationjob',
+            constraint=utils.models.UniqueConstraint(condition=models.Q(('status__in', ['Q', 'R'])), fields=('round',), name='draw_drawgenerationjob_round_active_uniq'),
+        ),
+    ]
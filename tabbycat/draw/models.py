@@ -1,6 +1,7 @@
 import logging
 from typing import TYPE_CHECKING
 
+from django.conf import settings
 from django.contrib.humanize.templatetags.humanize import ordinal
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.db import models
@@ -365,3 +366,56 @@ class TeamSideAllocation(models.Model):
         constraints = [UniqueConstraint(fields=['round', 'team'])]
         verbose_name = _("team side allocation")
         verbose_name_plural = _("team side allocations")
+
+
+class DrawGenerationJob(models.Model):
+    """Keeps track of the generation of a draw, which is done by the "draw"
+    worker (see draw/jobs.py). Only one job per round can be queued or running
+    at once, so that submitting the form twice doesn't create two draws."""
+
+    class Status(models.TextChoices):
+        QUEUED = 'Q', _("queued")
+        RUNNING = 'R', _("running")
+        DONE = 'D', _("done")
+        FAILED = 'F', _("failed")
+
+    class Stage(models.TextChoices):
+        STANDINGS = 'standings', _("Calculating team standings")
+        PAIRING = 'pairing', _("Pairing teams and avoiding conflicts")
+        SAVING = 'saving', _("Saving debates")
+        VENUES = 'venues', _("Allocating rooms")
+
+    ACTIVE_STATUSES = [Status.QUEUED, Status.RUNNING]
+
+    round = models.ForeignKey('tournaments.Round', models.CASCADE,
+        verbose_name=_("round"))
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, models.SET_NULL, blank=True, null=True,
+        verbose_name=_("user"))
+    ip_address = models.GenericIPAddressField(blank=True, null=True,
+        verbose_name=_("IP address"))
+    status = models.CharField(max_length=1, choices=Status.choices, default=Status.QUEUED,
+        verbose_name=_("status"))
+    stage = models.CharField(max_length=10, choices=Stage.choices, blank=True,
+        verbose_name=_("stage"))
+    messages = models.JSONField(default=list, blank=True,
+        verbose_name=_("messages"),
+        help_text=_("List of (level, text) pairs to show the user when the job finishes"))
+    messages_shown = models.BooleanField(default=False,
+        verbose_name=_("messages shown"))
+    created = models.DateTimeField(auto_now_add=True,
+        verbose_name=_("created"))
+    modified = models.DateTimeField(auto_now=True,
+        verbose_name=_("modified"))
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=['round'], condition=models.Q(status__in=['Q', 'R']),
+                name='draw_drawgenerationjob_round_active_uniq')]
+        verbose_name = _("draw generation job")
+        verbose_name_plural = _("draw generation jobs")
+
+    def __str__(self):
+        return "[%s] %s (%s)" % (self.id, self.round, self.get_status_display())
+
+    @property
+    def finished(self):
+        return self.status not in self.ACTIVE_STATUSES
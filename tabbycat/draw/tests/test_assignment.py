@@ -0,0 +1,126 @@
+import random
+import unittest
+
+import numpy as np
+
+from utils.assignment import (broadcast_costs, DISALLOWED, solve_jonker_volgenant, solve_lexicographic,
+    solve_munkres, UnsolvableAssignmentError)
+
+from .utils import TestTeam
+from ..generator.bphungarian import BPHungarianDrawGenerator
+
+
+class TestAssignmentSolvers(unittest.TestCase):
+    """Cross-checks the Jonker-Volgenant solver against the `munkres` reference
+    implementation."""
+
+    def setUp(self):
+        self.rng = np.random.default_rng(3210)
+
+    def assertValidAssignment(self, costs, indices):  # noqa: N802
+        rows, cols = zip(*indices) if indices else ((), ())
+        self.assertEqual(len(indices), min(costs.shape))
+        self.assertEqual(len(set(rows)), len(rows))
+        self.assertEqual(len(set(cols)), len(cols))
+        self.assertEqual(list(rows), sorted(rows))
+        self.assertTrue(all(costs[i, j] != DISALLOWED for i, j in indices))
+
+    def assertSameTotalCost(self, costs):  # noqa: N802
+        expected = solve_munkres(costs)
+        result = solve_jonker_volgenant(costs)
+        self.assertValidAssignment(costs, result)
+        self.assertAlmostEqual(sum(costs[i, j] for i, j in result), sum(costs[i, j] for i, j in expected))
+
+    def test_square(self):
+        for n in [1, 2, 5, 12, 24]:
+            with self.subTest(n=n):
+                self.assertSameTotalCost(self.rng.random((n, n)) * 100)
+
+    def test_many_ties(self):
+        for n in [4, 8, 20]:
+            with self.subTest(n=n):
+                self.assertSameTotalCost(self.rng.integers(0, 3, size=(n, n)).astype(float))
+
+    def test_rectangular(self):
+        for shape in [(3, 7), (7, 3), (1, 5), (10, 11), (16, 8)]:
+            with self.subTest(shape=shape):
+                self.assertSameTotalCost(self.rng.integers(0, 10, size=shape).astype(float))
+
+    def test_disallowed(self):
+        for n in [4, 8, 16]:
+            with self.subTest(n=n):
+                costs = self.rng.random((n, n))
+                mask = self.rng.random((n, n)) < 0.5
+                mask[np.arange(n), self.rng.permutation(n)] = False  # ensure it's solvable
+                costs[mask] = DISALLOWED
+                self.assertSameTotalCost(costs)
+
+    def test_unsolvable(self):
+        costs = np.array([[1, DISALLOWED, DISALLOWED], [2, DISALLOWED, 3], [DISALLOWED, DISALLOWED, 4]])
+        with self.assertRaises(UnsolvableAssignmentError):
+            solve_munkres(costs)
+        with self.assertRaises(UnsolvableAssignmentError):
+            solve_jonker_volgenant(costs)
+
+    def test_empty(self):
+        self.assertEqual(solve_jonker_volgenant(np.zeros((0, 0))), [])
+        self.assertEqual(solve_munkres(np.zeros((0, 0))), [])
+
+    def test_lexicographic(self):
+        # Small enough that weighting the levels doesn't lose anything to rounding
+        for shape in [(5, 5), (4, 9), (9, 4), (12, 12)]:
+            with self.subTest(shape=shape):
+                levels = [self.rng.integers(0, 3, size=shape) for i in range(3)] + [self.rng.random(shape)]
+                weighted = sum(costs * 1000 ** (len(levels) - k - 1) for k, costs in enumerate(levels))
+                expected = solve_munkres(weighted)
+                result = solve_lexicographic(levels)
+                self.assertValidAssignment(weighted, result)
+                for costs in levels:
+                    self.assertAlmostEqual(sum(costs[i, j] for i, j in result), sum(costs[i, j] for i, j in expected))
+        self.assertEqual(solve_lexicographic([np.zeros((0, 3))]), [])
+
+    def test_broadcast_costs(self):
+        rows, cols = [1, 2, 3], [10, 20]
+        costs = broadcast_costs(lambda r, c: r * c, rows, cols)
+        np.testing.assert_array_equal(costs, [[r * c for c in cols] for r in rows])
+        self.assertEqual(broadcast_costs(lambda r, c: 1, rows, cols).shape, (3, 2))
+        self.assertEqual(broadcast_costs(lambda r, c: r, [], cols).shape, (0, 2))
+
+
+class TestBPHungarianSolvers(unittest.TestCase):
+    """Checks that the BP draw generator finds equally good draws with both
+    assignment solvers."""
+
+    def _generate_teams(self, nteams, nrounds):
+        rng = random.Random(nteams)
+        teams = []
+        for i in range(nteams):
+            history = [0, 0, 0, 0]
+            for r in range(nrounds):
+                history[rng.randrange(4)] += 1
+            points = sum(rng.randrange(4) for r in range(nrounds))
+            teams.append(TestTeam(i, None, points=points, side_history=history))
+        return teams
+
+    def test_same_total_cost(self):
+        for nteams, nrounds in [(8, 1), (24, 3), (40, 5)]:
+            teams = self._generate_teams(nteams, nrounds)
+            with self.subTest(nteams=nteams, nrounds=nrounds):
+                totals = []
+                for solver in ["jonker_volgenant", "munkres"]:
+                    generator = BPHungarianDrawGenerator(teams, assignment_method="hungarian", assignment_solver=solver)
+                    rooms = generator.define_rooms([team.points for team in teams])
+                    costs = generator.generate_cost_matrix(rooms)
+                    indices = generator.solve_assignment(costs)
+                    totals.append(sum(costs[i, j] for i, j in indices))
+                self.assertAlmostEqual(*totals)
+
+    def test_draw_is_complete(self):
+        teams = self._generate_teams(40, 5)
+        draw = BPHungarianDrawGenerator(teams).generate()
+        self.assertEqual(len(draw), 10)
+        self.assertCountEqual([team for pairing in draw for team in pairing.teams], teams)
+
+    def test_invalid_solver(self):
+        with self.assertRaises(ValueError):
+            BPHungarianDrawGenerator(self._generate_teams(4, 1), assignment_solver="nonexistent")
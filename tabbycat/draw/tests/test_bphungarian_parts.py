@@ -1,5 +1,7 @@
 import unittest
 
+from utils.assignment import DISALLOWED
+
 from .utils import TestTeam
 from ..generator.bphungarian import BPHungarianDrawGenerator
 
@@ -45,3 +47,40 @@ class TestDefineRooms(unittest.TestCase):
 
     def test_pullup_one_room(self):
         self._test_define_rooms("one_room", self.one_room)
+
+
+class TestCostMatrix(unittest.TestCase):
+    """Tests that the broadcast cost matrix of BPHungarianDrawGenerator matches
+    a cell-by-cell computation."""
+
+    points = [4, 4, 4, 3, 3, 3, 3, 3, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 1, 1, 1, 1, 0]
+    histories = [[1, 1, 1, 1], [2, 0, 1, 1], [0, 0, 4, 0], [1, 2, 1, 0], [1, 1, 1, 1], [3, 1, 0, 0]]
+
+    def _teams(self):
+        return [TestTeam(i, None, points=p, side_history=list(self.histories[i % len(self.histories)]))
+                for i, p in enumerate(self.points)]
+
+    def _expected_cost_matrix(self, generator, rooms):
+        cost = generator.get_position_cost_function()
+        exponent = generator.options["exponent"]
+        expected = []
+        for team in generator.teams:
+            row = []
+            for level, allowed in rooms:
+                if team.points not in allowed:
+                    row.extend([DISALLOWED] * 4)
+                else:
+                    row.extend([cost(pos, team.side_history) ** exponent for pos in range(4)])
+            expected.append(row)
+        return expected
+
+    def test_cost_matrix(self):
+        for pullup in ["anywhere", "one_room"]:
+            for position_cost, renyi_order in [("simple", 1.0), ("variance", 1.0), ("entropy", 1.0), ("entropy", 0.0), ("entropy", 2.0)]:
+                with self.subTest(pullup=pullup, position_cost=position_cost, renyi_order=renyi_order):
+                    generator = BPHungarianDrawGenerator(self._teams(), pullup=pullup,
+                        position_cost=position_cost, renyi_order=renyi_order)
+                    rooms = generator.define_rooms(self.points)
+                    costs = generator.generate_cost_matrix(rooms)
+                    self.assertEqual(costs.shape, (len(self.points), len(self.points)))
+                    self.assertEqual(costs.tolist(), self._expected_cost_matrix(generator, rooms))
@@ -24,7 +24,7 @@ class TestCreateDrawViewErrors(TournamentTestCase):
 
     def run_test_for_error_response(self, expected_loglevel, error_type):
         url = self.reverse_round('draw-create')
-        with self.assertLogs('draw.views', level=expected_loglevel) as cm, \
+        with self.assertLogs('draw.jobs', level=expected_loglevel) as cm, \
                 suppress_logs('standings.metrics', logging.INFO):
             response = self.client.post(url, follow=True)
 
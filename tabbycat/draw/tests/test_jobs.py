@@ -0,0 +1,163 @@
+import logging
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.contrib.messages import INFO
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from actionlog.models import ActionLogEntry
+from availability.utils import set_availability
+from tournaments.caching import tournament_cache
+from tournaments.models import Round
+from utils.misc import reverse_round
+from utils.tests import suppress_logs, TournamentTestCase
+from venues.models import VenueConstraint
+
+from ..consumers import DrawGenerationJobConsumer, DrawGenerationWorkerConsumer
+from ..jobs import update_job
+from ..models import DrawGenerationJob
+
+
+class TestDrawGenerationJob(TournamentTestCase):
+
+    fixtures = ['after_round_1.json']
+    round_seq = 2
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()  # rounds cached by other tests, whose changes were rolled back
+        tournament_cache.clear()
+        self.client.login(username="admin", password="admin")
+        self.round = self.tournament.round_set.get(seq=self.round_seq)
+        set_availability(self.tournament.team_set.all(), self.round)
+
+    def reverse_round(self, view_name):
+        return reverse_round(view_name, self.round)
+
+    def test_inline(self):
+        VenueConstraint.objects.filter(adjudicator__isnull=False).delete()
+        stages = []
+
+        def record_stage(job, **fields):
+            if 'stage' in fields:
+                stages.append(fields['stage'])
+            update_job(job, **fields)
+
+        with override_settings(DRAW_GENERATION_IN_WORKER=False), \
+                mock.patch('draw.jobs.update_job', side_effect=record_stage), \
+                suppress_logs('standings.metrics', logging.INFO):
+            response = self.client.post(self.reverse_round('draw-create'), follow=True)
+
+        self.assertRedirects(response, self.reverse_round('draw'))
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.draw_status, Round.Status.DRAFT)
+        self.assertEqual(stages, [DrawGenerationJob.Stage.STANDINGS, DrawGenerationJob.Stage.PAIRING,
+                                  DrawGenerationJob.Stage.SAVING, DrawGenerationJob.Stage.VENUES])
+
+        job = DrawGenerationJob.objects.get(round=self.round)
+        self.assertEqual(job.status, DrawGenerationJob.Status.DONE)
+        self.assertTrue(job.messages_shown)
+        self.assertTrue(ActionLogEntry.objects.filter(type=ActionLogEntry.ActionType.DRAW_CREATE, round=self.round).exists())
+
+    @override_settings(DRAW_GENERATION_IN_WORKER=True)
+    def test_worker_job_started_once(self):
+        channel_layer = mock.Mock(send=mock.AsyncMock(), group_send=mock.AsyncMock())
+        with mock.patch('draw.jobs.get_channel_layer', return_value=channel_layer):
+            for i in range(2):  # double-click
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(self.reverse_round('draw-create'))
+                self.assertRedirects(response, self.reverse_round('draw-create-status'), fetch_redirect_response=False)
+
+            job = DrawGenerationJob.objects.get(round=self.round)
+            channel_layer.send.assert_called_once_with("draw", {'type': 'create_draw', 'job_id': job.id})
+
+            response = self.client.get(self.reverse_round('draw-create-status'))
+            self.assertEqual(response.status_code, 200)
+            self.assertTemplateUsed(response, 'draw_generating.html')
+
+            with suppress_logs('standings.metrics', logging.INFO):
+                DrawGenerationWorkerConsumer().create_draw({'type': 'create_draw', 'job_id': job.id})
+
+        self.round.refresh_from_db()
+        self.assertEqual(self.round.draw_status, Round.Status.DRAFT)
+        event = channel_layer.group_send.call_args.args[1]
+        self.assertEqual(event['type'], 'broadcast_job')
+        self.assertEqual(event['job']['status'], DrawGenerationJob.Status.DONE)
+
+        response = self.client.get(self.reverse_round('draw-create-status'), follow=True)
+        self.assertRedirects(response, self.reverse_round('draw'))
+
+        # Messages are only shown once
+        response = self.client.get(self.reverse_round('draw-create-status'), follow=True)
+        self.assertEqual([m for m in response.context['messages'] if m.level > INFO], [])
+
+    @override_settings(DRAW_GENERATION_IN_WORKER=True)
+    def test_stale_job_replaced(self):
+        old_job = DrawGenerationJob.objects.create(round=self.round, status=DrawGenerationJob.Status.RUNNING)
+        DrawGenerationJob.objects.filter(pk=old_job.pk).update(modified=timezone.now() - timedelta(hours=1))
+
+        with self.captureOnCommitCallbacks():
+            self.client.post(self.reverse_round('draw-create'))
+
+        old_job.refresh_from_db()
+        self.assertEqual(old_job.status, DrawGenerationJob.Status.FAILED)
+        self.assertEqual(self.round.drawgenerationjob_set.filter(status=DrawGenerationJob.Status.QUEUED).count(), 1)
+
+
+class TestDrawGenerationJobConsumer(TournamentTestCase):
+
+    fixtures = ['after_round_1.json']
+    round_seq = 2
+
+    def setUp(self):
+        super().setUp()
+        # Consumers close the database connection after handling each message,
+        # which would end the test's transaction
+        patcher = mock.patch('channels.db.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.round = self.tournament.round_set.get(seq=self.round_seq)
+
+    def get_communicator(self, user):
+        communicator = WebsocketCommunicator(DrawGenerationJobConsumer.as_asgi(),
+                "/ws/%s/round/%d/draw_job/" % (self.tournament.slug, self.round.seq))
+        communicator.scope['url_route'] = {'args': (), 'kwargs': {'tournament_slug': self.tournament.slug, 'round_seq': self.round.seq}}
+        communicator.scope['user'] = user
+        return communicator
+
+    def test_progress(self):
+        job = DrawGenerationJob.objects.create(round=self.round)
+        user = get_user_model().objects.get(username="admin")
+
+        async def watch():
+            communicator = self.get_communicator(user)
+            connected, subprotocol = await communicator.connect()
+            self.assertTrue(connected)
+            received = [await communicator.receive_json_from(timeout=5)]
+            await sync_to_async(update_job)(job, status=DrawGenerationJob.Status.RUNNING, stage=DrawGenerationJob.Stage.PAIRING)
+            received.append(await communicator.receive_json_from(timeout=5))
+            await communicator.disconnect()
+            return received
+
+        initial, update = async_to_sync(watch)()
+        self.assertEqual(initial['status'], DrawGenerationJob.Status.QUEUED)
+        self.assertFalse(initial['finished'])
+        self.assertEqual(update['stage'], DrawGenerationJob.Stage.PAIRING)
+        self.assertEqual(update['id'], job.id)
+        self.assertEqual(update.keys(), initial.keys())
+
+    def test_no_access(self):
+        DrawGenerationJob.objects.create(round=self.round)
+        user = get_user_model().objects.create_user("observer", "observer@example.com", "password")
+
+        async def watch():
+            communicator = self.get_communicator(user)
+            connected, subprotocol = await communicator.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(watch)())
@@ -0,0 +1,59 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from participants.models import Team
+from tournaments.models import Round
+from utils.tests import CompletedTournamentTestMixin
+
+from ..manager import DrawManager
+
+
+class TestDrawManagerTeamHistory(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_seen_from_memory(self):
+        manager = DrawManager(self.round)
+        teams = list(self.tournament.team_set.all())
+        expected = {(team.id, other.id): team.seen(other) for team in teams for other in teams if team != other}
+        self.assertTrue(any(expected.values()))
+
+        manager._populate_team_history(teams, manager._get_team_history(teams))
+        with self.assertNumQueries(0):
+            for team in teams:
+                for other in teams:
+                    if team != other:
+                        self.assertEqual(team.seen(other), expected[(team.id, other.id)])
+
+    def test_seen_before_round_uses_database(self):
+        manager = DrawManager(self.round)
+        teams = list(self.tournament.team_set.all())
+        manager._populate_team_history(teams, manager._get_team_history(teams))
+        team = teams[0]
+        other = Team.objects.filter(debateteam__debate__debateteam__team=team).exclude(id=team.id).first()
+        with self.assertNumQueries(1):
+            self.assertEqual(team.seen(other, before_round=1), 0)
+
+    def reset_draw(self):
+        self.round.debate_set.all().delete()
+        self.round.draw_status = Round.Status.NONE
+        self.round.save()
+
+    def test_query_count(self):
+        self.tournament.preferences['draw_rules__draw_search_candidates'] = 1
+        self.tournament.preferences['draw_rules__avoid_team_history'] = True
+
+        # The first draw also saves default preferences and a standings snapshot
+        self.reset_draw()
+        DrawManager(self.round, active_only=False).create()
+        self.reset_draw()
+
+        manager = DrawManager(self.round, active_only=False)
+        with CaptureQueriesContext(connection) as context:
+            manager.create()
+        self.assertEqual(manager.query_count, len(context))
+
+        # The number of queries shouldn't depend on the number of team pairs
+        nteams = self.tournament.team_set.count()
+        self.assertLess(manager.query_count, nteams)
@@ -0,0 +1,172 @@
+import random
+import unittest
+from collections import Counter
+
+import networkx as nx
+import numpy as np
+
+from .utils import TestTeam
+from ..generator import DrawGenerator
+from ..generator.graph import GraphGeneratorMixin
+from ..generator.matching import candidate_mask, DISALLOWED, sparse_min_weight_matching
+from ..generator.powerpair import GraphPowerPairedDrawGenerator, SingleGraphPowerPairedDrawGenerator
+from ..generator.random import GraphRandomDrawGenerator
+
+
+def generate_teams(nteams, nrounds, ninsts, seed):
+    """Returns a ranked list of teams with a random history of `nrounds`
+    rounds, drawn randomly."""
+    rng = random.Random(seed)
+    ids = list(range(1, nteams + 1))
+    hists = {i: [] for i in ids}
+    sides = {i: [0, 0] for i in ids}
+    wins = {i: 0 for i in ids}
+    for r in range(nrounds):
+        rng.shuffle(ids)
+        for aff, neg in zip(ids[::2], ids[1::2]):
+            hists[aff].append(neg)
+            hists[neg].append(aff)
+            sides[aff][0] += 1
+            sides[neg][1] += 1
+            wins[rng.choice([aff, neg])] += 1
+
+    ranked = sorted(ids, key=lambda i: -wins[i])
+    teams = []
+    subrank = 0
+    for k, i in enumerate(ranked):
+        subrank = 1 if k == 0 or wins[ranked[k-1]] != wins[i] else subrank + 1
+        teams.append(TestTeam(i, chr(ord('A') + i % ninsts), points=wins[i], hist=hists[i],
+            side_history=sides[i], subrank=subrank, pullup_debates=rng.randrange(2)))
+    return teams
+
+
+class TestAssignmentCostMatrix(unittest.TestCase):
+    """Checks that assignment_cost_matrix() agrees with assignment_cost()."""
+
+    options = [
+        {},
+        {"pairing_method": "fold", "pairing_penalty": 5},
+        {"pairing_method": "slide", "pairing_penalty": 3, "side_penalty": 2, "pullup_debates_penalty": 7},
+        {"pairing_method": "adjacent", "pairing_penalty": 1, "side_penalty": 4, "max_times_on_one_side": 2},
+        {"pairing_method": "fold_top_adjacent_rest", "pairing_penalty": 2, "avoid_institution": False},
+    ]
+
+    def assertMatrixMatches(self, generator, teams, size, bracket=None):  # noqa: N802
+        matrix = generator.assignment_cost_matrix(teams, size, bracket)
+        for i, t1 in enumerate(teams):
+            for j in range(i + 1, len(teams)):
+                expected = generator.assignment_cost(t1, teams[j], size, bracket)
+                self.assertEqual(matrix[i, j], np.inf if expected is None else expected,
+                    msg="teams %d and %d" % (t1.id, teams[j].id))
+
+    def test_graph_power_paired(self):
+        teams = generate_teams(20, 3, 5, seed=1)
+        for options in self.options:
+            with self.subTest(options=options):
+                generator = GraphPowerPairedDrawGenerator(teams, avoid_conflicts="graph", **options)
+                for points in set(t.points for t in teams):
+                    bracket = [t for t in teams if t.points == points]
+                    self.assertMatrixMatches(generator, bracket, generator.get_n_teams(bracket), bracket=points % 2)
+
+    def test_single_graph_power_paired(self):
+        teams = generate_teams(24, 4, 6, seed=2)
+        for options in self.options:
+            with self.subTest(options=options):
+                generator = SingleGraphPowerPairedDrawGenerator(teams, avoid_conflicts="graph_one",
+                    odd_bracket="pullup_top", **options)
+                max_points = max(t.points for t in teams)
+                generator.n_teams_per_points = {i: len([t for t in teams if t.points == i]) for i in range(max_points+1)}
+                generator.annotate_team_pullup_precedence(teams)
+                self.assertMatrixMatches(generator, teams, len(teams))
+
+    def test_graph_random(self):
+        teams = generate_teams(16, 2, 4, seed=3)
+        for options in self.options:
+            options = {k: v for k, v in options.items() if not k.startswith("pairing") and k != "pullup_debates_penalty"}
+            with self.subTest(options=options):
+                generator = GraphRandomDrawGenerator(teams, avoid_conflicts="graph", **options)
+                self.assertMatrixMatches(generator, teams, len(teams))
+
+    def test_team_history(self):
+        teams = generate_teams(18, 4, 5, seed=4)
+        teams.extend([TestTeam(19, None, hist=[teams[0].id], side_history=[2, 2]), TestTeam(20, None, side_history=[2, 2])])
+        teams[0].hist.append(19)
+        for team in teams:
+            team.team_history = Counter(team.hist)
+        for options in self.options:
+            options = {k: v for k, v in options.items() if not k.startswith("pairing") and k != "pullup_debates_penalty"}
+            with self.subTest(options=options):
+                generator = GraphRandomDrawGenerator(teams, avoid_conflicts="graph", **options)
+                self.assertMatrixMatches(generator, teams, len(teams))
+
+
+class TestSparseMinWeightMatching(unittest.TestCase):
+
+    def _networkx_matching(self, costs):
+        graph = nx.Graph()
+        for i in range(len(costs)):
+            for j in range(i + 1, len(costs)):
+                if costs[i][j] >= 0:
+                    graph.add_edge(i, j, weight=costs[i][j])
+        return nx.min_weight_matching(graph)
+
+    def _total_cost(self, costs, matching):
+        return sum(costs[min(i, j)][max(i, j)] for i, j in matching)
+
+    def test_candidate_mask(self):
+        costs = np.full((8, 8), 5)
+        costs[0, 7] = 0
+        costs[2, 3] = DISALLOWED
+        mask = candidate_mask(costs, 1)
+        self.assertTrue((mask == mask.T).all())
+        self.assertFalse(mask.diagonal().any())
+        self.assertTrue(mask[0, 1] and mask[3, 4] and mask[0, 7])
+        self.assertFalse(mask[2, 3])
+
+    def test_widens_window(self):
+        # With a window of 1, the pruned graph has no perfect matching
+        costs = np.array([
+            [-1,  2,  4,  2, -1,  4],
+            [ 2, -1, -1, -1,  2,  0],  # noqa: E201
+            [ 4, -1, -1, -1,  1,  4],  # noqa: E201
+            [ 2, -1, -1, -1,  0,  1],  # noqa: E201
+            [-1,  2,  1,  0, -1,  2],
+            [ 4,  0,  4,  1,  2, -1],  # noqa: E201
+        ])
+        pruned = np.where(candidate_mask(costs, 1), costs, DISALLOWED)
+        self.assertLess(len(self._networkx_matching(pruned)), 3)
+
+        matching = sparse_min_weight_matching(costs, window=1)
+        self.assertEqual(len(matching), 3)
+        self.assertEqual(self._total_cost(costs, matching), self._total_cost(costs, self._networkx_matching(costs)))
+
+    def test_same_cost_as_networkx(self):
+        rng = np.random.default_rng(7)
+        for n in [6, 12, 30]:
+            with self.subTest(n=n):
+                ranks = np.arange(n)
+                costs = np.abs(ranks[:, np.newaxis] - ranks[np.newaxis, :]) + 100 * (rng.random((n, n)) < 0.1)
+                matching = sparse_min_weight_matching(costs, window=4)
+                self.assertEqual(len(matching), n // 2)
+                self.assertEqual(self._total_cost(costs, matching), self._total_cost(costs, self._networkx_matching(costs)))
+
+
+class TestSparseMatchingEngine(unittest.TestCase):
+    """Checks that draws using the sparse engine are as good as with NetworkX."""
+
+    def _draw_cost(self, generator, draw):
+        size = len(generator.teams)
+        return sum(GraphGeneratorMixin.assignment_cost(generator, *pairing.teams, size) for pairing in draw)
+
+    def test_draws(self):
+        teams = generate_teams(40, 4, 8, seed=4)
+        for avoid_conflicts in ["graph", "graph_one"]:
+            with self.subTest(avoid_conflicts=avoid_conflicts):
+                costs = []
+                for engine in ["networkx", "sparse"]:
+                    generator = DrawGenerator(2, "power_paired", teams, avoid_conflicts=avoid_conflicts,
+                        odd_bracket="pullup_top", pairing_method="slide", matching_engine=engine)
+                    draw = generator.generate()
+                    self.assertCountEqual([t for pairing in draw for t in pairing.teams], teams)
+                    costs.append(self._draw_cost(generator, draw))
+                self.assertEqual(*costs)
@@ -0,0 +1,131 @@
+import random
+import unittest
+from collections import Counter
+
+from django.test import TestCase
+
+from tournaments.models import Round
+from utils.tests import CompletedTournamentTestMixin
+
+from .test_matching import generate_teams
+from .utils import TestTeam
+from ..generator.pairing import Pairing
+from ..generator.search import DrawSearch, score_draw, shuffle_ties, TeamSnapshot
+from ..manager import DrawManager
+from ..models import Debate
+
+
+def get_history(teams):
+    return {team.id: Counter(team.hist) for team in teams}
+
+
+class TestScoreDraw(unittest.TestCase):
+
+    def test_components(self):
+        teams = [
+            TestTeam(1, 'A', points=2, hist=[2], side_history=[2, 0]),
+            TestTeam(2, 'B', points=2, hist=[1], side_history=[1, 1]),
+            TestTeam(3, 'A', points=1, side_history=[0, 2]),
+            TestTeam(4, 'A', points=1, side_history=[1, 1]),
+        ]
+        pairings = [Pairing(teams[0:2], 2, 1), Pairing(teams[2:4], 1, 2)]
+        score, components = score_draw(pairings, {"history_penalty": 100, "institution_penalty": 10, "side_penalty": 1})
+        self.assertEqual(components, {
+            "history_penalty": 1,
+            "institution_penalty": 1,
+            "side_penalty": 3 + 1 + 1 + 1,
+            "pullup_penalty": 0,
+        })
+        self.assertEqual(score, 100 + 10 + 6)
+
+    def test_pullups(self):
+        teams = [TestTeam(i, None, points=p) for i, p in enumerate([3, 2, 2, 2])]
+        pairings = [Pairing(teams[0:2], 3, 1), Pairing(teams[2:4], 2, 2)]
+        score, components = score_draw(pairings, {"pullup_penalty": 5})
+        self.assertEqual(components["pullup_penalty"], 1)
+        self.assertEqual(score, 5)
+
+
+class TestShuffleTies(unittest.TestCase):
+
+    def test_shuffle_ties(self):
+        ranks = [1, 2, 2, 2, 5, 6, 6]
+        rng = random.Random(1)
+        orders = set()
+        for trial in range(20):
+            teams = [TestTeam(i, None, standings_rank=r, subrank=i) for i, r in enumerate(ranks)]
+            shuffled = list(teams)
+            shuffle_ties(shuffled, rng)
+            self.assertEqual([t.standings_rank for t in shuffled], ranks)
+            self.assertEqual([t.subrank for t in shuffled], list(range(len(ranks))))
+            self.assertEqual(shuffled[0], teams[0])
+            self.assertEqual(shuffled[4], teams[4])
+            orders.add(tuple(t.id for t in shuffled))
+        self.assertGreater(len(orders), 1)
+
+
+class TestDrawSearch(unittest.TestCase):
+
+    weights = {"history_penalty": 10000, "institution_penalty": 100, "side_penalty": 0, "pullup_penalty": 0}
+
+    def test_snapshot(self):
+        team = TestTeam(1, 'A', points=3, hist=[2, 2], side_history=[1, 2])
+        snapshot = TeamSnapshot(team, 0, {2: 2})
+        other = TeamSnapshot(TestTeam(2, 'A'), 1, {1: 2})
+        self.assertEqual(snapshot.points, 3)
+        self.assertEqual(snapshot.side_history, [1, 2])
+        self.assertEqual(snapshot.seen(other), 2)
+        self.assertTrue(snapshot.same_institution(other))
+
+    def _run_search(self, teams, candidates, max_workers, **options):
+        search = DrawSearch(2, "random", teams, get_history(teams), self.weights, candidates, max_workers=max_workers)
+        pairings = search.run(avoid_conflicts="off", **options)
+        self.assertCountEqual([t for p in pairings for t in p.teams], teams)
+        return search, pairings
+
+    def test_keeps_best_candidate(self):
+        teams = generate_teams(30, 3, 6, seed=5)
+        search, pairings = self._run_search(teams, 8, 1)
+        self.assertEqual(len(search.results), 8)
+        scores = [c.score for c in search.results]
+        self.assertEqual(scores, sorted(scores))
+        self.assertEqual(score_draw(pairings, self.weights)[0], scores[0])
+        summary = search.summary()
+        self.assertEqual(summary["best"], scores[0])
+        self.assertEqual(summary["worst"], scores[-1])
+
+    def test_process_pool(self):
+        teams = generate_teams(20, 2, 4, seed=6)
+        search, pairings = self._run_search(teams, 4, 2)
+        self.assertEqual(len(search.results), 4)
+        for team in teams:
+            self.assertIsInstance(team, TestTeam)
+        self.assertTrue(all(isinstance(t, TestTeam) for p in pairings for t in p.teams))
+
+
+class TestDrawManagerSearch(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 4
+
+    def test_team_history(self):
+        manager = DrawManager(self.round)
+        teams = list(self.tournament.team_set.all())
+        history = manager._get_team_history(teams)
+        for team in teams[:5]:
+            for other in teams:
+                if other == team:
+                    continue
+                self.assertEqual(history[team.id][other.id], team.seen(other))
+
+    def test_create(self):
+        self.tournament.preferences['draw_rules__draw_search_candidates'] = 3
+        self.round.debate_set.all().delete()
+        self.round.draw_status = Round.Status.NONE
+        self.round.save()
+
+        manager = DrawManager(self.round, active_only=False)
+        manager.create()
+        self.assertEqual(len(manager.search.results), 3)
+        self.assertEqual(self.round.draw_status, Round.Status.DRAFT)
+        self.assertEqual(Debate.objects.filter(round=self.round).count() * 2,
+                         sum(len(p.teams) for p in manager.search.results[0].pairings))
@@ -12,6 +12,9 @@ urlpatterns = [
         path('create/',
             views.CreateDrawView.as_view(),
             name='draw-create'),
+        path('create/status/',
+            views.DrawGenerationStatusView.as_view(),
+            name='draw-create-status'),
         path('details/',
             views.AdminDrawWithDetailsView.as_view(),
             name='draw-details'),
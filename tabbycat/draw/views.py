@@ -29,28 +29,23 @@ from options.preferences import BPPositionCost
 from participants.models import Adjudicator, Speaker, Team
 from participants.prefetch import populate_win_counts
 from participants.utils import get_side_history
-from standings.base import StandingsError
-from standings.teams import TeamStandingsGenerator
-from standings.views import BaseStandingsView
+from standings.columnar import ColumnarTeamStandingsGenerator
 from tournaments.mixins import (CurrentRoundMixin, DebateDragAndDropMixin,
     OptionalAssistantTournamentPageMixin, PublicTournamentPageMixin, RoundMixin,
     TournamentMixin)
 from tournaments.models import Round
 from tournaments.utils import get_side_name
 from users.permissions import Permission
-from utils.misc import reverse_round, reverse_tournament
+from utils.misc import get_ip_address, reverse_round, reverse_tournament
 from utils.mixins import AdministratorMixin
 from utils.tables import TabbycatTableBuilder
 from utils.views import PostOnlyRedirectView, VueTableTemplateView
-from venues.allocator import allocate_venues
-from venues.models import VenueConstraint
 from venues.utils import venue_conflicts_display
 
 from .dbutils import delete_round_draw
 from .forms import ConfirmDrawDeletionForm
-from .generator import DrawFatalError, DrawUserError
-from .manager import DrawManager
-from .models import Debate, TeamSideAllocation
+from .jobs import serialize_job, start_draw_job
+from .models import Debate, DrawGenerationJob, TeamSideAllocation
 from .prefetch import populate_history
 from .serializers import EditDebateTeamsDebateSerializer, EditDebateTeamsTeamSerializer
 from .tables import (AdminDrawTableBuilder, PositionBalanceReportDrawTableBuilder,
@@ -174,6 +169,7 @@ class PublicDrawMixin(PublicTournamentPageMixin):
     """Governs permissions, particularly those relating to draw release."""
 
     empty_table_title = gettext_lazy("The draw for this round hasn't been released.")
+    cache_tags = ['draw']
 
     @cached_property
     def draws_available(self):
@@ -220,6 +216,7 @@ class PublicDrawForCurrentRoundsView(PublicDrawMixin, BaseDisplayDrawForCurrentR
 
 class PublicAllDrawsAllTournamentsView(PublicTournamentPageMixin, BaseDisplayDrawTableView):
     public_page_preference = 'enable_mass_draws'
+    cache_tags = ['draw']
 
     @property
     def rounds(self):
@@ -346,7 +343,7 @@ class AdminDrawUtilitiesMixin:
 
     @cached_property
     def adjudicator_conflicts(self):
-        return adjudicator_conflicts_display(self.get_draw())
+        return adjudicator_conflicts_display(self.get_draw(), self.tournament)
 
     @cached_property
     def venue_conflicts(self):
@@ -474,7 +471,7 @@ class AdminDrawView(RoundMixin, AdministratorMixin, AdminDrawUtilitiesMixin, Vue
         side_histories_before = get_side_history(teams, self.tournament.sides, self.round.prev.seq)
         side_histories_now = get_side_history(teams, self.tournament.sides, self.round.seq)
         metrics = self.tournament.pref('team_standings_precedence')
-        generator = TeamStandingsGenerator(metrics[0:1], ())
+        generator = ColumnarTeamStandingsGenerator(metrics[0:1], ())
         standings = generator.generate(teams, round=self.round.prev)
         draw_table = PositionBalanceReportDrawTableBuilder(view=self)
         draw_table.build(draw, teams, side_histories_before, side_histories_now, standings)
@@ -519,7 +516,7 @@ class AdminDrawView(RoundMixin, AdministratorMixin, AdminDrawUtilitiesMixin, Vue
 
                 # subrank only makes sense if there's a second metric to rank on
                 rankings = ('rank', 'subrank') if len(metrics) > 1 else ('rank',)
-                generator = TeamStandingsGenerator(metrics, rankings,
+                generator = ColumnarTeamStandingsGenerator(metrics, rankings,
                     extra_metrics=(pullup_metric,) if pullup_metric and pullup_metric not in metrics else ())
                 standings = generator.generate(teams, round=r.prev)
                 if not r.is_break_round:
@@ -632,7 +629,7 @@ class PositionBalanceReportView(RoundMixin, AdministratorMixin, VueTableTemplate
         side_histories_before = get_side_history(teams, self.tournament.sides, self.round.prev.seq)
         side_histories_now = get_side_history(teams, self.tournament.sides, self.round.seq)
         metrics = self.tournament.pref('team_standings_precedence')
-        generator = TeamStandingsGenerator(metrics[0:1], ())
+        generator = ColumnarTeamStandingsGenerator(metrics[0:1], ())
         standings = generator.generate(teams, round=self.round.prev)
 
         summary_table = PositionBalanceReportSummaryTableBuilder(view=self,
@@ -668,56 +665,48 @@ class DrawStatusEdit(LogActionMixin, AdministratorMixin, RoundMixin, PostOnlyRed
 
 class CreateDrawView(DrawStatusEdit):
     edit_permission = Permission.GENERATE_DEBATE
-    action_log_type = ActionLogEntry.ActionType.DRAW_CREATE
 
     def post(self, request, *args, **kwargs):
         if self.round.draw_status != Round.Status.NONE:
             messages.error(request, _("Could not create draw for %(round)s, there was already a draw!") % {'round': self.round.name})
             return super().post(request, *args, **kwargs)
 
-        try:
-            manager = DrawManager(self.round)
-            manager.create()
-        except DrawUserError as e:
-            messages.error(request, mark_safe(_(
-                "<p>The draw could not be created, for the following reason: "
-                "<em>%(message)s</em></p>\n"
-                "<p>Please fix this issue before attempting to create the draw.</p>",
-            ) % {'message': str(e)}))
-            logger.warning("User error creating draw: " + str(e), exc_info=True)
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-        except DrawFatalError as e:
-            messages.error(request, mark_safe(_(
-                "<p>The draw could not be created, because the following error occurred: "
-                "<em>%(message)s</em></p>\n"
-                "<p>If this issue persists and you're not sure how to resolve it, please "
-                "contact the developers.</p>",
-            ) % {'message': str(e)}))
-            logger.exception("Fatal error creating draw: " + str(e))
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-        except StandingsError as e:
-            message = _(
-                "<p>The team standings could not be generated, because the following error occurred: "
-                "<em>%(message)s</em></p>\n"
-                "<p>Because generating the draw uses the current team standings, this "
-                "prevents the draw from being generated.</p>",
-            ) % {'message': str(e)}
-            standings_options_url = reverse_tournament('options-tournament-section', self.tournament, kwargs={'section': 'standings'})
-            instructions = BaseStandingsView.admin_standings_error_instructions % {'standings_options_url': standings_options_url}
-            messages.error(request, mark_safe(message + instructions))
-            logger.exception("Error generating standings for draw: " + str(e))
-            return HttpResponseRedirect(reverse_round('availability-index', self.round))
-
-        relevant_adj_venue_constraints = VenueConstraint.objects.filter(
-                adjudicator__in=self.tournament.relevant_adjudicators)
-        if not relevant_adj_venue_constraints.exists():
-            allocate_venues(self.round)
-        else:
-            messages.warning(request, _("Rooms were not auto-allocated because there are one or more adjudicator room constraints. "
-                "You should run room allocations after allocating adjudicators."))
+        # The draw itself is generated by the "draw" worker (see jobs.py); if
+        # it's already being generated, this just shows that job
+        start_draw_job(self.round, request.user, get_ip_address(request))
+        return HttpResponseRedirect(reverse_round('draw-create-status', self.round))
 
-        self.log_action()
-        return super().post(request, *args, **kwargs)
+
+class DrawGenerationStatusView(AdministratorMixin, RoundMixin, TemplateView):
+    """Shows the progress of the draw generation job for the round, and once
+    it's finished, shows its messages and redirects to the draft draw (or back
+    to availability, if it failed)."""
+
+    template_name = 'draw_generating.html'
+    page_title = gettext_lazy("Creating Draw")
+    page_emoji = '⏳'
+    view_permission = Permission.GENERATE_DEBATE
+
+    def get(self, request, *args, **kwargs):
+        self.job = self.round.drawgenerationjob_set.order_by('-created').first()
+        if self.job is None:
+            return HttpResponseRedirect(reverse_round('draw', self.round))
+        if not self.job.finished:
+            return super().get(request, *args, **kwargs)
+
+        if not self.job.messages_shown:
+            for level, text in self.job.messages:
+                messages.add_message(request, level, mark_safe(text))
+            self.job.messages_shown = True
+            self.job.save(update_fields=['messages_shown'])
+
+        if self.job.status == DrawGenerationJob.Status.DONE:
+            return HttpResponseRedirect(reverse_round('draw', self.round))
+        return HttpResponseRedirect(reverse_round('availability-index', self.round))
+
+    def get_context_data(self, **kwargs):
+        kwargs['job'] = serialize_job(self.job)
+        return super().get_context_data(**kwargs)
 
 
 class ConfirmDrawCreationView(DrawStatusEdit):
@@ -1,10 +1,15 @@
-from xml.etree.ElementTree import Element, SubElement
+import zlib
+from itertools import chain, islice
+from xml.etree.ElementTree import Element, SubElement, tostring
+from xml.sax.saxutils import quoteattr
 
+from defusedxml.ElementTree import iterparse
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import router, transaction
 from django.db.models import Prefetch, Q
 from django.utils.text import slugify
 
+from adjallocation.allocation import AdjudicatorAllocation
 from adjallocation.models import AdjudicatorAdjudicatorConflict, DebateAdjudicator
 from adjfeedback.models import AdjudicatorFeedback, AdjudicatorFeedbackQuestion
 from breakqual.models import BreakCategory
@@ -20,8 +25,11 @@ from results.models import BallotSubmission, Submission
 from results.prefetch import populate_confirmed_ballots, populate_wins
 from results.result import DebateResult
 from tournaments.models import Round, Tournament
+from utils.models import bulk_create_inherited
 from venues.models import Venue
 
+from .importers import DEFAULT_BATCH_SIZE
+
 
 # As ID/IDREF(S) must be unique to the whole document, prefix IDs
 ADJ_PREFIX = "A"
@@ -36,43 +44,102 @@ INST_PREFIX = "I"
 QUESTION_PREFIX = "Q"
 
 
+def batched(iterable, n):
+    """Yields lists of up to `n` items from `iterable`."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, n)):
+        yield batch
+
+
+def start_tag(element):
+    attrib = "".join(" %s=%s" % (key, quoteattr(value)) for key, value in element.attrib.items())
+    return "<%s%s>" % (element.tag, attrib)
+
+
+def iter_xml(root, children):
+    """Serializes an archive incrementally, yielding strings. `children` is an
+    iterable of the root's children, each of which is either an Element, or a
+    2-tuple `(element, children)` where `element` has no children of its own,
+    and `children` is an iterable of the same form. Elements are serialized as
+    soon as they're produced, so no more than one is held at a time at each
+    level."""
+    yield "<?xml version='1.0' encoding='utf-8'?>\n"
+    yield start_tag(root)
+    stack = [(root, iter(children))]
+    while stack:
+        element, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            yield "</%s>" % element.tag
+            stack.pop()
+        elif isinstance(child, tuple):
+            yield start_tag(child[0])
+            stack.append((child[0], iter(child[1])))
+        else:
+            yield tostring(child, encoding='unicode')
+
+
+def gzip_chunks(chunks, compresslevel=6):
+    """Compresses an iterable of strings into gzip format incrementally,
+    yielding bytes."""
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # 16+ for gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
 class Exporter:
+    """Exports a tournament to an XML archive. `create_all()` builds the whole
+    document in memory, while `stream()` yields it in pieces, fetching
+    `batch_size` debates, teams or adjudicators from the database at a time,
+    so that memory use doesn't depend on the size of the tournament."""
 
-    def __init__(self, tournament):
+    def __init__(self, tournament, batch_size=100):
         self.t = tournament
+        self.batch_size = batch_size
         self.root = Element('tournament', {'name': tournament.name, 'short': tournament.short_name})
         if tournament.pref('teams_in_debate') == 4:
             self.root.set('style', 'bp')
 
     def create_all(self):
-        self.add_rounds()
-        self.add_participants()
-        self.add_break_categories()
-        self.add_institutions()
-        self.add_motions()
-        self.add_venues()
-        self.add_questions()
+        stack = [(self.root, iter(self.iter_children()))]
+        while stack:
+            element, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+            elif isinstance(child, tuple):
+                element.append(child[0])
+                stack.append((child[0], iter(child[1])))
+            else:
+                element.append(child)
 
         return self.root
 
-    def add_rounds(self):
-        results_prefetch = Prefetch('ballotsubmission_set', queryset=BallotSubmission.objects.filter(confirmed=True).prefetch_related(
-            'speakerscore_set', 'speakerscorebyadj_set', 'teamscore_set'))
-        veto_prefetch = Prefetch('debateteammotionpreference_set', queryset=DebateTeamMotionPreference.objects.filter(
-            preference=3, ballot_submission__confirmed=True,
-        ))
-        dt_prefetch = Prefetch('debateteam_set', queryset=DebateTeam.objects.all().select_related(
-            'team', 'team__institution',
-        ).prefetch_related(veto_prefetch))
-        debate_prefetch = Prefetch('debate_set', queryset=Debate.objects.all().prefetch_related(
-            'debateadjudicator_set', dt_prefetch, results_prefetch,
-        ))
-
-        for round in self.t.round_set.all().prefetch_related(debate_prefetch, 'motion_set').order_by('seq'):
-            populate_confirmed_ballots(round.debate_set.all(), motions=True, results=True)
-            populate_wins(round.debate_set.all())
-
-            round_tag = SubElement(self.root, 'round', {
+    def stream(self, compress=False):
+        """Yields the archive as UTF-8 encoded chunks of bytes, or gzip
+        compressed chunks if `compress` is True."""
+        chunks = iter_xml(self.root, self.iter_children())
+        if compress:
+            return gzip_chunks(chunks)
+        return (chunk.encode('utf-8') for chunk in chunks)
+
+    def iter_children(self):
+        """Yields the children of the root element, in the form described in
+        `iter_xml()`."""
+        yield from self.iter_rounds()
+        yield (Element('participants'), chain(self.iter_teams(), self.iter_adjudicators()))
+        yield from self.iter_break_categories()
+        yield from self.iter_institutions()
+        yield from self.iter_motions()
+        yield from self.iter_venues()
+        yield from self.iter_questions()
+
+    def iter_rounds(self):
+        for round in self.t.round_set.all().prefetch_related('motion_set').order_by('seq'):
+            round_tag = Element('round', {
                 'name': round.name,
                 'abbreviation': round.abbreviation,
                 'elimination': str(round.stage == Round.Stage.ELIMINATION).lower(),
@@ -86,21 +153,37 @@ class Exporter:
                 round_tag.set('start', str(round.starts_at))
 
             motion = round.motion_set.first()
+            yield (round_tag, self.iter_debates(round, motion))
 
-            for debate in round.debate_set.all():
-                self.add_debates(round_tag, motion, debate)
-
-    def add_debates(self, round_tag, motion, debate):
-        debate_tag = SubElement(round_tag, 'debate', {
+    def iter_debates(self, round, motion):
+        veto_prefetch = Prefetch('debateteammotionpreference_set', queryset=DebateTeamMotionPreference.objects.filter(
+            preference=3, ballot_submission__confirmed=True,
+        ))
+        dt_prefetch = Prefetch('debateteam_set', queryset=DebateTeam.objects.all().select_related(
+            'team', 'team__institution',
+        ).prefetch_related(veto_prefetch))
+        debates = round.debate_set.all().select_related('round__tournament').prefetch_related(
+            Prefetch('debateadjudicator_set', queryset=DebateAdjudicator.objects.order_by('id')), dt_prefetch,
+        ).order_by('id')
+
+        for batch in batched(debates.iterator(chunk_size=self.batch_size), self.batch_size):
+            populate_confirmed_ballots(batch, motions=True, results=True)
+            populate_wins(batch)
+            for debate in batch:
+                yield self.debate_element(motion, debate)
+
+    def debate_element(self, motion, debate):
+        debate_tag = Element('debate', {
             'id': DEBATE_PREFIX + str(debate.id),
         })
 
         # Add list of motions as attribute
-        adjs = " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debate.debateadjudicator_set.all()])
+        debateadjs = debate.debateadjudicator_set.all()
+        adjs = " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debateadjs])
         if adjs != "":
             debate_tag.set('adjudicators', adjs)
 
-            chair = debate.debateadjudicator_set.get(type=DebateAdjudicator.TYPE_CHAIR).adjudicator_id
+            chair = next(d_adj for d_adj in debateadjs if d_adj.type == DebateAdjudicator.TYPE_CHAIR).adjudicator_id
             debate_tag.set('chair', ADJ_PREFIX + str(chair))
 
         # Venue
@@ -114,16 +197,16 @@ class Exporter:
             debate_tag.set('motion', MOTION_PREFIX + str(motion.id))
 
         if debate.confirmed_ballot is not None:
-            result = DebateResult(debate.confirmed_ballot, tournament=self.t)
+            result = debate.confirmed_ballot.result
 
             for side in self.t.sides:
                 side_tag = SubElement(debate_tag, 'side', {
                     'team': TEAM_PREFIX + str(debate.get_team(side).id),
                 })
 
-                dt = debate.get_dt(side)
-                if dt.debateteammotionpreference_set.exists():
-                    side_tag.set('motion-veto', MOTION_PREFIX + str(dt.debateteammotionpreference_set.first().motion_id))
+                vetoes = debate.get_dt(side).debateteammotionpreference_set.all()
+                if vetoes:
+                    side_tag.set('motion-veto', MOTION_PREFIX + str(vetoes[0].motion_id))
 
                 if result.is_voting:
                     for (adj, scoresheet) in result.scoresheets.items():
@@ -146,7 +229,9 @@ class Exporter:
                     )
 
                 if result.uses_speakers:
-                    self.add_speakers(side_tag, debate, result, side)
+                    self.add_speakers(side_tag, adjs, result, side)
+
+        return debate_tag
 
     def add_team_ballots(self, side_tag, result, adj, scoresheet, side):
         ballot_tag = SubElement(side_tag, 'ballot')
@@ -170,14 +255,14 @@ class Exporter:
         else:
             ballot_tag.text = str(side in scoresheet.winners())
 
-    def add_speakers(self, side_tag, debate, result, side):
+    def add_speakers(self, side_tag, adjs, result, side):
         for pos in self.t.positions:
             speaker = result.get_speaker(side, pos)
 
             if speaker is not None:
                 speech_tag = SubElement(side_tag, 'speech', {
-                    'speaker': SPEAKER_PREFIX + str(result.get_speaker(side, pos).id),
-                    'reply': str(pos > self.t.pref('substantive_speakers')),
+                    'speaker': SPEAKER_PREFIX + str(speaker.id),
+                    'reply': str(pos > self.t.pref('substantive_speakers')).lower(),
                 })
 
                 if result.is_voting:
@@ -188,16 +273,15 @@ class Exporter:
                         ballot_tag.text = str(scoresheet.get_score(side, pos))
                 else:
                     ballot_tag = SubElement(speech_tag, 'ballot', {
-                        'adjudicators': " ".join([ADJ_PREFIX + str(d_adj.adjudicator_id) for d_adj in debate.debateadjudicator_set.all()]),
+                        'adjudicators': adjs,
                     })
                     ballot_tag.text = str(result.scoresheet.get_score(side, pos))
 
-    def add_participants(self):
-        participants_tag = SubElement(self.root, 'participants')
-
-        speaker_category_prefetch = Prefetch('speaker_set', queryset=Speaker.objects.all().prefetch_related('categories'))
-        for team in self.t.team_set.all().prefetch_related(speaker_category_prefetch, 'break_categories'):
-            team_tag = SubElement(participants_tag, 'team', {
+    def iter_teams(self):
+        speaker_category_prefetch = Prefetch('speaker_set', queryset=Speaker.objects.order_by('id').prefetch_related('categories'))
+        teams = self.t.team_set.all().prefetch_related(speaker_category_prefetch, 'break_categories').order_by('id')
+        for team in teams.iterator(chunk_size=self.batch_size):
+            team_tag = Element('team', {
                 'name': team.long_name,
                 'code': team.code_name,
                 'id': TEAM_PREFIX + str(team.id),
@@ -211,7 +295,7 @@ class Exporter:
                 })
                 speaker_tag.text = speaker.name
 
-                if team.institution is not None:
+                if team.institution_id is not None:
                     speaker_tag.set('institutions', INST_PREFIX + str(team.institution_id))
 
                 if speaker.gender != "":
@@ -219,8 +303,20 @@ class Exporter:
 
                 speaker_tag.set('categories', " ".join([SPEAKER_CATEGORY_PREFIX + str(sc.id) for sc in speaker.categories.all()]))
 
-        for adj in self.t.relevant_adjudicators.prefetch_related('adjudicatorfeedback_set'):
-            adj_tag = SubElement(participants_tag, 'adjudicator', {
+            yield team_tag
+
+    def iter_adjudicators(self):
+        questions = list(AdjudicatorFeedbackQuestion.objects.filter(tournament=self.t))
+        question_order = {question.id: i for i, question in enumerate(questions)}
+        feedback_prefetch = Prefetch('adjudicatorfeedback_set', queryset=AdjudicatorFeedback.objects.filter(
+            confirmed=True,
+        ).select_related('source_adjudicator', 'source_team').prefetch_related(
+            Prefetch('answers', queryset=Answer.objects.filter(question_id__in=question_order.keys())),
+        ).order_by('id'))
+        adjs = self.t.relevant_adjudicators.prefetch_related(feedback_prefetch).order_by('id')
+
+        for adj in adjs.iterator(chunk_size=self.batch_size):
+            adj_tag = Element('adjudicator', {
                 'id': ADJ_PREFIX + str(adj.id),
                 'name': adj.name,
                 'core': str(adj.adj_core).lower(),
@@ -228,13 +324,13 @@ class Exporter:
                 'score': str(adj.base_score),
             })
 
-            if adj.institution is not None:
+            if adj.institution_id is not None:
                 adj_tag.set('institutions', INST_PREFIX + str(adj.institution_id))
 
             if adj.gender != "":
                 adj_tag.set('gender', adj.gender)
 
-            for feedback in adj.adjudicatorfeedback_set.filter(confirmed=True):
+            for feedback in adj.adjudicatorfeedback_set.all():
                 feedback_tag = SubElement(adj_tag, 'feedback', {
                     'score': str(feedback.score),
                 })
@@ -245,45 +341,40 @@ class Exporter:
                     feedback_tag.set('source-team', TEAM_PREFIX + str(feedback.source_team.team_id))
                     feedback_tag.set('debate', DEBATE_PREFIX + str(feedback.source_team.debate_id))
 
-                for question in AdjudicatorFeedbackQuestion.objects.filter(tournament=self.t):
-                    try:
-                        answer = Answer.objects.get(
-                            content_type=question.for_content_type,
-                            object_id=feedback.id,
-                            question=question,
-                        )
-                    except ObjectDoesNotExist:
-                        continue
-
+                for answer in sorted(feedback.answers.all(), key=lambda answer: question_order[answer.question_id]):
                     answer_tag = SubElement(feedback_tag, 'answer', {
                         'question': QUESTION_PREFIX + str(answer.question_id),
                     })
                     answer_tag.text = str(answer.answer)
 
-    def add_break_categories(self):
+            yield adj_tag
+
+    def iter_break_categories(self):
         speaker_categories = self.t.speakercategory_set.all().order_by('seq')
 
         for category in speaker_categories:
-            sc_tag = SubElement(self.root, 'speaker-category', {
+            sc_tag = Element('speaker-category', {
                 'id': SPEAKER_CATEGORY_PREFIX + str(category.id),
             })
             sc_tag.text = category.name
+            yield sc_tag
 
         break_categories = self.t.breakcategory_set.all().order_by('seq')
 
         for category in break_categories:
-            bc_tag = SubElement(self.root, 'break-category', {
+            bc_tag = Element('break-category', {
                 'id': BREAK_CATEGORY_PREFIX + str(category.id),
             })
             bc_tag.text = category.name
+            yield bc_tag
 
-    def add_institutions(self):
+    def iter_institutions(self):
         institution_query = Institution.objects.filter(
             Q(id__in=self.t.relevant_adjudicators.values_list('institution_id')) |
             Q(id__in=self.t.team_set.all().values_list('institution_id')),
         ).select_related('region')
         for institution in institution_query:
-            institution_tag = SubElement(self.root, 'institution', {
+            institution_tag = Element('institution', {
                 'id': INST_PREFIX + str(institution.id),
                 'reference': institution.code,
             })
@@ -292,9 +383,11 @@ class Exporter:
             if institution.region is not None:
                 institution_tag.set('region', institution.region.name)
 
-    def add_motions(self):
+            yield institution_tag
+
+    def iter_motions(self):
         for motion in Motion.objects.filter(tournament=self.t):
-            motion_tag = SubElement(self.root, 'motion', {
+            motion_tag = Element('motion', {
                 'id': MOTION_PREFIX + str(motion.id),
                 'reference': motion.reference,
             })
@@ -304,17 +397,19 @@ class Exporter:
                 info_slide.text = motion.info_slide
 
             motion_tag.text = motion.text
+            yield motion_tag
 
-    def add_venues(self):
+    def iter_venues(self):
         for venue in self.t.relevant_venues:
-            venue_tag = SubElement(self.root, 'venue', {
+            venue_tag = Element('venue', {
                 'id': VENUE_PREFIX + str(venue.id),
             })
             venue_tag.text = venue.name
+            yield venue_tag
 
-    def add_questions(self):
+    def iter_questions(self):
         for question in AdjudicatorFeedbackQuestion.objects.filter(tournament=self.t):
-            question_tag = SubElement(self.root, 'question', {
+            question_tag = Element('question', {
                 'id': QUESTION_PREFIX + str(question.id),
                 'name': question.name,
                 'from-teams': str(question.from_team).lower(),
@@ -322,14 +417,151 @@ class Exporter:
                 'type': question.answer_type,
             })
             question_tag.text = question.text
+            yield question_tag
 
 
 class Importer:
+    """Imports a tournament from an XML archive. The `source` can be a file
+    name or file object, which is parsed in a single pass, or an element that
+    has already been parsed.
 
-    def __init__(self, tournament):
-        self.root = tournament
+    As elements reference each other in any order (e.g., rounds come first, but
+    refer to teams, adjudicators and motions), the archive is first read into
+    compact records, discarding each element after it's been read. Objects are
+    then created in bulk, `batch_size` at a time, in an order that satisfies
+    their dependencies, keeping a map from each archive ID to the object it
+    refers to. The whole import runs in one transaction."""
+
+    def __init__(self, source, batch_size=DEFAULT_BATCH_SIZE):
+        self.source = source
+        self.batch_size = batch_size
 
     def import_tournament(self):
+        self.read_archive()
+
+        with transaction.atomic():
+            self.create_tournament()
+            self.is_bp = self.root.get('style') == 'bp' or len(self.first_debate_sides()) == 4
+
+            # Import all the separate parts
+            self.set_preferences()
+            self.import_institutions()
+            self.import_categories()
+            self.import_venues()
+            self.import_questions()
+            self.import_teams()
+            self.import_speakers()
+            self.import_adjudicators()
+            self.import_rounds()
+            self.import_debates()
+            self.import_motions()
+            self.import_results()
+            self.import_feedback()
+
+    def bulk_create(self, model, objs):
+        """Saves `objs` in batches. All objects are new, so the signals that
+        saving them would send have nothing to update, and aren't sent."""
+        if model._meta.parents:
+            using = router.db_for_write(model)
+            for batch in batched(objs, self.batch_size):
+                bulk_create_inherited(model, batch, using)
+        else:
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def bulk_add_m2m(self, model, field_name, pairs):
+        """Adds the (instance, related instance) pairs in `pairs` to the
+        many-to-many field `field_name` of `model`."""
+        field = model._meta.get_field(field_name)
+        through = field.remote_field.through
+        self.bulk_create(through, [through(**{field.m2m_field_name(): obj, field.m2m_reverse_field_name(): related})
+                                   for obj, related in dict.fromkeys(pairs)])
+
+    # --------------------------------------------------------------------------
+    # Reading the archive
+    # --------------------------------------------------------------------------
+
+    def iter_elements(self):
+        """Yields each child of the root element except <participants>, and
+        each child of <participants>, once it's been completely parsed. Yielded
+        elements are then removed from the tree, so that memory use doesn't
+        grow with the size of the archive."""
+        if isinstance(self.source, Element):
+            self.root = self.source
+            for child in self.root:
+                yield from (child if child.tag == 'participants' else [child])
+            return
+
+        stack = []
+        for event, element in iterparse(self.source, events=('start', 'end')):
+            if event == 'start':
+                if not stack:
+                    self.root = element
+                stack.append(element)
+                continue
+
+            stack.pop()
+            if (len(stack) == 1 and element.tag != 'participants') or (len(stack) == 2 and stack[1].tag == 'participants'):
+                yield element
+                stack[-1].remove(element)
+
+    def read_archive(self):
+        readers = {
+            'round': self.read_round,
+            'team': self.read_team,
+            'adjudicator': self.read_adjudicator,
+            'institution': self.read_text,
+            'break-category': self.read_text,
+            'speaker-category': self.read_text,
+            'venue': self.read_text,
+            'question': self.read_text,
+            'motion': self.read_motion,
+        }
+        self.records = {tag: [] for tag in readers}
+        for element in self.iter_elements():
+            if element.tag in readers:
+                self.records[element.tag].append(readers[element.tag](element))
+
+    def read_text(self, element):
+        return dict(element.attrib), element.text
+
+    def read_motion(self, element):
+        return dict(element.attrib), element.text, getattr(element.find('info-slide'), 'text', '')
+
+    def read_ballots(self, element):
+        return [(dict(ballot.attrib), ballot.text) for ballot in element.findall('ballot')]
+
+    def read_round(self, element):
+        """Returns (attributes, debates), where each debate is (attributes,
+        sides), each side is (attributes, ballots, speeches), each speech is
+        (attributes, ballots) and each ballot is (attributes, text)."""
+        return dict(element.attrib), [
+            (dict(debate.attrib), [
+                (dict(side.attrib), self.read_ballots(side), [
+                    (dict(speech.attrib), self.read_ballots(speech)) for speech in side.findall('speech')
+                ]) for side in debate.findall('side')
+            ]) for debate in element.findall('debate')
+        ]
+
+    def read_team(self, element):
+        return dict(element.attrib), [self.read_text(speaker) for speaker in element.findall('speaker')]
+
+    def read_adjudicator(self, element):
+        return dict(element.attrib), [
+            (dict(feedback.attrib), [(answer.get('question'), answer.text) for answer in feedback.findall('answer')])
+            for feedback in element.findall('feedback')
+        ]
+
+    def iter_sides(self, elimination=None):
+        for attrib, debates in self.records['round']:
+            if elimination is None or attrib.get('elimination') == elimination:
+                for debate_attrib, sides in debates:
+                    yield from sides
+
+    # --------------------------------------------------------------------------
+    # Creating objects
+    # --------------------------------------------------------------------------
+
+    def create_tournament(self):
         self.tournament = Tournament(name=self.root.get('name'))
 
         if self.root.get('short') is not None:
@@ -340,25 +572,13 @@ class Importer:
             self.tournament.slug = slugify(self.root.get('name')[:50])
         self.tournament.save()
 
-        self.is_bp = self.root.get('style') == 'bp' or len(self.root.findall('round[1]/debate[1]/side')) == 4
-
-        # Import all the separate parts
-        self.set_preferences()
-        self.import_institutions()
-        self.import_categories()
-        self.import_venues()
-        self.import_questions()
-        self.import_teams()
-        self.import_speakers()
-        self.import_adjudicators()
-        self.import_debates()
-        self.import_motions()
-        self.import_results()
-        self.import_feedback()
+    def first_debate_sides(self):
+        rounds = self.records['round']
+        return rounds[0][1][0][1] if rounds and rounds[0][1] else []
 
     def _is_consensus_ballot(self, elimination):
-        xpath = "round[@elimination='" + elimination + "']/debate/side"
-        return len(self.root.findall(xpath + "/ballot")) == len(self.root.findall(xpath))
+        sides = list(self.iter_sides(elimination))
+        return sum(len(ballots) for attrib, ballots, speeches in sides) == len(sides)
 
     def set_preferences(self):
         styles = {
@@ -393,9 +613,14 @@ class Importer:
         else:
             self.preliminary_consensus = self._is_consensus_ballot('false')
             self.elimination_consensus = self._is_consensus_ballot('true')
-            substantive_speakers = len(self.root.findall("round[1]/debate[1]/side[1]/speech[@reply='false']"))
-            reply_scores_enabled = len(self.root.findall("round/debate/side/speech[@reply='true']")) != 0
-            margin_includes_dissenters = len(self.root.findall("round/debate/side/ballot[@minority='true'][@ignored='true']")) == 0
+
+            # Older archives write the 'reply' attribute capitalised
+            first_sides = self.first_debate_sides()
+            substantive_speakers = len([speech for speech, ballots in first_sides[0][2] if speech.get('reply', '').lower() == 'false']) if first_sides else 0
+            reply_scores_enabled = any(speech.get('reply', '').lower() == 'true'
+                                       for attrib, ballots, speeches in self.iter_sides() for speech, speech_ballots in speeches)
+            margin_includes_dissenters = not any(ballot.get('minority') == 'true' and ballot.get('ignored') == 'true'
+                                                 for attrib, ballots, speeches in self.iter_sides() for ballot, text in ballots)
 
             self.tournament.preferences['debate_rules__substantive_speakers'] = substantive_speakers
             self.tournament.preferences['debate_rules__reply_scores_enabled'] = reply_scores_enabled
@@ -404,84 +629,98 @@ class Importer:
             self.tournament.preferences['scoring__margin_includes_dissenters'] = margin_includes_dissenters
 
     def import_institutions(self):
-        self.institutions = {}
-        self.regions = {}
-
-        for institution in self.root.findall('institution'):
-            # Use get_or_create as institutions may be shared between tournaments
-            inst_obj, created = Institution.objects.get_or_create(
-                code=institution.get('reference'), name=institution.text,
-            )
-            self.institutions[institution.get('id')] = inst_obj
-
-            if institution.get('region') is not None:
-                region = institution.get('region')
-                if region not in self.regions:
-                    self.regions[region], created = Region.objects.get_or_create(name=region)
+        records = self.records['institution']
 
-                inst_obj.region = self.regions[region]
-                inst_obj.save()
+        # Use existing institutions and regions, as they may be shared between tournaments
+        self.regions = {}
+        region_names = {attrib['region'] for attrib, name in records if attrib.get('region') is not None}
+        for region in Region.objects.filter(name__in=region_names):
+            self.regions.setdefault(region.name, region)
+        new_regions = [Region(name=name) for name in region_names if name not in self.regions]
+        self.bulk_create(Region, new_regions)
+        self.regions.update((region.name, region) for region in new_regions)
+
+        existing = {(inst.code, inst.name): inst for inst in
+                    Institution.objects.filter(code__in={attrib.get('reference') for attrib, name in records})}
+        self.institutions = {}
+        new_institutions = []
+        changed_institutions = {}
+
+        for attrib, name in records:
+            key = (attrib.get('reference'), name)
+            region = self.regions.get(attrib.get('region'))
+            inst_obj = existing.get(key)
+            if inst_obj is None:
+                inst_obj = existing[key] = Institution(code=key[0], name=name, region=region)
+                new_institutions.append(inst_obj)
+            elif region is not None and inst_obj.region_id != region.id:
+                inst_obj.region = region
+                if inst_obj.pk is not None:
+                    changed_institutions[inst_obj.pk] = inst_obj
+            self.institutions[attrib.get('id')] = inst_obj
+
+        self.bulk_create(Institution, new_institutions)
+        Institution.objects.bulk_update(changed_institutions.values(), ['region'], batch_size=self.batch_size)
 
     def import_categories(self):
         self.team_breaks = {}
         self.speaker_categories = {}
 
-        for i, breakqual in enumerate(self.root.findall('break-category'), 1):
-            bc = BreakCategory(
-                tournament=self.tournament, name=breakqual.text,
-                slug=slugify(breakqual.text[:50]), seq=i,
+        for i, (attrib, name) in enumerate(self.records['break-category'], 1):
+            self.team_breaks[attrib.get('id')] = BreakCategory(
+                tournament=self.tournament, name=name,
+                slug=slugify(name[:50]), seq=i,
                 break_size=0, is_general=False, priority=0,
             )
-            bc.save()
-            self.team_breaks[breakqual.get('id')] = bc
+        self.bulk_create(BreakCategory, list(self.team_breaks.values()))
 
-        for i, category in enumerate(self.root.findall('speaker-category'), 1):
-            sc = SpeakerCategory(
-                tournament=self.tournament, name=category.text,
-                slug=slugify(category.text[:50]), seq=i,
+        for i, (attrib, name) in enumerate(self.records['speaker-category'], 1):
+            self.speaker_categories[attrib.get('id')] = SpeakerCategory(
+                tournament=self.tournament, name=name,
+                slug=slugify(name[:50]), seq=i,
             )
-            sc.save()
-            self.speaker_categories[category.get('id')] = sc
+        self.bulk_create(SpeakerCategory, list(self.speaker_categories.values()))
 
     def import_venues(self):
         self.venues = {}
 
-        for venue in self.root.findall('venue'):
-            v = Venue(tournament=self.tournament, name=venue.text, priority=venue.get('priority', 0))
-            v.save()
-            self.venues[venue.get('id')] = v
+        for attrib, name in self.records['venue']:
+            self.venues[attrib.get('id')] = Venue(tournament=self.tournament, name=name, priority=int(attrib.get('priority', 0)))
+        self.bulk_create(Venue, list(self.venues.values()))
 
     def import_questions(self):
         self.questions = {}
 
-        content_type = ContentType.objects.get(app_label="adjfeedback", model="adjudicatorfeedback")
+        content_type = ContentType.objects.get_for_model(AdjudicatorFeedback)
 
-        for i, question in enumerate(self.root.findall('question'), 1):
-            q = AdjudicatorFeedbackQuestion(
-                tournament=self.tournament, seq=i, text=question.text,
+        for i, (attrib, text) in enumerate(self.records['question'], 1):
+            self.questions[attrib.get('id')] = AdjudicatorFeedbackQuestion(
+                tournament=self.tournament, seq=i, text=text,
                 for_content_type=content_type,
-                name=question.get('name'), reference=slugify(question.get('name')[:50]),
-                from_adj=question.get('from-adjudicators') == 'true', from_team=question.get('from-teams') == 'true',
-                answer_type=question.get('type'), required=False,
+                name=attrib.get('name'), reference=slugify(attrib.get('name')[:50]),
+                from_adj=attrib.get('from-adjudicators') == 'true', from_team=attrib.get('from-teams') == 'true',
+                answer_type=attrib.get('type'), required=False,
             )
-            q.save()
-            self.questions[question.get('id')] = q
+        self.bulk_create(AdjudicatorFeedbackQuestion, list(self.questions.values()))
 
     def import_teams(self):
         self.teams = {}
-        for team in self.root.findall('participants/team'):
-            team_obj = Team(tournament=self.tournament, long_name=team.get('name'))
-            self.teams[team.get('id')] = team_obj
+        institution_conflicts = []
+        break_categories = []
+
+        for attrib, speakers in self.records['team']:
+            team_obj = Team(tournament=self.tournament, long_name=attrib.get('name'))
+            self.teams[attrib.get('id')] = team_obj
 
             # Get emoji & code name
-            if 'code' in team.attrib:
-                team_obj.code_name = team.get('code')
-            emoji = EMOJI_BY_NAME.get(team.get('code'))
+            if 'code' in attrib:
+                team_obj.code_name = attrib.get('code')
+            emoji = EMOJI_BY_NAME.get(attrib.get('code'))
             if emoji is not None:
                 team_obj.emoji = emoji
 
             # Find institution from speakers - Get first institution from each speaker to compare
-            p_institutions = [p.get('institutions', '').split(" ") for p in team.findall('speaker')]
+            p_institutions = [speaker.get('institutions', '').split(" ") for speaker, name in speakers]
             p_inst = set([i[0] for i in p_institutions])
             team_institution = next(iter(p_inst)) if len(p_inst) == 1 else None
             institutions = set([i for s in p_institutions for i in s])
@@ -492,195 +731,249 @@ class Importer:
             # Remove institution from team name
             if team_obj.institution is not None and team_obj.long_name.startswith(team_obj.institution.name + " "):
                 team_obj.reference = team_obj.long_name[len(team_obj.institution.name) + 1:]
-                team_obj.short_name = team_obj.institution.code + " " + team_obj.reference
                 team_obj.use_institution_prefix = True
             else:
                 team_obj.reference = team_obj.long_name
-                team_obj.short_name = team_obj.reference[:50]
             team_obj.short_reference = team_obj.reference[:35]
-            team_obj.save()
+
+            # As in Team.save(), which bulk_create() doesn't call
+            team_obj.short_name = team_obj._construct_short_name()
+            team_obj.long_name = team_obj._construct_long_name()
 
             # Institution conflicts
-            team_obj.institution_conflicts.set([self.institutions.get(i) for i in institutions if i != ""])
+            institution_conflicts.extend((team_obj, self.institutions[i]) for i in institutions if i in self.institutions)
 
             # Break eligibilities
-            team_obj.break_categories.set([self.team_breaks[bc] for bc in team.get('break-eligibilities', "").split() if bc != ""])
+            break_categories.extend((team_obj, self.team_breaks[bc]) for bc in attrib.get('break-eligibilities', "").split())
+
+        self.bulk_create(Team, list(self.teams.values()))
+        self.bulk_add_m2m(Team, 'institution_conflicts', institution_conflicts)
+        self.bulk_add_m2m(Team, 'break_categories', break_categories)
 
     def import_speakers(self):
         self.speakers = {}
+        categories = []
+
+        for attrib, speakers in self.records['team']:
+            team_obj = self.teams[attrib.get('id')]
+            team_obj.speakers = []  # used when checking speakers in results
+            for speaker_attrib, name in speakers:
+                speaker_obj = Speaker(team=team_obj, name=name,
+                    gender=speaker_attrib.get('gender', ''), email=speaker_attrib.get('email', ''))
+                self.speakers[speaker_attrib.get('id')] = speaker_obj
+                team_obj.speakers.append(speaker_obj)
 
-        for team in self.root.findall('participants/team'):
-            for speaker in team.findall('speaker'):
-                speaker_obj = Speaker(
-                    team=self.teams[team.get('id')],
-                    name=speaker.text, gender=speaker.get('gender', ''), email=speaker.get('email', ''))
-                speaker_obj.save()
-                self.speakers[speaker.get('id')] = speaker_obj
+                categories.extend((speaker_obj, self.speaker_categories[sc]) for sc in speaker_attrib.get('categories', "").split())
 
-                speaker_obj.categories.set([self.speaker_categories[sc] for sc in speaker.get('categories', "").split() if sc != ""])
+        self.bulk_create(Speaker, list(self.speakers.values()))
+        self.bulk_add_m2m(Speaker, 'categories', categories)
 
     def import_adjudicators(self):
         self.adjudicators = {}
+        institution_conflicts = []
+        team_conflicts = []
         adj_adj_conflicts = []
 
-        for adj in self.root.findall('participants/adjudicator'):
+        for attrib, feedback in self.records['adjudicator']:
+            institutions = attrib.get('institutions', "").split()
             adj_obj = Adjudicator(
-                tournament=self.tournament, base_score=adj.get('score', 0),
-                institution=self.institutions.get(adj.get('institutions', "").split(" ")[0]),
-                independent=adj.get('independent', False) == 'true', adj_core=adj.get('core', False) == 'true',
-                name=adj.get('name'), gender=adj.get('gender', ''), email=adj.get('email', ''))
-            adj_obj.save()
-            self.adjudicators[adj.get('id')] = adj_obj
+                tournament=self.tournament, base_score=float(attrib.get('score', 0)),
+                institution=self.institutions.get(institutions[0]) if institutions else None,
+                independent=attrib.get('independent', False) == 'true', adj_core=attrib.get('core', False) == 'true',
+                name=attrib.get('name'), gender=attrib.get('gender', ''), email=attrib.get('email', ''))
+            self.adjudicators[attrib.get('id')] = adj_obj
 
             # Conflicts
-            adj_obj.institution_conflicts.set([self.institutions[i] for i in adj.get('institutions', "").split(" ") if i != ""])
-            adj_obj.team_conflicts.set([self.teams[t] for t in adj.get('team-conflicts', "").split(" ") if t != ""])
-            adj_adj_conflicts.extend([(adj_obj, adj2) for adj2 in adj.get('adjudicator-conflicts', "").split(" ") if adj2 != ""])
-
-        AdjudicatorAdjudicatorConflict.objects.bulk_create([
+            institution_conflicts.extend((adj_obj, self.institutions[i]) for i in institutions)
+            team_conflicts.extend((adj_obj, self.teams[t]) for t in attrib.get('team-conflicts', "").split())
+            adj_adj_conflicts.extend((adj_obj, adj2) for adj2 in attrib.get('adjudicator-conflicts', "").split())
+
+        self.bulk_create(Adjudicator, list(self.adjudicators.values()))
+        self.bulk_add_m2m(Adjudicator, 'institution_conflicts', institution_conflicts)
+        self.bulk_add_m2m(Adjudicator, 'team_conflicts', team_conflicts)
+        self.bulk_create(AdjudicatorAdjudicatorConflict, [
             AdjudicatorAdjudicatorConflict(adjudicator1=adj1, adjudicator2=self.adjudicators[adj2]) for adj1, adj2 in adj_adj_conflicts
         ])
 
-    def _get_voting_adjs(self, debate):
-        voting_adjs = set()
-        for ballot in debate.findall('.//ballot'):
-            voting_adjs.update(ballot.get('adjudicators').split())
-        return voting_adjs
+    def import_rounds(self):
+        self.rounds = []
 
-    def import_debates(self):
-        self.debates = {}
-        self.debateteams = {}
-        self.debateadjudicators = {}
-
-        rounds = []
-        for i, round in enumerate(self.root.findall('round'), 1):
-            round_stage = Round.Stage.ELIMINATION if round.get('elimination', 'false') == 'true' else Round.Stage.PRELIMINARY
+        for i, (attrib, debates) in enumerate(self.records['round'], 1):
+            round_stage = Round.Stage.ELIMINATION if attrib.get('elimination', 'false') == 'true' else Round.Stage.PRELIMINARY
             draw_type = Round.DrawType.ELIMINATION if round_stage == Round.Stage.ELIMINATION else Round.DrawType.MANUAL
 
             round_obj = Round(
-                tournament=self.tournament, seq=i, completed=True, name=round.get('name'),
-                abbreviation=round.get('abbreviation', round.get('name')[:10]), stage=round_stage, draw_type=draw_type,
-                draw_status=Round.Status.RELEASED, feedback_weight=round.get('feedback-weight', 0),
-                starts_at=round.get('start'))
-            rounds.append(round_obj)
+                tournament=self.tournament, seq=i, completed=True, name=attrib.get('name'),
+                abbreviation=attrib.get('abbreviation', attrib.get('name')[:10]), stage=round_stage, draw_type=draw_type,
+                draw_status=Round.Status.RELEASED, feedback_weight=float(attrib.get('feedback-weight', 0)),
+                starts_at=attrib.get('start'))
+            self.rounds.append(round_obj)
 
-            if round.find('debate') is None:
+            if not debates:
                 round_obj.completed = False
-                if round.find('debate/side/ballot') is None:
-                    round_obj.draw_status = Round.Status.NONE
+                round_obj.draw_status = Round.Status.NONE
 
             if round_stage == Round.Stage.ELIMINATION:
-                round_obj.break_category = self.team_breaks.get(round.get('break-category'))
-            round_obj.save()
+                round_obj.break_category = self.team_breaks.get(attrib.get('break-category'))
 
-            for debate in round.findall('debate'):
-                debate_obj = Debate(round=round_obj, venue=self.venues.get(debate.get('venue')), result_status=Debate.STATUS_CONFIRMED)
-                debate_obj.save()
-                self.debates[debate.get('id')] = debate_obj
+        self.bulk_create(Round, self.rounds)
+
+    def import_debates(self):
+        self.debates = {}
+        self.debateteams = {}
+        self.debateadjudicators = {}
+        self.voting_debateadjs = {}
+
+        for round_obj, (attrib, debates) in zip(self.rounds, self.records['round']):
+            for debate_attrib, sides in debates:
+                debate_id = debate_attrib.get('id')
+                debate_obj = Debate(round=round_obj, venue=self.venues.get(debate_attrib.get('venue')), result_status=Debate.STATUS_CONFIRMED)
+                self.debates[debate_id] = debate_obj
 
                 # Debate-teams
-                for j, side in enumerate(debate.findall('side')):
-                    debateteam_obj = DebateTeam(debate=debate_obj, team=self.teams[side.get('team')], side=j)
-                    debateteam_obj.save()
-                    self.debateteams[(debate.get('id'), side.get('team'))] = debateteam_obj
+                for j, (side_attrib, ballots, speeches) in enumerate(sides):
+                    self.debateteams[(debate_id, side_attrib.get('team'))] = DebateTeam(
+                        debate=debate_obj, team=self.teams[side_attrib.get('team')], side=j)
 
                 # Debate-adjudicators
-                voting_adjs = self._get_voting_adjs(debate)
-                for adj in debate.get('adjudicators').split():
+                voting_adjs = set()
+                for side_attrib, ballots, speeches in sides:
+                    for ballot, text in chain(ballots, *[speech_ballots for speech, speech_ballots in speeches]):
+                        voting_adjs.update(ballot.get('adjudicators').split())
+
+                debateadjs = {DebateAdjudicator.TYPE_CHAIR: [], DebateAdjudicator.TYPE_PANEL: [], DebateAdjudicator.TYPE_TRAINEE: []}
+                for adj in debate_attrib.get('adjudicators', "").split():
                     adj_type = DebateAdjudicator.TYPE_PANEL if adj in voting_adjs else DebateAdjudicator.TYPE_TRAINEE
-                    if debate.get('chair') == adj:
+                    if debate_attrib.get('chair') == adj:
                         adj_type = DebateAdjudicator.TYPE_CHAIR
-                    adj_obj = DebateAdjudicator(debate=debate_obj, adjudicator=self.adjudicators[adj], type=adj_type)
-                    adj_obj.save()
-                    self.debateadjudicators[(debate.get('id'), adj)] = adj_obj
+                    da_obj = DebateAdjudicator(debate=debate_obj, adjudicator=self.adjudicators[adj], type=adj_type)
+                    self.debateadjudicators[(debate_id, adj)] = da_obj
+                    debateadjs[adj_type].append(da_obj)
+
+                # Used when building results, to save querying the allocation back
+                debate_obj._adjudicators = AdjudicatorAllocation(debate_obj,
+                    chair=next((da.adjudicator for da in debateadjs[DebateAdjudicator.TYPE_CHAIR]), None),
+                    panellists=[da.adjudicator for da in debateadjs[DebateAdjudicator.TYPE_PANEL]],
+                    trainees=[da.adjudicator for da in debateadjs[DebateAdjudicator.TYPE_TRAINEE]])
+                self.voting_debateadjs[debate_id] = debateadjs[DebateAdjudicator.TYPE_CHAIR] + debateadjs[DebateAdjudicator.TYPE_PANEL]
+
+        self.bulk_create(Debate, list(self.debates.values()))
+        self.bulk_create(DebateTeam, list(self.debateteams.values()))
+        self.bulk_create(DebateAdjudicator, list(self.debateadjudicators.values()))
 
     def import_motions(self):
         # Can cause data consistency problems if motions are re-used between rounds: See #645
         self.motions = {}
 
-        motions_by_round = {}
-        seq_by_round = {}
-        for r_obj, round in zip(self.tournament.round_set.all().order_by('seq'), self.root.findall('round')):
-            motions_by_round[r_obj.id] = set()
-            seq_by_round[r_obj.id] = 1
-            for debate in round.findall('debate'):
-                motions_by_round[r_obj.id].add(debate.get('motion'))
-
-        for motion in self.root.findall('motion'):
-            motion_obj = Motion(
-                text=motion.text, reference=motion.get('reference'),
-                info_slide=getattr(motion.find('info-slide'), 'text', ''), tournament=self.tournament)
-            motion_obj.save()
-            self.motions[motion.get('id')] = motion_obj
-
-            for r, m_set in motions_by_round.items():
-                if motion.get('id') in m_set:
-                    rmotion_obj = RoundMotion(motion=motion_obj, seq=seq_by_round[r], round_id=r)
-                    rmotion_obj.save()
+        for attrib, text, info_slide in self.records['motion']:
+            self.motions[attrib.get('id')] = Motion(
+                text=text, reference=attrib.get('reference'),
+                info_slide=info_slide or '', tournament=self.tournament)
+        self.bulk_create(Motion, list(self.motions.values()))
+
+        round_motions = []
+        for round_obj, (attrib, debates) in zip(self.rounds, self.records['round']):
+            motion_ids = {debate_attrib.get('motion') for debate_attrib, sides in debates}
+            round_motions.extend(RoundMotion(motion=motion_obj, seq=seq, round=round_obj) for seq, motion_obj in
+                                 enumerate([m for m_id, m in self.motions.items() if m_id in motion_ids], 1))
+        self.bulk_create(RoundMotion, round_motions)
 
     def import_results(self):
-        for round in self.root.findall('round'):
-            consensus = self.preliminary_consensus if round.get('elimination') == 'false' else self.elimination_consensus
+        ballotsubs = []
+        vetoes = []
+        scores = {}
 
-            for debate in round.findall('debate'):
+        for round_obj, (attrib, debates) in zip(self.rounds, self.records['round']):
+            consensus = self.preliminary_consensus if attrib.get('elimination') == 'false' else self.elimination_consensus
+
+            for debate_attrib, sides in debates:
+                if not sides:
+                    continue  # no confirmed ballot
+
+                debate_id = debate_attrib.get('id')
                 bs_obj = BallotSubmission(
                     version=1, submitter_type=Submission.Submitter.TABROOM, confirmed=True,
-                    debate=self.debates[debate.get('id')], motion=self.motions.get(debate.get('motion')))
-                bs_obj.save()
-                dr = DebateResult(bs_obj)
-
-                numeric_scores = True
-                try:
-                    float(debate.find("side/ballot").text)
-                except ValueError:
-                    numeric_scores = False
-
-                for side, side_code in zip(debate.findall('side'), self.tournament.sides):
-
-                    if side.get('motion-veto') is not None:
-                        bs_obj.debateteammotionpreference_set.add(
-                            debate_team=self.debateteams.get((debate.get('id'), side.get('team'))),
-                            motion=self.motions.get(side.get('motion-veto')), preference=3)
-
-                    for speech, pos in zip(side.findall('speech'), self.tournament.positions):
-                        if numeric_scores:
-                            dr.set_speaker(side_code, pos, self.speakers.get(speech.get('speaker')))
-                            if consensus:
-                                dr.set_score(side_code, pos, float(speech.find('ballot').text))
-                            else:
-                                for ballot in speech.findall('ballot'):
-                                    for adj in [self.adjudicators[a] for a in ballot.get('adjudicators', "").split(" ")]:
-                                        dr.set_score(adj, side_code, pos, float(ballot.text))
-                    # Note: Dependent on #1180
+                    debate=self.debates[debate_id], motion=self.motions.get(debate_attrib.get('motion')))
+                ballotsubs.append(bs_obj)
+
+                for side_attrib, ballots, speeches in sides:
+                    if side_attrib.get('motion-veto') is not None:
+                        vetoes.append(DebateTeamMotionPreference(ballot_submission=bs_obj,
+                            debate_team=self.debateteams[(debate_id, side_attrib.get('team'))],
+                            motion=self.motions.get(side_attrib.get('motion-veto')), preference=3))
+
+                dr = self.get_result(bs_obj, round_obj, consensus, debate_id, sides)
+                for score in dr.build_scores():
+                    scores.setdefault(type(score), []).append(score)
+
+        self.bulk_create(BallotSubmission, ballotsubs)
+        self.bulk_create(DebateTeamMotionPreference, vetoes)
+        for model, objs in scores.items():
+            self.bulk_create(model, objs)
+
+    def get_result(self, bs_obj, round_obj, consensus, debate_id, sides):
+        """Returns a DebateResult for the debate, populated without touching
+        the database, in the same way as `results.prefetch.populate_results()`.
+        Archives don't include score criteria."""
+        dr = DebateResult(bs_obj, load=False, round=round_obj, tournament=self.tournament, criteria=[], sides=self.tournament.sides)
+        dr.init_blank_buffer()
+
+        for (side_attrib, ballots, speeches), side_code in zip(sides, self.tournament.sides):
+            dr.debateteams[side_code] = self.debateteams[(debate_id, side_attrib.get('team'))]
+
+        if dr.is_voting:
+            for da in self.voting_debateadjs[debate_id]:
+                dr.debateadjs[da.adjudicator] = da
+                dr.scoresheets[da.adjudicator] = dr.scoresheet_class(sides=dr.sides,
+                    positions=getattr(dr, 'positions', None), criteria=getattr(dr, 'criteria', []))
+
+        first_ballot = next((ballots[0][1] for side_attrib, ballots, speeches in sides if ballots), None)
+        try:
+            float(first_ballot)
+            numeric_scores = True
+        except (TypeError, ValueError):
+            numeric_scores = False
+
+        for (side_attrib, ballots, speeches), side_code in zip(sides, self.tournament.sides):
+            for (speech_attrib, speech_ballots), pos in zip(speeches, self.tournament.positions):
+                if numeric_scores:
+                    dr.set_speaker(side_code, pos, self.speakers.get(speech_attrib.get('speaker')))
                     if consensus:
-                        if int(side.find('ballot').get('rank')) == 1:
-                            dr.add_winner(side_code)
+                        dr.set_score(side_code, pos, float(speech_ballots[0][1]))
                     else:
-                        for ballot in side.findall('ballot'):
-                            for adj in [self.adjudicators.get(a) for a in ballot.get('adjudicators', "").split(" ")]:
-                                if int(ballot.get('rank')) == 1:
-                                    dr.add_winner(adj, side_code)
-                dr.save()
+                        for ballot, text in speech_ballots:
+                            for adj in [self.adjudicators[a] for a in ballot.get('adjudicators', "").split(" ")]:
+                                dr.set_score(adj, side_code, pos, float(text))
+            # Note: Dependent on #1180
+            if consensus:
+                if int(ballots[0][0].get('rank')) == 1:
+                    dr.add_winner(side_code)
+            else:
+                for ballot, text in ballots:
+                    for adj in [self.adjudicators.get(a) for a in ballot.get('adjudicators', "").split(" ")]:
+                        if int(ballot.get('rank')) == 1:
+                            dr.add_winner(adj, side_code)
+
+        return dr
 
     def import_feedback(self):
-        for adj in self.root.findall('participants/adjudicator'):
-            adj_obj = self.adjudicators[adj.get('id')]
+        feedbacks = []
+        answers = []
 
-            for feedback in adj.findall('feedback'):
-                d_adj = self.debateadjudicators.get((feedback.get('debate'), feedback.get('source-adjudicator')))
-                d_team = self.debateteams.get((feedback.get('debate'), feedback.get('source-team')))
-                feedback_obj = AdjudicatorFeedback(adjudicator=adj_obj, score=feedback.get('score'), version=1,
+        for attrib, feedback_records in self.records['adjudicator']:
+            adj_obj = self.adjudicators[attrib.get('id')]
+
+            for feedback_attrib, feedback_answers in feedback_records:
+                d_adj = self.debateadjudicators.get((feedback_attrib.get('debate'), feedback_attrib.get('source-adjudicator')))
+                d_team = self.debateteams.get((feedback_attrib.get('debate'), feedback_attrib.get('source-team')))
+                feedback_obj = AdjudicatorFeedback(adjudicator=adj_obj, score=float(feedback_attrib.get('score')), version=1,
                     source_adjudicator=d_adj, source_team=d_team,
                     submitter_type=Submission.Submitter.TABROOM, confirmed=True)
-                feedback_obj.save()
-
-                for answer in feedback.findall('answer'):
-                    question = self.questions[answer.get('question')]
+                feedbacks.append(feedback_obj)
+                answers.extend((feedback_obj, self.questions[question], text) for question, text in feedback_answers)
 
-                    cast_answer = answer.text
-                    answer = Answer(
-                        question=question,
-                        answer=cast_answer,
-                        object_id=feedback_obj.id,
-                        content_type=question.for_content_type,
-                    )
+        self.bulk_create(AdjudicatorFeedback, feedbacks)
+        self.bulk_create(Answer, [
+            Answer(question=question, answer=text or "", object_id=feedback_obj.id, content_type=question.for_content_type)
+            for feedback_obj, question, text in answers
+        ])
@@ -2,11 +2,15 @@
 
 import csv
 import logging
-import re
-from collections import Counter
+from collections import Counter, defaultdict, namedtuple
 from types import GeneratorType
 
-from django.core.exceptions import FieldError, MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist, ValidationError
+from django.db import models, router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, pre_save
+
+from utils.models import bulk_create_inherited
 
 NON_FIELD_ERRORS = '__all__'
 DUPLICATE_INFO = 19  # Logging level just below INFO
@@ -15,6 +19,10 @@ logging.addLevelName(DUPLICATE_INFO, 'DUPLICATE_INFO')
 TRUE_VALUES = ('true', 'yes', 't', 'y', '1')
 FALSE_VALUES = ('false', 'no', 'f', 'n', '0')
 
+DEFAULT_BATCH_SIZE = 500
+
+ImportRow = namedtuple('ImportRow', ['lineno', 'key', 'kwargs', 'description', 'values'])
+
 
 def convert_bool(value):
     if value.lower() in TRUE_VALUES:
@@ -137,6 +145,106 @@ class TournamentDataImporterError(Exception):
             yield str(entry)
 
 
+def freeze(value):
+    """Converts lists and dicts (e.g. from array fields) to tuples, so that the
+    value can be hashed."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+
+def row_values(fields, kwargs):
+    """Returns a hashable key for the object described by `kwargs`, made of
+    (attname, value) pairs with each value converted to the Python type the
+    database would return. `fields` maps field names and attnames to concrete
+    fields. Objects are passed as their primary keys. Raises ValueError or
+    ValidationError if a value can't be converted."""
+    values = []
+    for name, value in kwargs.items():
+        field = fields[name]
+        if field.is_relation:
+            if isinstance(value, models.Model):
+                value = getattr(value, field.target_field.attname)
+                if value is None:
+                    raise ValueError("%s can't be a %s that hasn't been saved" % (field.name, field.related_model._meta.verbose_name))
+            to_python = field.target_field.to_python
+        else:
+            to_python = field.to_python
+        try:
+            value = to_python(value)
+        except ValidationError as e:
+            raise ValidationError({field.name: e})
+        values.append((field.attname, freeze(value)))
+    return tuple(sorted(values))
+
+
+def _matching_rows(model, attnames, keys):
+    """Retrieves the values of `attnames` for all objects in the database that
+    might match one of `keys`, each a tuple of values in the same order as
+    `attnames`. Filters on the column with the most distinct values using a
+    single IN query, leaving the caller to match the other columns. Values are
+    returned as tuples, with lists and dicts frozen as in `freeze()`."""
+    if not attnames:
+        return [()] * model.objects.count()
+    columns = [i for i in range(len(attnames)) if not any(isinstance(key[i], tuple) for key in keys)]
+    queryset = model.objects.order_by().values_list(*attnames)
+    if columns:
+        column = max(columns, key=lambda i: len({key[i] for key in keys}))
+        values = {key[column] for key in keys}
+        q = Q(**{attnames[column] + '__in': values - {None}})
+        if None in values:
+            q |= Q(**{attnames[column] + '__isnull': True})
+        queryset = queryset.filter(q)
+    return [freeze(values) for values in queryset]
+
+
+def count_existing(model, keys):
+    """Returns a Counter mapping each key (as returned by `row_values()`) to
+    the number of objects in the database that match it. Runs one query for
+    each set of field names among the keys."""
+    groups = defaultdict(set)
+    for key in keys:
+        groups[tuple(attname for attname, value in key)].add(tuple(value for attname, value in key))
+
+    counts = Counter()
+    for attnames, group in groups.items():
+        for values in _matching_rows(model, attnames, group):
+            if values in group:
+                counts[tuple(zip(attnames, values))] += 1
+    return counts
+
+
+def unique_field_sets(model):
+    """Returns a list of tuples of field names that must be unique together,
+    from unique fields, `unique_together` and unconditional unique
+    constraints."""
+    field_sets = [(field.name,) for field in model._meta.concrete_fields if field.unique and not field.primary_key]
+    field_sets.extend(tuple(fields) for fields in model._meta.unique_together)
+    field_sets.extend(tuple(constraint.fields) for constraint in model._meta.total_unique_constraints if constraint.fields)
+    return field_sets
+
+
+def invalid_foreign_keys(model, instances):
+    """Does the check in `ForeignKey.validate()` for a batch of instances, with
+    one query per foreign key. Returns a dict mapping each foreign key to the
+    set of its values that don't refer to a valid object."""
+    invalid = {}
+    for field in model._meta.concrete_fields:
+        if not field.many_to_one or field.remote_field.parent_link:
+            continue
+        values = {getattr(inst, field.attname) for inst in instances} - {None}
+        if not values:
+            continue
+        using = router.db_for_read(field.remote_field.model)
+        lookup = {field.remote_field.field_name + '__in': values}
+        valid = field.remote_field.model._base_manager.using(using).filter(**lookup).complex_filter(
+            field.get_limit_choices_to()).values_list(field.remote_field.field_name, flat=True)
+        invalid[field] = values - set(valid)
+    return invalid
+
+
 class BaseTournamentDataImporter(object):
     """Base class for tournament data importers.
 
@@ -160,6 +268,7 @@ class BaseTournamentDataImporter(object):
         if 'loglevel' in kwargs:
             self.logger.setLevel(kwargs['loglevel'])
         self.expect_unique = kwargs.get('expect_unique', True)
+        self.batch_size = kwargs.get('batch_size', None) or DEFAULT_BATCH_SIZE
         self.reset_counts()
 
     def reset_counts(self):
@@ -202,136 +311,113 @@ class BaseTournamentDataImporter(object):
         duplicate objects before saving any of the objects it creates. If
         `expect_unique` is False, it will just skip objects that would be
         duplicates and log a DUPLICATE_INFO message to say so.
+
+        Lines are processed in batches of `self.batch_size`, each of which is
+        checked against the database with a fixed number of queries and then
+        saved using `bulk_create()`. The whole import runs in one transaction,
+        so if `self.strict` is True and there are errors, nothing is saved.
         """
         if hasattr(csvfile, 'seek') and callable(csvfile.seek):
             csvfile.seek(0)
         reader = csv.DictReader(csvfile)
-        kwargs_seen = list()
+        values_seen = set()
+        unique_seen = defaultdict(set)
+        batch = list()
         instances = dict()
         errors = TournamentDataImporterError()
         if expect_unique is None:
             expect_unique = self.expect_unique
         skipped_because_existing = 0
+        fields = {name: field for field in model._meta.concrete_fields for name in (field.name, field.attname)}
         boolean_fields = [field.name for field in model._meta.get_fields()
                           if hasattr(field, 'get_internal_type') and
                           field.get_internal_type() == 'BooleanField']
 
-        for lineno, line in enumerate(reader, start=2):
+        with transaction.atomic():
+            for lineno, line in enumerate(reader, start=2):
 
-            # Strip whitespace first
-            for k in line:
-                if isinstance(line[k], str):
-                    line[k] = line[k].strip()
+                # Strip whitespace first
+                for k in line:
+                    if isinstance(line[k], str):
+                        line[k] = line[k].strip()
 
-            # Interpret the line
-            try:
-                kwargs_list = interpreter(lineno, line)
-                if isinstance(kwargs_list, GeneratorType):
-                    kwargs_list = list(kwargs_list) # force evaluation
-            except (ObjectDoesNotExist, MultipleObjectsReturned, ValueError,
-                    TypeError, IndexError) as e:
-                message = "Couldn't parse line: " + str(e)
-                errors.add(lineno, model, message)
-                continue
-
-            if kwargs_list is None:
-                continue
-            if isinstance(kwargs_list, dict):
-                list_provided = False
-                kwargs_list = [kwargs_list]
-            else:
-                list_provided = True
-
-            # Create the instances
-            for itemno, kwargs in enumerate(kwargs_list, start=1):
-
-                # Extra conversion for booleans (Django's BooleanField.to_python() is too restrictive)
-                boolean_error = False
-                for fieldname in kwargs:
-                    if fieldname in boolean_fields:
-                        try:
-                            kwargs[fieldname] = convert_bool(kwargs[fieldname])
-                        except ValueError as e:
-                            errors.add(lineno, model, str(e))
-                            boolean_error = True
-                if boolean_error:
+                # Interpret the line
+                try:
+                    kwargs_list = interpreter(lineno, line)
+                    if isinstance(kwargs_list, GeneratorType):
+                        kwargs_list = list(kwargs_list) # force evaluation
+                except (ObjectDoesNotExist, MultipleObjectsReturned, ValueError,
+                        TypeError, IndexError) as e:
+                    message = "Couldn't parse line: " + str(e)
+                    errors.add(lineno, model, message)
                     continue
 
-                description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
-
-                # Check if it's a duplicate
-                kwargs_expect_unique = kwargs.copy()
-                if kwargs_expect_unique in kwargs_seen:
-                    if expect_unique:
-                        message = "Duplicate " + description
-                        errors.add(lineno, model, message)
-                    else:
-                        self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
+                if kwargs_list is None:
                     continue
-                kwargs_seen.append(kwargs_expect_unique)
-
-                # Create (but don't save) an instance (or handle an error)
-                try:
-                    inst = model.objects.get(**kwargs)
-                except ObjectDoesNotExist:
-                    inst = model(**kwargs)  # normal case (create object)
-                except MultipleObjectsReturned as e:
-                    if expect_unique:
+                if isinstance(kwargs_list, dict):
+                    list_provided = False
+                    kwargs_list = [kwargs_list]
+                else:
+                    list_provided = True
+
+                for itemno, kwargs in enumerate(kwargs_list, start=1):
+
+                    # Extra conversion for booleans (Django's BooleanField.to_python() is too restrictive)
+                    boolean_error = False
+                    for fieldname in kwargs:
+                        if fieldname in boolean_fields:
+                            try:
+                                kwargs[fieldname] = convert_bool(kwargs[fieldname])
+                            except ValueError as e:
+                                errors.add(lineno, model, str(e))
+                                boolean_error = True
+                    if boolean_error:
+                        continue
+
+                    description = model.__name__ + "(" + ", ".join(["%s=%r" % args for args in kwargs.items()]) + ")"
+
+                    for fieldname in kwargs:
+                        if fieldname not in fields:
+                            self._unrecognized_column(model, fieldname)
+
+                    try:
+                        values = row_values(fields, kwargs)
+                    except ValueError as e:
                         errors.add(lineno, model, str(e))
-                    continue
-                except FieldError as e:
-                    match = re.match(r"Cannot resolve keyword '(\w+)' into field.", str(e))
-                    if match:
-                        message = "There's an unrecognized column header in this file: {}".format(match.group(1))
+                        continue
+                    except ValidationError as e:
+                        errors.update_with_validation_error(lineno, model, e)
+                        continue
+
+                    # Check if it's a duplicate
+                    if values in values_seen:
+                        if expect_unique:
+                            message = "Duplicate " + description
+                            errors.add(lineno, model, message)
+                        else:
+                            self.logger.log(DUPLICATE_INFO, "Skipping duplicate " + description)
+                        continue
+                    values_seen.add(values)
+
+                    key = (lineno, itemno) if list_provided else lineno
+                    batch.append(ImportRow(lineno, key, kwargs, description, values))
+                    if len(batch) >= self.batch_size:
+                        skipped_because_existing += self._import_batch(model, batch, instances, errors, unique_seen, expect_unique)
+                        batch = list()
+
+            if batch:
+                skipped_because_existing += self._import_batch(model, batch, instances, errors, unique_seen, expect_unique)
+
+            # Report errors, if any
+            if errors:
+                if self.strict:
+                    for message in errors.itermessages():
                         self.logger.error(message)
-                        self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
-                        self.logger.error("The original error was: " + str(e))
-                        self.logger.error("If you're writing a new importer, it might be that you "
-                                "need to delete some columns from the dict in your interpreter.")
-                        self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
-                        raise TournamentDataImporterFatalError(message)
-                    else:
-                        raise
-                except ValueError as e:
-                    errors.add(lineno, model, str(e))
-                    continue
-                except ValidationError as e:
-                    errors.update_with_validation_error(lineno, model, e)
-                    continue
+                    raise errors  # rolls back the transaction
                 else:
-                    skipped_because_existing += 1
-                    if expect_unique:
-                        message = description + " already exists"
-                        errors.add(lineno, model, message)
-                    else:
-                        self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", description)
-                    continue
-
-                try:
-                    inst.full_clean()
-                except ValidationError as e:
-                    errors.update_with_validation_error(lineno, model, e)
-                    continue
-
-                key = (lineno, itemno) if list_provided else lineno
-                self.logger.debug("To create from line %s: %s", key, description)
-                instances[key] = inst
-
-        # Report errors, if any
-        if errors:
-            if self.strict:
-                for message in errors.itermessages():
-                    self.logger.error(message)
-                raise errors
-            else:
-                for message in errors.itermessages():
-                    self.logger.warning(message)
-                self.errors.update(errors)
-
-        # Create the instances
-        for lineno, inst in instances.items():
-            inst.save()
-            self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, lineno, inst)
+                    for message in errors.itermessages():
+                        self.logger.warning(message)
+                    self.errors.update(errors)
 
         self.logger.info("Imported %d %s", len(instances), model._meta.verbose_name_plural)
         if skipped_because_existing:
@@ -340,3 +426,140 @@ class BaseTournamentDataImporter(object):
         self.counts.update({model: len(instances)})
 
         return instances
+
+    def _import_batch(self, model, rows, instances, errors, unique_seen, expect_unique):
+        """Validates and saves a batch of rows from `_import()`, adding saved
+        instances to `instances` and errors to `errors`. `unique_seen` keeps
+        track of values of unique fields in earlier batches. Returns the number
+        of rows skipped because the object already exists."""
+        skipped_because_existing = 0
+        existing = count_existing(model, [row.values for row in rows])
+        candidates = []
+
+        for row in rows:
+            if existing[row.values] > 1:
+                if expect_unique:
+                    message = "get() returned more than one %s -- it returned %d!" % (model.__name__, existing[row.values])
+                    errors.add(row.lineno, model, message)
+                continue
+            elif existing[row.values] == 1:
+                skipped_because_existing += 1
+                if expect_unique:
+                    message = row.description + " already exists"
+                    errors.add(row.lineno, model, message)
+                else:
+                    self.logger.log(DUPLICATE_INFO, "Skipping %s, already exists", row.description)
+                continue
+
+            # Create (but don't save) an instance (or handle an error)
+            try:
+                inst = model(**row.kwargs)
+            except (ValueError, TypeError) as e:
+                errors.add(row.lineno, model, str(e))
+                continue
+            candidates.append((row, inst))
+
+        # Foreign keys and uniqueness are checked for the whole batch, rather
+        # than by full_clean(), which would query the database for each row.
+        invalid = invalid_foreign_keys(model, [inst for row, inst in candidates])
+        validated = []
+        for row, inst in candidates:
+            exclude = [field.name for field in invalid if getattr(inst, field.attname) is not None]
+            try:
+                inst.full_clean(exclude=exclude, validate_unique=False, validate_constraints=False)
+            except ValidationError as e:
+                errors.update_with_validation_error(row.lineno, model, e)
+                continue
+
+            error_dict = {}
+            for field, values in invalid.items():
+                value = getattr(inst, field.attname)
+                if value in values:
+                    error_dict[field.name] = ValidationError(field.error_messages['invalid'], code='invalid', params={
+                        'model': field.remote_field.model._meta.verbose_name, 'pk': value,
+                        'field': field.remote_field.field_name, 'value': value})
+            if error_dict:
+                errors.update_with_validation_error(row.lineno, model, ValidationError(error_dict))
+                continue
+            validated.append((row, inst))
+
+        for field_names in unique_field_sets(model):
+            validated = self._check_unique(model, field_names, validated, errors, unique_seen[field_names])
+
+        # If this import is going to fail anyway, don't bother saving
+        if self.strict and errors:
+            return skipped_because_existing
+
+        for row, inst in validated:
+            self.logger.debug("To create from line %s: %s", row.key, row.description)
+        self._save_instances(model, [inst for row, inst in validated])
+        for row, inst in validated:
+            self.logger.debug("Made %s from line %s: %r", model._meta.verbose_name, row.key, inst)
+            instances[row.key] = inst
+
+        return skipped_because_existing
+
+    def _check_unique(self, model, field_names, validated, errors, seen):
+        """Checks that the fields in `field_names` are unique together, both
+        among instances in this import and against the database. Returns the
+        (row, instance) pairs in `validated` that passed."""
+        attnames = [model._meta.get_field(name).attname for name in field_names]
+        keys = {}
+        for row, inst in validated:
+            key = tuple(getattr(inst, attname) for attname in attnames)
+            if None not in key:
+                keys[row.key] = key
+        if not keys:
+            return validated
+
+        existing = set(_matching_rows(model, attnames, set(keys.values())))
+        passed = []
+        for row, inst in validated:
+            key = keys.get(row.key)
+            if key is not None and (key in existing or key in seen):
+                message = inst.unique_error_message(model, field_names)
+                field = field_names[0] if len(field_names) == 1 else NON_FIELD_ERRORS
+                errors.update_with_validation_error(row.lineno, model, ValidationError({field: [message]}))
+                continue
+            if key is not None:
+                seen.add(key)
+            passed.append((row, inst))
+        return passed
+
+    def _save_instances(self, model, instances):
+        """Saves new instances in bulk, in chunks of `self.batch_size`. Models
+        that override save(), or that have more than one concrete parent, are
+        saved one at a time. Since `bulk_create()` doesn't send the pre_save
+        and post_save signals, this sends them itself, so that receivers (e.g.
+        cache invalidation) still run."""
+        if not instances:
+            return
+
+        if model.save is not models.Model.save or len(model._meta.get_parent_list()) > 1:
+            for inst in instances:
+                inst.save()
+            return
+
+        using = router.db_for_write(model)
+        send_signals = pre_save.has_listeners(model) or post_save.has_listeners(model)
+        if send_signals:
+            for inst in instances:
+                pre_save.send(sender=model, instance=inst, raw=False, using=using, update_fields=None)
+
+        if model._meta.parents:
+            bulk_create_inherited(model, instances, using)
+        else:
+            model._base_manager.using(using).bulk_create(instances, batch_size=self.batch_size)
+
+        if send_signals:
+            for inst in instances:
+                post_save.send(sender=model, instance=inst, created=True, update_fields=None, raw=False, using=using)
+
+    def _unrecognized_column(self, model, fieldname):
+        message = "There's an unrecognized column header in this file: {}".format(fieldname)
+        self.logger.error(message)
+        self.logger.error("I was trying to import %s at the time.", model._meta.verbose_name_plural)
+        self.logger.error("If you're writing a new importer, it might be that you "
+                "need to delete some columns from the dict in your interpreter.")
+        self.logger.error("If using construct_interpreter(), you can do this with the DELETE argument.")
+        raise TournamentDataImporterFatalError(message)
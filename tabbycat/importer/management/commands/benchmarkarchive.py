@@ -0,0 +1,68 @@
+import logging
+import time
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from draw.models import Debate
+from tournaments.models import Tournament
+
+from ...archive import Exporter, Importer
+from ...importers import DEFAULT_BATCH_SIZE
+
+
+class Command(BaseCommand):
+
+    help = "Times the archive importer on archives of the demo tournaments in the data directory. " \
+           "Each tournament is imported, has some rounds simulated, and is exported, and the archive " \
+           "is then imported. Everything is rolled back afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("sources", nargs="*", default=["australs24team"],
+            help="Demo data directories to benchmark, whose teams must have speakers (default: australs24team)")
+        parser.add_argument("-r", "--rounds", type=int, default=3,
+            help="Number of preliminary rounds to simulate before exporting (default: 3)")
+        parser.add_argument("-b", "--batch-sizes", type=int, nargs="+", default=[DEFAULT_BATCH_SIZE],
+            help="Importer batch sizes to benchmark (default: %d)" % DEFAULT_BATCH_SIZE)
+
+    def count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    def create_archive(self, source, nrounds):
+        call_command("importtournament", source, slug="benchmark-archive-source", name="Archive benchmark source",
+                     short_name="Archive benchmark source", stdout=StringIO())
+        tournament = Tournament.objects.get(slug="benchmark-archive-source")
+        rounds = [str(seq) for seq in tournament.prelim_rounds().order_by('seq').values_list('seq', flat=True)[:nrounds]]
+        if rounds:
+            call_command("simulaterounds", *rounds, tournament_selection=[tournament.slug], confirm=rounds,
+                         confirmed=True, create_user=True, stdout=StringIO())
+        return b"".join(Exporter(tournament).stream())
+
+    def handle(self, *args, **options):
+        logging.disable(logging.INFO)
+
+        self.stdout.write("{:<16} {:>7} {:>9} {:>7} {:>10} {:>9}".format(
+            "source", "batch", "size (kB)", "debates", "time (s)", "queries"))
+
+        for source in options["sources"]:
+            with transaction.atomic():
+                archive = self.create_archive(source, options["rounds"])
+
+                for batch_size in options["batch_sizes"]:
+                    with transaction.atomic():
+                        importer = Importer(BytesIO(archive), batch_size=batch_size)
+                        self.query_count = 0
+                        start = time.perf_counter()
+                        with connection.execute_wrapper(self.count_query):
+                            importer.import_tournament()
+                        elapsed = time.perf_counter() - start
+
+                        ndebates = Debate.objects.filter(round__tournament=importer.tournament).count()
+                        self.stdout.write("{:<16} {:>7d} {:>9.1f} {:>7d} {:>10.3f} {:>9d}".format(
+                            source, batch_size, len(archive) / 1024, ndebates, elapsed, self.query_count))
+                        transaction.set_rollback(True)
+
+                transaction.set_rollback(True)
@@ -0,0 +1,94 @@
+import csv
+import io
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from tournaments.models import Tournament
+
+from ...importers import DEFAULT_BATCH_SIZE
+from ...importers.anorak import AnorakTournamentDataImporter
+
+
+class Command(BaseCommand):
+
+    help = "Times the importer on randomly generated CSV files of speakers and adjudicators. " \
+           "Everything is imported into a new tournament, which is rolled back afterwards."
+
+    items = ['speakers', 'adjudicators']
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--rows", type=int, nargs="+", default=[10000],
+            help="Number of rows in each generated file (default: 10000)")
+        parser.add_argument("-b", "--batch-sizes", type=int, nargs="+", default=[DEFAULT_BATCH_SIZE],
+            help="Importer batch sizes to benchmark (default: %d)" % DEFAULT_BATCH_SIZE)
+        parser.add_argument("-i", "--institutions", type=int, default=100,
+            help="Number of institutions to spread participants across (default: 100)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Random seed for generating the files")
+
+    def make_csv(self, fieldnames, rows):
+        f = io.StringIO()
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        return f
+
+    def generate_institutions(self, ninstitutions):
+        return self.make_csv(["name", "code", "region"], [
+            {"name": "Institution %d" % i, "code": "Inst%d" % i, "region": "Region %d" % (i % 5)}
+            for i in range(ninstitutions)
+        ])
+
+    def generate_speakers(self, nrows, ninstitutions, rng):
+        return self.make_csv(["name", "email", "gender", "institution", "team_name", "use_institution_prefix"], [
+            {"name": "Speaker %d" % i, "email": "speaker%d@example.com" % i, "gender": rng.choice(["male", "female", ""]),
+             "institution": "Inst%d" % (i // 2 % ninstitutions), "team_name": str(i // 2), "use_institution_prefix": "true"}
+            for i in range(nrows)
+        ])
+
+    def generate_adjudicators(self, nrows, ninstitutions, rng):
+        rows = []
+        for i in range(nrows):
+            institution = rng.randrange(ninstitutions)
+            conflict = (institution + rng.randrange(1, ninstitutions)) % ninstitutions
+            rows.append({"name": "Adjudicator %d" % i, "email": "adjudicator%d@example.com" % i,
+                "gender": rng.choice(["male", "female", ""]), "institution": "Inst%d" % institution,
+                "base_score": rng.randint(1, 5), "institution_conflicts": "Inst%d" % conflict})
+        return self.make_csv(["name", "email", "gender", "institution", "base_score", "institution_conflicts"], rows)
+
+    def count_query(self, execute, sql, params, many, context):
+        self.query_count += 1
+        return execute(sql, params, many, context)
+
+    def handle(self, *args, **options):
+        loglevel = [logging.ERROR, logging.WARNING, logging.INFO, logging.DEBUG][options["verbosity"]]
+        rng = random.Random(options["seed"])
+
+        self.stdout.write("{:>7} {:>7} {:<14} {:>10} {:>9}".format("rows", "batch", "item", "time (s)", "queries"))
+
+        for nrows in options["rows"]:
+            files = {
+                'speakers': self.generate_speakers(nrows, options["institutions"], rng),
+                'adjudicators': self.generate_adjudicators(nrows, options["institutions"], rng),
+            }
+
+            for batch_size in options["batch_sizes"]:
+                with transaction.atomic():
+                    tournament = Tournament.objects.create(slug="benchmark-import", name="Import benchmark")
+                    importer = AnorakTournamentDataImporter(tournament, loglevel=loglevel, batch_size=batch_size)
+                    importer.import_institutions(self.generate_institutions(options["institutions"]))
+
+                    for item in self.items:
+                        self.query_count = 0
+                        start = time.perf_counter()
+                        with connection.execute_wrapper(self.count_query):
+                            getattr(importer, "import_" + item)(files[item])
+                        elapsed = time.perf_counter() - start
+                        self.stdout.write("{:>7d} {:>7d} {:<14} {:>10.3f} {:>9d}".format(
+                            nrows, batch_size, item, elapsed, self.query_count))
+
+                    transaction.set_rollback(True)
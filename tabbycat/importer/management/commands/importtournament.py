@@ -8,7 +8,7 @@ from django.template.defaultfilters import slugify
 import participants.models as pm
 import venues.models as vm
 from draw.models import DebateTeam
-from importer.importers import DUPLICATE_INFO, importer_registry, TournamentDataImporterFatalError
+from importer.importers import DEFAULT_BATCH_SIZE, DUPLICATE_INFO, importer_registry, TournamentDataImporterFatalError
 from tournaments.forms import TournamentStartForm
 from tournaments.models import Tournament
 from tournaments.utils import auto_make_rounds
@@ -34,6 +34,8 @@ class Command(BaseCommand):
                             help="Keep existing tournament and data, skipping lines if they are duplicates.")
         parser.add_argument('--relaxed', action='store_false', dest='strict', default=True,
                             help="Don't crash if there is an error, just skip and keep going.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Number of lines to check and save at a time (default: %d)" % DEFAULT_BATCH_SIZE)
 
         # Cleaning shared objects
         parser.add_argument('--clean-shared', action='store_true', default=False,
@@ -65,7 +67,8 @@ class Command(BaseCommand):
 
         importer_class = self.get_importer_class()
         self.importer = importer_class(
-            self.tournament, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'])
+            self.tournament, loglevel=loglevel, strict=options['strict'], expect_unique=not options['keep_existing'],
+            batch_size=options['batch_size'])
 
         # Importer classes specify what they import, and in what order
         for item in self.importer.order:
@@ -0,0 +1,144 @@
+import gzip
+from io import BytesIO
+from xml.etree.ElementTree import fromstring, tostring
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import slugify
+
+from adjallocation.models import DebateAdjudicator
+from adjfeedback.models import AdjudicatorFeedback
+from draw.models import Debate, DebateTeam
+from participants.models import Adjudicator, Speaker, Team
+from registration.models import Answer
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from tournaments.models import Round, Tournament
+from utils.tests import CompletedTournamentTestMixin
+
+from ..archive import Exporter, Importer
+
+
+class TestExporter(CompletedTournamentTestMixin, TestCase):
+
+    def test_stream_matches_create_all(self):
+        expected = tostring(Exporter(self.tournament).create_all())
+        streamed = b"".join(Exporter(self.tournament, batch_size=5).stream())
+        self.assertTrue(streamed.startswith(b"<?xml version='1.0' encoding='utf-8'?>"))
+        self.assertEqual(tostring(fromstring(streamed)), expected)
+
+    def test_gzip(self):
+        streamed = b"".join(Exporter(self.tournament).stream())
+        compressed = b"".join(Exporter(self.tournament).stream(compress=True))
+        self.assertEqual(gzip.decompress(compressed), streamed)
+
+    def test_contents(self):
+        root = Exporter(self.tournament).create_all()
+        self.assertEqual(len(root.findall('round')), self.tournament.round_set.count())
+        self.assertEqual(len(root.findall('participants/team')), self.tournament.team_set.count())
+        self.assertEqual(len(root.findall('participants/adjudicator')), self.tournament.adjudicator_set.count())
+        debates = Debate.objects.filter(round__tournament=self.tournament)
+        self.assertEqual(len(root.findall('round/debate')), debates.count())
+        self.assertEqual(len([tag for tag in root.findall('round/debate') if tag.find('side') is not None]),
+                         debates.filter(ballotsubmission__confirmed=True).count())
+
+    def test_queries_per_batch(self):
+        # Each batch of debates, teams or adjudicators takes a fixed number of queries
+        query_counts = []
+        for batch_size in [6, 12]:
+            with CaptureQueriesContext(connection) as context:
+                for chunk in Exporter(self.tournament, batch_size=batch_size).stream():
+                    pass
+            query_counts.append(len(context))
+        self.assertGreater(query_counts[0], query_counts[1])
+        self.assertLess(query_counts[0], 2 * query_counts[1])
+
+    def test_view(self):
+        user = get_user_model().objects.create(username='test_admin', is_superuser=True)
+        self.client.force_login(user)
+
+        response = self.client.get(self.reverse_url('exporter-archive-all'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/xml; charset=utf-8')
+        content = b"".join(response.streaming_content)
+        self.assertEqual(fromstring(content).get('short'), self.tournament.short_name)
+
+        response = self.client.get(self.reverse_url('exporter-archive-all') + "?gzip")
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.xml.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), content)
+
+
+class TestImporter(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.archive = b"".join(Exporter(self.tournament).stream())
+        # The imported tournament takes its slug from the archive
+        Tournament.objects.filter(pk=self.tournament.pk).update(slug="original")
+
+    def import_archive(self, source, **kwargs):
+        importer = Importer(source, **kwargs)
+        importer.import_tournament()
+        return importer.tournament
+
+    def assertTournamentsEqual(self, imported):  # noqa: N802
+        for model, lookup in [
+            (Team, 'tournament'), (Speaker, 'team__tournament'), (Adjudicator, 'tournament'),
+            (Round, 'tournament'), (Debate, 'round__tournament'), (DebateAdjudicator, 'debate__round__tournament'),
+            (BallotSubmission, 'debate__round__tournament'), (AdjudicatorFeedback, 'adjudicator__tournament'),
+        ]:
+            with self.subTest(model=model.__name__):
+                self.assertEqual(model.objects.filter(**{lookup: imported}).count(),
+                                 model.objects.filter(**{lookup: self.tournament}).count())
+
+        # Sides are only archived for debates with results
+        self.assertEqual(DebateTeam.objects.filter(debate__round__tournament=imported).count(),
+                         DebateTeam.objects.filter(debate__round__tournament=self.tournament,
+                                                   debate__ballotsubmission__confirmed=True).count())
+
+        def scores(tournament, model):
+            return sorted((name, round(score, 6)) for name, score in model.objects.filter(
+                ballot_submission__debate__round__tournament=tournament, ballot_submission__confirmed=True,
+            ).values_list('debate_team__team__long_name', 'score'))
+
+        self.assertEqual(scores(imported, TeamScore), scores(self.tournament, TeamScore))
+        self.assertEqual(scores(imported, SpeakerScore), scores(self.tournament, SpeakerScore))
+        self.assertEqual(TeamScore.objects.filter(ballot_submission__debate__round__tournament=imported, win=True).count(),
+                         TeamScore.objects.filter(ballot_submission__debate__round__tournament=self.tournament,
+                                                  ballot_submission__confirmed=True, win=True).count())
+
+    def test_stream(self):
+        imported = self.import_archive(BytesIO(self.archive))
+        self.assertEqual(imported.slug, slugify(self.tournament.short_name))
+        self.assertEqual(imported.pref('substantive_speakers'), self.tournament.pref('substantive_speakers'))
+        self.assertTournamentsEqual(imported)
+
+        def answers(tournament):
+            feedback = AdjudicatorFeedback.objects.filter(adjudicator__tournament=tournament, confirmed=True)
+            return sorted(Answer.objects.filter(object_id__in=feedback.values('id')).values_list('question__name', 'answer'))
+
+        self.assertEqual(answers(imported), answers(self.tournament))
+
+    def test_element(self):
+        imported = self.import_archive(fromstring(self.archive))
+        self.assertTournamentsEqual(imported)
+
+    def test_queries_per_batch(self):
+        # Queries depend on the number of batches, not the number of objects
+        query_counts = []
+        for i, batch_size in enumerate([50, 1000]):
+            Tournament.objects.filter(slug=slugify(self.tournament.short_name)).update(slug="imported-%d" % i)
+            with CaptureQueriesContext(connection) as context:
+                self.import_archive(BytesIO(self.archive), batch_size=batch_size)
+            query_counts.append(len(context))
+        self.assertGreater(query_counts[0], query_counts[1])
+        self.assertLess(query_counts[1], Debate.objects.filter(round__tournament=self.tournament).count() * 2)
+
+    def test_rolls_back(self):
+        archive = self.archive.replace(b'<side team="', b'<side team="X', 1)
+        with self.assertRaises(KeyError):
+            self.import_archive(BytesIO(archive))
+        self.assertFalse(Tournament.objects.filter(slug=slugify(self.tournament.short_name)).exists())
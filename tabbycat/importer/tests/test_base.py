@@ -0,0 +1,118 @@
+"""Unit tests for the importer's batched import engine."""
+
+import logging
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+import participants.models as pm
+import tournaments.models as tm
+
+from ..importers import TournamentDataImporterError
+from ..importers.base import BaseTournamentDataImporter, make_interpreter
+
+
+class TestBaseImporter(TestCase):
+
+    def setUp(self):
+        self.tournament = tm.Tournament.objects.create(slug="import-test")
+        self.logger = logging.getLogger(__name__)
+        self.logger.propagate = False  # keep logs contained for tests
+
+    def get_importer(self, **kwargs):
+        return BaseTournamentDataImporter(self.tournament, logger=self.logger, **kwargs)
+
+    def make_csv(self, header, rows):
+        return [header] + [",".join(row) for row in rows]
+
+    def test_query_count_independent_of_rows(self):
+        importer = self.get_importer(batch_size=50)
+        query_counts = []
+        for nrows in [5, 50]:
+            f = self.make_csv("name", [("Region %d-%d" % (nrows, i),) for i in range(nrows)])
+            with CaptureQueriesContext(connection) as context:
+                regions = importer._import(f, pm.Region)
+            self.assertEqual(len(regions), nrows)
+            query_counts.append(len(context))
+        self.assertEqual(query_counts[0], query_counts[1])
+        self.assertEqual(pm.Region.objects.count(), 55)
+
+    def test_batches(self):
+        importer = self.get_importer(batch_size=3)
+        f = self.make_csv("name", [("Region %d" % i,) for i in range(10)])
+        regions = importer._import(f, pm.Region)
+        self.assertEqual(sorted(regions.keys()), list(range(2, 12)))
+        self.assertEqual(regions[5].name, "Region 3")
+        self.assertIsNotNone(regions[5].pk)
+        self.assertEqual(importer.counts[pm.Region], 10)
+
+    def test_duplicates_and_existing(self):
+        pm.Region.objects.create(name="Existing")
+        importer = self.get_importer(batch_size=2, strict=False)
+        f = self.make_csv("name", [("First",), ("Second",), ("First",), ("Existing",), ("Third",)])
+        regions = importer._import(f, pm.Region)
+        self.assertCountEqual(regions.keys(), [2, 3, 6])
+        self.assertEqual([(entry.lineno, entry.message) for entry in importer.errors.entries], [
+            (4, "Duplicate Region(name='First')"),
+            (5, "Region(name='Existing') already exists"),
+        ])
+
+    def test_duplicates_skipped(self):
+        pm.Region.objects.create(name="Existing")
+        importer = self.get_importer(expect_unique=False)
+        f = self.make_csv("name", [("First",), ("First",), ("Existing",)])
+        regions = importer._import(f, pm.Region)
+        self.assertCountEqual(regions.keys(), [2])
+        self.assertFalse(importer.errors)
+
+    def test_strict_rolls_back(self):
+        importer = self.get_importer(batch_size=2)
+        f = self.make_csv("name", [("Region %d" % i,) for i in range(5)] + [("Region 0",)])
+        with self.assertRaises(TournamentDataImporterError) as cm:
+            importer._import(f, pm.Region)
+        self.assertEqual([entry.lineno for entry in cm.exception.entries], [7])
+        self.assertFalse(pm.Region.objects.exists())
+
+    def test_unique_constraint(self):
+        region = pm.Region.objects.create(name="Region")
+        pm.Institution.objects.create(name="Existing", code="Ex")
+        importer = self.get_importer(batch_size=2, strict=False)
+        interpreter = make_interpreter(region=lambda x: pm.Region.objects.get(name=x))
+        f = self.make_csv("name,code,region", [
+            ("First", "1", ""), ("Existing", "Ex", "Region"), ("Second", "2", ""), ("First", "1", "Region"),
+        ])
+        institutions = importer._import(f, pm.Institution, interpreter)
+        self.assertCountEqual(institutions.keys(), [2, 4])
+        self.assertEqual([entry.lineno for entry in importer.errors.entries], [3, 5])
+        self.assertFalse(pm.Institution.objects.filter(region=region).exists())
+
+    def test_invalid_values(self):
+        importer = self.get_importer(strict=False)
+        f = self.make_csv("name,slug,seq", [("Good", "good", "1"), ("Bad", "bad", "one"), ("Missing", "", "2")])
+        interpreter = make_interpreter(tournament=self.tournament)
+        categories = importer._import(f, pm.SpeakerCategory, interpreter)
+        self.assertCountEqual(categories.keys(), [2])
+        self.assertEqual([(entry.lineno, entry.field) for entry in importer.errors.entries], [(3, 'seq'), (4, 'slug')])
+
+    def test_invalid_foreign_key(self):
+        importer = self.get_importer(strict=False)
+        f = self.make_csv("name,code,region_id", [("First", "1", "9999")])
+        institutions = importer._import(f, pm.Institution)
+        self.assertEqual(institutions, {})
+        self.assertEqual([(entry.lineno, entry.field) for entry in importer.errors.entries], [(2, 'region')])
+
+    def test_multi_table_inheritance(self):
+        importer = self.get_importer(batch_size=4)
+        interpreter = make_interpreter(tournament=self.tournament)
+        f = self.make_csv("name,email", [("Adjudicator %d" % i, "adj%d@example.com" % i) for i in range(10)])
+        adjudicators = importer._import(f, pm.Adjudicator, interpreter)
+        self.assertEqual(self.tournament.adjudicator_set.count(), 10)
+        for adj in adjudicators.values():
+            self.assertEqual(pm.Person.objects.get(pk=adj.pk).email, adj.email)
+            self.assertEqual(pm.Adjudicator.objects.get(pk=adj.pk).name, adj.name)
+
+        # Existing adjudicators are found through the parent table's fields
+        importer.expect_unique = False
+        self.assertEqual(importer._import(f, pm.Adjudicator, interpreter), {})
+        self.assertEqual(self.tournament.adjudicator_set.count(), 10)
@@ -1,11 +1,10 @@
 import logging
-from xml.etree import ElementTree
+from io import BytesIO
 
-from defusedxml.ElementTree import fromstring
 from django.contrib import messages
 from django.core import management
 from django.forms import modelformset_factory
-from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseRedirect
+from django.http import HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils.safestring import mark_safe
@@ -264,7 +263,7 @@ class TournamentImportArchiveView(AdministratorMixin, FormView):
     view_role = ""
 
     def form_valid(self, form):
-        self.importer = Importer(fromstring(form.cleaned_data['xml']))
+        self.importer = Importer(BytesIO(form.cleaned_data['xml'].encode('utf-8')))
         self.importer.import_tournament()
 
         messages.success(self.request, _("Tournament archive has been imported."))
@@ -281,13 +280,17 @@ class ExportArchiveIndexView(AdministratorMixin, TournamentMixin, TemplateView):
 
 
 class ExportArchiveAllView(AdministratorMixin, TournamentMixin, View):
+    """Streams the archive, so that it's never held in memory all at once. If
+    the `gzip` query parameter is set, the archive is gzip-compressed."""
     view_permission = Permission.EXPORT_XML
 
     def get(self, request, *args, **kwargs):
-        response = HttpResponse(self.get_xml(), content_type='text/xml; charset=utf-8')
-        response['Content-Disposition'] = 'attachment; filename="' + self.tournament.short_name + '.xml"'
+        compress = 'gzip' in request.GET
+        exporter = Exporter(self.tournament)
+        filename = self.tournament.short_name + ('.xml.gz' if compress else '.xml')
+        content_type = 'application/gzip' if compress else 'text/xml; charset=utf-8'
 
-        return response
+        response = StreamingHttpResponse(exporter.stream(compress=compress), content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="' + filename + '"'
 
-    def get_xml(self):
-        return ElementTree.tostring(Exporter(self.tournament).create_all())
+        return response
@@ -1,20 +1,17 @@
-import json
-from dataclasses import asdict
 from email.utils import formataddr
-from time import time
-from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union
 
 from channels.consumer import SyncConsumer
 from django.conf import settings
 from django.core import mail
-from django.template import Context, Template
-from html2text import html2text
 
 from draw.models import Debate
 from participants.models import Person
 from tournaments.models import Round, Tournament
 
-from .models import BulkNotification, EmailStatus, SentMessage
+from .delivery import EmailDelivery
+from .models import BulkNotification, SentMessage
+from .rendering import NotificationRenderer
 from .utils import (AdjudicatorAssignmentEmailGenerator, BallotsEmailGenerator, MotionReleaseEmailGenerator,
                     NotificationContextGenerator, RandomizedUrlEmailGenerator, StandingsEmailGenerator,
                     TeamDrawEmailGenerator, TeamSpeakerEmailGenerator)
@@ -34,22 +31,8 @@ class NotificationQueueConsumer(SyncConsumer):
     }
 
     @staticmethod
-    def _send(messages: List[mail.EmailMultiAlternatives], records: List[SentMessage]) -> None:
-        SentMessage.objects.bulk_create(records)
-
-        connection = mail.get_connection(fail_silently=False)
-        failed_events = []
-
-        connection.open()
-        for message, record in zip(messages, records):
-            try:
-                message.extra_headers['X-RECORDID'] = record.id
-                connection.send_messages([message])
-            except Exception as e:
-                failed_events.append(EmailStatus(email=record, event=EmailStatus.EventType.FAILED, data={'error': str(e)}))
-        connection.close()
-
-        EmailStatus.objects.bulk_create(failed_events)
+    def _send(items: Iterable[Tuple[mail.EmailMultiAlternatives, SentMessage]]) -> None:
+        EmailDelivery().send(items)
 
     @staticmethod
     def _get_from_fields(t: Tournament) -> Tuple[str, Optional[List[str]]]:
@@ -77,9 +60,6 @@ class NotificationQueueConsumer(SyncConsumer):
         from_email, reply_to = self._get_from_fields(t)
         notification_type = event['message']
 
-        subject = Template(event['subject'])
-        html_body = Template(event['body'])
-
         recipients = Person.objects.filter(pk__in=event['send_to'] or [], email__isnull=False).exclude(email='')
         contexts = self.NOTIFICATION_GENERATORS[notification_type].generate(to=recipients, **event['extra'])
 
@@ -98,30 +78,5 @@ class NotificationQueueConsumer(SyncConsumer):
         else:
             bulk_notification = BulkNotification.objects.create(event=notification_type, **creation_kwargs)
 
-        messages = []
-        records = []
-        for instance, recipient in contexts:
-            data = asdict(instance)
-            data['USER'] = recipient.name
-
-            hook_id = str(bulk_notification.id) + "-" + str(recipient.id) + "-" + str(int(time()))[4:]
-            context = Context(data)
-            body = html_body.render(context)
-            email = mail.EmailMultiAlternatives(
-                subject=subject.render(context), body=html2text(body),
-                from_email=from_email, to=[formataddr((recipient.name.strip(), recipient.email))],
-                reply_to=reply_to, headers={
-                    'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
-                },
-            )
-            email.attach_alternative(body, "text/html")
-            messages.append(email)
-
-            raw_message = email.message()
-            records.append(
-                SentMessage(recipient=recipient, email=recipient.email,
-                            method=SentMessage.METHOD_TYPE_EMAIL,
-                            context=data, message_id=raw_message['Message-ID'],
-                            hook_id=hook_id, notification=bulk_notification))
-
-        self._send(messages, records)
+        renderer = NotificationRenderer(bulk_notification, event['subject'], event['body'], from_email, reply_to)
+        self._send(renderer.render(contexts))
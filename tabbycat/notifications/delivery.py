@@ -0,0 +1,145 @@
+"""Delivery of notification emails
+
+Messages are sent in chunks over a pool of SMTP connections, each of which is
+opened once and then reused for every chunk its thread sends. All database
+writes happen in the calling thread, once per chunk: a chunk's SentMessage
+records are created before it's handed to the pool (as their IDs go in the
+message headers), and EmailStatus records for any messages in it that couldn't
+be sent are created when the chunk finishes.
+
+Messages that fail for a reason that might go away (a dropped connection, or a
+4xx reply from the server) are retried after a backoff that doubles with each
+attempt. Other failures are recorded straight away.
+"""
+import logging
+import smtplib
+from concurrent.futures import as_completed, ThreadPoolExecutor
+from itertools import islice
+from threading import local, Lock
+from time import sleep
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core import mail
+
+from .models import EmailStatus, SentMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECTIONS = 4
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BACKOFF = 1.0
+
+
+def is_transient(error: Exception) -> bool:
+    """Returns True if sending might succeed if tried again later."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, msg in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPException):
+        return isinstance(error, smtplib.SMTPServerDisconnected)
+    return isinstance(error, OSError)  # e.g. connection refused or reset
+
+
+class EmailDelivery:
+    """Sends messages over up to `connections` concurrent SMTP connections,
+    `chunk_size` messages at a time, trying each message up to `max_attempts`
+    times. Defaults are taken from the NOTIFICATIONS_SMTP_CONNECTIONS,
+    NOTIFICATIONS_CHUNK_SIZE, NOTIFICATIONS_MAX_ATTEMPTS and
+    NOTIFICATIONS_RETRY_BACKOFF (in seconds) settings."""
+
+    def __init__(self, connections: int = None, chunk_size: int = None, max_attempts: int = None, backoff: float = None) -> None:
+        self.connections = connections or getattr(settings, 'NOTIFICATIONS_SMTP_CONNECTIONS', DEFAULT_CONNECTIONS)
+        self.chunk_size = chunk_size or getattr(settings, 'NOTIFICATIONS_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+        self.max_attempts = max_attempts or getattr(settings, 'NOTIFICATIONS_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        self.backoff = backoff if backoff is not None else getattr(settings, 'NOTIFICATIONS_RETRY_BACKOFF', DEFAULT_BACKOFF)
+
+        self._local = local()
+        self._lock = Lock()
+        self._opened = []
+
+    def send(self, items: Iterable[Tuple[mail.EmailMessage, SentMessage]]) -> int:
+        """Sends each message in `items`, an iterable of (message, unsaved
+        SentMessage record) pairs, and saves the records. Returns the number
+        of messages that couldn't be sent."""
+        nfailed = 0
+        items = iter(items)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.connections) as executor:
+                chunks = {}
+                while chunk := list(islice(items, self.chunk_size)):
+                    records = [record for message, record in chunk]
+                    SentMessage.objects.bulk_create(records)
+                    for message, record in chunk:
+                        message.extra_headers['X-RECORDID'] = record.id
+                    chunks[executor.submit(self.send_chunk, [message for message, record in chunk])] = records
+
+                for future in as_completed(chunks):
+                    records = chunks[future]
+                    failures = future.result()
+                    EmailStatus.objects.bulk_create([
+                        EmailStatus(email=records[i], event=EmailStatus.EventType.FAILED, data={'error': str(error)})
+                        for i, error in failures.items()
+                    ])
+                    nfailed += len(failures)
+        finally:
+            for connection in self._opened:
+                self.close(connection)
+
+        return nfailed
+
+    def send_chunk(self, messages: List[mail.EmailMessage]) -> Dict[int, Exception]:
+        """Sends `messages` using this thread's connection. Returns a dict
+        mapping the index of each message that couldn't be sent to the error
+        raised when it was last tried."""
+        failures = {}
+        pending = list(enumerate(messages))
+
+        for attempt in range(1, self.max_attempts + 1):
+            retries = []
+            for i, message in pending:
+                try:
+                    self.get_connection().send_messages([message])
+                except Exception as e:
+                    if not isinstance(e, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+                        self.discard_connection()  # might be broken
+                    if is_transient(e) and attempt < self.max_attempts:
+                        retries.append((i, message))
+                    else:
+                        failures[i] = e
+
+            if not retries:
+                break
+            delay = self.backoff * 2 ** (attempt - 1)
+            logger.warning("Retrying %d message(s) in %.1f seconds (attempt %d of %d)",
+                           len(retries), delay, attempt + 1, self.max_attempts)
+            sleep(delay)
+            pending = retries
+
+        return failures
+
+    def get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = mail.get_connection(fail_silently=False)
+            connection.open()
+            self._local.connection = connection
+            with self._lock:
+                self._opened.append(connection)
+        return connection
+
+    def discard_connection(self) -> None:
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            self.close(connection)
+
+    @staticmethod
+    def close(connection) -> None:
+        try:
+            connection.close()
+        except Exception:
+            logger.exception("Error closing email connection")
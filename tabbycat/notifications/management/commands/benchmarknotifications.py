@@ -0,0 +1,79 @@
+import time
+from dataclasses import asdict
+
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.template import Context, Template
+from html2text import html2text
+
+from options.preferences import AdjudicatorDrawNotificationMessage, AdjudicatorDrawNotificationSubject
+from participants.models import Person
+
+from ...models import BulkNotification
+from ...rendering import DEFAULT_BATCH_SIZE, NotificationRenderer
+from ...utils import AdjudicatorAssignmentEmailGenerator, EmailContextData
+
+CUSTOM_SUBJECT = "Briefing for all participants"
+CUSTOM_BODY = ("<p>Hi all,</p>"
+    "<p>The briefing will be held in the <strong>main hall</strong> at 9am. Please bring your "
+    "<a href=\"https://example.com/schedule\">schedule</a> and arrive early.</p>" * 5 +
+    "<ul>" + "<li>Remember to check in at the registration desk.</li>" * 10 + "</ul>")
+
+
+class Command(BaseCommand):
+
+    help = "Times the rendering of notification emails, comparing the notification renderer with rendering " \
+           "each message separately. Nothing is sent and the database isn't used."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--messages", type=int, default=5000,
+            help="Number of messages to render (default: 5000)")
+        parser.add_argument("-b", "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+            help="Renderer batch size (default: %d)" % DEFAULT_BATCH_SIZE)
+
+    def get_cases(self, n):
+        recipients = [Person(id=i, name="Person %d" % i, email="person%d@example.com" % i) for i in range(n)]
+        context_class = AdjudicatorAssignmentEmailGenerator.context_class
+        adj_contexts = [(context_class(ROUND="Round 1", VENUE="Room %d" % (i % 50), PANEL="Adj A (the chair), Adj B (a panellist)",
+                                       DRAW="Team %d vs Team %d" % (i, i + 1), POSITION="a panellist",
+                                       URL="https://example.com/privateurls/%d/" % i), recipient)
+                        for i, recipient in enumerate(recipients)]
+        custom_contexts = [(EmailContextData(), recipient) for recipient in recipients]
+        return [
+            ("custom", CUSTOM_SUBJECT, CUSTOM_BODY, custom_contexts),
+            ("adj_draw", AdjudicatorDrawNotificationSubject.default, AdjudicatorDrawNotificationMessage.default, adj_contexts),
+        ]
+
+    def render_separately(self, subject, body, contexts):
+        """Renders each message with its own Context, converting each body to
+        text and serializing each message to get its Message-ID."""
+        subject, body = Template(subject), Template(body)
+        for instance, recipient in contexts:
+            data = asdict(instance)
+            data['USER'] = recipient.name
+            context = Context(data)
+            html = body.render(context)
+            email = mail.EmailMultiAlternatives(subject=subject.render(context), body=html2text(html),
+                from_email="tab@example.com", to=[recipient.email])
+            email.attach_alternative(html, "text/html")
+            email.message()['Message-ID']
+
+    def render_with_renderer(self, subject, body, contexts, batch_size):
+        notification = BulkNotification(id=1, event=BulkNotification.EventType.CUSTOM)
+        renderer = NotificationRenderer(notification, subject, body, "tab@example.com", batch_size=batch_size)
+        for item in renderer.render(contexts):
+            pass
+
+    def time(self, func, *args):
+        start = time.perf_counter()
+        func(*args)
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        n = options["messages"]
+        self.stdout.write("{:<10} {:>8} {:>14} {:>14} {:>9}".format("case", "messages", "separate (s)", "renderer (s)", "speedup"))
+
+        for name, subject, body, contexts in self.get_cases(n):
+            separate = self.time(self.render_separately, subject, body, contexts)
+            renderer = self.time(self.render_with_renderer, subject, body, contexts, options["batch_size"])
+            self.stdout.write("{:<10} {:>8d} {:>14.3f} {:>14.3f} {:>8.1f}x".format(name, n, separate, renderer, separate / renderer))
@@ -0,0 +1,88 @@
+"""Rendering of notification emails
+
+The subject and body templates of a notification are compiled once, and each
+recipient's message is then rendered into a single Context that is reused
+(with the recipient's variables pushed onto and popped off it) rather than
+building a new one each time. Messages are rendered lazily, a batch at a time,
+so that sending can start before every message has been rendered.
+
+Converting the HTML body to plain text is comparatively slow, so its result is
+cached: notifications whose body doesn't depend on any per-recipient variables
+(as is common for custom messages) only convert it once. Message-IDs are
+generated directly rather than by serializing the whole MIME message, and are
+set on the message so that the ID that's recorded is the one that's sent.
+"""
+import json
+from dataclasses import asdict
+from email.utils import formataddr, make_msgid
+from functools import lru_cache
+from itertools import islice
+from time import time
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from django.core import mail
+from django.core.mail.utils import DNS_NAME
+from django.template import Context, Template
+from html2text import html2text
+
+from participants.models import Person
+
+from .models import BulkNotification, SentMessage
+from .utils import EmailContextData
+
+DEFAULT_BATCH_SIZE = 100
+
+
+class NotificationRenderer:
+    """Renders a bulk notification's messages from its subject and body
+    templates, `batch_size` recipients at a time."""
+
+    def __init__(self, notification: BulkNotification, subject: str, body: str, from_email: str,
+                 reply_to: Optional[List[str]] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.notification = notification
+        self.subject = Template(subject)
+        self.body = Template(body)
+        self.from_email = from_email
+        self.reply_to = reply_to
+        self.batch_size = batch_size
+        self.html2text = lru_cache(maxsize=64)(html2text)
+
+    def render(self, contexts: Iterable[Tuple[EmailContextData, Person]]) -> Iterator[Tuple[mail.EmailMultiAlternatives, SentMessage]]:
+        """Yields a (message, unsaved SentMessage record) pair for each
+        (context data, recipient) pair in `contexts`."""
+        contexts = iter(contexts)
+        while batch := list(islice(contexts, self.batch_size)):
+            yield from self.render_batch(batch)
+
+    def render_batch(self, batch: List[Tuple[EmailContextData, Person]]) -> List[Tuple[mail.EmailMultiAlternatives, SentMessage]]:
+        timestamp = str(int(time()))[4:]
+        context = Context()
+        rendered = []
+
+        for instance, recipient in batch:
+            data = asdict(instance)
+            data['USER'] = recipient.name
+
+            with context.push(data):
+                subject = self.subject.render(context)
+                body = self.body.render(context)
+
+            hook_id = "%d-%d-%s" % (self.notification.id, recipient.id, timestamp)
+            message_id = make_msgid(domain=DNS_NAME)
+            email = mail.EmailMultiAlternatives(
+                subject=subject, body=self.html2text(body),
+                from_email=self.from_email, to=[formataddr((recipient.name.strip(), recipient.email))],
+                reply_to=self.reply_to, headers={
+                    'Message-ID': message_id,
+                    'X-SMTPAPI': json.dumps({'unique_args': {'hook-id': hook_id}}),  # SendGrid-specific 'hook-id'
+                },
+            )
+            email.attach_alternative(body, "text/html")
+
+            record = SentMessage(recipient=recipient, email=recipient.email,
+                                 method=SentMessage.METHOD_TYPE_EMAIL,
+                                 context=data, message_id=message_id,
+                                 hook_id=hook_id, notification=self.notification)
+            rendered.append((email, record))
+
+        return rendered
@@ -0,0 +1,163 @@
+import socketserver
+from email import message_from_bytes
+from threading import Lock, Thread
+
+from django.core import mail
+from django.test import override_settings, TestCase
+
+from participants.models import Person
+from tournaments.models import Tournament
+
+from ..consumers import NotificationQueueConsumer
+from ..delivery import EmailDelivery
+from ..models import BulkNotification, EmailStatus, SentMessage
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+
+        self.reply("220 localhost SMTP stand-in")
+        while line := self.rfile.readline():
+            command = line.decode('ascii').strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == 'RCPT' and 'reject' in command:
+                self.reply("550 No such user")
+            elif verb in ('EHLO', 'HELO', 'MAIL', 'RCPT', 'RSET', 'NOOP'):
+                self.reply("250 OK")
+            elif verb == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while (data := self.rfile.readline()) not in (b".\r\n", b""):
+                    lines.append(data)
+                with server.lock:
+                    server.data_commands += 1
+                    defer = server.data_commands <= server.defer
+                    if not defer:
+                        server.messages.append(message_from_bytes(b"".join(lines)))
+                self.reply("451 Try again later" if defer else "250 OK")
+            elif verb == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("500 Command not recognised")
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """Minimal SMTP server that records the messages it receives. It defers
+    (with a 451 reply) the first `defer` messages it's sent, and rejects
+    recipients with "reject" in their address."""
+
+    daemon_threads = True
+
+    def __init__(self, defer=0):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.defer = defer
+        self.lock = Lock()
+        self.messages = []
+        self.connections = 0
+        self.data_commands = 0
+
+
+class TestEmailDelivery(TestCase):
+
+    def setUp(self):
+        tournament = Tournament.objects.create(slug="delivery-test")
+        self.notification = BulkNotification.objects.create(tournament=tournament, event=BulkNotification.EventType.CUSTOM)
+
+    def start_server(self, **kwargs):
+        server = SMTPStandIn(**kwargs)
+        Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.enterContext(override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=server.server_address[1], EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD=''))
+        return server
+
+    def make_items(self, addresses):
+        return [(mail.EmailMessage(subject="Message %d" % i, body="Body", from_email="tab@example.com", to=[address]),
+                 SentMessage(email=address, method=SentMessage.METHOD_TYPE_EMAIL, notification=self.notification,
+                             message_id="<message-%d@example.com>" % i))
+                for i, address in enumerate(addresses)]
+
+    def test_send(self):
+        server = self.start_server()
+        items = self.make_items(["person%d@example.com" % i for i in range(23)])
+        nfailed = EmailDelivery(connections=3, chunk_size=5, backoff=0).send(items)
+
+        self.assertEqual(nfailed, 0)
+        self.assertEqual(len(server.messages), 23)
+        self.assertLessEqual(server.connections, 3)
+        self.assertEqual(SentMessage.objects.count(), 23)
+        self.assertFalse(EmailStatus.objects.exists())
+        self.assertCountEqual([message['X-RECORDID'] for message in server.messages],
+                              [str(record.id) for record in SentMessage.objects.all()])
+
+    def test_retry_deferred(self):
+        server = self.start_server(defer=4)
+        nfailed = EmailDelivery(connections=2, chunk_size=5, backoff=0).send(
+            self.make_items(["person%d@example.com" % i for i in range(10)]))
+
+        self.assertEqual(nfailed, 0)
+        self.assertEqual(server.data_commands, 14)
+        self.assertCountEqual([message['To'] for message in server.messages], ["person%d@example.com" % i for i in range(10)])
+        self.assertFalse(EmailStatus.objects.exists())
+
+    def test_give_up(self):
+        server = self.start_server(defer=100)
+        nfailed = EmailDelivery(connections=2, chunk_size=2, max_attempts=3, backoff=0).send(
+            self.make_items(["person%d@example.com" % i for i in range(5)]))
+
+        self.assertEqual(nfailed, 5)
+        self.assertEqual(server.data_commands, 15)
+        self.assertEqual(EmailStatus.objects.filter(event=EmailStatus.EventType.FAILED).count(), 5)
+
+    def test_rejected_recipient(self):
+        server = self.start_server()
+        nfailed = EmailDelivery(connections=2, chunk_size=2, backoff=0).send(
+            self.make_items(["person0@example.com", "reject@example.com", "person2@example.com"]))
+
+        self.assertEqual(nfailed, 1)
+        self.assertEqual(len(server.messages), 2)
+        status = EmailStatus.objects.get()
+        self.assertEqual(status.event, EmailStatus.EventType.FAILED)
+        self.assertEqual(status.email.email, "reject@example.com")
+
+    def test_connection_refused(self):
+        server = self.start_server()
+        server.shutdown()
+        server.server_close()
+        nfailed = EmailDelivery(connections=1, chunk_size=2, max_attempts=2, backoff=0).send(
+            self.make_items(["person0@example.com", "person1@example.com"]))
+
+        self.assertEqual(nfailed, 2)
+        self.assertEqual(SentMessage.objects.count(), 2)
+        self.assertEqual(EmailStatus.objects.count(), 2)
+
+
+class TestNotificationQueueConsumer(TestCase):
+
+    def test_email(self):
+        tournament = Tournament.objects.create(slug="consumer-test", short_name="Consumer")
+        people = [Person.objects.create(name="Person %d" % i, email="person%d@example.com" % i) for i in range(3)]
+
+        NotificationQueueConsumer().email({
+            'message': BulkNotification.EventType.CUSTOM,
+            'subject': "Hello {{ USER }}",
+            'body': "<p>Message for {{ USER }}</p>",
+            'send_to': [person.id for person in people],
+            'extra': {'tournament_id': tournament.id},
+        })
+
+        self.assertCountEqual([message.subject for message in mail.outbox], ["Hello Person %d" % i for i in range(3)])
+        self.assertEqual(SentMessage.objects.filter(notification__tournament=tournament).count(), 3)
+        for message in mail.outbox:
+            self.assertIn(message.extra_headers['X-RECORDID'], SentMessage.objects.values_list('id', flat=True))
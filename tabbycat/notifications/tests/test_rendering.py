@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from itertools import islice
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from participants.models import Person
+
+from ..models import BulkNotification
+from ..rendering import html2text, NotificationRenderer
+from ..utils import EmailContextData
+
+
+@dataclass
+class VenueContext(EmailContextData):
+    VENUE: str
+
+
+class TestNotificationRenderer(SimpleTestCase):
+
+    def setUp(self):
+        self.notification = BulkNotification(id=7, event=BulkNotification.EventType.CUSTOM)
+        self.recipients = [Person(id=i, name="Person %d" % i, email="person%d@example.com" % i) for i in range(5)]
+
+    def get_renderer(self, subject, body, **kwargs):
+        return NotificationRenderer(self.notification, subject, body, "Tab <tab@example.com>", **kwargs)
+
+    def test_render(self):
+        renderer = self.get_renderer("{{ VENUE }} for {{ USER }}", "<p>Hi {{ USER }}, you're in <b>{{ VENUE }}</b></p>", batch_size=2)
+        contexts = [(VenueContext(VENUE="Room %d" % i), person) for i, person in enumerate(self.recipients)]
+        rendered = list(renderer.render(contexts))
+
+        self.assertEqual(len(rendered), 5)
+        for i, (email, record) in enumerate(rendered):
+            self.assertEqual(email.subject, "Room %d for Person %d" % (i, i))
+            self.assertEqual(email.alternatives[0][0], "<p>Hi Person %d, you're in <b>Room %d</b></p>" % (i, i))
+            self.assertEqual(email.body.strip(), "Hi Person %d, you're in **Room %d**" % (i, i))
+            self.assertEqual(email.to, ["Person %d <person%d@example.com>" % (i, i)])
+            self.assertEqual(record.context, {'VENUE': "Room %d" % i, 'USER': "Person %d" % i})
+            self.assertTrue(record.hook_id.startswith("7-%d-" % i))
+            self.assertIs(record.recipient, self.recipients[i])
+            self.assertIs(record.notification, self.notification)
+
+    def test_message_id(self):
+        renderer = self.get_renderer("Subject", "<p>Body</p>")
+        rendered = list(renderer.render([(EmailContextData(), person) for person in self.recipients]))
+
+        message_ids = [record.message_id for email, record in rendered]
+        self.assertEqual(len(set(message_ids)), 5)
+        for email, record in rendered:
+            self.assertEqual(email.message()['Message-ID'], record.message_id)
+
+    def test_html2text_cached(self):
+        with mock.patch('notifications.rendering.html2text', wraps=html2text) as converter:
+            renderer = self.get_renderer("Hello {{ USER }}", "<p>The same for everyone</p>")
+            rendered = list(renderer.render([(EmailContextData(), person) for person in self.recipients]))
+
+        converter.assert_called_once_with("<p>The same for everyone</p>")
+        self.assertEqual([email.body.strip() for email, record in rendered], ["The same for everyone"] * 5)
+        self.assertEqual(len({email.subject for email, record in rendered}), 5)
+
+    def test_render_lazily(self):
+        renderer = self.get_renderer("Subject", "<p>Body</p>", batch_size=2)
+        contexts = iter([(EmailContextData(), person) for person in self.recipients])
+        list(islice(renderer.render(contexts), 1))
+        self.assertEqual(len(list(contexts)), 3)
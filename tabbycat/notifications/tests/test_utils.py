@@ -0,0 +1,84 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from adjallocation.models import DebateAdjudicator
+from availability.utils import activate_all
+from draw.models import Debate, DebateTeam
+from draw.types import DebateSide
+from participants.models import Adjudicator, Institution, Person, Speaker, Team
+from tournaments.caching import tournament_cache
+from tournaments.models import Round, Tournament
+from utils.models import bulk_create_inherited
+from utils.tests import ClearTournamentCacheMixin
+from venues.models import Venue
+
+from ..utils import (AdjudicatorAssignmentEmailGenerator, StandingsEmailGenerator, TeamDrawEmailGenerator,
+                     TeamSpeakerEmailGenerator)
+
+
+class TestGeneratorQueryCounts(ClearTournamentCacheMixin, TestCase):
+    """Checks that the number of queries each context generator makes doesn't
+    depend on the number of recipients."""
+
+    NDEBATES = 84  # 168 teams of 6 speakers, and 12 adjudicators per debate, gives 1,008 of each
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tournament = Tournament.objects.create(slug="generators", short_name="Generators")
+        cls.round = Round.objects.create(tournament=cls.tournament, seq=1, name="Round 1", abbreviation="R1",
+                                         stage=Round.Stage.PRELIMINARY, draw_status=Round.Status.RELEASED)
+        institution = Institution.objects.create(code="INS", name="Institution")
+
+        teams = Team.objects.bulk_create([Team(tournament=cls.tournament, institution=institution, reference=str(i),
+                                               short_reference=str(i), short_name="INS %d" % i, long_name="Institution %d" % i)
+                                          for i in range(cls.NDEBATES * 2)])
+        bulk_create_inherited(Speaker, [Speaker(team=team, name="Speaker %s-%d" % (team.reference, j), email="s%s-%d@example.com" % (team.reference, j))
+                                        for team in teams for j in range(6)], connection.alias)
+        adjs = [Adjudicator(tournament=cls.tournament, institution=institution, name="Adjudicator %d" % i,
+                            email="a%d@example.com" % i, url_key="adj%d" % i) for i in range(cls.NDEBATES * 12)]
+        bulk_create_inherited(Adjudicator, adjs, connection.alias)
+        venues = Venue.objects.bulk_create([Venue(tournament=cls.tournament, name="Room %d" % i, priority=i) for i in range(cls.NDEBATES)])
+        activate_all(cls.round)
+
+        debates = Debate.objects.bulk_create([Debate(round=cls.round, venue=venue, sides_confirmed=True) for venue in venues])
+        DebateTeam.objects.bulk_create([DebateTeam(debate=debate, team=team, side=side) for i, debate in enumerate(debates)
+                                        for team, side in zip(teams[2*i:2*i+2], [DebateSide.AFF, DebateSide.NEG])])
+        DebateAdjudicator.objects.bulk_create([
+            DebateAdjudicator(debate=debate, adjudicator=adj, type=DebateAdjudicator.TYPE_CHAIR if j == 0 else DebateAdjudicator.TYPE_PANEL)
+            for i, debate in enumerate(debates) for j, adj in enumerate(adjs[12*i:12*i+12])])
+
+    def get_round(self):
+        return Round.objects.select_related('tournament').get(pk=self.round.pk)
+
+    def assertQueriesConstant(self, generate, model):  # noqa: N802
+        all_ids = list(model.objects.order_by('?').values_list('pk', flat=True))
+        generate(Person.objects.filter(pk=all_ids[0]))  # saves the tournament's default preferences
+        query_counts = []
+        for n in [10, 1000]:
+            ids = all_ids[:n]
+            recipients = Person.objects.filter(pk__in=ids)
+            # so that preferences are loaded the same way each time
+            cache.clear()
+            tournament_cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                emails = generate(recipients)
+            query_counts.append(len(context.captured_queries))
+            self.assertCountEqual([person.id for data, person in emails], ids)
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_adjudicator_assignment(self):
+        self.assertQueriesConstant(lambda to: AdjudicatorAssignmentEmailGenerator.generate(
+            to=to, url="https://example.com/", round=self.get_round()), Adjudicator)
+
+    def test_team_draw(self):
+        self.assertQueriesConstant(lambda to: TeamDrawEmailGenerator.generate(to=to, round=self.get_round()), Speaker)
+
+    def test_standings(self):
+        self.assertQueriesConstant(lambda to: StandingsEmailGenerator.generate(
+            to=to, url="https://example.com/", round=self.get_round()), Speaker)
+
+    def test_team_speaker(self):
+        self.assertQueriesConstant(lambda to: TeamSpeakerEmailGenerator.generate(
+            to=to, tournament=Tournament.objects.get(pk=self.tournament.pk)), Speaker)
@@ -52,6 +52,20 @@ def _assemble_panel(adjs: List[Tuple['Person', str]]) -> str:
     return ", ".join(adj_string)
 
 
+def _draw_for(round: 'Round', speakers: bool, **kwargs) -> List['Debate']:
+    """Returns the debates in `round` matching the filter `kwargs`, each once,
+    with their teams and adjudicators prefetched. Filters across relations to
+    recipients match a debate once for each recipient in it, so the debates
+    are selected by ID. Each debate shares the `round` instance, as otherwise
+    each would fetch its own copy of the tournament (and its preferences)."""
+    from draw.models import Debate
+    draw = list(round.debate_set_with_prefetches(speakers=speakers).filter(
+        id__in=Debate.objects.filter(round=round, **kwargs).values('id')))
+    for debate in draw:
+        debate.round = round
+    return draw
+
+
 def _check_in_to(pk: int, to_ids: Set[int]) -> bool:
     try:
         to_ids.remove(pk)
@@ -85,7 +99,7 @@ class AdjudicatorAssignmentEmailGenerator(NotificationContextGenerator):
     def generate(cls, to: 'QuerySet[Person]', url: str, round: 'Round') -> List[Tuple[EmailContextData, 'Person']]:
         emails = []
         to_ids = {p.id for p in to}
-        draw = round.debate_set_with_prefetches(speakers=False).filter(debateadjudicator__adjudicator__in=to)
+        draw = _draw_for(round, speakers=False, debateadjudicator__adjudicator__in=to)
         use_codes = use_team_code_names(round.tournament, False)
 
         for debate in draw:
@@ -211,7 +225,7 @@ class StandingsEmailGenerator(NotificationContextGenerator):
         emails = []
         to_ids = {p.id for p in to}
 
-        teams = round.active_teams.filter(speaker__in=to).prefetch_related('speaker_set')
+        teams = round.active_teams.filter(speaker__in=to).distinct().prefetch_related('speaker_set')
         populate_win_counts(teams, round)
 
         context = {
@@ -280,7 +294,7 @@ class TeamSpeakerEmailGenerator(NotificationContextGenerator):
         emails = []
         to_ids = {p.id for p in to}
 
-        teams = tournament.team_set.filter(speaker__in=to).prefetch_related(
+        teams = tournament.team_set.filter(speaker__in=to).distinct().prefetch_related(
             'speaker_set', 'break_categories').select_related('institution')
         for team in teams:
             context = cls.context_class(
@@ -316,7 +330,7 @@ class TeamDrawEmailGenerator(NotificationContextGenerator):
         emails = []
         to_ids = {p.id for p in to}
         tournament = round.tournament
-        draw = round.debate_set_with_prefetches(speakers=True).filter(debateteam__team__speaker__in=to)
+        draw = _draw_for(round, speakers=True, debateteam__team__speaker__in=to)
         use_codes = use_team_code_names(tournament, False)
 
         for debate in draw:
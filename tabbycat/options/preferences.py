@@ -298,6 +298,33 @@ class DrawAvoidConflicts(ChoicePreference):
     default = 'one_up_one_down'
 
 
+@tournament_preferences_registry.register
+class DrawMatchingEngine(ChoicePreference):
+    help_text = _("How minimum cost matching finds the matching. The sparse engine only considers each team's "
+        "nearest candidates, widening the search if needed; it is much faster for large tournaments, but may "
+        "occasionally miss the optimal draw")
+    verbose_name = _("Minimum cost matching engine")
+    section = draw_rules
+    name = 'draw_matching_engine'
+    choices = (
+        ('networkx', _("Exact (consider all pairings)")),
+        ('sparse', _("Sparse (consider nearest candidates)")),
+    )
+    default = 'networkx'
+
+
+@tournament_preferences_registry.register
+class DrawSearchCandidates(IntegerPreference):
+    help_text = _("Number of candidate draws to generate in parallel, keeping the one with the lowest penalty "
+        "score (weighted conflicts, side imbalance and pull-ups). Only useful with random elements in the draw, "
+        "such as random draws or random tiebreaks in power-paired draws; 1 generates a single draw")
+    verbose_name = _("Candidate draws to search")
+    section = draw_rules
+    name = 'draw_search_candidates'
+    default = 1
+    field_kwargs = {'validators': [MinValueValidator(1)]}
+
+
 @tournament_preferences_registry.register
 class DrawPullupRestriction(ChoicePreference):
     help_text = _("If using pull-ups, restrict which teams can be pulled up. "
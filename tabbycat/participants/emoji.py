@@ -15,7 +15,7 @@ def set_emoji(teams, tournament):
     unused_emoji = [e for e in EMOJI_RANDOM_OPTIONS if e[0] not in used_emoji]
 
     if len(teams) > len(unused_emoji):
-        teams = teams[:len(unused_emoji)]
+        teams = list(teams)[:len(unused_emoji)]
     emojis = random.sample(unused_emoji, len(teams))
 
     for team, emoji in zip(teams, emojis):
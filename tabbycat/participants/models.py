@@ -366,6 +366,11 @@ class Team(models.Model):
         return self.speaker_set.all()
 
     def seen(self, other, before_round=None):
+        """Returns the number of times this team has met `other`. If a draw
+        manager has attached `team_history` to this team, and `before_round`
+        isn't given, this is answered from that instead of the database."""
+        if before_round is None and hasattr(self, 'team_history'):
+            return self.team_history.get(other.id, 0)
         queryset = self.debateteam_set.filter(debate__debateteam__team=other)
         if before_round:
             queryset = queryset.filter(debate__round__seq__lt=before_round)
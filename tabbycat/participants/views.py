@@ -313,11 +313,13 @@ class AdjudicatorRecordView(AdministratorMixin, BaseAdjudicatorRecordView):
 
 class PublicTeamRecordView(PublicTournamentPageMixin, BaseTeamRecordView):
     public_page_preference = 'public_record'
+    cache_tags = ['draw', 'results']
     admin = False
 
 
 class PublicAdjudicatorRecordView(PublicTournamentPageMixin, BaseAdjudicatorRecordView):
     public_page_preference = 'public_record'
+    cache_tags = ['draw', 'results']
     admin = False
 
 
@@ -56,7 +56,7 @@ def fill_scoresheet_randomly(scoresheet, tournament, nattempts=1000):
                     step = tournament.pref('score_step')
                     start = tournament.pref('score_min') / step
                     stop = tournament.pref('score_max') / step
-                score = random.randint(start, stop) * step
+                score = random.randint(int(start), int(stop)) * step
                 scoresheet.set_score(side, pos, score)
 
         if scoresheet.uses_declared_winners:
@@ -143,7 +143,7 @@ def populate_results(ballotsubs, tournament=None):
         debate__ballotsubmission__in=ballotsubs,
     ).exclude(
         type=DebateAdjudicator.TYPE_TRAINEE,
-    ).select_related('adjudicator__institution', 'adjudicator__tournament').distinct()
+    ).select_related('adjudicator__institution', 'adjudicator__tournament').distinct().order_by('id')
 
     for da in debateadjs:
         for result in results_by_debate_id[da.debate_id]:
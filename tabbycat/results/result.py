@@ -305,6 +305,22 @@ class BaseDebateResult:
             self.ballotsub.teamscore_set.update_or_create(debate_team=dt,
                     defaults=self.get_defaults_fields('teamscore', side))
 
+    def build_scores(self):
+        """Returns unsaved instances of everything `save()` would save, for
+        callers that save many results at once using `bulk_create()`, like the
+        archive importer. Unlike `save()`, this assumes that the ballot
+        submission doesn't have any scores yet. Instances that refer to other
+        instances in the list come after them, so models should be saved in the
+        order in which they first appear. Raises ResultError if the ballot set
+        is incomplete or invalid."""
+        from .models import TeamScore
+
+        if not self.is_valid():
+            raise ResultError("Tried to save an invalid result.")
+
+        return [TeamScore(ballot_submission=self.ballotsub, debate_team=self.debateteams[side],
+                **self.get_defaults_fields('teamscore', side)) for side in self.sides]
+
     def get_defaults_fields(self, model, *args):
         """Collects fields defined in subclasses"""
         fields = {}
@@ -502,6 +518,18 @@ class DebateResultByAdjudicator(BaseDebateResult):
                     debate_team=dt, debate_adjudicator=da,
                     defaults=self.get_defaults_fields('teamscorebyadj', adj, side))
 
+    def build_scores(self):
+        from .models import TeamScoreByAdj
+
+        scores = super().build_scores()
+        for adj, sheet in self.scoresheets.items():
+            da = self.debateadjs[adj]
+            for side in self.sides:
+                scores.append(TeamScoreByAdj(ballot_submission=self.ballotsub,
+                        debate_team=self.debateteams[side], debate_adjudicator=da,
+                        **self.get_defaults_fields('teamscorebyadj', adj, side)))
+        return scores
+
     # --------------------------------------------------------------------------
     # Data setting and retrieval
     # --------------------------------------------------------------------------
@@ -774,6 +802,21 @@ class DebateResultWithScoresMixin:
                     speaker_score.speakercriterionscore_set.update_or_create(
                         criterion=criterion, defaults=self.get_defaults_fields('speakercriterionscore', side, pos, criterion))
 
+    def build_scores(self):
+        from .models import SpeakerCriterionScore, SpeakerScore
+
+        scores = super().build_scores()
+        for side in self.sides:
+            dt = self.debateteams[side]
+            for pos in self.positions:
+                speaker_score = SpeakerScore(ballot_submission=self.ballotsub, debate_team=dt,
+                        position=pos, **self.get_defaults_fields('speakerscore', side, pos))
+                scores.append(speaker_score)
+                for criterion in self.criteria:
+                    scores.append(SpeakerCriterionScore(speaker_score=speaker_score, criterion=criterion,
+                            **self.get_defaults_fields('speakercriterionscore', side, pos, criterion)))
+        return scores
+
     # --------------------------------------------------------------------------
     # Data setting and retrieval
     # --------------------------------------------------------------------------
@@ -1135,6 +1178,24 @@ class DebateResultByAdjudicatorWithScores(DebateResultWithScoresMixin, DebateRes
                         speaker_score_by_adj.speakercriterionscorebyadj_set.update_or_create(
                             criterion=criterion, defaults=self.get_defaults_fields('speakercriterionscorebyadj', adj, side, pos, criterion))
 
+    def build_scores(self):
+        from .models import SpeakerCriterionScoreByAdj, SpeakerScoreByAdj
+
+        scores = super().build_scores()
+        for adj, sheet in self.scoresheets.items():
+            da = self.debateadjs[adj]
+            for side in self.sides:
+                dt = self.debateteams[side]
+                for pos in self.positions:
+                    speaker_score_by_adj = SpeakerScoreByAdj(ballot_submission=self.ballotsub,
+                            debate_team=dt, debate_adjudicator=da, position=pos,
+                            **self.get_defaults_fields('speakerscorebyadj', adj, side, pos))
+                    scores.append(speaker_score_by_adj)
+                    for criterion in self.criteria:
+                        scores.append(SpeakerCriterionScoreByAdj(speaker_score_by_adj=speaker_score_by_adj, criterion=criterion,
+                                **self.get_defaults_fields('speakercriterionscorebyadj', adj, side, pos, criterion)))
+        return scores
+
     def set_score(self, adjudicator, side, position, score):
         try:
             self.scoresheets[adjudicator].set_score(side, position, score)
@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tournaments.models import Round
+from utils.pagecache import invalidate_pages, round_page_tags
+
+from .models import BallotSubmission
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def invalidate_pages_for_ballot(sender, instance, raw=False, **kwargs):
+    # Confirming (or unconfirming) a ballot changes the public results and
+    # standings. The round might already have been deleted, if this was a cascade.
+    if raw:
+        return
+    round = Round.objects.filter(debate__id=instance.debate_id).select_related('tournament').first()
+    if round is not None:
+        invalidate_pages(*round_page_tags(round, ['results', 'standings']))
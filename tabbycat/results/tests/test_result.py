@@ -5,7 +5,7 @@ from django.test import TestCase
 from draw.models import Debate, DebateTeam
 from draw.types import DebateSide
 from participants.models import Adjudicator, Institution, Speaker, Team
-from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore
+from results.models import BallotSubmission, SpeakerScore, SpeakerScoreByAdj, TeamScore, TeamScoreByAdj
 from results.result import ConsensusDebateResultWithScores, DebateResultByAdjudicatorWithScores, ResultError    # absolute import to keep logger's name consistent
 from tournaments.models import Round, Tournament
 from utils.tests import suppress_logs
@@ -193,6 +193,18 @@ class GeneralSpeakerTestsMixin:
         # Run self.save_complete_result and check completeness
         self.assertTrue(result.is_complete())
 
+    @standard_test
+    def test_build_scores(self, result, testdata, scoresheet_type):
+        # Should return unsaved copies of what save() saved
+        scores = result.build_scores()
+        self.assertTrue(all(score.pk is None for score in scores))
+        for model in [TeamScore, TeamScoreByAdj, SpeakerScore, SpeakerScoreByAdj]:
+            with self.subTest(model=model.__name__):
+                fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+                self.assertCountEqual(
+                    [tuple(getattr(score, field) for field in fields) for score in scores if type(score) is model],
+                    model.objects.filter(ballot_submission=result.ballotsub).values_list(*fields))
+
     def test_unknown_speaker(self):
         self.save_complete_result(self.testdata['high'])
         result = self.get_result()
@@ -55,6 +55,7 @@ class PublicResultsIndexView(PublicTournamentPageMixin, TemplateView):
     template_name = 'public_results_index.html'
     public_page_preference = 'public_results'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ['results']
 
     def get_context_data(self, **kwargs):
         kwargs["rounds"] = self.tournament.round_set.filter(
@@ -163,6 +164,7 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
     page_emoji = '💥'
     default_view = 'team'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ['results']
 
     def get_table(self):
         view_type = self.request.session.get('results_view', self.default_view)
@@ -247,6 +249,12 @@ class PublicResultsForRoundView(RoundMixin, PublicTournamentPageMixin, VueTableT
         kwargs['view_type'] = self.request.session.get('results_view', self.default_view)
         return super().get_context_data(**kwargs)
 
+    def get_cache_variant(self):
+        # The view type is stored in the session, so is different for each visitor
+        if self.request.GET.get('view') in ['team', 'debate']:
+            return self.request.GET['view']
+        return self.request.session.get('results_view', self.default_view)
+
 
 # ==============================================================================
 # Ballot entry form views
@@ -856,6 +864,8 @@ class PublicBallotSubmissionIndexView(PublicTournamentPageMixin, RoundMixin, Vue
     """Public view listing all debate-adjudicators for the current round, as
     links for them to enter their ballots."""
 
+    cache_tags = ['draw', 'motions']
+
     def is_page_enabled(self, tournament):
         return tournament.pref('participant_ballots') == 'public'
 
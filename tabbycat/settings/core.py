@@ -210,6 +210,15 @@ PUBLIC_FAST_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_FAST_CACHE_TIMEOUT', 60 *
 PUBLIC_SLOW_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_SLOW_CACHE_TIMEOUT', 60 * 3.5))
 TAB_PAGES_CACHE_TIMEOUT = int(os.environ.get('TAB_PAGES_CACHE_TIMEOUT', 60 * 120))
 
+# Whether public pages are rendered again by the "pagecache" worker when what
+# they show changes (see utils/pagecache.py). Like DRAW_GENERATION_IN_WORKER,
+# if this isn't set, it's only done if the channel layer isn't in-memory.
+PUBLIC_PAGE_PREWARMING = bool(int(os.environ['PUBLIC_PAGE_PREWARMING'])) if 'PUBLIC_PAGE_PREWARMING' in os.environ else None
+
+# In-process cache of tournament and round objects (see tournaments/caching.py)
+TOURNAMENT_CACHE_SIZE = int(os.environ.get('TOURNAMENT_CACHE_SIZE', 32))
+TOURNAMENT_CACHE_MAX_AGE = float(os.environ.get('TOURNAMENT_CACHE_MAX_AGE', 2))
+
 # Default non-heroku cache is to use local memory
 CACHES = {
     'default': {
@@ -332,6 +341,19 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Whether draws are generated by the "draw" worker, rather than in the request
+# that asks for one. The worker needs a channel layer shared between processes,
+# so if this isn't set, it's only used if the layer isn't in-memory.
+DRAW_GENERATION_IN_WORKER = bool(int(os.environ['DRAW_GENERATION_IN_WORKER'])) if 'DRAW_GENERATION_IN_WORKER' in os.environ else None
+
+# ==============================================================================
+# Notifications
+# ==============================================================================
+
+# Number of concurrent SMTP connections used to send bulk emails (some email
+# providers limit this); see notifications/delivery.py for other settings
+NOTIFICATIONS_SMTP_CONNECTIONS = int(os.environ.get('NOTIFICATIONS_SMTP_CONNECTIONS', 4))
+
 # ==============================================================================
 # Dynamic preferences
 # ==============================================================================
@@ -255,6 +255,13 @@ class Standings:
 
         self.ranked = True
 
+    def set_order(self, standings):
+        """Sets the order of the standings directly, for generators that sort
+        them some other way. `standings` must be a list of all the
+        `StandingInfo` objects in these standings."""
+        self._standings = standings
+        self.ranked = True
+
     def filter(self, include_filter):
         self.infos = {instance: info for instance, info in self.infos.items() if include_filter(info)}
 
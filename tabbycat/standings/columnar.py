@@ -0,0 +1,760 @@
+"""Columnar standings engines for teams and speakers.
+
+`ColumnarTeamStandingsGenerator` and `ColumnarSpeakerStandingsGenerator`
+produce the same `Standings` as `TeamStandingsGenerator` and
+`SpeakerStandingsGenerator`, but rather than annotating querysets, they reduce
+the results of the tournament to per-team or per-speaker aggregates (counts,
+sums, sums of squares, etc.) in NumPy arrays, compute metrics from those
+aggregates, and rank using `numpy.lexsort`.
+
+Aggregates are additive over rounds, so they're persisted as a
+`StandingsSnapshot` after each completed preliminary round. Standings for a
+later round start from the latest snapshot, and only load results from rounds
+after it. Snapshots are deleted when results, pairings or rounds they include
+change; see `standings.signals`. Snapshots also record the tournament options
+their aggregates depend on, and are ignored if those options have changed.
+
+Snapshots are saved by the first standings generator to need them, from results
+it has just loaded. So that a change committed in the meantime can't leave
+behind a snapshot of the old results, invalidating snapshots changes the
+tournament's snapshot version (in the shared cache), both straight away and
+when the change commits. A snapshot isn't saved if the version has changed
+since its results were loaded, and is deleted again if it changes before the
+save commits.
+
+Who-beat-whom and average individual speaker score can't be computed this way.
+If they're only extra metrics, their usual annotators are run after ranking; if
+they're in the precedence, the generator falls back to the queryset-based
+implementation.
+"""
+
+import logging
+from functools import cached_property
+from time import time_ns
+
+import numpy as np
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from draw.models import DebateTeam
+from participants.models import Speaker
+from results.models import SpeakerScore, TeamScore
+from tournaments.models import Round
+
+from .base import Standings
+from .models import StandingsSnapshot
+from .speakers import SpeakerStandingsGenerator
+from .teams import OpponentMatrix, TeamStandingsGenerator
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION_KEY = "standings_snapshots_%d_version"
+
+
+def get_snapshot_version(tournament_id):
+    """Returns the version of the tournament's snapshots, which changes whenever
+    they're invalidated, or None if it isn't in the shared cache."""
+    return cache.get(SNAPSHOT_VERSION_KEY % tournament_id)
+
+
+def bump_snapshot_version(tournament_id):
+    cache.set(SNAPSHOT_VERSION_KEY % tournament_id, time_ns(), None)
+
+
+# ==============================================================================
+# Results tables
+# ==============================================================================
+
+class BaseResultsTable:
+    """Aggregates of the results of preliminary rounds up to and including
+    `round` (or all rounds, if `round` is None) for all teams or speakers in a
+    tournament, as NumPy arrays. Instances are identified by their index in
+    `ids`.
+
+    Subclasses define `AGGREGATES`, a dict mapping each aggregate to the ufunc
+    that combines two values of it, and implement `get_instance_ids()`,
+    `load_rows()` and `reduce()`."""
+
+    kind = None
+    AGGREGATES = {}
+
+    def __init__(self, tournament, round=None, ids=()):
+        self.tournament = tournament
+        self.round = round
+        ids = set(ids)
+        if tournament is not None:
+            ids.update(self.get_instance_ids())
+        self.ids = np.array(sorted(ids), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def index(self, ids):
+        """Returns an array of the indices of the given IDs."""
+        return np.searchsorted(self.ids, np.asarray(ids, dtype=np.int64))
+
+    def get_instance_ids(self):
+        raise NotImplementedError
+
+    def load_rows(self, after, until):
+        """Returns a dict of dicts of arrays, with one element per row of
+        results from preliminary rounds with sequence numbers greater than
+        `after` and at most `until` (either of which may be None). Each dict of
+        arrays must have a "seq" array of round sequence numbers."""
+        raise NotImplementedError
+
+    def reduce(self, rows):
+        """Returns a dict of aggregates of the given rows."""
+        raise NotImplementedError
+
+    def _filter(self, prefix, after, until):
+        q = Q(**{prefix + 'debate__round__stage': Round.Stage.PRELIMINARY})
+        q &= Q(**{prefix + 'debate__round__tournament': self.tournament})
+        if after is not None:
+            q &= Q(**{prefix + 'debate__round__seq__gt': after})
+        if until is not None:
+            q &= Q(**{prefix + 'debate__round__seq__lte': until})
+        return q
+
+    # Aggregates
+
+    def empty(self):
+        return {key: np.full(len(self), ufunc.identity if ufunc.identity is not None else np.nan, dtype=float)
+                for key, ufunc in self.AGGREGATES.items()}
+
+    def combine(self, first, second):
+        return {key: ufunc(first[key], second[key]) for key, ufunc in self.AGGREGATES.items()}
+
+    @cached_property
+    def aggregates(self):
+        """Dict of arrays of aggregates over all instances, computed from the
+        latest snapshot and the results of rounds after it. If there's a
+        completed round after the latest snapshot, a snapshot is saved for it.
+        """
+        if self.tournament is None:
+            return self.empty()
+
+        version = get_snapshot_version(self.tournament.id)
+        until = self.round.seq if self.round is not None else None
+        rounds = self.tournament.round_set.filter(stage=Round.Stage.PRELIMINARY)
+        if until is not None:
+            rounds = rounds.filter(seq__lte=until)
+
+        snapshot = StandingsSnapshot.objects.filter(round__in=rounds, kind=self.kind).select_related(
+            'round').order_by('-round__seq').first()
+        if snapshot is not None and snapshot.data.get('options', {}) != self.snapshot_options():
+            logger.debug("Ignoring %s standings snapshot for %s, options have changed", self.kind, snapshot.round)
+            snapshot = None
+        if snapshot is not None:
+            base, after = self.from_snapshot(snapshot.data), snapshot.round.seq
+            logger.debug("Using %s standings snapshot for %s", self.kind, snapshot.round)
+            if after == until:
+                return base
+        else:
+            base, after = self.empty(), None
+
+        last_completed = rounds.filter(completed=True).order_by('-seq').values_list('id', 'seq').first()
+        rows = self.load_rows(after, until)
+
+        if last_completed is not None and (after is None or last_completed[1] > after):
+            round_id, seq = last_completed
+            completed = self.combine(base, self.reduce(self.rows_until(rows, seq)))
+            self.save_snapshot(round_id, completed, version)
+            if seq == until:
+                return completed
+            rows = self.rows_after(rows, seq)
+            base = completed
+
+        return self.combine(base, self.reduce(rows))
+
+    @staticmethod
+    def rows_until(rows, seq):
+        return {source: {key: array[columns['seq'] <= seq] for key, array in columns.items()}
+                for source, columns in rows.items()}
+
+    @staticmethod
+    def rows_after(rows, seq):
+        return {source: {key: array[columns['seq'] > seq] for key, array in columns.items()}
+                for source, columns in rows.items()}
+
+    # Snapshots
+
+    def snapshot_options(self):
+        """Returns a JSON-serializable dict of the tournament options that
+        `reduce()` depends on."""
+        return {}
+
+    def to_snapshot(self, aggregates):
+        """Returns a JSON-serializable representation of the aggregates. NaN
+        isn't valid JSON, so it's stored as null."""
+        return {
+            'options': self.snapshot_options(),
+            'ids': self.ids.tolist(),
+            'aggregates': {key: [None if np.isnan(x) else x for x in aggregates[key].tolist()]
+                           for key in self.AGGREGATES},
+        }
+
+    def from_snapshot(self, data):
+        """Returns aggregates from a snapshot, aligned to the IDs in this table.
+        Instances not in the snapshot get empty aggregates."""
+        ids = np.array(data['ids'], dtype=np.int64)
+        present = np.isin(ids, self.ids)
+        index = self.index(ids[present])
+        aggregates = self.empty()
+        for key, values in data['aggregates'].items():
+            aggregates[key][index] = np.array(values, dtype=float)[present]
+        return aggregates
+
+    def save_snapshot(self, round_id, aggregates, version):
+        """Saves a snapshot of the aggregates for the round, unless snapshots
+        have been invalidated since `version` was read."""
+        if get_snapshot_version(self.tournament.id) != version:
+            logger.debug("Not saving %s standings snapshot for round %d, results changed", self.kind, round_id)
+            return
+
+        try:
+            with transaction.atomic():
+                StandingsSnapshot.objects.update_or_create(round_id=round_id, kind=self.kind,
+                    defaults={'data': self.to_snapshot(aggregates)})
+        except IntegrityError:
+            logger.warning("Couldn't save %s standings snapshot for round %d, another was saved first", self.kind, round_id)
+        else:
+            logger.debug("Saved %s standings snapshot for round %d", self.kind, round_id)
+            transaction.on_commit(lambda: self.discard_stale_snapshot(round_id, version))
+
+    def discard_stale_snapshot(self, round_id, version):
+        # If snapshots were invalidated after the version was checked, the one
+        # just saved might have been built from the old results
+        if get_snapshot_version(self.tournament.id) != version:
+            StandingsSnapshot.objects.filter(round_id=round_id, kind=self.kind).delete()
+            logger.debug("Deleted %s standings snapshot for round %d, results changed", self.kind, round_id)
+
+    # Metrics from aggregates
+
+    def count(self, name):
+        return self.aggregates[name + '_count']
+
+    def total(self, name):
+        """Returns the sum for each instance, or NaN if an instance has no
+        values (as SQL's SUM() would)."""
+        return np.where(self.count(name) > 0, self.aggregates[name + '_sum'], np.nan)
+
+    def mean(self, name):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count(name) > 0, self.aggregates[name + '_sum'] / self.count(name), np.nan)
+
+    def stddev(self, name):
+        """Population standard deviation, as PostgreSQL's STDDEV_POP()."""
+        mean = self.mean(name)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = self.aggregates[name + '_sumsq'] / self.count(name) - mean ** 2
+        return np.where(self.count(name) > 0, np.sqrt(np.maximum(variance, 0)), np.nan)
+
+    # Reductions over rows
+
+    def bincount(self, index, mask=None, weights=None):
+        if mask is not None:
+            index = index[mask]
+            weights = weights[mask] if weights is not None else None
+        return np.bincount(index, weights=weights, minlength=len(self)).astype(float)
+
+    def add_sums(self, aggregates, name, index, values, squares=False):
+        """Adds the count, sum and (if `squares` is True) sum of squares of the
+        non-null `values` to `aggregates`."""
+        valid = ~np.isnan(values)
+        aggregates[name + '_count'] = self.bincount(index, valid)
+        aggregates[name + '_sum'] = self.bincount(index, valid, values)
+        if squares:
+            aggregates[name + '_sumsq'] = self.bincount(index, valid, values ** 2)
+
+
+class TeamResultsTable(BaseResultsTable):
+    """Results table for teams. Aggregates are computed from confirmed team
+    scores and from debate teams, which are each loaded in one query."""
+
+    kind = StandingsSnapshot.Kind.TEAM
+
+    AGGREGATES = {key: np.add for key in (
+        'points_count', 'points_sum', 'points_raw_sum', 'wins', 'score_count', 'score_sum', 'score_sumsq',
+        'margin_count', 'margin_sum', 'votes_count', 'votes_sum', 'firsts', 'seconds', 'thirds', 'irons',
+        'npullups', 'pullup_debates',
+    )}
+
+    def get_instance_ids(self):
+        return self.tournament.team_set.order_by().values_list('id', flat=True)
+
+    def load_rows(self, after, until):
+        fields = ('team', 'seq', 'weight', 'points', 'win', 'score', 'margin', 'votes_given', 'votes_possible', 'has_ghost')
+        rows = TeamScore.objects.filter(self._filter('debate_team__', after, until), ballot_submission__confirmed=True).values_list(
+            'debate_team__team_id', 'debate_team__debate__round__seq', 'debate_team__debate__round__weight', 'points', 'win',
+            'score', 'margin', 'votes_given', 'votes_possible', 'has_ghost')
+        columns = dict(zip(fields, zip(*rows))) if rows else dict.fromkeys(fields, ())
+        teamscores = {key: np.array(values, dtype=float) for key, values in columns.items()}
+        teamscores['team'] = self.index(columns['team'])
+
+        dts = DebateTeam.objects.filter(self._filter('', after, until)).values_list(
+            'team_id', 'debate__round__seq', 'debate_id', 'flags', 'debate__flags')
+        logger.debug("Loaded %d team scores and %d debate teams", len(rows), len(dts))
+        debateteams = {
+            'team': self.index([row[0] for row in dts]),
+            'seq': np.array([row[1] for row in dts], dtype=np.int64),
+            'debate': np.array([row[2] for row in dts], dtype=np.int64),
+            'pullup': np.array(['pullup' in row[3] for row in dts], dtype=bool),
+            'debate_pullup': np.array(['pullup' in row[4] for row in dts], dtype=bool),
+        }
+        return {'teamscores': teamscores, 'debateteams': debateteams}
+
+    def reduce(self, rows):
+        ts, dts = rows['teamscores'], rows['debateteams']
+        team = ts['team']
+        aggregates = {}
+        self.add_sums(aggregates, 'points', team, ts['points'] * ts['weight'])
+        aggregates['points_raw_sum'] = self.bincount(team, ~np.isnan(ts['points']), ts['points'])
+        aggregates['wins'] = self.bincount(team, ts['win'] == 1)
+        self.add_sums(aggregates, 'score', team, ts['score'], squares=True)
+        self.add_sums(aggregates, 'margin', team, ts['margin'])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            votes = np.where(ts['votes_possible'] == 0, np.nan, ts['votes_given'] / ts['votes_possible'])
+        self.add_sums(aggregates, 'votes', team, votes)
+        aggregates['firsts'] = self.bincount(team, ts['points'] == 3)
+        aggregates['seconds'] = self.bincount(team, ts['points'] == 2)
+        aggregates['thirds'] = self.bincount(team, ts['points'] == 1)
+        aggregates['irons'] = self.bincount(team, ts['has_ghost'] == 1)
+        aggregates['npullups'] = self.bincount(dts['team'], dts['pullup'])
+        aggregates['pullup_debates'] = self.bincount(dts['team'], dts['debate_pullup'])
+        aggregates['pairs'] = self.pairs(dts['team'], dts['debate'])
+        return aggregates
+
+    @staticmethod
+    def pairs(team, debate):
+        """Returns a tuple of arrays `(teams, opponents, counts)`, with one
+        element for each pair of teams that faced each other."""
+        return TeamResultsTable.count_pairs(*OpponentMatrix.pair_teams(team, debate))
+
+    @staticmethod
+    def count_pairs(teams, opponents, counts=None):
+        if counts is None:
+            counts = np.ones(len(teams))
+        pairs, inverse = np.unique(np.column_stack([teams, opponents]).reshape(-1, 2), axis=0, return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=counts, minlength=len(pairs))
+        return pairs[:, 0].astype(np.intp), pairs[:, 1].astype(np.intp), totals
+
+    def empty(self):
+        aggregates = super().empty()
+        aggregates['pairs'] = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0))
+        return aggregates
+
+    def combine(self, first, second):
+        aggregates = super().combine(first, second)
+        aggregates['pairs'] = self.count_pairs(*(np.concatenate(arrays) for arrays in zip(first['pairs'], second['pairs'])))
+        return aggregates
+
+    def to_snapshot(self, aggregates):
+        data = super().to_snapshot(aggregates)
+        teams, opponents, counts = aggregates['pairs']
+        data['pairs'] = [self.ids[teams].tolist(), self.ids[opponents].tolist(), counts.tolist()]
+        return data
+
+    def from_snapshot(self, data):
+        aggregates = super().from_snapshot(data)
+        teams, opponents = (np.array(ids, dtype=np.int64) for ids in data['pairs'][:2])
+        present = np.isin(teams, self.ids) & np.isin(opponents, self.ids)
+        aggregates['pairs'] = (self.index(teams[present]), self.index(opponents[present]),
+                               np.array(data['pairs'][2], dtype=float)[present])
+        return aggregates
+
+    def opponent_sum(self, values):
+        """Returns, for each team, the sum of `values` over all the opponents
+        they've faced, treating null values as zero."""
+        teams, opponents, counts = self.aggregates['pairs']
+        return np.bincount(teams, weights=counts * np.nan_to_num(values)[opponents], minlength=len(self))
+
+
+class SpeakerResultsTable(BaseResultsTable):
+    """Results table for speakers. Aggregates are computed from confirmed,
+    non-ghost speaker scores, which are loaded in one query. Metrics of
+    speakers' teams come from a `TeamResultsTable`."""
+
+    kind = StandingsSnapshot.Kind.SPEAKER
+    speaker_teams = {}
+
+    AGGREGATES = {
+        'score_count': np.add, 'score_sum': np.add, 'score_sumsq': np.add, 'score_max': np.fmax, 'score_min': np.fmin,
+        'srank_count': np.add, 'srank_sum': np.add, 'reply_count': np.add, 'reply_sum': np.add, 'reply_sumsq': np.add,
+    }
+
+    def get_instance_ids(self):
+        self.speaker_teams = dict(Speaker.objects.filter(team__tournament=self.tournament).values_list('id', 'team_id'))
+        return self.speaker_teams.keys()
+
+    def load_rows(self, after, until):
+        fields = ('speaker', 'seq', 'score', 'rank', 'position')
+        rows = SpeakerScore.objects.filter(self._filter('debate_team__', after, until),
+            ballot_submission__confirmed=True, ghost=False).values_list(
+            'speaker_id', 'debate_team__debate__round__seq', 'score', 'rank', 'position')
+        logger.debug("Loaded %d speaker scores", len(rows))
+        columns = dict(zip(fields, zip(*rows))) if rows else dict.fromkeys(fields, ())
+        speakerscores = {key: np.array(values, dtype=float) for key, values in columns.items()}
+        speakerscores['speaker'] = self.index(columns['speaker'])
+        return {'speakerscores': speakerscores}
+
+    def snapshot_options(self):
+        return {
+            'last_substantive_position': self.tournament.last_substantive_position,
+            'reply_position': self.tournament.reply_position,
+        }
+
+    def reduce(self, rows):
+        ss = rows['speakerscores']
+        substantive = ss['position'] <= self.tournament.last_substantive_position
+        reply = ss['position'] == (self.tournament.reply_position or -1)
+        speaker = ss['speaker']
+
+        aggregates = {}
+        self.add_sums(aggregates, 'score', speaker[substantive], ss['score'][substantive], squares=True)
+        self.add_sums(aggregates, 'srank', speaker[substantive], ss['rank'][substantive])
+        self.add_sums(aggregates, 'reply', speaker[reply], ss['score'][reply], squares=True)
+        for key, ufunc in (('score_max', np.fmax), ('score_min', np.fmin)):
+            aggregates[key] = np.full(len(self), np.nan)
+            ufunc.at(aggregates[key], speaker[substantive], ss['score'][substantive])
+        return aggregates
+
+    @cached_property
+    def teams(self):
+        return TeamResultsTable(self.tournament, self.round)
+
+    def team_column(self, values):
+        """Maps an array over teams to an array over speakers. Speakers outside
+        the tournament get NaN."""
+        team_ids = [self.speaker_teams.get(speaker_id) for speaker_id in self.ids.tolist()]
+        has_team = np.array([team_id is not None for team_id in team_ids], dtype=bool)
+        index = self.teams.index([team_id for team_id in team_ids if team_id is not None])
+        column = np.full(len(self), np.nan)
+        column[has_team] = values[index]
+        return column
+
+
+def rank_within_groups(groups, keys):
+    """Ranks rows within groups. `groups` and `keys` are two-dimensional
+    arrays with one row per item, in ranked order. Rows are grouped by the
+    values in `groups`, and within each group, consecutive rows with the same
+    values in `keys` are equal. Returns a tuple of arrays `(ranks, tied)`."""
+    n = len(keys)
+    order = np.lexsort([np.arange(n)] + [groups[:, j] for j in reversed(range(groups.shape[1]))])
+    sorted_groups, sorted_keys = groups[order], keys[order]
+
+    new_group = np.ones(n, dtype=bool)
+    new_group[1:] = (sorted_groups[1:] != sorted_groups[:-1]).any(axis=1)
+    new_run = new_group.copy()
+    new_run[1:] |= (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+
+    positions = np.arange(n)
+    group_start = np.maximum.accumulate(np.where(new_group, positions, 0))
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+    run_id = np.cumsum(new_run) - 1
+    run_size = np.bincount(run_id)[run_id]
+
+    ranks = np.empty(n, dtype=np.int64)
+    tied = np.empty(n, dtype=bool)
+    ranks[order] = run_start - group_start + 1
+    tied[order] = run_size > 1
+    return ranks, tied
+
+
+# ==============================================================================
+# Standings generators
+# ==============================================================================
+
+class BaseColumnarStandingsGenerator:
+    """Mixin for standings generators that compute metrics and rankings from a
+    results table. It takes the same arguments and returns the same
+    `Standings` as the queryset-based generator it's mixed into, and is much
+    faster for large tournaments."""
+
+    table_class = None
+
+    # Metric key: (method, type of value). Methods return an array over all
+    # instances in the table; NaN values become None unless the type is "count".
+    COLUMN_FUNCTIONS = {}
+
+    # Metrics computed from rankings, after ranking
+    RANKED_COLUMN_FUNCTIONS = {}
+
+    def get_tournament(self, instances):
+        raise NotImplementedError
+
+    def generate(self, queryset, tournament=None, round=None):
+        if not set(self.precedence) <= set(self.COLUMN_FUNCTIONS):
+            logger.info("Using queryset-based standings, since precedence %s has non-columnar metrics", self.precedence)
+            return super().generate(queryset, tournament=tournament, round=round)
+
+        instances = list(queryset)
+        rank_filter = self.get_rank_filter() if self.options["rank_filter"][0] is not None else None
+        standings = Standings(instances, rank_filter=rank_filter)
+
+        if tournament is None:
+            tournament = round.tournament if round is not None else (self.get_tournament(instances) if instances else None)
+        table = self.table_class(tournament, round, [instance.id for instance in instances])
+
+        columns = {}
+        deferred = []
+        for annotator in self.metric_annotators:
+            if annotator.key in self.COLUMN_FUNCTIONS:
+                method, kind = self.COLUMN_FUNCTIONS[annotator.key]
+                columns[annotator.key] = getattr(self, method)(table, annotator)
+                self._add_column(standings, table, annotator, columns[annotator.key], kind)
+            else:
+                deferred.append(annotator)
+
+        if self.options["include_filter"]:
+            standings.filter(self.options["include_filter"])
+
+        self._sort(standings, table, columns)
+        ranks = self._rank(standings, table, columns)
+
+        for annotator in deferred:
+            if annotator.key in self.RANKED_COLUMN_FUNCTIONS:
+                method, kind = self.RANKED_COLUMN_FUNCTIONS[annotator.key]
+                self._add_column(standings, table, annotator, getattr(self, method)(table, ranks), kind)
+            else:
+                logger.debug("Running metric annotator: %s", annotator.name)
+                queryset_for_metrics = queryset.model.objects.filter(id__in=[instance.id for instance in instances])
+                annotator.run(queryset_for_metrics, standings, round)
+
+        return standings
+
+    @staticmethod
+    def _add_column(standings, table, annotator, column, kind):
+        standings.record_added_metric(annotator.key, annotator.name, annotator.abbr, annotator.icon, annotator.ascending)
+        infos = list(standings.infoview())
+        values = column[table.index([info.instance_id for info in infos])]
+
+        if kind is None:  # cast to int if all values are integers, as for number of adjudicators
+            values = np.nan_to_num(values)
+            kind = int if (values == np.round(values)).all() else float
+        if kind == "count":
+            values = values.astype(np.int64).tolist()
+        else:
+            values = [None if np.isnan(value) else kind(value) for value in values.tolist()]
+
+        for info, value in zip(infos, values):
+            info.add_metric(annotator.key, value)
+
+    def _sort(self, standings, table, columns):
+        """Sorts the standings by the precedence, in the same way as
+        `Standings.sort()`."""
+        infos = list(standings.infoview())
+        if self._tiebreak_func:
+            self._tiebreak_func(infos)
+        index = table.index([info.instance_id for info in infos])
+
+        # Nulls go last, as in SQL's NULLS LAST, so sort by whether a metric is
+        # null before the metric itself
+        keys = [np.arange(len(infos))]  # least significant key, to keep the tiebreak order
+        for key in reversed(self.precedence):
+            column = columns[key][index]
+            values = np.nan_to_num(column)
+            keys.append(values if standings.metric_ascending[key] else -values)
+            keys.append(np.isnan(column))
+        if standings.rank_filter:
+            keys.append(np.array([not standings.rank_filter(info) for info in infos], dtype=bool))
+
+        order = np.lexsort(keys)
+        standings.set_order([infos[i] for i in order])
+
+    def _rank(self, standings, table, columns):
+        """Adds rankings to the rank-eligible standings, and returns an array
+        over all instances in the table of the "rank" ranking, zero if none."""
+        eligible = list(standings.rank_eligible)
+        index = table.index([info.instance_id for info in eligible])
+        # Each metric is represented by two columns, so that null isn't equal to zero
+        metrics = np.column_stack([f(columns[key][index]) for key in self.precedence for f in (np.isnan, np.nan_to_num)] or
+                                  [np.zeros((len(eligible), 0))])
+        no_groups = np.zeros((len(eligible), 0))
+
+        ranks = np.zeros(len(table), dtype=np.int64)
+        for annotator in self.ranking_annotators:
+            standings.record_added_ranking(annotator.key, annotator.name, annotator.abbr, annotator.icon)
+            infos = eligible
+
+            if annotator.key == "rank":
+                values, tied = rank_within_groups(no_groups, metrics)
+                ranks[index] = values
+            elif annotator.key == "subrank":
+                values, tied = rank_within_groups(metrics[:, :2], metrics[:, 2:])
+            elif annotator.key == "institution_rank":
+                has_institution = np.array([info.team.institution_id is not None for info in eligible], dtype=bool)
+                infos = [info for info in eligible if info.team.institution_id is not None]
+                institutions = np.array([[info.team.institution_id] for info in infos], dtype=np.int64).reshape(-1, 1)
+                values, tied = rank_within_groups(institutions, metrics[has_institution])
+            else:
+                raise ValueError("Unrecognised ranking: {0!r}".format(annotator.key))
+
+            for info, value, equal in zip(infos, values.tolist(), tied.tolist()):
+                info.add_ranking(annotator.key, (value, equal))
+
+        return ranks
+
+
+class ColumnarTeamStandingsGenerator(BaseColumnarStandingsGenerator, TeamStandingsGenerator):
+    """Columnar version of `TeamStandingsGenerator`."""
+
+    table_class = TeamResultsTable
+
+    COLUMN_FUNCTIONS = {
+        "points"              : ("_points", int),
+        "wins"                : ("_wins", "count"),
+        "speaks_sum"          : ("_speaks_sum", float),
+        "speaks_avg"          : ("_speaks_avg", float),
+        "speaks_stddev"       : ("_speaks_stddev", float),
+        "draw_strength"       : ("_draw_strength", int),
+        "draw_strength_speaks": ("_draw_strength_speaks", float),
+        "margin_sum"          : ("_margin_sum", float),
+        "margin_avg"          : ("_margin_avg", float),
+        "npullups"            : ("_npullups", "count"),
+        "pullup_debates"      : ("_pullup_debates", "count"),
+        "num_adjs"            : ("_num_adjs", None),
+        "firsts"              : ("_firsts", "count"),
+        "seconds"             : ("_seconds", "count"),
+        "thirds"              : ("_thirds", "count"),
+        "num_iron"            : ("_num_iron", "count"),
+    }
+
+    RANKED_COLUMN_FUNCTIONS = {
+        "draw_strength_rank"  : ("_draw_strength_rank", "count"),
+    }
+
+    def get_tournament(self, instances):
+        return instances[0].tournament
+
+    def _points(self, table, annotator=None):
+        return table.total('points')
+
+    def _wins(self, table, annotator):
+        return table.aggregates['wins']
+
+    def _speaks_sum(self, table, annotator=None):
+        return table.total('score')
+
+    def _speaks_avg(self, table, annotator):
+        return table.mean('score')
+
+    def _speaks_stddev(self, table, annotator):
+        return table.stddev('score')
+
+    def _draw_strength(self, table, annotator):
+        return table.opponent_sum(self._points(table))
+
+    def _draw_strength_speaks(self, table, annotator):
+        return table.opponent_sum(self._speaks_sum(table))
+
+    def _draw_strength_rank(self, table, ranks):
+        return table.opponent_sum(ranks.astype(float))
+
+    def _margin_sum(self, table, annotator):
+        return table.total('margin')
+
+    def _margin_avg(self, table, annotator):
+        return table.mean('margin')
+
+    def _npullups(self, table, annotator):
+        return table.aggregates['npullups']
+
+    def _pullup_debates(self, table, annotator):
+        return table.aggregates['pullup_debates']
+
+    def _num_adjs(self, table, annotator):
+        return table.total('votes') * annotator.adjs_per_debate
+
+    def _firsts(self, table, annotator):
+        return table.aggregates['firsts']
+
+    def _seconds(self, table, annotator):
+        return table.aggregates['seconds']
+
+    def _thirds(self, table, annotator):
+        return table.aggregates['thirds']
+
+    def _num_iron(self, table, annotator):
+        return table.aggregates['irons']
+
+
+class ColumnarSpeakerStandingsGenerator(BaseColumnarStandingsGenerator, SpeakerStandingsGenerator):
+    """Columnar version of `SpeakerStandingsGenerator`."""
+
+    table_class = SpeakerResultsTable
+
+    COLUMN_FUNCTIONS = {
+        "total"         : ("_total", float),
+        "average"       : ("_average", float),
+        "trimmed_mean"  : ("_trimmed_mean", float),
+        "team_points"   : ("_team_points", int),
+        "stdev"         : ("_stdev", float),
+        "count"         : ("_count", "count"),
+        "replies_sum"   : ("_replies_sum", float),
+        "replies_avg"   : ("_replies_avg", float),
+        "replies_stddev": ("_replies_stddev", float),
+        "replies_count" : ("_replies_count", "count"),
+        "srank"         : ("_srank", int),
+        "team_wins"     : ("_team_wins", "count"),
+        "firsts"        : ("_firsts", "count"),
+        "seconds"       : ("_seconds", "count"),
+        "thirds"        : ("_thirds", "count"),
+        "num_adjs"      : ("_num_adjs", None),
+    }
+
+    def get_tournament(self, instances):
+        return instances[0].team.tournament
+
+    def _total(self, table, annotator):
+        return table.total('score')
+
+    def _average(self, table, annotator):
+        return table.mean('score')
+
+    def _trimmed_mean(self, table, annotator):
+        count, total = table.count('score'), table.aggregates['score_sum']
+        trimmed = total - table.aggregates['score_max'] - table.aggregates['score_min']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 2, trimmed / (count - 2), np.where(count > 0, total / count, np.nan))
+
+    def _stdev(self, table, annotator):
+        return table.stddev('score')
+
+    def _count(self, table, annotator):
+        return table.count('score')
+
+    def _replies_sum(self, table, annotator):
+        return table.total('reply')
+
+    def _replies_avg(self, table, annotator):
+        return table.mean('reply')
+
+    def _replies_stddev(self, table, annotator):
+        return table.stddev('reply')
+
+    def _replies_count(self, table, annotator):
+        return table.count('reply')
+
+    def _srank(self, table, annotator):
+        return table.total('srank')
+
+    def _team_points(self, table, annotator):
+        teams = table.teams
+        return table.team_column(np.where(teams.count('points') > 0, teams.aggregates['points_raw_sum'], np.nan))
+
+    def _team_wins(self, table, annotator):
+        return np.nan_to_num(table.team_column(table.teams.aggregates['wins']))
+
+    def _firsts(self, table, annotator):
+        return np.nan_to_num(table.team_column(table.teams.aggregates['firsts']))
+
+    def _seconds(self, table, annotator):
+        return np.nan_to_num(table.team_column(table.teams.aggregates['seconds']))
+
+    def _thirds(self, table, annotator):
+        return np.nan_to_num(table.team_column(table.teams.aggregates['thirds']))
+
+    def _num_adjs(self, table, annotator):
+        return table.team_column(table.teams.total('votes') * annotator.adjs_per_debate)
@@ -0,0 +1,114 @@
+import logging
+import random
+import time
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+
+from draw.models import Debate, DebateTeam
+from draw.types import DebateSide
+from participants.models import Team
+from results.models import BallotSubmission, TeamScore
+from tournaments.models import Round, Tournament
+
+from ...teams import (DrawStrengthByRankMetricAnnotator, DrawStrengthBySpeakerScoreMetricAnnotator,
+    DrawStrengthByWinsMetricAnnotator, PointsMetricAnnotator, TeamStandingsGenerator,
+    TotalSpeakerScoreMetricAnnotator)
+
+
+def query_metrics(annotator, tournament, round):
+    return {team.id: getattr(team, annotator.key) for team in annotator().get_annotated_queryset(tournament.team_set.all(), round)}
+
+
+def walk_draw_strengths(teams, round, get_metrics):
+    """Computes draw strengths by walking each team's opponents in Python, as
+    the draw strength annotators used to. `get_metrics` returns a dict of the
+    opponent metric by team ID."""
+    opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
+    opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY, debateteam__debate__round__seq__lte=round.seq)
+    teams_with_opponents = Team.objects.annotate(opponent_ids=ArrayAgg('debateteam__debate__debateteam__team_id', filter=opponents_filter))
+    opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
+    opp_metrics = get_metrics()
+
+    draw_strengths = {}
+    for team in teams:
+        draw_strengths[team.id] = sum(opp_metrics[opponent_id] or 0 for opponent_id in opponents_by_team[team.id])
+    return draw_strengths
+
+
+class Command(BaseCommand):
+
+    help = "Times batched draw strength against walking opponents in Python, in randomly " \
+           "generated two-team tournaments, which are rolled back afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument("-n", "--teams", type=int, nargs="+", default=[100, 300, 500],
+            help="Number of teams in each tournament to benchmark (default: 100 300 500)")
+        parser.add_argument("-r", "--rounds", type=int, default=6,
+            help="Number of completed rounds in each tournament (default: 6)")
+        parser.add_argument("--seed", type=int, default=None,
+            help="Random seed for generating the tournaments")
+
+    def create_tournament(self, nteams, nrounds, rng):
+        tournament = Tournament.objects.create(slug="benchmark%d" % nteams)
+        teams = Team.objects.bulk_create([Team(tournament=tournament, reference=str(i)) for i in range(nteams)])
+        rounds = Round.objects.bulk_create([Round(tournament=tournament, seq=seq, completed=True,
+            draw_type=Round.DrawType.RANDOM, stage=Round.Stage.PRELIMINARY) for seq in range(1, nrounds + 1)])
+
+        for round in rounds:
+            rng.shuffle(teams)
+            debates = Debate.objects.bulk_create([Debate(round=round) for i in range(nteams // 2)])
+            debateteams = DebateTeam.objects.bulk_create([DebateTeam(debate=debate, team=team, side=side)
+                for debate, pair in zip(debates, zip(teams[::2], teams[1::2]))
+                for team, side in zip(pair, [DebateSide.AFF, DebateSide.NEG])])
+            ballotsubs = BallotSubmission.objects.bulk_create([BallotSubmission(debate=debate, confirmed=True, version=1,
+                submitter_type=BallotSubmission.Submitter.TABROOM) for debate in debates])
+            teamscores = []
+            for ballotsub, (aff, neg) in zip(ballotsubs, zip(debateteams[::2], debateteams[1::2])):
+                aff_win = rng.random() < 0.5
+                for dt, win in [(aff, aff_win), (neg, not aff_win)]:
+                    teamscores.append(TeamScore(ballot_submission=ballotsub, debate_team=dt, win=win, points=int(win),
+                        score=rng.randrange(220, 240)))
+            TeamScore.objects.bulk_create(teamscores)
+
+        return tournament, rounds[-1]
+
+    def handle(self, *args, **options):
+        loglevel = [logging.ERROR, logging.WARNING, logging.INFO, logging.DEBUG][options["verbosity"]]
+        logging.getLogger("standings").setLevel(loglevel)
+
+        rng = random.Random(options["seed"])
+        self.stdout.write("{:>6} {:<22} {:>10} {:>10} {:>8}".format("teams", "metric", "walk (s)", "batch (s)", "speedup"))
+
+        for nteams in options["teams"]:
+            nteams -= nteams % 2
+            with transaction.atomic():
+                tournament, round = self.create_tournament(nteams, options["rounds"], rng)
+                self.benchmark_tournament(tournament, round, nteams)
+                transaction.set_rollback(True)
+
+    def benchmark_tournament(self, tournament, round, nteams):
+        teams = tournament.team_set.all()
+        standings = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',)).generate(teams, round=round)
+        ranks = {info.instance_id: info.rankings['rank'][0] for info in standings}
+
+        for annotator, get_metrics in [
+            (DrawStrengthByWinsMetricAnnotator, lambda: query_metrics(PointsMetricAnnotator, tournament, round)),
+            (DrawStrengthBySpeakerScoreMetricAnnotator, lambda: query_metrics(TotalSpeakerScoreMetricAnnotator, tournament, round)),
+            (DrawStrengthByRankMetricAnnotator, lambda: ranks),
+        ]:
+            start = time.perf_counter()
+            expected = walk_draw_strengths(list(teams), round, get_metrics)
+            walk_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            annotator().annotate(teams, standings, round)
+            batch_time = time.perf_counter() - start
+
+            mismatches = sum(abs(expected[info.instance_id] - info.metrics[annotator.key]) > 1e-6 for info in standings)
+            if mismatches:
+                self.stderr.write("%d teams have different %s from walking opponents" % (mismatches, annotator.key))
+            self.stdout.write("{:>6d} {:<22} {:>10.3f} {:>10.3f} {:>7.1f}x".format(
+                nteams, annotator.key, walk_time, batch_time, walk_time / batch_time))
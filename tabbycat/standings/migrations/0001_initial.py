@@ -0,0 +1,35 @@
+# Generated by Django 5.0.4 on 2026-10-18 04:38
+
+import django.db.models.deletion
+import utils.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('tournaments', '0013_scheduleevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingsSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('team', 'team'), ('speaker', 'speaker')], max_length=7, verbose_name='kind')),
+                ('data', models.JSONField(verbose_name='data')),
+                ('timestamp', models.DateTimeField(auto_now=True, verbose_name='timestamp')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tournaments.round', verbose_name='round')),
+            ],
+            options={
+                'verbose_name': 'standings snapshot',
+                'verbose_name_plural': 'standings snapshots',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='standingssnapshot',
+            constraint=utils.models.UniqueConstraint(fields=('round', 'kind'), name='standin_standingssnapshot_round__kind_uniq'),
+        ),
+    ]
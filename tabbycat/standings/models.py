@@ -0,0 +1,44 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from tournaments.models import Round
+from utils.models import UniqueConstraint
+
+
+class StandingsSnapshotQuerySet(models.QuerySet):
+
+    def invalidate(self, round):
+        """Deletes snapshots that include results from `round`, i.e., those of
+        `round` and all later rounds in its tournament."""
+        return self.filter(round__tournament_id=round.tournament_id, round__seq__gte=round.seq).delete()
+
+
+class StandingsSnapshot(models.Model):
+    """Cumulative aggregates of results (sums, counts, etc.) for every team or
+    speaker in a tournament, up to and including a completed preliminary round.
+    Standings generators start from the latest snapshot and only aggregate
+    results from rounds after it. See `standings.columnar` for the format of
+    `data`."""
+
+    class Kind(models.TextChoices):
+        TEAM = 'team', _("team")
+        SPEAKER = 'speaker', _("speaker")
+
+    round = models.ForeignKey(Round, models.CASCADE,
+        verbose_name=_("round"))
+    kind = models.CharField(max_length=7, choices=Kind.choices,
+        verbose_name=_("kind"))
+    data = models.JSONField(
+        verbose_name=_("data"))
+    timestamp = models.DateTimeField(auto_now=True,
+        verbose_name=_("timestamp"))
+
+    objects = StandingsSnapshotQuerySet.as_manager()
+
+    class Meta:
+        constraints = [UniqueConstraint(fields=['round', 'kind'])]
+        verbose_name = _("standings snapshot")
+        verbose_name_plural = _("standings snapshots")
+
+    def __str__(self):
+        return "%s (%s)" % (self.round, self.get_kind_display())
@@ -0,0 +1,77 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from draw.models import DebateTeam
+from results.models import BallotSubmission, SpeakerScore, TeamScore
+from tournaments.models import Round
+
+from .columnar import bump_snapshot_version
+from .models import StandingsSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+def invalidate_snapshots(round):
+    # Snapshots are deleted straight away, so that this transaction sees the
+    # change, and again once it commits, in case another process saved one from
+    # the old results in the meantime. See `standings.columnar`.
+    deleted, _ = StandingsSnapshot.objects.invalidate(round)
+    bump_snapshot_version(round.tournament_id)
+    if deleted:
+        logger.debug("Deleted %d standings snapshots from %s onwards", deleted, round)
+
+    def invalidate_on_commit():
+        bump_snapshot_version(round.tournament_id)
+        StandingsSnapshot.objects.invalidate(round)
+
+    transaction.on_commit(invalidate_on_commit)
+
+
+def invalidate_snapshots_for_round_of(**lookups):
+    # The round might already have been deleted, if this was a cascade
+    round = Round.objects.filter(**lookups).only('tournament_id', 'seq').first()
+    if round is not None:
+        invalidate_snapshots(round)
+
+
+def invalidate_snapshots_for_debate(debate_id):
+    invalidate_snapshots_for_round_of(debate__id=debate_id)
+
+
+@receiver(post_delete, sender=BallotSubmission)
+@receiver(post_save, sender=BallotSubmission)
+def invalidate_snapshots_for_ballot(sender, instance, raw=False, **kwargs):
+    # Confirming (or unconfirming) a ballot changes the results for its round,
+    # and therefore every cumulative snapshot from that round onwards.
+    if not raw:
+        invalidate_snapshots_for_debate(instance.debate_id)
+
+
+@receiver(post_delete, sender=DebateTeam)
+@receiver(post_save, sender=DebateTeam)
+def invalidate_snapshots_for_debate_team(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_snapshots_for_debate(instance.debate_id)
+
+
+@receiver(post_delete, sender=SpeakerScore)
+@receiver(post_save, sender=SpeakerScore)
+@receiver(post_delete, sender=TeamScore)
+@receiver(post_save, sender=TeamScore)
+def invalidate_snapshots_for_score(sender, instance, raw=False, **kwargs):
+    # Scores are usually saved along with their ballot submission, which
+    # invalidates snapshots when it's confirmed, but they can also be edited
+    # directly (e.g. in the admin site). Only confirmed ballots count.
+    if not raw:
+        invalidate_snapshots_for_round_of(debate__debateteam__id=instance.debate_team_id,
+            debate__ballotsubmission__id=instance.ballot_submission_id, debate__ballotsubmission__confirmed=True)
+
+
+@receiver(post_save, sender=Round)
+def invalidate_snapshots_for_round(sender, instance, raw=False, **kwargs):
+    # Weights, stages and completion all affect snapshots
+    if not raw:
+        invalidate_snapshots(instance)
@@ -2,11 +2,12 @@
 
 import logging
 
-from django.contrib.postgres.aggregates import ArrayAgg
+import numpy as np
 from django.db.models import Avg, Count, F, FloatField, PositiveIntegerField, Q, StdDev, Sum
 from django.db.models.functions import Cast, NullIf
 from django.utils.translation import gettext_lazy as _
 
+from draw.models import DebateTeam
 from results.models import TeamScore
 from tournaments.models import Round
 
@@ -171,6 +172,79 @@ class AverageIndividualScoreMetricAnnotator(TeamScoreQuerySetMetricAnnotator):
         return super().get_annotated_queryset(queryset, round)
 
 
+class OpponentMatrix:
+    """Sparse matrix of which teams have faced each other, in coordinate
+    format: for each `k`, team `teams[k]` has faced team `opponents[k]`
+    `counts[k]` times. Teams are identified by their index in `team_ids`.
+
+    Draw strengths are products of this matrix with vectors of opponents'
+    metrics, so they can be computed for all teams at once."""
+
+    def __init__(self, team_ids, teams, opponents, counts):
+        self.team_ids = team_ids
+        self.teams = teams
+        self.opponents = opponents
+        self.counts = counts
+
+    @classmethod
+    def from_debates(cls, tournament, round=None):
+        """Loads the debate teams of all preliminary rounds of the tournament,
+        up to and including `round` if given, in one query, and pairs up
+        teams in the same debate."""
+        debateteams = DebateTeam.objects.filter(debate__round__tournament=tournament,
+            debate__round__stage=Round.Stage.PRELIMINARY)
+        if round is not None:
+            debateteams = debateteams.filter(debate__round__seq__lte=round.seq)
+        rows = np.array(list(debateteams.values_list('team_id', 'debate_id')), dtype=np.int64).reshape(-1, 2)
+        logger.debug("Loaded %d debate teams for draw strength", len(rows))
+
+        team_ids = np.union1d(np.array(list(tournament.team_set.values_list('id', flat=True)), dtype=np.int64), rows[:, 0])
+        teams, opponents = cls.pair_teams(np.searchsorted(team_ids, rows[:, 0]), rows[:, 1])
+        pairs, counts = np.unique(np.column_stack([teams, opponents]), axis=0, return_counts=True)
+        return cls(team_ids, pairs[:, 0], pairs[:, 1], counts)
+
+    @staticmethod
+    def pair_teams(team, debate):
+        """Given arrays of the team and debate of each debate team, returns a
+        tuple of arrays `(teams, opponents)`, with one element for each time a
+        team faced an opponent."""
+        order = np.argsort(debate, kind='stable')
+        team, debate = team[order], debate[order]
+
+        # Pair each debate team with those up to (most teams in a debate - 1) places after it
+        max_teams = np.unique(debate, return_counts=True)[1].max() if len(debate) else 0
+        teams, opponents = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+        for offset in range(1, max_teams):
+            same = debate[offset:] == debate[:-offset]
+            teams.extend([team[offset:][same], team[:-offset][same]])
+            opponents.extend([team[:-offset][same], team[offset:][same]])
+        return np.concatenate(teams), np.concatenate(opponents)
+
+    def vector(self, values):
+        """Returns an array of the values in the dict `values`, keyed by team
+        ID, aligned to this matrix. Missing and None values are zero."""
+        ids = np.fromiter(values.keys(), dtype=np.int64, count=len(values))
+        data = np.array([0 if value is None else value for value in values.values()], dtype=float)
+        index = np.searchsorted(self.team_ids, ids).clip(max=max(len(self.team_ids) - 1, 0))
+        found = self.team_ids[index] == ids if len(self.team_ids) else np.zeros(len(ids), dtype=bool)
+        vector = np.zeros(len(self.team_ids))
+        vector[index[found]] = data[found]
+        return vector
+
+    def dot(self, vector):
+        """Returns the product of this matrix and `vector`, i.e., for each
+        team, the sum of the values in `vector` of the opponents it's faced."""
+        return np.bincount(self.teams, weights=self.counts * vector[self.opponents], minlength=len(self.team_ids))
+
+    def opponent_sums(self, values):
+        """Returns a dict mapping team IDs to the sum of `values` (a dict keyed
+        by team ID) over their opponents. Sums are ints if all values are."""
+        sums = self.dot(self.vector(values))
+        if all(isinstance(value, int) for value in values.values() if value is not None):
+            sums = sums.round().astype(np.int64)
+        return dict(zip(self.team_ids.tolist(), sums.tolist()))
+
+
 class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
 
     opponent_annotator = None
@@ -179,30 +253,23 @@ class BaseDrawStrengthMetricAnnotator(BaseMetricAnnotator):
         if not queryset.exists():
             return
 
-        logger.info("Running opponents query for draw strength:")
-
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
+        tournament = queryset[0].tournament
+        matrix = OpponentMatrix.from_debates(tournament, round)
+        draw_strengths = matrix.opponent_sums(self.get_opponent_metrics(matrix, standings, tournament, round))
+        for team in queryset:
+            standings.add_metric(team, self.key, draw_strengths.get(team.id, 0))
 
-        opp_metric_queryset = self.opponent_annotator().get_annotated_queryset(
-                queryset[0].tournament.team_set.all(), round)
-        opp_metric_queryset_teams = {team.id: team for team in opp_metric_queryset}
+    def get_opponent_metrics(self, matrix, standings, tournament, round):
+        """Returns a dict mapping team IDs to the opponent metric. This is
+        taken from the standings if they already have it for every team that
+        could be an opponent, otherwise it's queried."""
+        key = self.opponent_annotator.key
+        infos = {info.instance_id: info for info in standings.infoview()}
+        if key in standings.metric_keys and infos.keys() >= set(matrix.team_ids.tolist()):
+            return {team_id: info.metrics[key] for team_id, info in infos.items()}
 
-        for team in queryset:
-            draw_strength = 0
-            for opponent_id in opponents_by_team[team.id]:
-                opp_metric = getattr(opp_metric_queryset_teams[opponent_id], self.opponent_annotator.key)
-                if opp_metric is not None: # opp_metric is None when no debates have happened
-                    draw_strength += opp_metric
-            standings.add_metric(team, self.key, draw_strength)
+        queryset = self.opponent_annotator().get_annotated_queryset(tournament.team_set.all(), round)
+        return {team.id: getattr(team, key) for team in queryset}
 
 
 class DrawStrengthByRankMetricAnnotator(BaseMetricAnnotator):
@@ -217,24 +284,12 @@ class DrawStrengthByRankMetricAnnotator(BaseMetricAnnotator):
         if not queryset.exists():
             return
 
-        logger.info("Running opponents query for rank draw strength:")
-
-        # Make a copy of teams queryset and annotate with opponents
-        opponents_filter = ~Q(debateteam__debate__debateteam__team_id=F('id'))
-        opponents_filter &= Q(debateteam__debate__round__stage=Round.Stage.PRELIMINARY)
-        if round is not None:
-            opponents_filter &= Q(debateteam__debate__round__seq__lte=round.seq)
-        opponents_annotation = ArrayAgg('debateteam__debate__debateteam__team_id',
-                filter=opponents_filter)
-        logger.info("Opponents annotation: %s", str(opponents_annotation))
-        teams_with_opponents = queryset.model.objects.annotate(opponent_ids=opponents_annotation)
-        opponents_by_team = {team.id: team.opponent_ids or [] for team in teams_with_opponents}
-        teams_by_id = {team.id: team for team in teams_with_opponents}
+        matrix = OpponentMatrix.from_debates(queryset[0].tournament, round)
+        ranks = {info.instance_id: info.rankings['rank'][0] for info in standings.infoview() if 'rank' in info.rankings}
 
+        draw_strengths = matrix.opponent_sums(ranks)
         for team in queryset:
-            ranks = [standings.infos[teams_by_id[opponent_id]].rankings['rank'][0] for opponent_id in opponents_by_team[team.id]]
-            ranks_without_none = [rank for rank in ranks if rank is not None]
-            standings.add_metric(team, self.key, sum(ranks_without_none))
+            standings.add_metric(team, self.key, draw_strengths.get(team.id, 0))
 
 
 class DrawStrengthByWinsMetricAnnotator(BaseDrawStrengthMetricAnnotator):
@@ -0,0 +1,47 @@
+from django.test import TestCase
+
+from draw.models import DebateTeam
+from participants.models import Team
+from tournaments.models import Round, Tournament
+from utils.tests import CompletedTournamentTestMixin
+
+from ..management.commands.benchmarkdrawstrength import query_metrics, walk_draw_strengths
+from ..teams import OpponentMatrix, PointsMetricAnnotator, TeamStandingsGenerator, TotalSpeakerScoreMetricAnnotator
+
+
+class TestOpponentMatrix(CompletedTournamentTestMixin, TestCase):
+
+    def test_matches_walk(self):
+        teams = list(self.tournament.team_set.all())
+        for round in self.tournament.prelim_rounds():
+            matrix = OpponentMatrix.from_debates(self.tournament, round)
+            for annotator in [PointsMetricAnnotator, TotalSpeakerScoreMetricAnnotator]:
+                with self.subTest(round=round.seq, metric=annotator.key):
+                    opp_metrics = query_metrics(annotator, self.tournament, round)
+                    expected = walk_draw_strengths(teams, round, lambda: opp_metrics)
+                    result = matrix.opponent_sums(opp_metrics)
+                    for team in teams:
+                        self.assertAlmostEqual(expected[team.id], result[team.id])
+
+    def test_counts_repeat_opponents(self):
+        matrix = OpponentMatrix.from_debates(self.tournament)
+        for team in self.tournament.team_set.all()[:5]:
+            index = matrix.team_ids.tolist().index(team.id)
+            for opponent_index, count in zip(matrix.opponents[matrix.teams == index], matrix.counts[matrix.teams == index]):
+                self.assertEqual(count, team.debateteam_set.filter(debate__debateteam__team_id=matrix.team_ids[opponent_index],
+                    debate__round__stage=Round.Stage.PRELIMINARY).count())
+
+    def test_draw_strength_rank(self):
+        teams = self.tournament.team_set.all()
+        round = self.tournament.round_set.get(seq=4)
+        standings = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank',), extra_metrics=('draw_strength_rank',)).generate(teams, round=round)
+        ranks = {info.team.id: info.rankings['rank'][0] for info in standings}
+        for info in standings:
+            opponents = DebateTeam.objects.filter(debate__debateteam__team=info.team, debate__round__seq__lte=4).exclude(team=info.team)
+            self.assertEqual(info.metrics['draw_strength_rank'], sum(ranks[dt.team_id] for dt in opponents))
+
+    def test_no_debates(self):
+        tournament = Tournament.objects.create(slug="nodebates")
+        Team.objects.create(tournament=tournament, reference="1")
+        matrix = OpponentMatrix.from_debates(tournament)
+        self.assertEqual(matrix.opponent_sums({}), {tournament.team_set.get().id: 0})
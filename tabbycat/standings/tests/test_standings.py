@@ -1,4 +1,5 @@
 import logging
+from unittest import mock
 
 from django.test import TestCase
 
@@ -8,10 +9,13 @@ from draw.types import DebateSide
 from participants.models import Adjudicator, Institution, Speaker, Team
 from results.models import BallotSubmission, SpeakerScore, TeamScore
 from tournaments.models import Round, Tournament
-from utils.tests import suppress_logs
+from utils.tests import CompletedTournamentTestMixin, suppress_logs
 from venues.models import Venue
 
 from ..base import StandingsError
+from ..columnar import bump_snapshot_version, ColumnarSpeakerStandingsGenerator, ColumnarTeamStandingsGenerator, TeamResultsTable
+from ..models import StandingsSnapshot
+from ..speakers import SpeakerStandingsGenerator
 from ..teams import TeamStandingsGenerator
 
 
@@ -22,6 +26,8 @@ class TestTrivialStandings(TestCase):
     configurations, rather than check the results of the ordering or aggregation
     functions themselves."""
 
+    generator_class = TeamStandingsGenerator
+
     def setUp(self):
         self.tournament = Tournament.objects.create(slug="trivialstandingstest", name="Trivial standings test")
         self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
@@ -62,7 +68,7 @@ class TestTrivialStandings(TestCase):
                 speaker=speaker2, position=position, score=100-i)
 
     def _base_metric_test(self, metrics):
-        generator = TeamStandingsGenerator(metrics.keys(), ())
+        generator = self.generator_class(metrics.keys(), ())
         standings = self.get_standings(generator)
         for mkey, mvalues in metrics.items():
             if isinstance(mvalues, dict):
@@ -74,11 +80,11 @@ class TestTrivialStandings(TestCase):
 
     def test_nothing(self):
         # just test that it does not crash
-        generator = TeamStandingsGenerator((), ())
+        generator = self.generator_class((), ())
         generator.generate(self.tournament.team_set.all(), tournament=self.tournament)
 
     def test_no_metrics(self):
-        generator = TeamStandingsGenerator((), ('rank', 'subrank'))
+        generator = self.generator_class((), ('rank', 'subrank'))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (1, True))
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (1, True))
@@ -86,7 +92,7 @@ class TestTrivialStandings(TestCase):
         self.assertEqual(standings.get_standing(self.team2).rankings['subrank'], (1, True))
 
     def test_only_extra_metrics(self):
-        generator = TeamStandingsGenerator((), ('rank', 'subrank'), extra_metrics=('points',))
+        generator = self.generator_class((), ('rank', 'subrank'), extra_metrics=('points',))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (1, True))
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (1, True))
@@ -152,7 +158,7 @@ class TestTrivialStandings(TestCase):
         self._base_metric_test({'points': [2, 0], 'npullups': [2, 0], 'pullup_debates': [2, 2]})
 
     def test_points_ranked(self):
-        generator = TeamStandingsGenerator(('points',), ('rank',))
+        generator = self.generator_class(('points',), ('rank',))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).metrics['points'], 2)
         self.assertEqual(standings.get_standing(self.team2).metrics['points'], 0)
@@ -160,7 +166,7 @@ class TestTrivialStandings(TestCase):
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (2, False))
 
     def test_speaks_ranked(self):
-        generator = TeamStandingsGenerator(('speaks_sum',), ('rank',))
+        generator = self.generator_class(('speaks_sum',), ('rank',))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).metrics['speaks_sum'], 203)
         self.assertEqual(standings.get_standing(self.team2).metrics['speaks_sum'], 197)
@@ -168,7 +174,7 @@ class TestTrivialStandings(TestCase):
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (2, False))
 
     def test_points_speaks_subrank(self):
-        generator = TeamStandingsGenerator(('points', 'speaks_sum'), ('rank', 'subrank'))
+        generator = self.generator_class(('points', 'speaks_sum'), ('rank', 'subrank'))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).metrics['points'], 2)
         self.assertEqual(standings.get_standing(self.team2).metrics['points'], 0)
@@ -180,12 +186,12 @@ class TestTrivialStandings(TestCase):
         self.assertEqual(standings.get_standing(self.team2).rankings['subrank'], (1, False))
 
     def test_double_metric_error(self):
-        self.assertRaises(StandingsError, TeamStandingsGenerator, ('points', 'wbw', 'points'), ('rank',))
+        self.assertRaises(StandingsError, self.generator_class, ('points', 'wbw', 'points'), ('rank',))
 
     def test_points_with_extra_team(self):
         # check that a team with no debates doesn't throw off the rankings
         team_extra = Team.objects.create(tournament=self.tournament, reference="extra", use_institution_prefix=False)
-        generator = TeamStandingsGenerator(('points',), ('rank',))
+        generator = self.generator_class(('points',), ('rank',))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (1, False))
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (2, False))
@@ -194,7 +200,7 @@ class TestTrivialStandings(TestCase):
     def test_wins_with_extra_team(self):
         # check that a team with no debates doesn't throw off the rankings
         team_extra = Team.objects.create(tournament=self.tournament, reference="extra", use_institution_prefix=False)
-        generator = TeamStandingsGenerator(('wins',), ('rank',))
+        generator = self.generator_class(('wins',), ('rank',))
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).rankings['rank'], (1, False))
         self.assertEqual(standings.get_standing(self.team2).rankings['rank'], (2, True))
@@ -267,6 +273,7 @@ class TestStandingsWithUnconfirmedBallotSubmission(IgnorableDebateMixin, TestTri
 class TestBasicStandings(TestCase):
 
     TEAMS = "ABCD"
+    generator_class = TeamStandingsGenerator
 
     testdata = dict()
     testdata[1] = \
@@ -345,7 +352,7 @@ class TestBasicStandings(TestCase):
             tournament, teams = self.setup_testdata(testdata)
             for metrics in testdata["rankings"].keys():
                 with self.subTest(index=index, metrics=metrics):
-                    generator = TeamStandingsGenerator(metrics, self.rankings)
+                    generator = self.generator_class(metrics, self.rankings)
                     with suppress_logs('standings.teams', logging.INFO), \
                             suppress_logs('standings.metrics', logging.INFO):
                         standings = generator.generate(tournament.team_set.all(), tournament=tournament)
@@ -369,6 +376,8 @@ class TestBasicStandings(TestCase):
 
 class TestMissingStandings(TestCase):
 
+    generator_class = TeamStandingsGenerator
+
     def setUp(self):
         self.tournament = Tournament.objects.create(slug="missingstandingstest", name="Missing standings test")
         self.team1 = Team.objects.create(tournament=self.tournament, reference="1", use_institution_prefix=False)
@@ -382,7 +391,259 @@ class TestMissingStandings(TestCase):
             return generator.generate(self.tournament.team_set.all(), tournament=self.tournament)
 
     def test_num_adjs_missing(self):
-        generator = TeamStandingsGenerator(('num_adjs',), ())
+        generator = self.generator_class(('num_adjs',), ())
         standings = self.get_standings(generator)
         self.assertEqual(standings.get_standing(self.team1).metrics['num_adjs'], 0)
         self.assertEqual(standings.get_standing(self.team2).metrics['num_adjs'], 0)
+
+
+class TestTrivialColumnarStandings(TestTrivialStandings):
+    generator_class = ColumnarTeamStandingsGenerator
+
+
+class TestColumnarStandingsWithEliminationRound(TestStandingsWithEliminationRound):
+    generator_class = ColumnarTeamStandingsGenerator
+
+
+class TestColumnarStandingsWithUnconfirmedBallotSubmission(TestStandingsWithUnconfirmedBallotSubmission):
+    generator_class = ColumnarTeamStandingsGenerator
+
+
+class TestBasicColumnarStandings(TestBasicStandings):
+    generator_class = ColumnarTeamStandingsGenerator
+
+
+class TestMissingColumnarStandings(TestMissingStandings):
+    generator_class = ColumnarTeamStandingsGenerator
+
+
+class TestColumnarStandingsParity(CompletedTournamentTestMixin, TestCase):
+    """Checks that the columnar engine agrees with the queryset-based engine on
+    a demonstration tournament."""
+
+    precedences = [
+        ('points', 'speaks_sum'),
+        ('wins', 'speaks_avg', 'draw_strength', 'margin_sum'),
+        ('points', 'draw_strength_speaks', 'speaks_stddev', 'margin_avg'),
+        ('num_adjs', 'npullups', 'pullup_debates', 'num_iron'),
+    ]
+    rankings = ('rank', 'subrank', 'institution_rank')
+
+    def assertStandingsEqual(self, expected, result, skip_rankings=()):  # noqa: N802
+        self.assertEqual(expected.metric_keys, result.metric_keys)
+        self.assertEqual(expected.ranking_keys, result.ranking_keys)
+        for standing in expected:
+            other = result.get_standing(standing.team)
+            for key in expected.metric_keys:
+                if isinstance(standing.metrics[key], float):
+                    self.assertAlmostEqual(standing.metrics[key], other.metrics[key], msg="%s: %s" % (standing.team, key))
+                else:
+                    self.assertEqual(standing.metrics[key], other.metrics[key], msg="%s: %s" % (standing.team, key))
+            for key in expected.ranking_keys:
+                if key not in skip_rankings:
+                    self.assertEqual(standing.rankings.get(key), other.rankings.get(key), msg="%s: %s" % (standing.team, key))
+
+    def test_parity(self):
+        teams = self.tournament.team_set.all()
+        for round in self.tournament.prelim_rounds():
+            for precedence in self.precedences:
+                with self.subTest(round=round.seq, precedence=precedence):
+                    expected = TeamStandingsGenerator(precedence, self.rankings, extra_metrics=('draw_strength_rank',)).generate(teams, round=round)
+                    result = ColumnarTeamStandingsGenerator(precedence, self.rankings, extra_metrics=('draw_strength_rank',)).generate(teams, round=round)
+                    # When ranking in SQL, the queryset-based engine ranks within
+                    # institutions by all metrics but the first, unlike when it
+                    # ranks in Python (and the columnar engine), which use all metrics.
+                    sql_ranked = precedence == ('points', 'speaks_sum')
+                    self.assertStandingsEqual(expected, result, skip_rankings=('institution_rank',) if sql_ranked else ())
+
+    def test_fallback(self):
+        # speaks_ind_avg can't be computed by the columnar engine
+        args = (('points', 'speaks_ind_avg'), ('rank',))
+        expected = TeamStandingsGenerator(*args, extra_metrics=('speaks_sum',)).generate(self.tournament.team_set.all())
+        result = ColumnarTeamStandingsGenerator(*args, extra_metrics=('speaks_sum',)).generate(self.tournament.team_set.all())
+        self.assertStandingsEqual(expected, result)
+
+    def test_non_columnar_extra_metric(self):
+        args = (('points', 'speaks_sum'), ('rank',))
+        expected = TeamStandingsGenerator(*args, extra_metrics=('speaks_ind_avg',)).generate(self.tournament.team_set.all())
+        result = ColumnarTeamStandingsGenerator(*args, extra_metrics=('speaks_ind_avg',)).generate(self.tournament.team_set.all())
+        self.assertEqual(set(expected.metric_keys), set(result.metric_keys))
+        for standing in expected:
+            self.assertAlmostEqual(standing.metrics['speaks_ind_avg'], result.get_standing(standing.team).metrics['speaks_ind_avg'])
+
+    def test_queries(self):
+        generator = ColumnarTeamStandingsGenerator(('points', 'wins', 'speaks_sum', 'draw_strength'), ('rank', 'subrank'))
+        teams = list(self.tournament.team_set.all())
+        generator.generate(teams, tournament=self.tournament)  # saves a snapshot for round 3
+        # teams in tournament, snapshot, last completed round, team scores and debate teams after snapshot
+        with self.assertNumQueries(5):
+            generator.generate(teams, tournament=self.tournament)
+        # teams in tournament, snapshot
+        round = self.tournament.round_set.get(seq=3)
+        with self.assertNumQueries(2):
+            generator.generate(teams, round=round)
+
+
+class TestStandingsSnapshots(CompletedTournamentTestMixin, TestCase):
+    """Checks that standings computed from snapshots are the same as those
+    computed from scratch, and that snapshots are invalidated when results
+    change."""
+
+    precedence = ('points', 'speaks_sum', 'draw_strength', 'npullups')
+
+    def assertParity(self, round):  # noqa: N802
+        teams = self.tournament.team_set.all()
+        expected = TeamStandingsGenerator(self.precedence, ('rank',)).generate(teams, round=round)
+        result = ColumnarTeamStandingsGenerator(self.precedence, ('rank',)).generate(teams, round=round)
+        for standing in expected:
+            other = result.get_standing(standing.team)
+            self.assertEqual(standing.metrics, other.metrics, msg=str(standing.team))
+            self.assertEqual(standing.rankings['rank'], other.rankings['rank'], msg=str(standing.team))
+
+    def snapshot_rounds(self, kind=StandingsSnapshot.Kind.TEAM):
+        return list(StandingsSnapshot.objects.filter(kind=kind).order_by('round__seq').values_list('round__seq', flat=True))
+
+    def test_snapshots_saved(self):
+        for round in self.tournament.prelim_rounds():
+            with self.subTest(round=round.seq):
+                self.assertParity(round)  # from snapshot of previous round, if any
+                self.assertParity(round)  # from snapshot of this round, if completed
+        self.assertEqual(self.snapshot_rounds(), [1, 2, 3])
+
+    def test_later_rounds_only(self):
+        round = self.tournament.round_set.get(seq=4)
+        self.assertParity(round)
+        self.assertEqual(self.snapshot_rounds(), [3])
+
+    def test_ballot_invalidates(self):
+        round = self.tournament.round_set.get(seq=4)
+        self.assertParity(round)
+
+        ballotsub = BallotSubmission.objects.filter(debate__round__seq=2, confirmed=True).first()
+        ballotsub.confirmed = False
+        ballotsub.save()
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(round)
+
+        ballotsub.confirmed = True
+        ballotsub.save()
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(round)
+        self.assertEqual(self.snapshot_rounds(), [3])
+
+    def test_earlier_snapshots_kept(self):
+        for seq in [1, 2, 3]:
+            self.assertParity(self.tournament.round_set.get(seq=seq))
+        ballotsub = BallotSubmission.objects.filter(debate__round__seq=3, confirmed=True).first()
+        ballotsub.delete()
+        self.assertEqual(self.snapshot_rounds(), [1, 2])
+        self.assertParity(self.tournament.round_set.get(seq=4))
+
+    def test_round_weight_invalidates(self):
+        self.assertParity(self.tournament.round_set.get(seq=4))
+        round = self.tournament.round_set.get(seq=2)
+        round.weight = 2
+        round.save()
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(self.tournament.round_set.get(seq=4))
+
+    def test_debate_team_invalidates(self):
+        self.assertParity(self.tournament.round_set.get(seq=4))
+        dt = DebateTeam.objects.filter(debate__round__seq=1).first()
+        dt.flags = ['pullup']
+        dt.save()
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(self.tournament.round_set.get(seq=4))
+
+    def test_score_invalidates(self):
+        self.assertParity(self.tournament.round_set.get(seq=4))
+        teamscore = TeamScore.objects.filter(debate_team__debate__round__seq=2, ballot_submission__confirmed=True).first()
+        teamscore.score += 1
+        teamscore.save()
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(self.tournament.round_set.get(seq=4))
+
+    def test_speaker_options_checked(self):
+        round = self.tournament.round_set.get(seq=4)
+        speakers = Speaker.objects.filter(team__tournament=self.tournament)
+        precedence = ('total', 'replies_sum')
+        ColumnarSpeakerStandingsGenerator(precedence, ('rank',)).generate(speakers, round=round)
+        self.assertEqual(self.snapshot_rounds(StandingsSnapshot.Kind.SPEAKER), [3])
+
+        self.tournament.preferences['debate_rules__reply_scores_enabled'] = False
+        round = self.tournament.round_set.get(seq=4)
+        expected = SpeakerStandingsGenerator(precedence, ('rank',)).generate(speakers, round=round)
+        result = ColumnarSpeakerStandingsGenerator(precedence, ('rank',)).generate(speakers, round=round)
+        for standing in expected:
+            self.assertEqual(standing.metrics['replies_sum'], result.get_standing(standing.speaker).metrics['replies_sum'])
+
+    def test_not_saved_if_results_change_while_loading(self):
+        round = self.tournament.round_set.get(seq=4)
+        ballotsub = BallotSubmission.objects.filter(debate__round__seq=2, confirmed=True).first()
+        load_rows = TeamResultsTable.load_rows
+
+        def load_rows_then_unconfirm(table, after, until):
+            rows = load_rows(table, after, until)
+            if ballotsub.confirmed:
+                ballotsub.confirmed = False
+                ballotsub.save()
+            return rows
+
+        with mock.patch.object(TeamResultsTable, 'load_rows', autospec=True, side_effect=load_rows_then_unconfirm):
+            ColumnarTeamStandingsGenerator(self.precedence, ('rank',)).generate(self.tournament.team_set.all(), round=round)
+        self.assertEqual(self.snapshot_rounds(), [])
+        self.assertParity(round)
+        self.assertEqual(self.snapshot_rounds(), [3])
+
+    def test_discarded_if_invalidated_before_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertParity(self.tournament.round_set.get(seq=4))
+        self.assertEqual(self.snapshot_rounds(), [3])
+
+        bump_snapshot_version(self.tournament.id)  # as if results changed in another process
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.snapshot_rounds(), [])
+
+
+class TestColumnarSpeakerStandingsParity(CompletedTournamentTestMixin, TestCase):
+    """Checks that the columnar speaker engine agrees with the queryset-based
+    engine on a demonstration tournament."""
+
+    precedences = [
+        ('total', 'average', 'trimmed_mean'),
+        ('average', 'stdev', 'count', 'srank'),
+        ('replies_avg', 'replies_sum', 'replies_stddev', 'replies_count'),
+        ('team_points', 'team_wins', 'total', 'count'),
+    ]
+
+    def test_parity(self):
+        speakers = Speaker.objects.filter(team__tournament=self.tournament)
+        for round in self.tournament.prelim_rounds():
+            for precedence in self.precedences:
+                for attempt in ['initial', 'snapshot']:
+                    with self.subTest(round=round.seq, precedence=precedence, attempt=attempt):
+                        expected = SpeakerStandingsGenerator(precedence, ('rank',), tiebreak="name").generate(speakers, round=round)
+                        result = ColumnarSpeakerStandingsGenerator(precedence, ('rank',), tiebreak="name").generate(speakers, round=round)
+                        for standing in expected:
+                            other = result.get_standing(standing.speaker)
+                            for key in precedence:
+                                if isinstance(standing.metrics[key], float):
+                                    self.assertAlmostEqual(standing.metrics[key], other.metrics[key], msg="%s: %s" % (standing.speaker, key))
+                                else:
+                                    self.assertEqual(standing.metrics[key], other.metrics[key], msg="%s: %s" % (standing.speaker, key))
+                            # Rounding errors in the database's standard deviations can break ties
+                            if 'stdev' not in precedence:
+                                self.assertEqual(standing.rankings['rank'], other.rankings['rank'], msg=str(standing.speaker))
+        self.assertEqual(list(StandingsSnapshot.objects.filter(kind=StandingsSnapshot.Kind.SPEAKER).order_by(
+            'round__seq').values_list('round__seq', flat=True)), [1, 2, 3])
+
+    def test_num_adjs(self):
+        # The queryset-based annotator sums speaker scores rather than votes, so
+        # compare with the number of adjudicators for each speaker's team instead
+        round = self.tournament.round_set.get(seq=4)
+        speakers = Speaker.objects.filter(team__tournament=self.tournament).select_related('team')
+        result = ColumnarSpeakerStandingsGenerator(('num_adjs',), ('rank',)).generate(speakers, round=round)
+        teams = ColumnarTeamStandingsGenerator(('num_adjs',), ('rank',)).generate(self.tournament.team_set.all(), round=round)
+        for standing in result:
+            self.assertEqual(standing.metrics['num_adjs'], teams.get_standing(standing.speaker.team).metrics['num_adjs'])
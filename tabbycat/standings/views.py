@@ -25,10 +25,9 @@ from utils.tables import TabbycatTableBuilder
 from utils.views import VueTableTemplateView
 
 from .base import StandingsError
+from .columnar import ColumnarSpeakerStandingsGenerator, ColumnarTeamStandingsGenerator
 from .diversity import get_diversity_data_sets
 from .round_results import add_speaker_round_results, add_team_round_results, add_team_round_results_public
-from .speakers import SpeakerStandingsGenerator
-from .teams import TeamStandingsGenerator
 from .templatetags.standingsformat import metricformat
 
 logger = logging.getLogger(__name__)
@@ -137,6 +136,7 @@ class BaseStandingsView(RoundMixin, VueTableTemplateView):
 class PublicTabMixin(PublicTournamentPageMixin):
     """Mixin for views that should only be allowed when the tab is released publicly."""
     cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
+    cache_tags = ['standings']
 
     def get_page_subtitle(self):
         return None
@@ -219,7 +219,7 @@ class BaseSpeakerStandingsView(BaseStandingsView):
 
         metrics, extra_metrics = self.get_metrics()
         rank_filter = self.get_rank_filter()
-        generator = SpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter)
+        generator = ColumnarSpeakerStandingsGenerator(metrics, self.rankings, extra_metrics, rank_filter=rank_filter)
         standings = generator.generate(speakers, round=self.round)
 
         rounds = self.get_rounds()
@@ -439,7 +439,7 @@ class BaseTeamStandingsView(BaseStandingsView):
                 to_attr='break_categories_nongeneral'))
         metrics = self.tournament.pref('team_standings_precedence')
         extra_metrics = self.tournament.pref('team_standings_extra_metrics')
-        generator = TeamStandingsGenerator(metrics, self.rankings, extra_metrics)
+        generator = ColumnarTeamStandingsGenerator(metrics, self.rankings, extra_metrics)
         standings = generator.generate(teams, round=self.round)
         self.limit_rank_display(standings)
 
@@ -563,6 +563,7 @@ class PublicCurrentTeamStandingsView(PublicTournamentPageMixin, VueTableTemplate
     page_title = gettext_lazy("Current Team Standings")
     page_emoji = '🌟'
     cache_timeout = settings.PUBLIC_SLOW_CACHE_TIMEOUT
+    cache_tags = ['standings']
 
     def get_rounds(self):
         if not hasattr(self, '_rounds'):
@@ -633,6 +634,7 @@ class DiversityStandingsView(AdministratorMixin, BaseDiversityStandingsView):
 class PublicDiversityStandingsView(PublicTournamentPageMixin, BaseDiversityStandingsView):
 
     cache_timeout = settings.TAB_PAGES_CACHE_TIMEOUT
+    cache_tags = ['standings']
     public_page_preference = 'public_diversity'
     for_public = True
 
@@ -0,0 +1,266 @@
+"""Per-process cache of tournament and round objects
+
+Tournament and round objects are looked up on almost every request, by
+DebateMiddleware and the URL mixins. As well as being kept in the shared cache
+(e.g. Redis), they're kept in memory in each process, in a small LRU cache of
+tournaments, so that most requests don't need to go over the network for them.
+
+Entries are tagged with the tournament's version, a number in the shared cache
+that increases whenever the tournament, one of its rounds or one of its
+preferences is saved (see tournaments/signals.py). The objects are kept in the
+shared cache under the version too, so an object cached by another process
+before a change committed is never used once the version has increased. Until
+then, the process making the change loads the tournament's objects from the
+database, rather than caching its uncommitted changes under the old version. Changes made in a process
+take effect in that process immediately. Other processes notice them when they
+next check the version, which they do once an entry is more than
+TOURNAMENT_CACHE_MAX_AGE seconds old. Callers that can't tolerate that delay
+(e.g. when handling requests from signed-in users, who expect to see their own
+changes) pass `max_age=0` to check it on every lookup, which costs one read
+from the shared cache.
+
+Objects are returned as shallow copies, so that attributes cached on them while
+handling one request don't outlive it.
+
+Each entry also holds a snapshot of the tournament's preferences: a read-only
+mapping of all of them, by name, loaded in one read from the shared cache (or
+failing that, one query). It's shared by every instance of the tournament in the
+process, however that instance was obtained, and is where `Tournament.pref()`
+reads preferences from.
+"""
+import logging
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import monotonic, time_ns
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.shortcuts import get_object_or_404
+
+from .models import Round, Tournament
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "{slug}_version"
+TOURNAMENT_KEY = "{slug}_{version}_object"
+ROUND_KEY = "{slug}_{version}_{seq}_object"
+
+# Objects are cached in the shared cache under the version, so they're never
+# deleted, just left to expire once they're out of date.
+OBJECT_TIMEOUT = 24 * 60 * 60
+
+DEFAULT_SIZE = 32
+DEFAULT_MAX_AGE = 2.0
+
+
+def _initial_version():
+    # Versions start from the current time, so that they still increase if the
+    # key is evicted from the shared cache.
+    return time_ns() // 1000
+
+
+def get_version(slug):
+    """Returns the current version of the tournament with slug `slug`."""
+    key = VERSION_KEY.format(slug=slug)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(slug):
+    """Marks all cached objects for the tournament with slug `slug` as stale.
+    This process's cache is cleared immediately, but the version is only
+    increased once the current transaction (if any) commits, so that other
+    processes can't cache the old objects under the new version."""
+    tournament_cache.invalidate(slug, pending=True)
+
+    def bump():
+        key = VERSION_KEY.format(slug=slug)
+        try:
+            cache.incr(key)
+        except ValueError:  # not in the cache
+            if not cache.add(key, _initial_version(), None):
+                cache.incr(key)
+        tournament_cache.invalidate(slug)
+        logger.debug("Bumped cache version for tournament %s", slug)
+
+    transaction.on_commit(bump)
+
+
+def load_preferences(tournament):
+    """Returns a read-only mapping of all of `tournament`'s preferences, by name.
+    Values are read from the preferences cache in one go. If any are missing
+    from it, they're all read from the database in one query, and then cached.
+    Preferences that aren't in the database take their default values, without
+    being saved."""
+    manager = tournament.preferences
+    registered = manager.registry.preferences()
+    values = manager.many_from_cache(registered)
+
+    if len(values) < len(registered):
+        db_prefs = {db_pref.preference.identifier(): db_pref for db_pref in manager.queryset}
+        for preference in registered:
+            if preference.identifier() not in db_prefs:
+                default = manager.model(section=preference.section.name, name=preference.name, instance=tournament)
+                default.value = preference.get('default')
+                db_prefs[preference.identifier()] = default
+        manager.to_cache(*db_prefs.values())
+        values = {identifier: db_pref.value for identifier, db_pref in db_prefs.items()}
+
+    return MappingProxyType({preference.name: values[preference.identifier()] for preference in registered})
+
+
+class _Entry:
+    __slots__ = ('version', 'checked', 'tournament', 'rounds', 'preferences')
+
+    def __init__(self, version):
+        self.version = version
+        self.checked = monotonic()
+        self.tournament = None
+        self.rounds = {}
+        self.preferences = None  # (tournament ID, snapshot)
+
+
+class TournamentObjectCache:
+    """LRU cache of the tournament objects, and their round objects, for up to
+    `size` tournaments. Defaults are taken from the TOURNAMENT_CACHE_SIZE and
+    TOURNAMENT_CACHE_MAX_AGE settings."""
+
+    def __init__(self, size=None, max_age=None):
+        self._size = size
+        self._max_age = max_age
+        self._entries = OrderedDict()
+        self._pending = set()  # slugs with changes that haven't committed yet
+        self._lock = Lock()
+        self.preference_hits = 0
+        self.preference_misses = 0
+
+    @property
+    def size(self):
+        return self._size or getattr(settings, 'TOURNAMENT_CACHE_SIZE', DEFAULT_SIZE)
+
+    @property
+    def max_age(self):
+        if self._max_age is not None:
+            return self._max_age
+        return getattr(settings, 'TOURNAMENT_CACHE_MAX_AGE', DEFAULT_MAX_AGE)
+
+    def get_entry(self, slug, max_age=None):
+        if max_age is None:
+            max_age = self.max_age
+
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None:
+                self._entries.move_to_end(slug)
+                if monotonic() - entry.checked < max_age:
+                    return entry
+
+        version = get_version(slug)
+
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None or entry.version != version:
+                entry = self._entries[slug] = _Entry(version)
+                self._entries.move_to_end(slug)
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+            else:
+                entry.checked = monotonic()
+        return entry
+
+    def get_tournament(self, slug, max_age=None):
+        """Returns the tournament with slug `slug`, raising Http404 if there
+        isn't one. `max_age` overrides the TOURNAMENT_CACHE_MAX_AGE setting."""
+        entry = self.get_entry(slug, max_age)
+        tournament = entry.tournament
+        if tournament is None:
+            key = TOURNAMENT_KEY.format(slug=slug, version=entry.version)
+            tournament = self._load(slug, key, lambda: get_object_or_404(Tournament, slug=slug))
+            entry.tournament = tournament
+        tournament = copy(tournament)
+        tournament._prefs = {}
+        return tournament
+
+    def get_round(self, tournament, seq, max_age=None):
+        """Returns the round of `tournament` with sequence number `seq`,
+        raising Http404 if there isn't one. The round's tournament is set to
+        `tournament`. As the tournament will normally just have been looked up,
+        its entry is only checked again if it's older than `max_age`."""
+        entry = self.get_entry(tournament.slug, max_age)
+        round = entry.rounds.get(seq)
+        if round is None:
+            key = ROUND_KEY.format(slug=tournament.slug, version=entry.version, seq=seq)
+            round = self._load(tournament.slug, key, lambda: get_object_or_404(Round, tournament=tournament, seq=seq))
+            entry.rounds[seq] = round
+        round = copy(round)
+        round.tournament = tournament
+        return round
+
+    def _load(self, slug, key, load):
+        """Returns the object at `key` in the shared cache, calling `load()` to
+        load and cache it if it isn't there."""
+        if slug in self._pending:
+            return load()
+        obj = cache.get(key)
+        if obj is None:
+            obj = load()
+            cache.set(key, obj, OBJECT_TIMEOUT)
+        return obj
+
+    def get_preferences(self, tournament, max_age=None):
+        """Returns the snapshot of `tournament`'s preferences (see
+        `load_preferences()`), loading it if it isn't in the cache."""
+        if tournament.pk is None:
+            return MappingProxyType({})
+
+        entry = self.get_entry(tournament.slug, max_age)
+        cached = entry.preferences
+        if cached is not None and cached[0] == tournament.pk:
+            self.preference_hits += 1
+            return cached[1]
+
+        self.preference_misses += 1
+        snapshot = load_preferences(tournament)
+        entry.preferences = (tournament.pk, snapshot)
+        return snapshot
+
+    def stats(self):
+        return {
+            'tournaments': len(self._entries),
+            'preference_hits': self.preference_hits,
+            'preference_misses': self.preference_misses,
+        }
+
+    def invalidate(self, slug, pending=False):
+        """Drops the entry for `slug`. If `pending` is True, the change is yet
+        to commit, so the shared cache isn't used for the tournament until it's
+        invalidated again."""
+        with self._lock:
+            self._entries.pop(slug, None)
+            if pending:
+                self._pending.add(slug)
+            else:
+                self._pending.discard(slug)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+
+tournament_cache = TournamentObjectCache()
+
+
+@receiver(setting_changed)
+def clear_tournament_cache(setting, **kwargs):
+    # Entries are tied to the shared cache they were checked against
+    if setting in ('CACHES', 'TOURNAMENT_CACHE_SIZE', 'TOURNAMENT_CACHE_MAX_AGE'):
+        tournament_cache.clear()
@@ -1,5 +1,4 @@
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.forms import CharField, ChoiceField, DateTimeInput, Form, HiddenInput, ModelChoiceField, ModelForm
 from django.forms.fields import IntegerField, NumberInput
 from django.forms.models import ModelChoiceIterator
@@ -186,7 +185,6 @@ class RoundWithCompleteOptionField(RoundField):
 
 
 def clear_all_round_caches(tournament):
-    cache.delete_many(["%s_%s_%s" % (tournament.slug, r.seq, 'object') for r in tournament.round_set.all()])
     update_tournament_cache(Tournament, tournament)
 
 
@@ -4,10 +4,9 @@ import logging
 from asgiref.sync import async_to_sync
 from django.conf import settings
 from django.contrib import messages
-from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 from django.db.models import Prefetch, Q
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.template.response import TemplateResponse
 from django.urls import NoReverseMatch, reverse
 from django.utils.encoding import force_str
@@ -28,7 +27,7 @@ from utils.misc import (add_query_string_parameter, redirect_tournament,
 from utils.mixins import AssistantMixin, CacheMixin, TabbycatPageTitlesMixin
 from utils.serializers import django_rest_json_render
 
-from .models import Round, Tournament
+from .caching import tournament_cache
 
 logger = logging.getLogger(__name__)
 
@@ -38,15 +37,14 @@ logger = logging.getLogger(__name__)
 # ==============================================================================
 
 class TournamentFromUrlMixin:
-    """Provides the `tournament` property, looking in the cache and URL path,
-    and keeping its own local cache.
+    """Provides the `tournament` property, looking in the request, the cache
+    and URL path, and keeping its own local cache.
 
     This mixin shouldn't generally be used directly; it should instead typically
     be inherited via `TournamentMixin` (for views) or `TournamentWebsocketMixin`
     (for websocket consumers).
     """
     tournament_slug_url_kwarg = "tournament_slug"
-    tournament_cache_key = "{slug}_object"
     tournament_redirect_pattern_name = None
 
     def get_url_kwargs(self):
@@ -58,17 +56,15 @@ class TournamentFromUrlMixin:
         if hasattr(self, "_tournament_from_url"):
             return self._tournament_from_url
 
-        # then look in cache,
+        # then in the request, where DebateMiddleware will usually have put it,
         slug = self.get_url_kwargs()[self.tournament_slug_url_kwarg]
-        key = self.tournament_cache_key.format(slug=slug)
-        cached_tournament = cache.get(key)
-        if cached_tournament:
-            self._tournament_from_url = cached_tournament
-            return cached_tournament
-
-        # and if it was in neither place, retrieve the object
-        tournament = get_object_or_404(Tournament, slug=slug)
-        cache.set(key, tournament, None)
+        tournament = getattr(getattr(self, "request", None), "tournament", None)
+
+        # and if it was in neither place, look in the cache, which retrieves
+        # the object if it isn't there either
+        if tournament is None or tournament.slug != slug:
+            tournament = tournament_cache.get_tournament(slug, max_age=0)
+
         self._tournament_from_url = tournament
         return tournament
 
@@ -183,15 +179,14 @@ class TournamentWebsocketMixin(TournamentFromUrlMixin):
 
 
 class RoundFromUrlMixin(TournamentFromUrlMixin):
-    """Provides the `round` property, looking in the cache and URL path,
-    and keeping its own local cache.
+    """Provides the `round` property, looking in the request, the cache and
+    URL path, and keeping its own local cache.
 
     This mixin shouldn't generally be used directly; it should instead typically
     be inherited via `RoundMixin` (for views) or `RoundWebsocketMixin` (for
     websocket consumers).
     """
     round_seq_url_kwarg = "round_seq"
-    round_cache_key = "{slug}_{seq}_object"
     round_redirect_pattern_name = None
 
     @property
@@ -200,17 +195,15 @@ class RoundFromUrlMixin(TournamentFromUrlMixin):
         if hasattr(self, "_round_from_url"):
             return self._round_from_url
 
-        # then look in cache,
+        # then in the request, where DebateMiddleware will usually have put it,
         seq = self.get_url_kwargs()[self.round_seq_url_kwarg]
-        key = self.round_cache_key.format(slug=self.tournament.slug, seq=seq)
-        cached_round = cache.get(key)
-        if cached_round:
-            self._round_from_url = cached_round
-            return cached_round
-
-        # and if it was in neither place, retrieve the object
-        round = get_object_or_404(Round, tournament=self.tournament, seq=seq)
-        cache.set(key, round, None)
+        round = getattr(getattr(self, "request", None), "round", None)
+
+        # and if it was in neither place, look in the cache, which retrieves
+        # the object if it isn't there either
+        if round is None or round.tournament_id != self.tournament.id or round.seq != int(seq):
+            round = tournament_cache.get_round(self.tournament, seq)
+
         self._round_from_url = round
         return round
 
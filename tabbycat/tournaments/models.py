@@ -65,6 +65,13 @@ class Tournament(models.Model):
     # Properties related to preferences
     # --------------------------------------------------------------------------
 
+    def all_prefs(self):
+        """Returns a read-only mapping of all of this tournament's preferences,
+        by name. This is a snapshot that is shared by all instances of the
+        tournament in this process (see tournaments/caching.py)."""
+        from .caching import tournament_cache
+        return tournament_cache.get_preferences(self)
+
     def pref(self, name):
         """Keep a record in this instance, to avoid hitting the cache
         unnecessarily. Note that this means that, if a tournament preference is
@@ -73,7 +80,8 @@ class Tournament(models.Model):
         try:
             return self._prefs[name]
         except KeyError:
-            self._prefs[name] = self.preferences.get_by_name(name)
+            prefs = self.all_prefs()
+            self._prefs[name] = prefs[name] if name in prefs else self.preferences.get_by_name(name)
             return self._prefs[name]
 
     @property
@@ -1,30 +1,54 @@
 import logging
 
-from django.core.cache import cache
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
+from options.models import TournamentPreferenceModel
+from tournaments.caching import bump_version
 from tournaments.models import Round, Tournament
+from utils.pagecache import invalidate_pages, page_tag, round_page_tags
 
 logger = logging.getLogger(__name__)
 
 
+@receiver(post_delete, sender=Tournament)
 @receiver(post_save, sender=Tournament)
 def update_tournament_cache(sender, instance, **kwargs):
-    cache.delete("%s_%s" % (instance.slug, 'object'))
+    bump_version(instance.slug)
 
 
 @receiver(post_delete, sender=Round)
 @receiver(post_save, sender=Round)
 def update_round_cache(sender, instance, **kwargs):
-    cached_key = "%s_%s_%s" % (instance.tournament.slug, instance.seq, 'object')
-    cache.delete(cached_key)
-    logger.debug("Cleared cache %s for %s" % (cached_key, instance))
-
-    # Update the tournament cache as well if either this is the current round,
-    # or the current round is None (this might mean the current round was deleted).
-    current_round_id = getattr(instance.tournament.current_round, 'id', None)
-    if current_round_id == instance.id or current_round_id is None:
-        logger.debug("Cleared %s tournament cache because the current round is %s" %
-                (instance.tournament.slug, instance if current_round_id == instance.id else current_round_id))
-        update_tournament_cache(sender, instance.tournament, **kwargs)
+    # This also covers the tournament object, which is cached under the same
+    # version, and whose current round might have changed
+    bump_version(instance.tournament.slug)
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def update_tournament_preferences_cache(sender, instance, **kwargs):
+    bump_version(instance.instance.slug)
+
+
+# Public pages (see utils/pagecache.py). Releasing the draw or motions, or
+# completing a round, is a change to the round; releasing the tab or standings
+# is a change to a tournament preference.
+
+@receiver(post_delete, sender=Tournament)
+@receiver(post_save, sender=Tournament)
+def invalidate_tournament_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(page_tag(instance))
+
+
+@receiver(post_delete, sender=Round)
+@receiver(post_save, sender=Round)
+def invalidate_round_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(*round_page_tags(instance, ['draw', 'motions', 'results', 'standings']))
+
+
+@receiver(post_save, sender=TournamentPreferenceModel)
+def invalidate_tournament_preference_pages(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_pages(page_tag(instance.instance))
@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from options.models import TournamentPreferenceModel
+from tournaments.caching import get_version, ROUND_KEY, TournamentObjectCache, VERSION_KEY
+from tournaments.models import Round, Tournament
+
+
+class TestTournamentObjectCache(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.tournament = Tournament.objects.create(slug="cachetest", name="Cache test")
+        self.round = Round.objects.create(tournament=self.tournament, seq=1, name="Round 1", abbreviation="R1")
+        self.objects = TournamentObjectCache(size=2, max_age=60)
+
+    def count_shared_cache_reads(self, func, *args, **kwargs):
+        with mock.patch('tournaments.caching.cache', wraps=cache) as shared_cache, \
+                CaptureQueriesContext(connection) as queries:
+            result = func(*args, **kwargs)
+        return result, shared_cache.get.call_count + len(queries)
+
+    def test_local_hit(self):
+        tournament, reads = self.count_shared_cache_reads(self.objects.get_tournament, "cachetest")
+        self.assertEqual(tournament, self.tournament)
+        self.assertGreater(reads, 0)
+
+        tournament, reads = self.count_shared_cache_reads(self.objects.get_tournament, "cachetest")
+        self.assertEqual(tournament, self.tournament)
+        self.assertEqual(reads, 0)
+
+        round, reads = self.count_shared_cache_reads(self.objects.get_round, tournament, 1)
+        self.assertEqual(round, self.round)
+        self.assertIs(round.tournament, tournament)
+        round, reads = self.count_shared_cache_reads(self.objects.get_round, tournament, 1)
+        self.assertEqual(reads, 0)
+
+    def test_max_age_zero(self):
+        self.objects.get_tournament("cachetest")
+        tournament, reads = self.count_shared_cache_reads(self.objects.get_tournament, "cachetest", max_age=0)
+        self.assertEqual(reads, 1)  # just the version
+
+    def test_copies(self):
+        first = self.objects.get_tournament("cachetest")
+        first.name = "Changed"
+        first.pref('teams_in_debate')
+        second = self.objects.get_tournament("cachetest")
+        self.assertIsNot(first, second)
+        self.assertEqual(second.name, "Cache test")
+        self.assertIs(second.all_prefs(), first.all_prefs())
+
+    def test_changed_in_this_process(self):
+        self.objects.get_tournament("cachetest")
+        with self.captureOnCommitCallbacks(execute=True), mock.patch('tournaments.caching.tournament_cache', self.objects):
+            Tournament.objects.filter(pk=self.tournament.pk).update(name="Updated")
+            self.tournament.refresh_from_db()
+            self.tournament.save()
+            self.assertEqual(self.objects.get_tournament("cachetest").name, "Updated")
+
+    def test_changed_in_other_process(self):
+        old_version = get_version("cachetest")
+        with mock.patch('tournaments.caching.tournament_cache', self.objects):
+            self.assertEqual(self.objects.get_tournament("cachetest").pref('teams_in_debate'), 2)
+
+        # Another process (i.e. not using self.objects) changes a preference
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tournament.preferences['debate_rules__teams_in_debate'] = 4
+        self.assertGreater(get_version("cachetest"), old_version)
+
+        with mock.patch('tournaments.caching.tournament_cache', self.objects):
+            self.assertEqual(self.objects.get_tournament("cachetest").pref('teams_in_debate'), 2)  # not checked yet
+            self.assertEqual(self.objects.get_tournament("cachetest", max_age=0).pref('teams_in_debate'), 4)
+
+    def test_not_recached_before_commit(self):
+        version = get_version("cachetest")
+        old_round = Round.objects.get(pk=self.round.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.round.draw_status = Round.Status.RELEASED
+            self.round.save()
+            # Another process caches the round from before the change commits
+            cache.set(ROUND_KEY.format(slug="cachetest", version=version, seq=1), old_round)
+
+        tournament = self.objects.get_tournament("cachetest")
+        self.assertEqual(self.objects.get_round(tournament, 1).draw_status, Round.Status.RELEASED)
+
+    def test_preference_snapshot(self):
+        self.tournament.preferences['debate_rules__substantive_speakers'] = 2
+        cache.clear()
+
+        with mock.patch('tournaments.caching.tournament_cache', self.objects):
+            with CaptureQueriesContext(connection) as queries:
+                first = Tournament.objects.get(pk=self.tournament.pk)
+                self.assertEqual(first.pref('substantive_speakers'), 2)
+                self.assertEqual(first.pref('teams_in_debate'), 2)
+            self.assertEqual(len(queries), 2)  # the tournament and its preferences
+
+            with self.assertNumQueries(1):  # just the tournament
+                second = Tournament.objects.get(pk=self.tournament.pk)
+                self.assertEqual(second.pref('substantive_speakers'), 2)
+            self.assertEqual(self.objects.stats()['preference_misses'], 1)
+            self.assertEqual(self.objects.stats()['preference_hits'], 2)
+            self.assertIs(second.all_prefs(), first.all_prefs())
+
+        with self.assertRaises(TypeError):
+            first.all_prefs()['teams_in_debate'] = 4
+
+        # Defaults aren't saved to the database just by being read
+        self.assertFalse(TournamentPreferenceModel.objects.filter(instance=self.tournament, name='teams_in_debate').exists())
+
+        # They're now all in the preferences cache, so are read in one go
+        self.objects.clear()
+        with mock.patch('tournaments.caching.tournament_cache', self.objects), self.assertNumQueries(0):
+            self.assertEqual(Tournament(pk=self.tournament.pk, slug="cachetest").pref('substantive_speakers'), 2)
+
+    def test_default_preferences_not_changes(self):
+        version = get_version("cachetest")
+        with self.captureOnCommitCallbacks(execute=True):
+            Tournament.objects.get(pk=self.tournament.pk).pref('substantive_speakers')
+        self.assertEqual(get_version("cachetest"), version)
+
+    def test_version_evicted(self):
+        self.objects.get_tournament("cachetest")
+        version = get_version("cachetest")
+        cache.delete(VERSION_KEY.format(slug="cachetest"))
+        self.assertGreater(get_version("cachetest"), version)
+
+    def test_lru(self):
+        for slug in ["a", "b"]:
+            Tournament.objects.create(slug=slug)
+        self.objects.get_tournament("cachetest")
+        self.objects.get_tournament("a")
+        self.objects.get_tournament("cachetest")
+        self.objects.get_tournament("b")
+        self.assertEqual(list(self.objects._entries), ["cachetest", "b"])
+
+    def test_not_found(self):
+        with self.assertRaises(Http404):
+            self.objects.get_tournament("nonexistent")
+        with self.assertRaises(Http404):
+            self.objects.get_round(self.tournament, 2)
@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import override_settings, TestCase
+
+from results.models import BallotSubmission
+from tournaments.caching import tournament_cache
+from tournaments.models import Round
+from utils.pagecache import CSRF_TOKEN_PLACEHOLDER, get_tag_versions, invalidate_pages, page_tag, render_pages
+from utils.tests import CompletedTournamentTestMixin
+
+
+class TestPublicPageCache(CompletedTournamentTestMixin, TestCase):
+
+    round_seq = 2
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        tournament_cache.clear()
+        self.tournament.preferences['public_features__public_draw'] = 'all-released'
+        self.round.draw_status = Round.Status.CONFIRMED
+        self.round.save()
+        self.url = self.reverse_url('draw-public-for-round')
+
+    def assertRendered(self, response):  # noqa: N802
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.context)
+
+    def assertFromCache(self, response):  # noqa: N802
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context)
+
+    def test_anonymous_page_cached(self):
+        first = self.client.get(self.url)
+        self.assertRendered(first)
+        second = self.client.get(self.url)
+        self.assertFromCache(second)
+        self.assertNotIn(CSRF_TOKEN_PLACEHOLDER.encode(), second.content)
+        self.assertIn(b'csrfmiddlewaretoken', second.content)
+        self.assertIn('Cookie', second['Vary'])
+
+    def test_invalidated_on_draw_release(self):
+        self.assertEqual(self.client.get(self.url).context['tables_data'], '[]')
+        self.round.draw_status = Round.Status.RELEASED
+        self.round.save()
+        response = self.client.get(self.url)
+        self.assertRendered(response)
+        self.assertNotEqual(response.context['tables_data'], '[]')
+
+    def test_authenticated_not_cached(self):
+        self.client.login(username="admin", password="admin")
+        self.assertRendered(self.client.get(self.url))
+        self.assertRendered(self.client.get(self.url))
+
+    def test_stale_served_while_rendering(self):
+        self.client.get(self.url)
+        invalidate_pages(page_tag(self.tournament, 'draw', self.round))
+        # Another process is rendering every page
+        with mock.patch('utils.pagecache.LOCK_KEY', "pagecache_lock_test"):
+            cache.set("pagecache_lock_test", True)
+            self.assertFromCache(self.client.get(self.url))
+
+            # With no previous copy, give up waiting and render it anyway
+            invalidate_pages(page_tag(self.tournament, 'draw', self.round))
+            with mock.patch('utils.pagecache.STALE_PAGE_KEY', "pagecache_stale_test"), \
+                    mock.patch('utils.pagecache.WAIT_TIMEOUT', 0.2):
+                self.assertRendered(self.client.get(self.url))
+
+    def test_ballot_invalidates_results(self):
+        tags = [page_tag(self.tournament, 'results', self.round), page_tag(self.tournament, 'standings')]
+        versions = get_tag_versions(tags)
+        ballotsub = BallotSubmission.objects.filter(debate__round=self.round, confirmed=True).first()
+        ballotsub.confirmed = False
+        ballotsub.save()
+        for before, after in zip(versions, get_tag_versions(tags)):
+            self.assertGreater(after, before)
+
+    @override_settings(PUBLIC_PAGE_PREWARMING=True)
+    def test_prewarm(self):
+        self.client.get(self.url)
+        channel_layer = mock.Mock(send=mock.AsyncMock())
+        with mock.patch('utils.pagecache.get_channel_layer', return_value=channel_layer):
+            for i in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.round.draw_status = Round.Status.RELEASED
+                    self.round.save()
+        channel_layer.send.assert_called_once()
+        channel, message = channel_layer.send.call_args.args
+        self.assertEqual(channel, "pagecache")
+        self.assertIn(page_tag(self.tournament, 'draw', self.round), message['tags'])
+
+        # Rendering would close the test's database connection otherwise
+        for signal in [request_started, request_finished]:
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        render_pages(message['tags'])
+        self.assertFromCache(self.client.get(self.url))
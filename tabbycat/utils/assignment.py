@@ -0,0 +1,175 @@
+"""Solvers for the linear assignment problem.
+
+Cost matrices are two-dimensional NumPy arrays, with rows being assigned to
+columns. Pairs that may never be assigned are marked with `DISALLOWED`
+(positive infinity). Every solver returns a list of `(row, col)` tuples, sorted
+by row, that minimises the total cost; if there are more columns than rows,
+some columns are left unassigned, and vice versa.
+
+These are used by the BP draw generator, the Hungarian adjudicator allocators
+and the venue allocator."""
+
+import munkres
+import numpy as np
+
+DISALLOWED = np.inf
+
+
+def broadcast_costs(func, row_values, col_values):
+    """Builds a cost matrix from a vectorised cost function. `func` is called
+    once, with `row_values` as a column vector and `col_values` as a row
+    vector, so that NumPy broadcasting evaluates it for every pair. The result
+    is a float array with a row for each row value and a column for each
+    column value."""
+    rows = np.asarray(row_values, dtype=float).reshape(-1, 1)
+    cols = np.asarray(col_values, dtype=float).reshape(1, -1)
+    costs = np.asarray(func(rows, cols), dtype=float)
+    return np.broadcast_to(costs, (rows.shape[0], cols.shape[1])).copy()
+
+
+class UnsolvableAssignmentError(ValueError):
+    """Raised when every complete assignment includes a disallowed pair."""
+    pass
+
+
+def solve_jonker_volgenant(costs):
+    """Solves the assignment problem using the shortest augmenting path
+    algorithm of Jonker and Volgenant, as described by Crouse (2016), "On
+    implementing 2D rectangular assignment algorithms". Each row is added to
+    the assignment by a Dijkstra-like search for the shortest augmenting path
+    over reduced costs, with each step of the search vectorised over columns.
+    This is O(n³) in the worst case, compared to O(n⁴) for `munkres`."""
+    costs = np.asarray(costs, dtype=float)
+    if costs.size == 0:
+        return []
+
+    transposed = costs.shape[0] > costs.shape[1]
+    if transposed:
+        costs = costs.T
+
+    col4row, u, v = _shortest_augmenting_paths(costs)
+
+    if transposed:
+        return sorted((int(j), i) for i, j in enumerate(col4row))
+    return [(i, int(j)) for i, j in enumerate(col4row)]
+
+
+def _shortest_augmenting_paths(costs):
+    """Returns a tuple `(col4row, u, v)`, where `col4row` is an array whose
+    `i`th element is the column assigned to row `i`, and `u` and `v` are the
+    optimal row and column duals. Requires that there be no more rows than
+    columns."""
+    nrows, ncols = costs.shape
+
+    u = np.zeros(nrows)  # row duals
+    v = np.zeros(ncols)  # column duals
+    col4row = np.full(nrows, -1, dtype=np.intp)
+    row4col = np.full(ncols, -1, dtype=np.intp)
+
+    for cur_row in range(nrows):
+        shortest = np.full(ncols, np.inf)
+        path = np.full(ncols, -1, dtype=np.intp)
+        scanned_cols = np.zeros(ncols, dtype=bool)
+        scanned_rows = [cur_row]
+        min_val = 0.0
+        i = cur_row
+
+        while True:
+            reduced = min_val + costs[i] - u[i] - v
+            improved = ~scanned_cols & (reduced < shortest)
+            path[improved] = i
+            shortest[improved] = reduced[improved]
+
+            candidates = np.where(scanned_cols, np.inf, shortest)
+            min_val = candidates.min()
+            if min_val == np.inf:
+                raise UnsolvableAssignmentError("No assignment of row %d avoids disallowed entries" % cur_row)
+
+            # Among equally short paths, prefer ending at an unassigned column
+            ties = np.flatnonzero(candidates == min_val)
+            free = ties[row4col[ties] == -1]
+            j = free[0] if len(free) > 0 else ties[0]
+            scanned_cols[j] = True
+
+            if row4col[j] == -1:
+                break
+            i = row4col[j]
+            scanned_rows.append(i)
+
+        # Update the dual variables
+        u[cur_row] += min_val
+        others = np.array(scanned_rows[1:], dtype=np.intp)
+        u[others] += min_val - shortest[col4row[others]]
+        v[scanned_cols] -= min_val - shortest[scanned_cols]
+
+        # Augment the assignment along the path ending at column j
+        while True:
+            i = path[j]
+            row4col[j] = i
+            col4row[i], j = j, col4row[i]
+            if i == cur_row:
+                break
+
+    return col4row, u, v
+
+
+def solve_lexicographic(cost_levels):
+    """Solves the assignment problem for a list of cost matrices of the same
+    shape, in order of precedence: the assignment minimises the total of the
+    first matrix, then among those that do, the total of the second, and so on.
+    This avoids combining them into one matrix with weights large enough to
+    give each precedence over the next, which would lose small costs to
+    rounding if there were many levels.
+
+    Each level is solved with the Jonker-Volgenant algorithm, then restricted
+    to pairs with zero reduced cost under its optimal duals. These include
+    every pair in any optimal assignment for that level, and any complete
+    assignment of them is optimal. The problem is padded to a square with zero
+    costs, so that this holds for rectangular problems too. For the same
+    reason, all but the last level should have integer costs."""
+    cost_levels = [np.asarray(costs, dtype=float) for costs in cost_levels]
+    nrows, ncols = cost_levels[0].shape
+    if nrows == 0 or ncols == 0:
+        return []
+
+    size = max(nrows, ncols)
+    allowed = np.ones((size, size), dtype=bool)
+    for costs in cost_levels:
+        padded = np.zeros((size, size))
+        padded[:nrows, :ncols] = costs
+        padded[~allowed] = DISALLOWED
+        col4row, u, v = _shortest_augmenting_paths(padded)
+        allowed &= padded - u[:, np.newaxis] - v[np.newaxis, :] <= 1e-9
+
+    return [(i, int(j)) for i, j in enumerate(col4row) if i < nrows and j < ncols]
+
+
+def solve_munkres(costs):
+    """Solves the assignment problem using the `munkres` package. This is much
+    slower than `solve_jonker_volgenant()`, and is kept mainly as a reference
+    implementation."""
+    matrix = [[munkres.DISALLOWED if c == DISALLOWED else c for c in row]
+              for row in np.asarray(costs, dtype=float).tolist()]
+    if not matrix or not matrix[0]:
+        return []
+    try:
+        return sorted(munkres.Munkres().compute(matrix))
+    except munkres.UnsolvableMatrix as e:
+        raise UnsolvableAssignmentError(str(e))
+
+
+ASSIGNMENT_SOLVERS = {
+    "jonker_volgenant": solve_jonker_volgenant,
+    "munkres"         : solve_munkres,
+}
+
+
+def get_assignment_solver(name):
+    """Returns the solver function with the given name. `name` may also be a
+    solver function itself, in which case it is returned as-is."""
+    if callable(name):
+        return name
+    try:
+        return ASSIGNMENT_SOLVERS[name]
+    except KeyError:
+        raise ValueError("Unrecognised assignment solver: {0!r}".format(name))
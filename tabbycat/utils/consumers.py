@@ -0,0 +1,9 @@
+from channels.consumer import SyncConsumer
+
+from .pagecache import render_pages
+
+
+class PageCacheWorkerConsumer(SyncConsumer):
+
+    def render_pages(self, event):
+        render_pages(event['tags'])
@@ -5,12 +5,12 @@ from typing import Optional, TYPE_CHECKING
 from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
 from django.db import connection
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
 from django.views.generic.base import ContextMixin
 
 from users.permissions import has_permission
 
+from .pagecache import CSRF_TOKEN_PLACEHOLDER, page_tag, PageCache, use_page_cache
+
 if TYPE_CHECKING:
     from users.permissions import permission_type
 
@@ -163,10 +163,49 @@ class WarnAboutLegacySendgridConfigVarsMixin(ContextMixin):
 
 
 class CacheMixin:
-    """Mixin for views that cache the page and need to update quickly."""
+    """Mixin for views that cache the page and need to update quickly.
+
+    Pages are tagged with the tournament and with `cache_tags`, which name what
+    the page shows (e.g. "draw"), for the round if the URL specifies one. They
+    are rendered again as soon as any of those change; see utils/pagecache.py."""
 
     cache_timeout = settings.PUBLIC_FAST_CACHE_TIMEOUT
+    cache_tags = []
+    page_cache = None
+
+    def get_cache_tags(self):
+        """Returns a tuple `(tags, prewarm_tags)`, where `prewarm_tags` are
+        those under which the page is remembered for pre-warming."""
+        tournament = getattr(self, 'tournament', None)
+        if tournament is None:
+            return [], []
+        round = self.round if 'round_seq' in self.kwargs else None
+        prewarm_tags = [page_tag(tournament, name, round) for name in self.cache_tags]
+        return [page_tag(tournament)] + prewarm_tags, prewarm_tags
+
+    def get_cache_variant(self):
+        """Returns a string identifying which version of the page this visitor
+        should get, for pages that depend on more than the URL."""
+        return ""
+
+    def dispatch(self, request, *args, **kwargs):
+        if not use_page_cache(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        tags, prewarm_tags = self.get_cache_tags()
+        self.page_cache = PageCache(request, tags, self.cache_timeout, prewarm_tags, self.get_cache_variant())
+        response = self.page_cache.get()
+        if response is not None:
+            return response
+
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except Exception:
+            self.page_cache.release()
+            raise
+        return self.page_cache.store(response)
 
-    @method_decorator(cache_page(cache_timeout))
-    def dispatch(self, *args, **kwargs):
-        return super().dispatch(*args, **kwargs)
+    def get_context_data(self, **kwargs):
+        if self.page_cache is not None:
+            kwargs['csrf_token'] = CSRF_TOKEN_PLACEHOLDER
+        return super().get_context_data(**kwargs)
@@ -6,3 +6,23 @@ class UniqueConstraint(models.UniqueConstraint):
         if name is None:
             name = '%(app_label).7s_%(class)s_' + "__".join(fields) + '_uniq'
         return super().__init__(*expressions, fields=fields, name=name, **kwargs)
+
+
+def bulk_create_inherited(model, instances, using):
+    """`QuerySet.bulk_create()` doesn't support multi-table inheritance, so for
+    models with one concrete parent (e.g. Speaker and Adjudicator), this inserts
+    the parent rows in bulk, then the child rows with their parent links."""
+    [(parent, link)] = model._meta.parents.items()
+    parent_objs = [parent(**{field.attname: getattr(inst, field.attname) for field in parent._meta.concrete_fields})
+                   for inst in instances]
+    parent._base_manager.using(using).bulk_create(parent_objs)
+
+    for inst, parent_obj in zip(instances, parent_objs):
+        setattr(inst, parent._meta.pk.attname, parent_obj.pk)
+        setattr(inst, link.attname, parent_obj.pk)
+
+    # This is what Model.save() uses to insert the child row
+    model._base_manager._insert(instances, fields=model._meta.local_concrete_fields, using=using)
+    for inst in instances:
+        inst._state.adding = False
+        inst._state.db = using
@@ -0,0 +1,278 @@
+"""Cache of public pages, with tag-based invalidation and pre-warming
+
+Public pages (views using `utils.mixins.CacheMixin`) are cached for visitors who
+aren't signed in. Each page has a list of tags, strings made by `page_tag()`
+that name what the page shows, e.g. "demo:draw" for the current draw of the
+tournament "demo", or "demo:draw:3" for the draw of its round 3. Every page also
+has the tournament's own tag, "demo". Each tag has a version in the cache, and
+a page's cache key includes the versions of all of its tags, so increasing the
+version of a tag (see `invalidate_pages()`) makes every page with that tag miss.
+Pages still expire after the view's `cache_timeout`.
+
+When a page misses, only one process renders it. Others serve the previous copy
+of the page while that happens, or if there isn't one, wait for it to be
+rendered. Pages are rendered again in the background ("pre-warmed") by the
+"pagecache" worker when their tags are invalidated, so that most visitors don't
+wait at all. Only pages that someone has asked for are pre-warmed.
+
+Pages are shared between visitors, so they're rendered with a placeholder for
+the CSRF token, which is replaced with each visitor's own token when served.
+Visitors who have messages waiting are given an uncached page.
+"""
+import hashlib
+import logging
+import sys
+from io import BytesIO
+from time import monotonic, sleep, time_ns
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import transaction
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.utils.cache import patch_vary_headers
+from django.utils.translation import get_language
+
+logger = logging.getLogger(__name__)
+
+TAG_VERSION_KEY = "pagecache_tag_{tag}"
+PAGE_KEY = "pagecache_page_{key}"
+STALE_PAGE_KEY = "pagecache_stale_{key}"
+LOCK_KEY = "pagecache_lock_{key}"
+PAGES_FOR_TAG_KEY = "pagecache_pages_{tag}"
+PREWARM_PENDING_KEY = "pagecache_prewarm_{tag}"
+
+CSRF_TOKEN_PLACEHOLDER = "pagecache-csrf-token-placeholder"
+
+LOCK_TIMEOUT = 30           # seconds a render may hold the lock for
+WAIT_TIMEOUT = 10           # seconds to wait for another process's render
+WAIT_INTERVAL = 0.1         # seconds between checks while waiting
+MAX_PAGES_PER_TAG = 200     # pages remembered for pre-warming, per tag
+PREWARM_PENDING_TIMEOUT = 120
+
+
+def page_tag(tournament, name=None, round=None):
+    """Returns the tag for pages about the given tournament and, optionally,
+    of the given kind (e.g. "draw") and round."""
+    parts = [tournament.slug]
+    if name is not None:
+        parts.append(name)
+        if round is not None:
+            parts.append(str(round.seq))
+    return ":".join(parts)
+
+
+def round_page_tags(round, names):
+    """Returns the tags for pages of the given kinds about `round`, including
+    tournament-wide pages of those kinds (e.g. the draw for current rounds)."""
+    tags = []
+    for name in names:
+        tags.append(page_tag(round.tournament, name, round))
+        tags.append(page_tag(round.tournament, name))
+    return tags
+
+
+def _initial_version():
+    # Versions start from the current time, so that they still increase if the
+    # key is evicted from the cache.
+    return time_ns() // 1000
+
+
+def get_tag_versions(tags):
+    keys = [TAG_VERSION_KEY.format(tag=tag) for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _initial_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump_tags(tags):
+    for tag in tags:
+        key = TAG_VERSION_KEY.format(tag=tag)
+        try:
+            cache.incr(key)
+        except ValueError:  # not in the cache
+            if not cache.add(key, _initial_version(), None):
+                cache.incr(key)
+
+
+def invalidate_pages(*tags):
+    """Marks all cached pages with any of `tags` as stale. Versions are bumped
+    straight away, so that this process sees the change, and again once the
+    current transaction commits, so that pages rendered from the old data by
+    other processes in the meantime aren't kept. The pages are then pre-warmed."""
+    _bump_tags(tags)
+
+    def bump_and_prewarm():
+        _bump_tags(tags)
+        prewarm_pages(tags)
+        logger.debug("Invalidated pages tagged %s", ", ".join(tags))
+
+    transaction.on_commit(bump_and_prewarm)
+
+
+def prewarming_enabled():
+    if settings.PUBLIC_PAGE_PREWARMING is not None:
+        return settings.PUBLIC_PAGE_PREWARMING
+    return settings.CHANNEL_LAYERS['default']['BACKEND'] != 'channels.layers.InMemoryChannelLayer'
+
+
+def prewarm_pages(tags):
+    """Asks the "pagecache" worker to render the pages remembered for `tags`,
+    unless it's already been asked to and hasn't started yet."""
+    if not prewarming_enabled():
+        return
+    tags = [tag for tag in tags if cache.add(PREWARM_PENDING_KEY.format(tag=tag), True, PREWARM_PENDING_TIMEOUT)]
+    if tags:
+        async_to_sync(get_channel_layer().send)("pagecache", {
+            'type': 'render_pages',
+            'tags': tags,
+        })
+
+
+def _remember_page(tags, request):
+    page = (request.path_info, request.META.get('QUERY_STRING', ''), get_language())
+    location = (request.get_host(), request.is_secure())
+    for tag in tags:
+        key = PAGES_FOR_TAG_KEY.format(tag=tag)
+        pages = cache.get(key, {})
+        if pages.get(page) == location or (page not in pages and len(pages) >= MAX_PAGES_PER_TAG):
+            continue
+        pages[page] = location
+        cache.set(key, pages, None)
+
+
+def _wsgi_str(string):
+    # WSGI strings are bytes decoded as ISO-8859-1
+    return string.encode('utf-8').decode('iso-8859-1')
+
+
+def render_pages(tags):
+    """Renders the pages remembered for `tags` (if they aren't already cached),
+    by passing requests for them through Django as an anonymous visitor."""
+    for tag in tags:
+        cache.delete(PREWARM_PENDING_KEY.format(tag=tag))
+    pages = {}
+    for tag in tags:
+        pages.update(cache.get(PAGES_FOR_TAG_KEY.format(tag=tag), {}))
+
+    handler = WSGIHandler()
+    for (path_info, query_string, language), (host, secure) in pages.items():
+        scheme = 'https' if secure else 'http'
+        host_name, _, port = host.partition(':')
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'SCRIPT_NAME': '',
+            'PATH_INFO': _wsgi_str(path_info),
+            'QUERY_STRING': query_string,
+            'SERVER_NAME': host_name,
+            'SERVER_PORT': port or ('443' if secure else '80'),
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': host,
+            'HTTP_ACCEPT_LANGUAGE': language,
+            'HTTP_X_FORWARDED_PROTO': scheme,
+            'wsgi.url_scheme': scheme,
+            'wsgi.input': BytesIO(),
+            'wsgi.errors': sys.stderr,
+        }
+        response = handler(environ, lambda status, headers, exc_info=None: None)
+        response.close()
+        if response.status_code != 200:
+            logger.warning("Pre-warming %s gave status code %d", path_info, response.status_code)
+    logger.info("Pre-warmed %d pages tagged %s", len(pages), ", ".join(tags))
+
+
+def use_page_cache(request):
+    """Returns whether the page for this request can come from (and go into)
+    the cache."""
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    return len(get_messages(request)) == 0
+
+
+class PageCache:
+    """Looks up and stores the page for one request. `get()` returns the cached
+    page, or None if it should be rendered; if so, pass the response to
+    `store()` (or call `release()` if rendering fails). Pages are remembered
+    for pre-warming under `prewarm_tags`, which should be a subset of `tags`.
+    If the page can differ between visitors, `variant` should say how."""
+
+    def __init__(self, request, tags, timeout, prewarm_tags=(), variant=""):
+        self.request = request
+        self.tags = tags
+        self.prewarm_tags = prewarm_tags
+        self.timeout = timeout
+        page = "%s|%s|%s|%s" % (request.get_host(), request.get_full_path(), get_language(), variant)
+        versions = ".".join(str(version) for version in get_tag_versions(tags))
+        self.page_key = hashlib.md5(page.encode('utf-8')).hexdigest()
+        self.key = hashlib.md5((page + "|" + versions).encode('utf-8')).hexdigest()
+        self.locked = False
+
+    def get(self):
+        cached = cache.get(PAGE_KEY.format(key=self.key))
+        if cached is not None:
+            return self.respond(cached)
+
+        self.locked = cache.add(LOCK_KEY.format(key=self.key), True, LOCK_TIMEOUT)
+        if self.locked:
+            return None
+
+        # Someone else is rendering the page
+        stale = cache.get(STALE_PAGE_KEY.format(key=self.page_key))
+        if stale is not None:
+            return self.respond(stale)
+
+        deadline = monotonic() + WAIT_TIMEOUT
+        while monotonic() < deadline:
+            sleep(WAIT_INTERVAL)
+            cached = cache.get(PAGE_KEY.format(key=self.key))
+            if cached is not None:
+                return self.respond(cached)
+            if cache.get(LOCK_KEY.format(key=self.key)) is None:
+                break  # the other render didn't store anything
+        logger.warning("Gave up waiting for %s to be rendered", self.request.path)
+        return None
+
+    def store(self, response):
+        if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+            response.add_post_render_callback(self._store)
+        else:
+            self._store(response)
+        return response
+
+    def _store(self, response):
+        try:
+            if response.status_code == 200 and not response.streaming and not response.cookies \
+                    and "private" not in response.get('Cache-Control', ()):
+                cached = (response.content, response['Content-Type'])
+                cache.set(PAGE_KEY.format(key=self.key), cached, self.timeout)
+                cache.set(STALE_PAGE_KEY.format(key=self.page_key), cached, self.timeout * 2)
+                _remember_page(self.prewarm_tags, self.request)
+            if not response.streaming:
+                response.content = self.insert_csrf_token(response.content)
+                patch_vary_headers(response, ('Cookie',))
+        finally:
+            self.release()
+
+    def release(self):
+        if self.locked:
+            cache.delete(LOCK_KEY.format(key=self.key))
+            self.locked = False
+
+    def respond(self, cached):
+        content, content_type = cached
+        response = HttpResponse(self.insert_csrf_token(content), content_type=content_type)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def insert_csrf_token(self, content):
+        placeholder = CSRF_TOKEN_PLACEHOLDER.encode('ascii')
+        if placeholder not in content:
+            return content
+        return content.replace(placeholder, get_token(self.request).encode('ascii'))
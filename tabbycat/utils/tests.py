@@ -13,6 +13,7 @@ from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 
 from draw.models import DebateTeam
 from participants.models import Adjudicator, Institution, Speaker, Team
+from tournaments.caching import tournament_cache
 from tournaments.models import Tournament
 from utils.misc import add_query_string_parameter, reverse_tournament
 from venues.models import Venue
@@ -43,7 +44,19 @@ def suppress_logs(name, level, returnto=logging.NOTSET):
     suppressed_logger.setLevel(returnto)
 
 
-class CompletedTournamentTestMixin:
+class ClearTournamentCacheMixin:
+    """Mixin that clears this process's cache of tournament objects (see
+    tournaments/caching.py) around each test. `cache.clear()` doesn't, and
+    entries left over from earlier tests are only checked again after
+    TOURNAMENT_CACHE_MAX_AGE, which makes query counts depend on timing."""
+
+    def setUp(self):
+        super().setUp()
+        tournament_cache.clear()
+        self.addCleanup(tournament_cache.clear)
+
+
+class CompletedTournamentTestMixin(ClearTournamentCacheMixin):
     """Mixin providing a few convenience functions for tests:
       - Loads a completed demonstration tournament
       - Assumes URLs are from said tournament and, optionally, a particular round
@@ -71,6 +84,7 @@ class CompletedTournamentTestMixin:
 
     def get_response(self, view_name, use_post=False, **kwargs):
         cache.clear()
+        tournament_cache.clear()
         url = self.reverse_url(view_name, **kwargs)
         return self.client.get(url)
 
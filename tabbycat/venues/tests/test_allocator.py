@@ -0,0 +1,87 @@
+from django.test import TestCase
+
+from adjallocation.models import DebateAdjudicator
+from availability.utils import activate_all
+from participants.models import Adjudicator
+from utils.tests import CompletedTournamentTestMixin
+
+from ..allocator import allocate_venues
+from ..models import VenueCategory, VenueConstraint
+
+
+class TestVenueAllocator(CompletedTournamentTestMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.round = self.tournament.round_set.get(seq=4)
+        activate_all(self.round)
+        self.debates = list(self.round.debate_set.all())
+        self.venues = list(self.round.active_venues.order_by('-priority'))
+
+    def add_constraint(self, debate, venues, priority):
+        category = VenueCategory.objects.create(tournament=self.tournament, name="Category %d" % priority)
+        category.venues.set(venues)
+        return VenueConstraint.objects.create(category=category, subject=debate.teams[0], priority=priority)
+
+    def get_venues(self):
+        return {debate: debate.venue for debate in self.round.debate_set.all()}
+
+    def test_unconstrained(self):
+        allocate_venues(self.round)
+        venues = list(self.get_venues().values())
+        self.assertEqual(len(set(venues)), len(self.debates))
+        if len(self.venues) >= len(self.debates):
+            self.assertCountEqual(venues, self.venues[:len(self.debates)])
+
+    def test_contended_constraints(self):
+        # A greedy allocation would give the high-priority debate either venue
+        # half the time, leaving the low-priority debate unsatisfied.
+        high, low = self.debates[:2]
+        self.add_constraint(high, self.venues[:2], 10)
+        self.add_constraint(low, self.venues[:1], 5)
+        for i in range(5):
+            allocate_venues(self.round)
+            venues = self.get_venues()
+            self.assertEqual(venues[low], self.venues[0])
+            self.assertEqual(venues[high], self.venues[1])
+
+    def test_priority_outweighs_many_lower_priorities(self):
+        high, low = self.debates[:2]
+        last_venue = self.venues[len(self.debates) - 1]
+        self.add_constraint(high, [last_venue], 6)
+        category = VenueCategory.objects.create(tournament=self.tournament, name="Low")
+        category.venues.set([last_venue])
+        for subject in [*low.teams, low.adjudicators.chair]:
+            VenueConstraint.objects.create(category=category, subject=subject, priority=5)
+        for i in range(5):
+            allocate_venues(self.round)
+            self.assertEqual(self.get_venues()[high], last_venue)
+
+    def test_priority_takes_precedence(self):
+        high, low = self.debates[:2]
+        last_venue = self.venues[len(self.debates) - 1]
+        self.add_constraint(high, [last_venue], 10)
+        self.add_constraint(low, [last_venue], 5)
+        allocate_venues(self.round)
+        self.assertEqual(self.get_venues()[high], last_venue)
+
+    def test_many_priorities(self):
+        # Unfulfillable constraints at many priorities shouldn't drown out
+        # lower-priority constraints, venue priorities or random tie-breaking.
+        category = VenueCategory.objects.create(tournament=self.tournament, name="Empty")
+        for priority in range(1, 17):
+            for debate in self.debates:
+                adj = Adjudicator.objects.create(tournament=self.tournament, name="Trainee %d" % priority)
+                DebateAdjudicator.objects.create(debate=debate, adjudicator=adj, type=DebateAdjudicator.TYPE_TRAINEE)
+                VenueConstraint.objects.create(category=category, subject=adj, priority=priority)
+        last_venue = self.venues[len(self.debates) - 1]
+        self.add_constraint(self.debates[0], [last_venue], 0)
+
+        allocations = set()
+        for i in range(5):
+            allocate_venues(self.round)
+            venues = self.get_venues()
+            self.assertEqual(venues[self.debates[0]], last_venue)
+            self.assertCountEqual(venues.values(), self.venues[:len(self.debates)])
+            allocations.add(tuple(venues[debate] for debate in self.debates))
+        self.assertGreater(len(allocations), 1)